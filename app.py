@@ -1,7 +1,76 @@
 import streamlit as st
 import os
-from pathlib import Path
-from chef_brain import RecipeAgent
+import json
+import time
+import threading
+import uuid
+from artifact_store import ArtifactStore
+from chef_brain import get_shared_agent, warm_up
+from recipe_cache import RecipeCache
+from dish_index import DishNameIndex
+from ingredient_index import IngredientIndex
+from image_cache import ImageCache
+from image_derivatives import DerivativeWorker, best_image
+from deadline import CANCELLED, TIMEOUT
+from job_queue import DONE, FAILED, JobStore, JobWorkerPool
+from profiles import DEFAULT_PROFILE, profile_scope
+from rate_limit import shared_call_layer
+from scheduler import session_scope
+from telemetry import shared_telemetry
+
+# 단계별 이미지를 동시에 생성할 최대 개수
+STEP_IMAGE_WORKERS = 4
+
+# 이 서버 프로세스에서 동시에 처리할 생성 작업 수
+JOB_WORKERS = 2
+
+# 진행 중인 작업 상태를 다시 읽는 간격 (초)
+JOB_POLL_SECONDS = 1.0
+
+# 화면에 표시하는 이미지 폭 (px) - 이 폭에 맞는 가장 작은 파생본을 사용
+LIVE_HERO_IMAGE_WIDTH = 320
+HERO_IMAGE_WIDTH = 480
+STEP_IMAGE_COLUMN_WIDTH = 480
+
+# 단계 이미지 품질 모드 (full / progressive / preview)
+# progressive: 빠른 미리보기 모델 이미지를 먼저 보여주고 전체 품질 이미지로 교체
+IMAGE_QUALITY = os.getenv("SOUS_CHEF_IMAGE_QUALITY", "progressive")
+
+# 전체 품질 이미지 모델 부하(진행 중 요청 수 / 동시성 상한)가 이 값 이상이면 교체를 건너뛰고 미리보기 유지
+UPGRADE_MAX_LOAD = float(os.getenv("SOUS_CHEF_UPGRADE_MAX_LOAD", "1.0"))
+
+# 생성 요청 하나의 제한 시간 (초, 제출부터) - 넘기면 그때까지 끝난 결과만 보여주고 남은 단계는 "시간 초과"로 표시
+# 0이면 제한 없음
+DEADLINE_SECONDS = float(os.getenv("SOUS_CHEF_DEADLINE_SECONDS", "120")) or None
+
+# 진행 중 화면에 표시하는 단계 이미지 폭 (px)
+LIVE_STEP_IMAGE_WIDTH = 240
+
+# 이미지 저장소 용량 상한 (MB) - 넘으면 백그라운드에서 오래 쓰지 않은 이미지부터 정리
+ARTIFACT_QUOTA_MB = float(os.getenv("SOUS_CHEF_ARTIFACT_QUOTA_MB", "2048"))
+
+# 거의 같은 이미지로 보고 합칠 지각 해시 거리 (0~3, 비워 두면 내용이 똑같은 이미지만 합침)
+ARTIFACT_PHASH_DISTANCE = int(os.getenv("SOUS_CHEF_ARTIFACT_PHASH_DISTANCE") or -1)
+
+# 표기만 다른 요리(예: "김치 찌개", "kimchi jjigae")의 캐시 레시피를 재사용할 최소 유사도
+DISH_MATCH_THRESHOLD = float(os.getenv("SOUS_CHEF_DISH_MATCH_THRESHOLD", "0.8"))
+
+# 가진 재료로 찾을 때 저장된 레시피를 재사용할 최소 재료 일치율 (입력 재료 중 레시피가 쓰는 비율)
+# 이보다 잘 맞는 레시피가 없으면 재료로 새 레시피를 생성
+INGREDIENT_MIN_COVERAGE = float(os.getenv("SOUS_CHEF_INGREDIENT_MIN_COVERAGE", "0.75"))
+
+# 기본 생성 프로필 (fast / balanced / quality) - 세션마다 화면에서 바꿀 수 있음
+GENERATION_PROFILE = os.getenv("SOUS_CHEF_PROFILE", DEFAULT_PROFILE)
+
+# 화면에 표시하는 프로필 이름
+PROFILE_LABELS = {
+    "fast": "⚡ 빠르게",
+    "balanced": "⚖️ 균형",
+    "quality": "✨ 고품질",
+}
+
+# SOUS_CHEF_DEBUG=1이면 마지막 생성 요청의 타이밍 분석 패널 표시
+DEBUG_PANEL = os.getenv("SOUS_CHEF_DEBUG") == "1"
 
 # 페이지 설정
 st.set_page_config(
@@ -10,13 +79,189 @@ st.set_page_config(
     layout="wide"
 )
 
+
+@st.cache_resource
+def load_artifacts():
+    """
+    모든 세션이 함께 쓰는 이미지 아티팩트 저장소 (이미지는 경로 대신 핸들로 주고받음)
+    """
+    return ArtifactStore(quota_bytes=int(ARTIFACT_QUOTA_MB * 1024 ** 2),
+                         phash_distance=ARTIFACT_PHASH_DISTANCE if ARTIFACT_PHASH_DISTANCE >= 0 else None,
+                         telemetry=shared_telemetry())
+
+
+def image_file(value):
+    """
+    화면에 표시할 이미지 파일 경로 (아티팩트 핸들 또는 예전 작업의 파일 경로, 없거나 정리되었으면 None)
+    """
+    return load_artifacts().resolve(value)
+
+
+@st.cache_resource
+def load_recipe_cache():
+    """
+    모든 세션이 함께 쓰는 레시피 캐시 (재실행마다 SQLite 파일을 다시 열고 테이블을 확인하지 않도록)
+    """
+    return RecipeCache()
+
+
+@st.cache_resource
+def load_agent():
+    """
+    모든 세션과 재실행이 함께 쓰는 RecipeAgent (genai.Client와 HTTP 연결 풀 재사용)
+    SOUS_CHEF_WARMUP=1이면 처음 로드할 때 백그라운드에서 연결을 예열
+    """
+    # 이미지 캐시는 아티팩트 저장소에 참조만 남김 (같은 이미지를 두 번 저장하지 않고, 용량 정리도 저장소가 맡음)
+    image_cache = ImageCache(artifact_store=load_artifacts())
+    agent = get_shared_agent(recipe_cache=load_recipe_cache(), image_cache=image_cache, derivatives=DerivativeWorker(),
+                             dish_index=DishNameIndex(threshold=DISH_MATCH_THRESHOLD), artifact_store=load_artifacts(),
+                             ingredient_index=IngredientIndex(min_coverage=INGREDIENT_MIN_COVERAGE),
+                             profile=GENERATION_PROFILE)
+    if os.getenv("SOUS_CHEF_WARMUP") == "1":
+        threading.Thread(target=warm_up, args=(agent,), daemon=True).start()
+    return agent
+
+
+@st.cache_resource
+def load_job_workers():
+    """
+    모든 세션이 함께 쓰는 작업 큐와 백그라운드 작업자
+    생성 작업은 스크립트 실행과 분리되어 진행되므로 새로고침이나 연결 끊김에도 중단되지 않습니다.
+    """
+    workers = JobWorkerPool(load_agent(), JobStore(), workers=JOB_WORKERS, step_workers=STEP_IMAGE_WORKERS,
+                            image_quality=IMAGE_QUALITY, upgrade_max_load=UPGRADE_MAX_LOAD,
+                            deadline_seconds=DEADLINE_SECONDS)
+    workers.start()
+    return workers
+
+
+# 서버 시작 후 첫 페이지 로드에서 미리 에이전트 생성 및 연결 예열 (선택)
+if os.getenv("SOUS_CHEF_WARMUP") == "1":
+    load_agent()
+
 # Session State 초기화
 if 'recipe' not in st.session_state:
     st.session_state.recipe = None
 if 'step_images' not in st.session_state:
     st.session_state.step_images = []
+if 'step_statuses' not in st.session_state:
+    st.session_state.step_statuses = []
 if 'dish_name' not in st.session_state:
     st.session_state.dish_name = ""
+if 'hero_image' not in st.session_state:
+    st.session_state.hero_image = None
+if 'trace_id' not in st.session_state:
+    st.session_state.trace_id = None
+if 'job_id' not in st.session_state:
+    # 새로고침/재접속한 세션은 주소의 작업 ID로 진행 중이던 작업을 이어서 표시
+    st.session_state.job_id = st.query_params.get("job")
+if 'loaded_job_id' not in st.session_state:
+    st.session_state.loaded_job_id = None
+if 'render_seconds' not in st.session_state:
+    st.session_state.render_seconds = 0.0
+if 'session_id' not in st.session_state:
+    # API 호출 스케줄러에서 이 세션의 호출을 구분하는 ID (세션끼리 할당량을 공정하게 나눠 씀)
+    st.session_state.session_id = uuid.uuid4().hex
+
+
+def load_job_result(job: dict):
+    """
+    끝난 작업의 결과를 세션에 반영
+
+    Args:
+        job: JobStore.get 결과
+    """
+    recipe = job["recipe"]
+    st.session_state.dish_name = job["dish_name"]
+    st.session_state.trace_id = job["trace_id"]
+    st.session_state.loaded_job_id = job["id"]
+
+    if job["status"] == FAILED or recipe is None:
+        st.session_state.recipe = None
+        st.session_state.step_images = []
+        st.session_state.hero_image = None
+        st.session_state.job_message = ("error", f"❌ 오류가 발생했습니다: {job['error']}")
+        return
+
+    step_images = [job["steps"].get(i, {}).get("path") for i in range(1, len(recipe["steps"]) + 1)]
+    step_statuses = [job["steps"].get(i, {}).get("status") for i in range(1, len(recipe["steps"]) + 1)]
+    st.session_state.recipe = recipe
+    st.session_state.step_images = step_images
+    st.session_state.step_statuses = step_statuses
+    st.session_state.hero_image = job["hero_image"]
+    made = len([img for img in step_images if img])
+    if TIMEOUT in step_statuses:
+        st.session_state.job_message = (
+            "warning", f"⏱️ 제한 시간 안에 만든 사진만 표시합니다. ({made}/{len(step_images)}장)"
+        )
+    else:
+        st.session_state.job_message = ("success", f"✅ 조리 단계별 사진 생성 완료! ({made}/{len(step_images)}장)")
+
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def render_job_progress(job_id: str):
+    """
+    진행 중인 작업의 현재 상태 표시 (저장된 결과를 주기적으로 다시 읽음)
+    작업이 끝나면 결과를 세션에 반영하고 전체 화면을 다시 그림
+
+    Args:
+        job_id: 작업 ID
+    """
+    job = load_job_workers().store.get(job_id)
+    if job is None:
+        st.warning("⚠️ 작업을 찾을 수 없습니다. 다시 생성해주세요.")
+        st.session_state.job_id = None
+        st.query_params.pop("job", None)
+        return
+
+    if job["status"] in (DONE, FAILED):
+        load_job_result(job)
+        st.rerun()
+
+    render_started = time.perf_counter()
+    recipe = job["recipe"] or job["partial"]
+    steps = recipe.get("steps", [])
+    finished_steps = [i for i, step in job["steps"].items() if step["status"] != "generating"]
+
+    if job["recipe"] is None:
+        st.info(f"🤖 Gemini 2.5가 '{job['dish_name']}' 레시피를 고민 중입니다...")
+    else:
+        st.success("✅ 레시피 생성 완료!")
+
+    if steps:
+        # 단계가 순서와 다르게 끝나므로 완료된 단계 수로 진행률 계산
+        st.progress(
+            len(finished_steps) / len(steps),
+            text=f"📸 단계별 이미지 생성 중... ({len(finished_steps)}/{len(steps)})"
+        )
+
+    hero_file = image_file(job["hero_image"])
+    if hero_file:
+        st.image(best_image(hero_file, LIVE_HERO_IMAGE_WIDTH), width=LIVE_HERO_IMAGE_WIDTH)
+    if recipe.get("title"):
+        st.markdown(f"## 📌 {recipe['title']}")
+    if recipe.get("cooking_time"):
+        st.markdown(f"**⏱️ 소요 시간:** {recipe['cooking_time']}")
+    if recipe.get("ingredients"):
+        st.markdown(
+            "### 🥘 재료\n" + "\n".join(f"{i}. {item}" for i, item in enumerate(recipe["ingredients"], 1))
+        )
+    if steps:
+        st.markdown("### 👨‍🍳 조리 과정")
+        for i, step in enumerate(steps, 1):
+            step_image = job["steps"].get(i, {})
+            step_status = step_image.get("status")
+            icon = {"completed": "✅", "preview": "🖼️", "failed": "⚠️", "error": "⚠️", TIMEOUT: "⏱️",
+                    CANCELLED: "🛑", "generating": "🎨"}.get(step_status, "⏳")
+            st.markdown(f"{icon} **{i}단계** {step}")
+            # 미리보기 이미지도 도착하는 즉시 표시 (전체 품질 이미지가 오면 다음 갱신에서 교체됨)
+            step_file = image_file(step_image.get("path"))
+            if step_file:
+                st.image(best_image(step_file, LIVE_STEP_IMAGE_WIDTH), width=LIVE_STEP_IMAGE_WIDTH,
+                         caption="미리보기" if step_status == "preview" else None)
+
+    st.session_state.render_seconds += time.perf_counter() - render_started
+
 
 # 타이틀
 st.title("🍳 Sous Chef AI")
@@ -30,10 +275,18 @@ col1, col2 = st.columns([2, 1])
 with col1:
     st.write("### 🥘 어떤 요리를 만들고 싶으세요?")
 
-    # 입력 폼
+    # 입력 폼 (요리 이름 또는 가진 재료)
+    input_mode = st.radio("입력 방식", ["요리 이름", "가진 재료"], horizontal=True, key="input_mode",
+                          label_visibility="collapsed")
+    by_ingredients = input_mode == "가진 재료"
+    profile = st.selectbox(
+        "생성 모드", list(PROFILE_LABELS), index=list(PROFILE_LABELS).index(GENERATION_PROFILE),
+        format_func=PROFILE_LABELS.get, key="profile",
+        help="빠르게: 가벼운 모델과 빠른 이미지 모델 / 균형: 기본 / 고품질: 큰 모델과 최고 품질 이미지 모델 (느림)"
+    )
     dish_name = st.text_input(
-        "요리 이름을 입력하세요",
-        placeholder="예: 김치찌개, 된장찌개, 파스타, 돈까스...",
+        "가진 재료를 입력하세요" if by_ingredients else "요리 이름을 입력하세요",
+        placeholder="예: 돼지고기, 김치, 두부" if by_ingredients else "예: 김치찌개, 된장찌개, 파스타, 돈까스...",
         key="dish_input"
     )
 
@@ -46,65 +299,76 @@ with col1:
 
     st.divider()
 
-    # 버튼 클릭 시 레시피 및 이미지 생성
+    # 버튼 클릭 시 생성 작업 제출 (생성은 백그라운드 작업자가 진행)
     if generate_button and dish_name:
-        st.session_state.dish_name = dish_name
-
         try:
-            # RecipeAgent 초기화
-            agent = RecipeAgent()
-
-            # 1단계: 레시피 텍스트 생성
-            with st.spinner(f"🤖 Gemini 2.5가 '{dish_name}' 레시피를 고민 중입니다..."):
-                recipe = agent.generate_recipe(dish_name)
-                st.session_state.recipe = recipe
-
-            st.success("✅ 레시피 생성 완료!")
-
-            # 2단계: 단계별 이미지 생성 (실시간 진행 상황 표시)
-            total_steps = len(recipe['steps'])
-
-            # 진행 상황을 표시할 컨테이너 생성
-            progress_container = st.empty()
-            status_container = st.empty()
-
-            # 진행 상황 콜백 함수
-            def update_progress(current, total, status):
-                with progress_container:
-                    progress_percent = current / total
-                    st.progress(progress_percent, text=f"📸 단계 {current}/{total} 이미지 생성 중...")
-
-                with status_container:
-                    if status == "generating":
-                        st.info(f"🎨 {current}단계 이미지를 생성하고 있습니다...")
-                    elif status == "completed":
-                        st.success(f"✅ {current}단계 이미지 생성 완료!")
-                    elif status in ["failed", "error"]:
-                        st.warning(f"⚠️ {current}단계 이미지 생성 실패")
-
-            # 이미지 생성 시작
-            step_images = agent.generate_step_images(dish_name, recipe, progress_callback=update_progress)
-            st.session_state.step_images = step_images
-
-            # 최종 결과 표시
-            progress_container.empty()
-            status_container.empty()
-
-            success_count = len([img for img in step_images if img])
-            st.success(f"✅ 조리 단계별 사진 생성 완료! ({success_count}/{total_steps}장)")
+            st.session_state.ingredient_message = None
+            job_workers = load_job_workers()
+            if by_ingredients:
+                # 재료가 잘 맞는 저장된 레시피가 있으면 그 요리로 (LLM 호출 없이 캐시에서), 없으면 새로 생성
+                with profile_scope(profile), session_scope(st.session_state.session_id):
+                    dish_name, match = job_workers.agent.dish_for_ingredients(dish_name)
+                if match is not None:
+                    missing = f" / 더 필요한 재료: {', '.join(match['missing'])}" if match["missing"] else ""
+                    st.session_state.ingredient_message = (
+                        "info", f"🥕 저장된 레시피 **{dish_name}**을(를) 찾았습니다 "
+                                f"(입력 재료 중 {', '.join(match['matched'])} 사용{missing})"
+                    )
+                else:
+                    st.session_state.ingredient_message = (
+                        "info", "🥕 재료가 잘 맞는 저장된 레시피가 없어서 새 레시피를 만듭니다."
+                    )
+            st.session_state.dish_name = dish_name
+
+            # 같은 요리/설정(프로필 포함)의 작업이 이미 진행 중이면 그 작업에 합류
+            previous_job_id = st.session_state.job_id
+            with profile_scope(profile):
+                dedup_key = job_workers.agent.generation_key(dish_name)
+            job_id = job_workers.store.submit(dish_name, dedup_key=dedup_key, profile=profile,
+                                              session=st.session_state.session_id)
+            if previous_job_id and previous_job_id != job_id:
+                # 이 세션은 이전 작업 결과를 더 기다리지 않음 (다른 세션도 기다리지 않으면 취소)
+                job_workers.store.release(previous_job_id)
+            st.session_state.job_id = job_id
+            st.query_params["job"] = job_id
+            st.session_state.recipe = None
+            st.session_state.step_images = []
+            st.session_state.step_statuses = []
+            st.session_state.hero_image = None
+            st.session_state.render_seconds = 0.0
 
         except Exception as e:
             st.error(f"❌ 오류가 발생했습니다: {e}")
             st.session_state.recipe = None
             st.session_state.step_images = []
+            st.session_state.hero_image = None
 
     elif generate_button and not dish_name:
-        st.warning("⚠️ 요리 이름을 입력해주세요!")
+        st.warning("⚠️ 재료를 입력해주세요!" if by_ingredients else "⚠️ 요리 이름을 입력해주세요!")
+
+    # 재료 검색 결과 (다음 생성 요청 전까지 표시)
+    ingredient_message = st.session_state.get("ingredient_message")
+    if ingredient_message and by_ingredients:
+        getattr(st, ingredient_message[0])(ingredient_message[1])
+
+    # 아직 결과를 불러오지 않은 작업이 있으면 진행 상황 표시
+    if st.session_state.job_id and st.session_state.job_id != st.session_state.loaded_job_id:
+        try:
+            render_job_progress(st.session_state.job_id)
+        except ValueError as e:
+            # API Key가 없으면 작업자를 만들 수 없음
+            st.error(f"❌ 오류가 발생했습니다: {e}")
+            st.session_state.job_id = None
+
+    # 작업 완료 직후 한 번만 결과 메시지 표시
+    job_message = st.session_state.pop("job_message", None)
+    if job_message:
+        getattr(st, job_message[0])(job_message[1])
 
 with col2:
     st.write("### ℹ️ 사용 방법")
     st.info("""
-    1. 왼쪽에 요리 이름 입력
+    1. 왼쪽에 요리 이름 또는 가진 재료 입력
     2. 버튼을 클릭하여 생성
     3. AI가 레시피와 사진을 만들어드립니다!
 
@@ -120,6 +384,11 @@ st.divider()
 if st.session_state.recipe:
     recipe = st.session_state.recipe
 
+    # 대표 이미지
+    hero_file = image_file(st.session_state.hero_image)
+    if hero_file:
+        st.image(best_image(hero_file, HERO_IMAGE_WIDTH), width=HERO_IMAGE_WIDTH)
+
     # 레시피 제목
     st.markdown(f"## 📌 {recipe['title']}")
     st.markdown(f"**⏱️ 소요 시간:** {recipe['cooking_time']}")
@@ -155,18 +424,86 @@ if st.session_state.recipe:
             with step_col2:
                 # 단계별 이미지 표시
                 if st.session_state.step_images and i <= len(st.session_state.step_images):
-                    image_path = st.session_state.step_images[i - 1]
-                    if image_path and Path(image_path).exists():
+                    image_path = image_file(st.session_state.step_images[i - 1])
+                    if image_path:
+                        # 컬럼 폭에 맞는 작은 파생본을 표시하고, 원본은 요청할 때만 전송
                         st.image(
-                            image_path,
+                            best_image(image_path, STEP_IMAGE_COLUMN_WIDTH),
                             caption=f"{i}단계",
                             use_container_width=True
                         )
+                        if st.checkbox("🔍 원본 크기로 보기", key=f"full_image_{i}"):
+                            st.image(image_path, use_container_width=True)
+                    elif i <= len(st.session_state.step_statuses) and st.session_state.step_statuses[i - 1] == TIMEOUT:
+                        st.info(f"⏱️ 제한 시간 안에 {i}단계 이미지를 만들지 못했습니다.")
                     else:
                         st.info(f"{i}단계 이미지를 생성하지 못했습니다.")
                 else:
                     st.info("이미지 생성 중...")
 
+
+def render_trace_panel(trace: dict, render_seconds: float):
+    """
+    생성 요청 하나의 타이밍 분석 (LLM / Imagen / 디스크 저장 / 화면 갱신 시간과 스팬 목록)
+
+    Args:
+        trace: Telemetry.export_trace 결과
+        render_seconds: 이 세션에서 진행 상황을 그리는 데 쓴 시간 (초)
+    """
+    spans = trace["spans"]
+    root = next((span for span in spans if span["parent_id"] is None), spans[0])
+
+    def total(predicate):
+        return sum(span["duration_seconds"] or 0 for span in spans if predicate(span["name"]))
+
+    # 이미지는 병렬로 생성되므로 합계가 전체 시간보다 클 수 있음
+    breakdown_cols = st.columns(5)
+    breakdown_cols[0].metric("전체", f"{root['duration_seconds'] or 0:.2f}초")
+    breakdown_cols[1].metric("LLM (합계)", f"{total(lambda name: name.startswith('api.generate_content')):.2f}초")
+    breakdown_cols[2].metric("Imagen (합계)", f"{total(lambda name: name == 'api.generate_images'):.2f}초")
+    breakdown_cols[3].metric("디스크 저장 (합계)", f"{total(lambda name: name == 'image.save'):.3f}초")
+    breakdown_cols[4].metric("화면 갱신", f"{render_seconds:.2f}초")
+
+    # 스팬 목록 (들여쓰기로 부모-자식 관계 표시)
+    depths = {}
+    rows = []
+    for span in spans:
+        depth = depths[span["span_id"]] = depths.get(span["parent_id"], -1) + 1
+        attributes = span["attributes"]
+        rows.append({
+            "스팬": "　" * depth + span["name"],
+            "시작 (ms)": round((span["start_time"] - root["start_time"]) * 1000),
+            "소요 (ms)": round((span["duration_seconds"] or 0) * 1000),
+            "결과": span["status"],
+            "입력 토큰": attributes.get("prompt_tokens"),
+            "출력 토큰": attributes.get("output_tokens"),
+            "응답 크기 (B)": attributes.get("response_bytes", attributes.get("bytes")),
+            "재시도": attributes.get("retries"),
+        })
+    st.dataframe(rows, use_container_width=True, hide_index=True)
+
+    download_col1, download_col2 = st.columns(2)
+    download_col1.download_button(
+        "📥 트레이스 JSON",
+        data=json.dumps(trace, ensure_ascii=False, indent=2, default=str),
+        file_name=f"trace_{trace['trace_id']}.json",
+        mime="application/json",
+    )
+    download_col2.download_button(
+        "📥 Prometheus 지표",
+        data=shared_telemetry().prometheus_text(),
+        file_name="sous_chef_metrics.prom",
+        mime="text/plain",
+    )
+
+
+# 타이밍 분석 패널 (디버그)
+if DEBUG_PANEL and st.session_state.trace_id:
+    current_trace = shared_telemetry().export_trace(st.session_state.trace_id)
+    if current_trace:
+        with st.expander("⏱️ 타이밍 분석 (마지막 생성 요청)"):
+            render_trace_panel(current_trace, st.session_state.render_seconds)
+
 # 사이드바 - 블로그 포스팅용 텍스트
 if st.session_state.recipe:
     with st.sidebar:
@@ -213,10 +550,102 @@ with st.expander("🔧 개발 정보"):
     st.write("""
     **Sous Chef AI**는 Google의 최신 AI 기술을 활용한 레시피 생성 서비스입니다.
 
-    - **LLM**: Gemini 2.5 Flash (텍스트 생성)
-    - **Image**: Imagen 4.0 (이미지 생성)
+    - **LLM**: Gemini 2.5 Flash-Lite / Flash / Pro (텍스트 생성, 생성 모드에 따라)
+    - **Image**: Imagen 4.0 Fast / 표준 / Ultra (이미지 생성, 생성 모드에 따라)
     - **Framework**: Streamlit (웹 UI)
     - **GitHub**: [sous-chef-ai](https://github.com/yourusername/sous-chef-ai)
 
     Made with ❤️ by Sous Chef AI Team
     """)
+
+    # 레시피 캐시 통계 (절약한 LLM 호출 수)
+    cache_stats = load_recipe_cache().stats()
+    st.write(
+        f"**레시피 캐시**: 적중 {cache_stats['hits']}회 / 미스 {cache_stats['misses']}회 "
+        f"(적중률 {cache_stats['hit_rate']:.0%}, 저장된 레시피 {cache_stats['entries']}개)"
+    )
+
+    # HTTP 연결 재사용 통계 (이 서버 프로세스 기준)
+    try:
+        shared_agent = load_agent()
+    except ValueError:
+        # API Key가 없으면 에이전트를 만들 수 없음
+        shared_agent = None
+
+    if shared_agent is not None:
+        # 레시피 응답 처리 통계 (복구로 아낀 전체 재생성 수)
+        response_stats = shared_agent.response_stats()
+        st.write(
+            f"**레시피 응답**: 정상 {response_stats['parsed']}회 / 로컬 복구 {response_stats['repaired_locally']}회 "
+            f"/ 뒷부분 재요청 {response_stats['repaired_tail']}회 / 전체 재생성 {response_stats['regenerated']}회"
+        )
+
+    connection_metrics = shared_agent.connection_metrics if shared_agent is not None else None
+    if connection_metrics is not None:
+        connection_stats = connection_metrics.stats()
+        st.write(
+            f"**HTTP 연결**: 요청 {connection_stats['requests']}회 / 새 연결 {connection_stats['new_connections']}회 "
+            f"(재사용률 {connection_stats['reuse_rate']:.0%}, TLS 핸드셰이크 {connection_stats['tls_handshakes']}회)"
+        )
+
+    # 작업 큐 상태 (모든 서버 프로세스 합계)
+    if shared_agent is not None:
+        job_stats = load_job_workers().store.stats()
+        st.write(
+            f"**작업 큐**: 대기 {job_stats['queued']}개 / 진행 {job_stats['running']}개 "
+            f"/ 완료 {job_stats['done']}개 / 실패 {job_stats['failed']}개"
+        )
+
+        # 진행 중인 같은 요청 합치기 (작업 큐 합류는 전체 프로세스, 호출 합치기는 이 프로세스 기준)
+        followers = {kind: stats["followers"] for kind, stats in shared_agent.coalesce_stats().items()}
+        recipe_followers = followers.get("recipe", 0) + followers.get("recipe_stream", 0)
+        st.write(
+            f"**요청 합치기**: 작업 합류 {job_stats['coalesced']}회 / 레시피 호출 {recipe_followers}회 "
+            f"/ 이미지 호출 {followers.get('image', 0)}회"
+        )
+
+        # 단계 이미지가 처음 보이기까지 걸린 시간 (이 프로세스 기준)
+        metrics = shared_agent.telemetry.metrics
+        preview_mean, preview_count = metrics.mean("time_to_first_image_seconds", tier="preview")
+        full_mean, full_count = metrics.mean("time_to_first_image_seconds", tier="full")
+        st.write(
+            f"**첫 이미지까지**: 미리보기 평균 {preview_mean:.1f}초 ({preview_count}장) "
+            f"/ 전체 품질 평균 {full_mean:.1f}초 ({full_count}장) "
+            f"/ 교체 {metrics.total('image_upgrades_total', outcome='ok'):g}회 "
+            f"(부하로 건너뜀 {metrics.total('image_upgrades_total', outcome='skipped'):g}회)"
+        )
+
+        # 재료로 찾기 (이 프로세스 기준)
+        st.write(
+            f"**재료 검색**: 저장된 레시피 사용 {metrics.total('ingredient_search_total', outcome='hit'):g}회 "
+            f"/ 새로 생성 {metrics.total('ingredient_search_total', outcome='fallback'):g}회 "
+            f"(색인된 레시피 {len(shared_agent.ingredient_index) if shared_agent.ingredient_index is not None else 0}개)"
+        )
+
+        # 이미지 아티팩트 저장소 (디스크 사용량은 전체 프로세스, 합치기/정리 횟수는 이 프로세스 기준)
+        artifact_stats = load_artifacts().stats()
+        st.write(
+            f"**이미지 저장소**: {artifact_stats['artifacts']}장 / {artifact_stats['bytes'] / 1024 ** 2:.1f}MB "
+            f"(상한 {artifact_stats['quota_bytes'] / 1024 ** 2:.0f}MB, 레시피 {artifact_stats['owners']}개) "
+            f"/ 중복 합침 {metrics.total('artifact_dedup_total'):g}회 "
+            f"(거의 같은 이미지 {metrics.total('artifact_dedup_total', kind='perceptual'):g}회) "
+            f"/ 정리 {metrics.total('artifact_evictions_total'):g}장"
+        )
+
+    # API 호출 계층 통계 (이 서버 프로세스 기준)
+    call_stats = shared_call_layer().stats()
+    st.write(
+        f"**API 호출**: {call_stats['calls']}회 (재시도 {call_stats['retries']}회, "
+        f"할당량 초과 {call_stats['throttles']}회, 대기 {call_stats['limiter_wait_seconds'] + call_stats['backoff_wait_seconds']:.1f}초)"
+    )
+
+    # 세션 간 호출 스케줄러 (모든 세션이 함께 쓰는 대기열)
+    scheduler_stats = call_stats["scheduler"]
+    session_stats = scheduler_stats["sessions"].get(st.session_state.session_id, {})
+    queued = ", ".join(f"{name} {count}" for name, count in scheduler_stats["queued"].items())
+    st.write(
+        f"**호출 스케줄러**: 진행 중 {scheduler_stats['in_flight']}/{scheduler_stats['max_concurrency']} "
+        f"/ 대기 ({queued}) / 세션 {len(scheduler_stats['sessions'])}개 "
+        f"/ 이 세션 대기 평균 {session_stats.get('mean_wait_seconds', 0.0):.2f}초 "
+        f"(최대 {session_stats.get('max_wait_seconds', 0.0):.2f}초)"
+    )
@@ -0,0 +1,454 @@
+"""
+이미지 아티팩트 저장소 (콘텐츠 주소)
+생성한 이미지를 내용 해시(SHA-256)를 이름으로 저장하고, 화면에는 파일 경로 대신 핸들("artifact:<해시>")을 넘깁니다.
+- 같은 내용은 한 번만 저장되고 파일 이름이 내용으로 정해지므로, 여러 세션이 같은 요리를 만들어도 서로의 파일을 덮어쓰지 않음
+- 레시피/작업(owner)마다 이미지 이름(예: "step_1")별로 참조를 기록 - 참조가 없는 이미지는 제거 대상
+  (owner는 owner_scope로 지정 - 같은 요리라도 레시피/작업마다 참조를 따로 둠)
+- 디스크 용량(quota)을 넘으면 백그라운드에서 오래 쓰지 않은 것부터 제거
+  (참조 없는 이미지 먼저, 그래도 넘으면 가장 오래 쓰지 않은 레시피의 참조를 통째로 해제)
+- 선택: 지각 해시(pHash)가 거의 같은 이미지는 먼저 저장된 이미지로 합침
+"""
+
+import contextvars
+import hashlib
+import io
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+# 핸들 접두사 (이 접두사가 없는 값은 예전 방식의 파일 경로로 취급)
+HANDLE_PREFIX = "artifact:"
+
+# 지각 해시 계산용 축소 크기와 사용할 저주파 계수 크기 (8×8 = 64비트)
+PHASH_IMAGE_SIZE = 32
+PHASH_LOW_SIZE = 8
+# 지각 해시 검색용 구역 수 (64비트를 16비트씩 4구역 - 거리 3 이하는 적어도 한 구역이 일치)
+PHASH_BANDS = 4
+# 거의 단색인 이미지는 해시가 모두 같아지므로 합치지 않음 (저주파 계수 표준편차 하한)
+PHASH_MIN_DETAIL = 1.0
+# 마지막 사용 시각 갱신 간격 (초) - 표시할 때마다 쓰기 잠금을 잡지 않도록
+TOUCH_INTERVAL = 60
+
+# 현재 컨텍스트에서 저장하는 이미지의 참조 주인 (레시피/작업 ID)
+_current_owner = contextvars.ContextVar("artifact_owner", default=None)
+
+
+def current_owner() -> str:
+    """
+    현재 컨텍스트의 참조 주인 (owner_scope 밖이면 None)
+    """
+    return _current_owner.get()
+
+
+@contextmanager
+def owner_scope(owner: str = None):
+    """
+    블록 안에서 저장하는 이미지의 참조 주인 지정
+    (블록 안에서 run_in_context로 넘긴 작업자 스레드도 같은 주인을 따름)
+
+    Args:
+        owner: 레시피/작업 ID (None이면 이미 지정된 주인을 그대로 쓰고, 없으면 새 ID)
+
+    Yields:
+        str: 적용된 주인
+    """
+    token = _current_owner.set(owner or _current_owner.get() or uuid.uuid4().hex)
+    try:
+        yield _current_owner.get()
+    finally:
+        _current_owner.reset(token)
+
+
+def is_handle(value) -> bool:
+    """
+    아티팩트 핸들인지 확인
+
+    Args:
+        value: 확인할 값
+
+    Returns:
+        bool: "artifact:"로 시작하는 문자열이면 True
+    """
+    return isinstance(value, str) and value.startswith(HANDLE_PREFIX)
+
+
+def _dct_matrix(size: int) -> np.ndarray:
+    # DCT-II 변환 행렬 (정규직교)
+    k = np.arange(size)[:, None]
+    x = np.arange(size)[None, :]
+    matrix = np.cos(np.pi * (2 * x + 1) * k / (2 * size)) * np.sqrt(2 / size)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+_DCT = _dct_matrix(PHASH_IMAGE_SIZE)
+
+
+def perceptual_hash(image_data: bytes):
+    """
+    64비트 지각 해시 (pHash: 흑백 32×32 축소 → DCT → 저주파 8×8 계수가 중앙값보다 큰지)
+
+    Args:
+        image_data: 이미지 데이터
+
+    Returns:
+        int | None: 해시 값, 읽을 수 없거나 거의 단색인 이미지면 None
+    """
+    try:
+        image = Image.open(io.BytesIO(image_data)).convert("L")
+    except Exception:
+        return None
+    pixels = np.asarray(image.resize((PHASH_IMAGE_SIZE, PHASH_IMAGE_SIZE), Image.LANCZOS), dtype=np.float64)
+    low = (_DCT @ pixels @ _DCT.T)[:PHASH_LOW_SIZE, :PHASH_LOW_SIZE].flatten()
+    if low[1:].std() < PHASH_MIN_DETAIL:
+        return None
+    bits = low > np.median(low[1:])
+    return int("".join("1" if bit else "0" for bit in bits), 2)
+
+
+def _bands(phash: int) -> list:
+    # 64비트 해시를 16비트 구역 4개로 나눔
+    width = 64 // PHASH_BANDS
+    mask = (1 << width) - 1
+    return [(phash >> (width * n)) & mask for n in range(PHASH_BANDS)]
+
+
+class ArtifactStore:
+    """
+    콘텐츠 주소 이미지 저장소
+    - 파일: {root}/{해시 앞 2자리}/{해시}.png (임시 파일에 쓴 뒤 os.replace로 교체 - 읽는 쪽은 완성된 파일만 봄)
+    - 색인: {root}/index.db (SQLite WAL - 여러 Streamlit 워커 프로세스가 같은 저장소를 공유해도 안전)
+    - 파생본(썸네일 등)은 원본 옆에 "{해시}.*" 이름으로 만들어지고 원본과 함께 제거됨
+    """
+
+    def __init__(self, root: str = "cache/artifacts", quota_bytes: int = 2 * 1024 ** 3, phash_distance: int = None,
+                 grace_seconds: int = 3600, evict_interval: float = 300, telemetry=None):
+        """
+        ArtifactStore 초기화
+
+        Args:
+            root: 저장 폴더
+            quota_bytes: 원본 이미지 전체 크기 상한 (바이트, 0 이하면 제한 없음)
+            phash_distance: 같은 이미지로 합칠 최대 지각 해시 거리 (0~3, None이면 합치지 않음)
+            grace_seconds: 최근 이 시간 안에 사용한 이미지는 용량을 넘어도 제거하지 않음 (초)
+            evict_interval: 백그라운드 정리 주기 (초, 0 이하면 백그라운드 정리 없음 - evict() 직접 호출)
+            telemetry: 스팬/지표 기록기 (Telemetry, optional)
+        """
+        if phash_distance is not None and not 0 <= phash_distance < PHASH_BANDS:
+            raise ValueError(f"phash_distance는 0~{PHASH_BANDS - 1} 사이여야 합니다: {phash_distance}")
+
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.root / "index.db"
+        self.quota_bytes = quota_bytes
+        self.phash_distance = phash_distance
+        self.grace_seconds = grace_seconds
+        self.telemetry = telemetry
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS artifacts (
+                    digest TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    phash TEXT,
+                    band0 INTEGER,
+                    band1 INTEGER,
+                    band2 INTEGER,
+                    band3 INTEGER,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS artifact_refs (
+                    owner TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    digest TEXT NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (owner, name)
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_artifacts_last_access ON artifacts (last_access)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_artifact_refs_digest ON artifact_refs (digest)")
+            for n in range(PHASH_BANDS):
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_artifacts_band{n} ON artifacts (band{n})")
+
+        # 백그라운드 정리 스레드 (용량을 넘는 저장이 있으면 주기를 기다리지 않고 깨움)
+        self._wake = threading.Event()
+        if evict_interval > 0:
+            threading.Thread(target=self._evict_loop, args=(evict_interval,), daemon=True,
+                             name="artifact-evictor").start()
+
+    @contextmanager
+    def _connect(self):
+        # 스레드/프로세스마다 새 연결을 사용 (잠금은 SQLite가 처리)
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _file_path(self, digest: str) -> Path:
+        return self.root / digest[:2] / f"{digest}.png"
+
+    def put(self, image_data: bytes, owner: str = None, name: str = None) -> str:
+        """
+        이미지 저장 (같은 내용이 이미 있으면 그 이미지를 재사용)
+
+        Args:
+            image_data: 이미지 데이터 (PNG)
+            owner: 참조하는 레시피/작업 ID (None이면 참조 없이 저장 - 다음 정리 때 제거될 수 있음)
+            name: 레시피 안에서의 이미지 이름 (예: "image", "step_1") - 같은 이름의 이전 이미지는 참조가 해제됨
+
+        Returns:
+            str: 아티팩트 핸들 ("artifact:<해시>")
+        """
+        digest = hashlib.sha256(image_data).hexdigest()
+        phash = perceptual_hash(image_data) if self.phash_distance is not None else None
+        now = time.time()
+
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            exists = conn.execute("SELECT 1 FROM artifacts WHERE digest = ?", (digest,)).fetchone() is not None
+            dedup = "exact" if exists else None
+            if not exists and phash is not None:
+                similar = self._find_similar(conn, phash)
+                if similar is not None:
+                    digest, dedup = similar, "perceptual"
+            if dedup is None:
+                bands = _bands(phash) if phash is not None else [None] * PHASH_BANDS
+                conn.execute(
+                    "INSERT INTO artifacts (digest, size, phash, band0, band1, band2, band3, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (digest, len(image_data), None if phash is None else f"{phash:016x}", *bands, now, now),
+                )
+            else:
+                conn.execute("UPDATE artifacts SET last_access = ? WHERE digest = ?", (now, digest))
+            if owner is not None:
+                conn.execute(
+                    "INSERT INTO artifact_refs (owner, name, digest, updated_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(owner, name) DO UPDATE SET digest = excluded.digest, updated_at = excluded.updated_at",
+                    (owner, name or "", digest, now),
+                )
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM artifacts").fetchone()[0]
+            conn.execute("COMMIT")
+
+        # 색인을 먼저 갱신했으므로 정리 작업이 이 파일을 지우지 않음 (정리는 색인 행을 지운 뒤에만 파일을 지움)
+        # (비슷한 이미지로 합쳤는데 그 파일이 없으면 이번 이미지로 채움)
+        path = self._file_path(digest)
+        if not path.exists():
+            self._write_atomic(path, image_data)
+
+        if dedup is not None and self.telemetry is not None:
+            self.telemetry.metrics.inc("artifact_dedup_total", kind=dedup)
+        if 0 < self.quota_bytes < total:
+            self._wake.set()
+        return HANDLE_PREFIX + digest
+
+    def refs(self, owner: str) -> dict:
+        """
+        owner의 참조 목록
+
+        Args:
+            owner: 레시피/작업 ID
+
+        Returns:
+            dict: {이미지 이름: 아티팩트 핸들}
+        """
+        with self._connect() as conn:
+            rows = conn.execute("SELECT name, digest FROM artifact_refs WHERE owner = ?", (owner,)).fetchall()
+        return {name: HANDLE_PREFIX + digest for name, digest in rows}
+
+    def release(self, owner: str, name: str = None) -> int:
+        """
+        참조 해제 (이미지는 다른 참조가 없으면 다음 정리 때 제거 대상)
+
+        Args:
+            owner: 레시피/작업 ID
+            name: 해제할 이미지 이름 (None이면 owner의 참조 전체)
+
+        Returns:
+            int: 해제한 참조 수
+        """
+        with self._connect() as conn:
+            if name is None:
+                cursor = conn.execute("DELETE FROM artifact_refs WHERE owner = ?", (owner,))
+            else:
+                cursor = conn.execute("DELETE FROM artifact_refs WHERE owner = ? AND name = ?", (owner, name))
+            return cursor.rowcount
+
+    def _find_similar(self, conn, phash: int):
+        # 구역 하나라도 같은 후보 중에서 해밍 거리가 가장 가까운 이미지
+        bands = _bands(phash)
+        where = " OR ".join(f"band{n} = ?" for n in range(PHASH_BANDS))
+        best, best_distance = None, self.phash_distance + 1
+        for digest, other in conn.execute(f"SELECT digest, phash FROM artifacts WHERE {where}", bands):
+            distance = bin(phash ^ int(other, 16)).count("1")
+            if distance < best_distance:
+                best, best_distance = digest, distance
+        return best
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-", suffix=".png")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    def path(self, handle: str):
+        """
+        핸들이 가리키는 파일 경로 (마지막 사용 시각 갱신)
+
+        Args:
+            handle: 아티팩트 핸들
+
+        Returns:
+            str | None: 파일 경로, 핸들이 아니거나 이미 제거되었으면 None
+        """
+        if not is_handle(handle):
+            return None
+        digest = handle[len(HANDLE_PREFIX):]
+        path = self._file_path(digest)
+        if not path.exists():
+            return None
+
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("UPDATE artifacts SET last_access = ? WHERE digest = ? AND last_access < ?",
+                         (now, digest, now - TOUCH_INTERVAL))
+        return str(path)
+
+    def resolve(self, value):
+        """
+        화면에 표시할 파일 경로 (핸들과 예전 방식의 파일 경로를 모두 받음)
+
+        Args:
+            value: 아티팩트 핸들 또는 파일 경로
+
+        Returns:
+            str | None: 존재하는 파일 경로, 없으면 None
+        """
+        if not value:
+            return None
+        if is_handle(value):
+            return self.path(value)
+        return str(value) if Path(value).exists() else None
+
+    def _evict_loop(self, interval: float):
+        while True:
+            self._wake.wait(interval)
+            self._wake.clear()
+            try:
+                self.evict()
+            except Exception as e:
+                print(f"⚠️ 아티팩트 정리 실패: {e}")
+
+    def evict(self) -> dict:
+        """
+        용량을 넘은 만큼 제거
+        1) 참조 없는 이미지를 마지막 사용 시각 순으로 제거
+        2) 그래도 넘으면 가장 오래 쓰지 않은 레시피의 참조를 해제하고 1) 반복
+        (최근 grace_seconds 안에 사용한 이미지/레시피는 건드리지 않음)
+
+        Returns:
+            dict: removed(제거한 이미지 수), freed(줄어든 원본 크기, 바이트), released(참조를 해제한 레시피 수)
+        """
+        result = {"removed": 0, "freed": 0, "released": 0}
+        if self.quota_bytes <= 0:
+            return result
+
+        cutoff = time.time() - self.grace_seconds
+        while self._evict_step(cutoff, result):
+            pass
+
+        if result["removed"] or result["released"]:
+            print(f"🧹 아티팩트 정리: 이미지 {result['removed']}개 제거 ({result['freed'] / 1024 ** 2:.1f}MB), "
+                  f"레시피 {result['released']}개 참조 해제")
+        if self.telemetry is not None and result["removed"]:
+            self.telemetry.metrics.inc("artifact_evictions_total", result["removed"])
+        return result
+
+    def _evict_step(self, cutoff: float, result: dict) -> bool:
+        # 트랜잭션 하나만큼 정리하고, 더 정리할 것이 있으면 True
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                excess = conn.execute("SELECT COALESCE(SUM(size), 0) FROM artifacts").fetchone()[0] - self.quota_bytes
+                if excess <= 0:
+                    return False
+
+                removed = self._remove_unreferenced(conn, excess, cutoff)
+                if removed:
+                    result["removed"] += len(removed)
+                    result["freed"] += sum(size for _, size in removed)
+                    return True
+
+                # 참조 없는 이미지로 부족하면 가장 오래 쓰지 않은 레시피 하나를 해제
+                owner = conn.execute(
+                    "SELECT r.owner FROM artifact_refs r JOIN artifacts a ON a.digest = r.digest "
+                    "GROUP BY r.owner HAVING MAX(a.last_access) < ? ORDER BY MAX(a.last_access) LIMIT 1",
+                    (cutoff,),
+                ).fetchone()
+                if owner is None:
+                    # 남은 것은 모두 최근에 쓴 이미지
+                    return False
+                conn.execute("DELETE FROM artifact_refs WHERE owner = ?", owner)
+                result["released"] += 1
+                return True
+            finally:
+                conn.execute("COMMIT")
+
+    def _remove_unreferenced(self, conn, excess: int, cutoff: float) -> list:
+        # 참조 없는 이미지를 오래된 순으로 excess 바이트만큼 색인과 디스크에서 제거
+        # (쓰기 잠금을 잡은 채로 파일까지 지워서, 같은 이미지를 다시 저장하는 put()과 엇갈리지 않게 함)
+        removed = []
+        freed = 0
+        rows = conn.execute(
+            "SELECT digest, size FROM artifacts a WHERE last_access < ? "
+            "AND NOT EXISTS (SELECT 1 FROM artifact_refs r WHERE r.digest = a.digest) ORDER BY last_access",
+            (cutoff,),
+        )
+        for digest, size in rows.fetchall():
+            if freed >= excess:
+                break
+            conn.execute("DELETE FROM artifacts WHERE digest = ?", (digest,))
+            path = self._file_path(digest)
+            for file in path.parent.glob(f"{digest}.*"):
+                file.unlink(missing_ok=True)
+            removed.append((digest, size))
+            freed += size
+        return removed
+
+    def stats(self) -> dict:
+        """
+        저장소 상태
+
+        Returns:
+            dict: artifacts(이미지 수), bytes(원본 전체 크기), quota_bytes(상한), referenced(참조 중인 이미지 수),
+                  owners(레시피 수)
+        """
+        with self._connect() as conn:
+            count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM artifacts").fetchone()
+            referenced, owners = conn.execute(
+                "SELECT COUNT(DISTINCT digest), COUNT(DISTINCT owner) FROM artifact_refs"
+            ).fetchone()
+        return {"artifacts": count, "bytes": total, "quota_bytes": self.quota_bytes, "referenced": referenced,
+                "owners": owners}
@@ -0,0 +1,284 @@
+"""
+대량 레시피 생성 (배치)
+요리 이름 목록 파일을 받아서 레시피와 단계별 이미지를 한꺼번에 생성합니다.
+요리/단계마다 체크포인트를 남기므로 중단된 작업을 다시 실행하면 끝난 API 호출은 반복하지 않습니다.
+
+사용법:
+    python -m chef_brain batch dishes.txt --output-dir batch_output
+    python -m chef_brain batch dishes.txt --profile fast
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from profiles import profile_scope
+from scheduler import PRIORITY_BACKGROUND, priority_scope, session_scope
+from telemetry import run_in_context
+
+
+def load_dish_names(dish_file: str) -> list:
+    """
+    요리 이름 목록 파일 읽기 (한 줄에 하나, 빈 줄과 #으로 시작하는 줄은 무시, 중복 제거)
+
+    Args:
+        dish_file: 요리 이름 목록 파일 경로
+
+    Returns:
+        list: 요리 이름 리스트 (파일 순서 유지)
+    """
+    dish_names = []
+    seen = set()
+    with open(dish_file, encoding="utf-8") as f:
+        for line in f:
+            dish_name = line.strip()
+            if not dish_name or dish_name.startswith("#") or dish_name in seen:
+                continue
+            seen.add(dish_name)
+            dish_names.append(dish_name)
+    return dish_names
+
+
+class BatchCheckpoint:
+    """
+    배치 체크포인트 (JSONL 추가 기록)
+    - {"type": "recipe", "dish_name": ..., "recipe": {...}}: 레시피 생성 완료
+    - {"type": "step", "dish_name": ..., "index": n, "path": ...}: 단계 이미지 생성 완료
+    - {"type": "done", "dish_name": ...}: 요리 처리 완료 (결과 JSONL에 기록됨)
+    """
+
+    def __init__(self, path: Path):
+        """
+        체크포인트 파일을 읽어서 이전 진행 상황 복원
+
+        Args:
+            path: 체크포인트 파일 경로
+        """
+        self.path = path
+        self.recipes = {}
+        self.steps = {}
+        self.done = set()
+        self._lock = threading.Lock()
+
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # 중단 시점에 반쯤 쓰인 마지막 줄은 무시
+                        continue
+                    self._apply(record)
+
+    def _apply(self, record: dict):
+        dish_name = record["dish_name"]
+        if record["type"] == "recipe":
+            self.recipes[dish_name] = record["recipe"]
+        elif record["type"] == "step":
+            self.steps.setdefault(dish_name, {})[record["index"]] = record["path"]
+        elif record["type"] == "done":
+            self.done.add(dish_name)
+
+    def record(self, record: dict):
+        """
+        체크포인트 기록 (디스크에 바로 반영)
+
+        Args:
+            record: 기록할 항목
+        """
+        with self._lock:
+            self._apply(record)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+
+class BatchRunner:
+    """
+    배치 실행기
+    - 요리 단위 동시 실행 수(max_workers)와 이미지 동시 생성 수(image_workers)를 따로 제한
+    - 결과는 {output_dir}/recipes.jsonl, 이미지는 {output_dir}/images/ 에 저장
+    - 모든 호출은 "batch" 세션의 백그라운드 우선순위로 요청 (같은 프로세스의 앱 세션이 먼저 차례를 받음)
+    """
+
+    # 스케줄러 세션 ID (scheduler.session_scope)
+    SESSION = "batch"
+
+    def __init__(self, agent, output_dir: str = "batch_output", max_workers: int = 4, image_workers: int = 8,
+                 with_images: bool = True, profile=None):
+        """
+        BatchRunner 초기화
+
+        Args:
+            agent: RecipeAgent 인스턴스 (image_dir는 {output_dir}/images로 바뀌고, 결과 폴더만 옮겨도 쓸 수 있도록
+                아티팩트 저장소 대신 파일로 저장)
+            output_dir: 결과 폴더
+            max_workers: 동시에 처리할 요리 수
+            image_workers: 동시에 생성할 이미지 수
+            with_images: 단계별 이미지 생성 여부
+            profile: 이 배치에 쓸 생성 프로필 이름 (profiles.PROFILES 참고, None이면 에이전트 기본 프로필)
+        """
+        self.agent = agent
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.agent.image_dir = self.output_dir / "images"
+        self.agent.artifacts = None
+
+        self.max_workers = max_workers
+        self.image_workers = image_workers
+        self.with_images = with_images
+        self.profile = profile
+
+        self.checkpoint = BatchCheckpoint(self.output_dir / "checkpoint.jsonl")
+        self.results_path = self.output_dir / "recipes.jsonl"
+        self._results_lock = threading.Lock()
+
+        # 이번 실행에서 실제로 수행한 작업 통계
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            "dishes_total": 0,
+            "dishes_skipped": 0,
+            "dishes_completed": 0,
+            "dishes_failed": 0,
+            "recipes_generated": 0,
+            "images_generated": 0,
+            "images_failed": 0,
+        }
+
+    def _count(self, name: str, value: int = 1):
+        with self._stats_lock:
+            self.stats[name] += value
+
+    def run(self, dish_names: list) -> dict:
+        """
+        배치 실행
+
+        Args:
+            dish_names: 요리 이름 리스트
+
+        Returns:
+            dict: 처리량 요약 (summary 참고)
+        """
+        pending = [dish_name for dish_name in dish_names if dish_name not in self.checkpoint.done]
+        self.stats["dishes_total"] = len(dish_names)
+        self.stats["dishes_skipped"] = len(dish_names) - len(pending)
+
+        print(f"📦 배치 시작: 전체 {len(dish_names)}개 중 {len(pending)}개 처리 (완료된 {self.stats['dishes_skipped']}개 건너뜀)")
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.image_workers) as image_pool:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as dish_pool:
+                futures = {
+                    dish_pool.submit(self._process_dish, dish_name, image_pool): dish_name
+                    for dish_name in pending
+                }
+                for n, future in enumerate(as_completed(futures), 1):
+                    result = future.result()
+                    icon = "✅" if result["status"] != "failed" else "❌"
+                    print(f"{icon} [{n}/{len(pending)}] {futures[future]}: {result['status']}")
+
+        return self.summary(time.monotonic() - started)
+
+    def _process_dish(self, dish_name: str, image_pool: ThreadPoolExecutor) -> dict:
+        # 요리 하나를 하나의 트레이스로 기록 (이미지 작업자에도 같은 프로필/스케줄러 세션이 전달됨)
+        with profile_scope(self.profile), session_scope(self.SESSION), priority_scope(PRIORITY_BACKGROUND), \
+                self.agent.telemetry.trace("batch.dish", dish_name=dish_name):
+            return self._run_dish(dish_name, image_pool)
+
+    def _run_dish(self, dish_name: str, image_pool: ThreadPoolExecutor) -> dict:
+        # 1. 레시피 (체크포인트에 있으면 재사용)
+        recipe = self.checkpoint.recipes.get(dish_name)
+        if recipe is None:
+            try:
+                recipe = self.agent.generate_recipe(dish_name)
+            except Exception as e:
+                self._count("dishes_failed")
+                result = {"dish_name": dish_name, "status": "failed", "error": str(e), "recipe": None, "step_images": []}
+                self._write_result(result)
+                return result
+
+            self._count("recipes_generated")
+            self.checkpoint.record({"type": "recipe", "dish_name": dish_name, "recipe": recipe})
+
+        # 2. 단계별 이미지 (완료된 단계는 건너뜀)
+        done_steps = self.checkpoint.steps.get(dish_name, {})
+        step_images = [done_steps.get(i) for i in range(1, len(recipe["steps"]) + 1)]
+
+        if self.with_images:
+            futures = {
+                image_pool.submit(run_in_context(self.agent.generate_step_image), dish_name, step, i, len(recipe["steps"])): i
+                for i, step in enumerate(recipe["steps"], 1)
+                if i not in done_steps
+            }
+            for future in as_completed(futures):
+                i = futures[future]
+                status, image_path = future.result()
+                if status == "completed":
+                    self._count("images_generated")
+                    step_images[i - 1] = image_path
+                    self.checkpoint.record({"type": "step", "dish_name": dish_name, "index": i, "path": image_path})
+                else:
+                    self._count("images_failed")
+
+        # 3. 결과 기록 (일부 이미지가 실패하면 partial - 다음 실행 때 실패한 단계만 다시 시도)
+        status = "ok" if not self.with_images or all(step_images) else "partial"
+        result = {"dish_name": dish_name, "status": status, "recipe": recipe, "step_images": step_images}
+        self._write_result(result)
+        if status == "ok":
+            self.checkpoint.record({"type": "done", "dish_name": dish_name})
+        self._count("dishes_completed")
+        return result
+
+    def _write_result(self, result: dict):
+        # 같은 요리가 여러 번 기록될 수 있으며 (재실행으로 실패/부분 완료를 다시 처리한 경우), 마지막 줄이 최신 결과
+        with self._results_lock:
+            with open(self.results_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+    def summary(self, elapsed_seconds: float) -> dict:
+        """
+        처리량 요약
+
+        Args:
+            elapsed_seconds: 실행 시간 (초)
+
+        Returns:
+            dict: 통계 + dishes_per_minute, images_per_minute, dish_failure_rate, image_failure_rate
+        """
+        with self._stats_lock:
+            stats = dict(self.stats)
+
+        minutes = max(elapsed_seconds, 1e-9) / 60
+        attempted_dishes = stats["dishes_completed"] + stats["dishes_failed"]
+        attempted_images = stats["images_generated"] + stats["images_failed"]
+
+        stats.update({
+            "elapsed_seconds": elapsed_seconds,
+            "dishes_per_minute": stats["dishes_completed"] / minutes,
+            "images_per_minute": stats["images_generated"] / minutes,
+            "dish_failure_rate": stats["dishes_failed"] / attempted_dishes if attempted_dishes else 0.0,
+            "image_failure_rate": stats["images_failed"] / attempted_images if attempted_images else 0.0,
+        })
+        return stats
+
+
+def print_summary(summary: dict):
+    """
+    처리량 요약 출력
+
+    Args:
+        summary: BatchRunner.summary 결과
+    """
+    print("\n" + "=" * 60)
+    print("📊 배치 처리 요약")
+    print("=" * 60)
+    print(f"  - 요리: 완료 {summary['dishes_completed']}개 / 실패 {summary['dishes_failed']}개 "
+          f"/ 건너뜀 {summary['dishes_skipped']}개 (전체 {summary['dishes_total']}개)")
+    print(f"  - 이미지: 생성 {summary['images_generated']}장 / 실패 {summary['images_failed']}장")
+    print(f"  - 소요 시간: {summary['elapsed_seconds']:.1f}초")
+    print(f"  - 처리량: {summary['dishes_per_minute']:.1f} 요리/분, {summary['images_per_minute']:.1f} 이미지/분")
+    print(f"  - 실패율: 요리 {summary['dish_failure_rate']:.1%}, 이미지 {summary['image_failure_rate']:.1%}")
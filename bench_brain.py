@@ -0,0 +1,556 @@
+"""
+RecipeAgent 오프라인 벤치마크
+가짜 백엔드(fake_backend.FakeGenaiClient)로 generate_recipe + generate_step_images 전체 지연 시간을
+동시 요청 수별로 측정하고, p50/p95/p99와 처리량을 JSON 파일로 저장합니다.
+커밋마다 결과 파일을 비교해서 처리량 회귀를 확인할 수 있습니다.
+--compare-prompts를 주면 레시피 프롬프트 전달 방식(본문에 지시문 포함 / system_instruction / 컨텍스트 캐시)별로
+레시피 호출의 입력 토큰 수와 지연 시간을 비교합니다.
+--compare-profiles를 주면 생성 프로필(fast / balanced / quality)별로 레시피 + 단계 이미지 지연 시간,
+레시피 호출의 토큰 사용량(입력/출력/생각), 스키마에 맞는 응답 비율을 비교합니다.
+--compare-scheduling을 주면 단계 이미지가 많은 세션 하나와 요리 하나씩 만드는 세션 여러 개가 전역 동시성 상한을
+함께 쓸 때, 공정 스케줄러(세션별 공정 큐잉 + 앞쪽 단계 우선)와 도착 순서(FIFO)의 첫 이미지 대기 시간을 비교합니다.
+
+사용법:
+    python bench_brain.py --concurrency 1 4 8 --requests 32 --output bench_results.json
+    python bench_brain.py --compare-prompts --concurrency 4 --requests 32
+    python bench_brain.py --compare-profiles --concurrency 4 --requests 16
+    python bench_brain.py --compare-scheduling --concurrency 4 --max-concurrency 8
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import platform
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from chef_brain import RecipeAgent
+from fake_backend import FakeGenaiClient
+from profiles import PROFILES
+from rate_limit import DEFAULT_LIMITS, CallLayer, ModelLimit
+from scheduler import DEFAULT_SESSION, PRIORITY_INTERACTIVE, PRIORITY_NAMES, FairScheduler, session_scope
+from telemetry import Telemetry, run_in_context
+
+# --compare-prompts에서 비교할 레시피 프롬프트 전달 방식
+PROMPT_MODES = ["inline", "system", "cached"]
+
+# --compare-scheduling에서 비교할 스케줄링 방식
+SCHEDULING_MODES = ["fifo", "fair"]
+
+# --compare-scheduling에서 단계 이미지가 많은 세션이 한꺼번에 만드는 요리 수
+HEAVY_SESSION_DISHES = 4
+
+
+class InlinePromptAgent(RecipeAgent):
+    """
+    비교용 에이전트 - 예전 방식처럼 시스템 지시문 전체를 요청 본문에 붙여서 매번 보냄
+    """
+
+    def _build_recipe_prompt(self, dish_name: str) -> str:
+        return f"{self.recipe_instruction}\n{super()._build_recipe_prompt(dish_name)}"
+
+    def _recipe_config(self, cached: bool = True):
+        config = super()._recipe_config(cached=False)
+        config.system_instruction = None
+        return config
+
+
+class FifoScheduler(FairScheduler):
+    """
+    비교용 스케줄러 - 세션과 우선순위를 보지 않고 도착 순서대로 자리를 줌 (전역 동시성 상한만 적용)
+    """
+
+    def _classify(self) -> tuple:
+        return DEFAULT_SESSION, 1.0, PRIORITY_INTERACTIVE, 0
+
+
+def percentile(values: list, p: float) -> float:
+    """
+    백분위수 (nearest-rank 방식)
+
+    Args:
+        values: 측정값 리스트
+        p: 백분위 (0~100)
+
+    Returns:
+        float: 백분위수 (값이 없으면 0)
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def git_commit() -> str:
+    """
+    현재 git 커밋 해시 (git 저장소가 아니면 None)
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_call_layer(limits: str, base_delay: float, telemetry: Telemetry = None, max_concurrency: int = None,
+                     scheduler_class=FairScheduler) -> CallLayer:
+    """
+    벤치마크용 호출 계층 (동시 요청 수마다 새로 만들어서 이전 측정의 제한 상태가 섞이지 않게 함)
+
+    Args:
+        limits: "default"면 실제 모델별 제한, "none"이면 사실상 제한 없음
+        base_delay: 재시도 기본 대기 시간 (초)
+        telemetry: 지표 기록기 (None이면 프로세스 공용 기록기)
+        max_concurrency: 전역 동시성 상한 (None이면 limits가 "none"일 때 사실상 제한 없음, "default"일 때 기본값)
+        scheduler_class: 호출 스케줄러 클래스 (FairScheduler 또는 FifoScheduler)
+
+    Returns:
+        CallLayer: 호출 계층
+    """
+    if limits == "default":
+        model_limits = DEFAULT_LIMITS
+    else:
+        model_limits = {
+            model: ModelLimit(requests_per_minute=1_000_000, max_concurrency=256, initial_concurrency=256)
+            for model in DEFAULT_LIMITS
+        }
+        max_concurrency = max_concurrency or 1024
+    scheduler = scheduler_class(max_concurrency=max_concurrency, telemetry=telemetry)
+    return CallLayer(limits=model_limits, base_delay=base_delay, telemetry=telemetry, scheduler=scheduler)
+
+
+def build_client(args) -> FakeGenaiClient:
+    """
+    명령줄 인자로 가짜 백엔드 생성
+
+    Args:
+        args: 명령줄 인자
+
+    Returns:
+        FakeGenaiClient: 가짜 백엔드
+    """
+    return FakeGenaiClient(
+        latency=args.latency,
+        image_latency=args.image_latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        seed=args.seed,
+        prefill_latency=args.prefill_latency,
+        thinking_latency=args.thinking_latency,
+    )
+
+
+def latency_summary(latencies: list) -> dict:
+    """
+    지연 시간 요약 (평균, p50/p95/p99, 최댓값)
+
+    Args:
+        latencies: 성공한 요청의 지연 시간 리스트 (초)
+
+    Returns:
+        dict: 요약 통계
+    """
+    return {
+        "mean": sum(latencies) / len(latencies) if latencies else 0.0,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "max": max(latencies, default=0.0),
+    }
+
+
+def run_level(args, concurrency: int) -> dict:
+    """
+    동시 요청 수 하나에 대해 벤치마크 실행
+
+    Args:
+        args: 명령줄 인자
+        concurrency: 동시 요청 수
+
+    Returns:
+        dict: 측정 결과
+    """
+    client = build_client(args)
+    call_layer = build_call_layer(args.limits, args.base_delay, max_concurrency=args.max_concurrency)
+    image_dir = tempfile.mkdtemp(prefix="sous_chef_bench_")
+    agent = RecipeAgent(client=client, call_layer=call_layer, image_dir=image_dir)
+
+    latencies = []
+    failures = 0
+    lock = threading.Lock()
+
+    def one_request(n: int):
+        nonlocal failures
+        # 요리 이름이 모두 달라서 레시피는 매번 생성됨 (캐시 없음)
+        dish_name = f"벤치마크 요리 {concurrency}-{n}"
+        started = time.monotonic()
+        try:
+            recipe = agent.generate_recipe(dish_name, use_cache=False)
+            image_paths = agent.generate_step_images(dish_name, recipe, max_workers=args.image_workers,
+                                                     storyboard=args.storyboard)
+            ok = all(image_paths)
+        except Exception:
+            ok = False
+        elapsed = time.monotonic() - started
+
+        with lock:
+            if ok:
+                latencies.append(elapsed)
+            else:
+                failures += 1
+
+    output = io.StringIO() if not args.verbose else None
+    started = time.monotonic()
+    with contextlib.redirect_stdout(output) if output else contextlib.nullcontext():
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(one_request, range(args.requests)))
+    wall_seconds = time.monotonic() - started
+
+    return {
+        "concurrency": concurrency,
+        "requests": args.requests,
+        "succeeded": len(latencies),
+        "failed": failures,
+        "wall_seconds": wall_seconds,
+        "throughput_rps": len(latencies) / wall_seconds if wall_seconds else 0.0,
+        "latency_seconds": latency_summary(latencies),
+        "backend_calls": dict(client.models.calls),
+        "call_layer": call_layer.stats(),
+    }
+
+
+def run_prompt_level(args, mode: str, concurrency: int) -> dict:
+    """
+    레시피 프롬프트 전달 방식 하나로 레시피만 생성하면서 입력 토큰 수와 지연 시간 측정
+
+    Args:
+        args: 명령줄 인자
+        mode: "inline"(본문에 지시문 포함) / "system"(system_instruction) / "cached"(컨텍스트 캐시)
+        concurrency: 동시 요청 수
+
+    Returns:
+        dict: 측정 결과
+    """
+    client = build_client(args)
+    telemetry = Telemetry()
+    call_layer = build_call_layer(args.limits, args.base_delay, telemetry)
+    agent_class = InlinePromptAgent if mode == "inline" else RecipeAgent
+    agent = agent_class(client=client, call_layer=call_layer, context_cache=mode == "cached",
+                        image_dir=tempfile.mkdtemp(prefix="sous_chef_bench_"))
+
+    latencies = []
+    failures = 0
+    lock = threading.Lock()
+
+    def one_request(n: int):
+        nonlocal failures
+        started = time.monotonic()
+        try:
+            agent.generate_recipe(f"벤치마크 요리 {mode}-{n}", use_cache=False)
+            ok = True
+        except Exception:
+            ok = False
+        elapsed = time.monotonic() - started
+
+        with lock:
+            if ok:
+                latencies.append(elapsed)
+            else:
+                failures += 1
+
+    output = io.StringIO() if not args.verbose else None
+    with contextlib.redirect_stdout(output) if output else contextlib.nullcontext():
+        if agent.context_cache is not None:
+            # 서버 시작 시 예열하는 것처럼 캐시는 측정 전에 생성
+            agent.context_cache.name()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(one_request, range(args.requests)))
+
+    calls = telemetry.metrics.total("api_calls_total", method="generate_content", outcome="ok") or 1
+    prompt_tokens = telemetry.metrics.total("api_tokens_total", type="prompt")
+    cached_tokens = telemetry.metrics.total("api_tokens_total", type="cached")
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "requests": args.requests,
+        "succeeded": len(latencies),
+        "failed": failures,
+        "input_tokens_per_call": {
+            "prompt": prompt_tokens / calls,
+            "cached": cached_tokens / calls,
+            "uncached": (prompt_tokens - cached_tokens) / calls,
+        },
+        "latency_seconds": latency_summary(latencies),
+        "context_cache_calls": dict(client.caches.calls),
+    }
+
+
+def run_profile_level(args, profile: str, concurrency: int) -> dict:
+    """
+    생성 프로필 하나로 레시피 + 단계 이미지를 생성하면서 지연 시간, 토큰 사용량, 스키마에 맞는 응답 비율 측정
+
+    Args:
+        args: 명령줄 인자
+        profile: 프로필 이름 (profiles.PROFILES 참고)
+        concurrency: 동시 요청 수
+
+    Returns:
+        dict: 측정 결과
+    """
+    client = build_client(args)
+    telemetry = Telemetry()
+    call_layer = build_call_layer(args.limits, args.base_delay, telemetry)
+    agent = RecipeAgent(client=client, call_layer=call_layer, profile=profile,
+                        image_dir=tempfile.mkdtemp(prefix="sous_chef_bench_"))
+
+    latencies = []
+    recipe_latencies = []
+    failures = 0
+    lock = threading.Lock()
+
+    def one_request(n: int):
+        nonlocal failures
+        dish_name = f"벤치마크 요리 {profile}-{concurrency}-{n}"
+        started = time.monotonic()
+        recipe_seconds = None
+        try:
+            recipe = agent.generate_recipe(dish_name, use_cache=False)
+            recipe_seconds = time.monotonic() - started
+            image_paths = agent.generate_step_images(dish_name, recipe, max_workers=args.image_workers,
+                                                     storyboard=args.storyboard)
+            ok = all(image_paths)
+        except Exception:
+            ok = False
+        elapsed = time.monotonic() - started
+
+        with lock:
+            if recipe_seconds is not None:
+                recipe_latencies.append(recipe_seconds)
+            if ok:
+                latencies.append(elapsed)
+            else:
+                failures += 1
+
+    output = io.StringIO() if not args.verbose else None
+    with contextlib.redirect_stdout(output) if output else contextlib.nullcontext():
+        if agent.context_cache is not None:
+            # 서버 시작 시 예열하는 것처럼 캐시는 측정 전에 생성
+            agent.context_cache.name()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(one_request, range(args.requests)))
+
+    text_model = PROFILES[profile]["text_model"]
+    calls = telemetry.metrics.total("api_calls_total", model=text_model, method="generate_content", outcome="ok") or 1
+    tokens = {
+        token_type: telemetry.metrics.total("api_tokens_total", model=text_model, type=token_type) / calls
+        for token_type in ("prompt", "output", "thoughts")
+    }
+    # 스키마에 맞는 응답 비율: 첫 응답을 그대로 파싱할 수 있었던 비율 (잘려서 복구/재요청한 응답 제외)
+    response_stats = agent.response_stats()
+    responses = sum(response_stats.values())
+    return {
+        "profile": profile,
+        "settings": PROFILES[profile],
+        "concurrency": concurrency,
+        "requests": args.requests,
+        "succeeded": len(latencies),
+        "failed": failures,
+        "latency_seconds": latency_summary(latencies),
+        "recipe_latency_seconds": latency_summary(recipe_latencies),
+        "tokens_per_call": tokens,
+        "schema_valid_rate": response_stats["parsed"] / responses if responses else 0.0,
+        "response_stats": response_stats,
+        "backend_calls": dict(client.models.calls),
+    }
+
+
+def run_scheduling_level(args, mode: str, sessions: int) -> dict:
+    """
+    세션 여러 개가 전역 동시성 상한을 함께 쓸 때 세션별 첫 단계 이미지 대기 시간 측정
+    세션 0은 요리 HEAVY_SESSION_DISHES개의 단계 이미지를 한꺼번에 요청하고, 조금 뒤에 도착한 나머지 세션은
+    요리 하나씩 레시피 + 단계 이미지를 생성
+
+    Args:
+        args: 명령줄 인자
+        mode: "fifo"(도착 순서) 또는 "fair"(공정 스케줄러)
+        sessions: 세션 수 (2 이상)
+
+    Returns:
+        dict: 측정 결과
+    """
+    client = build_client(args)
+    telemetry = Telemetry()
+    call_layer = build_call_layer(args.limits, args.base_delay, telemetry, args.max_concurrency or 8,
+                                  FifoScheduler if mode == "fifo" else FairScheduler)
+    agent = RecipeAgent(client=client, call_layer=call_layer, image_dir=tempfile.mkdtemp(prefix="sous_chef_bench_"))
+    started = time.monotonic()
+    results = {}
+    lock = threading.Lock()
+
+    def make_dish(session: int, n: int) -> dict:
+        # 레시피 + 단계 이미지 (모든 단계를 한꺼번에 요청), 첫 단계 이미지와 전체 완료 시각 기록
+        dish_name = f"벤치마크 요리 {mode}-{session}-{n}"
+        timings = {"first_image": None}
+
+        def progress(index, total, status):
+            if status == "completed" and timings["first_image"] is None:
+                timings["first_image"] = time.monotonic() - started
+
+        recipe = agent.generate_recipe(dish_name, use_cache=False)
+        agent.generate_step_images(dish_name, recipe, progress_callback=progress,
+                                   max_workers=len(recipe["steps"]))
+        timings["done"] = time.monotonic() - started
+        return timings
+
+    def run_session(session: int):
+        with session_scope(f"session-{session}"):
+            if session == 0:
+                with ThreadPoolExecutor(max_workers=HEAVY_SESSION_DISHES) as executor:
+                    dishes = list(executor.map(run_in_context(make_dish), [0] * HEAVY_SESSION_DISHES,
+                                               range(HEAVY_SESSION_DISHES)))
+            else:
+                # 큰 세션의 이미지 요청이 먼저 줄을 선 뒤에 도착
+                time.sleep(args.latency * 0.5)
+                dishes = [make_dish(session, 0)]
+        with lock:
+            results[session] = dishes
+
+    output = io.StringIO() if not args.verbose else None
+    with contextlib.redirect_stdout(output) if output else contextlib.nullcontext():
+        with ThreadPoolExecutor(max_workers=sessions) as executor:
+            list(executor.map(run_session, range(sessions)))
+
+    light = [dish for session in range(1, sessions) for dish in results[session]]
+    heavy = results[0]
+    return {
+        "mode": mode,
+        "sessions": sessions,
+        "max_concurrency": call_layer.scheduler.max_concurrency,
+        "light_first_image_seconds": latency_summary([dish["first_image"] for dish in light if dish["first_image"]]),
+        "light_done_seconds": latency_summary([dish["done"] for dish in light]),
+        "heavy_first_image_seconds": min((dish["first_image"] for dish in heavy if dish["first_image"]), default=0.0),
+        "heavy_done_seconds": max(dish["done"] for dish in heavy),
+        "wait_seconds_by_priority": {
+            name: telemetry.metrics.mean("scheduler_wait_seconds", priority=name)[0] for name in PRIORITY_NAMES
+        },
+        "scheduler": call_layer.scheduler.stats(),
+    }
+
+
+def main(argv=None):
+    """
+    벤치마크 진입점
+
+    Args:
+        argv: 명령줄 인자 (None이면 sys.argv 사용)
+    """
+    parser = argparse.ArgumentParser(description="RecipeAgent 오프라인 벤치마크 (가짜 백엔드)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8], help="측정할 동시 요청 수 (기본: 1 4 8)")
+    parser.add_argument("--requests", type=int, default=16, help="동시 요청 수마다 보낼 요청 수 (기본: 16)")
+    parser.add_argument("--image-workers", type=int, default=4, help="요청 하나의 이미지 동시 생성 수 (기본: 4)")
+    parser.add_argument("--latency", type=float, default=1.0, help="텍스트 생성 평균 지연 시간 (초, 기본: 1.0)")
+    parser.add_argument("--image-latency", type=float, default=2.0, help="이미지 생성 평균 지연 시간 (초, 기본: 2.0)")
+    parser.add_argument("--jitter", type=float, default=0.2, help="지연 시간 변동 비율 (기본: 0.2)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="503 오류 비율 (기본: 0)")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="429 오류 비율 (기본: 0)")
+    parser.add_argument("--storyboard", action="store_true", help="단계별 이미지를 스토리보드(격자 이미지 한 장)로 생성")
+    parser.add_argument("--limits", choices=["none", "default"], default="none",
+                        help="호출 계층 제한: none(백엔드만 측정) / default(실제 모델별 제한 적용)")
+    parser.add_argument("--base-delay", type=float, default=0.1, help="재시도 기본 대기 시간 (초, 기본: 0.1)")
+    parser.add_argument("--prefill-latency", type=float, default=0.1,
+                        help="캐시되지 않은 입력 토큰 1000개당 추가 지연 시간 (초, 기본: 0.1)")
+    parser.add_argument("--thinking-latency", type=float, default=0.5,
+                        help="생각 토큰 1000개당 추가 지연 시간 (초, 기본: 0.5)")
+    parser.add_argument("--compare-prompts", action="store_true",
+                        help="레시피 프롬프트 전달 방식(inline / system / cached)별 입력 토큰 수와 지연 시간 비교")
+    parser.add_argument("--compare-profiles", action="store_true",
+                        help="생성 프로필(fast / balanced / quality)별 지연 시간, 토큰 사용량, 스키마에 맞는 응답 비율 비교")
+    parser.add_argument("--compare-scheduling", action="store_true",
+                        help="세션 여러 개가 동시성 상한을 함께 쓸 때 도착 순서(fifo)와 공정 스케줄러(fair)의 첫 이미지 대기 시간 비교 "
+                             "(--concurrency는 세션 수)")
+    parser.add_argument("--max-concurrency", type=int, default=None,
+                        help="전역 동시성 상한 (기본: --limits none이면 제한 없음, --compare-scheduling은 8)")
+    parser.add_argument("--seed", type=int, default=0, help="난수 시드 (기본: 0)")
+    parser.add_argument("--output", default="bench_results.json", help="결과 JSON 파일 (기본: bench_results.json)")
+    parser.add_argument("--verbose", action="store_true", help="RecipeAgent 진행 로그 출력")
+    args = parser.parse_args(argv)
+
+    print("=" * 60)
+    print("⏱️ RecipeAgent 오프라인 벤치마크")
+    print("=" * 60)
+
+    results = []
+    for concurrency in args.concurrency:
+        if args.compare_prompts:
+            for mode in PROMPT_MODES:
+                print(f"\n🧾 [{mode}] 동시 요청 {concurrency}개 × 레시피 {args.requests}개 측정 중...")
+                result = run_prompt_level(args, mode, concurrency)
+                results.append(result)
+                tokens = result["input_tokens_per_call"]
+                latency = result["latency_seconds"]
+                print(f"  - 호출당 입력 토큰: {tokens['prompt']:.0f} (캐시 {tokens['cached']:.0f}, 캐시 제외 {tokens['uncached']:.0f})")
+                if mode == "cached" and not result["context_cache_calls"]["create"]:
+                    print("  - 컨텍스트 캐시 미사용: 지시문이 모델의 최소 캐시 크기보다 작아 system_instruction으로 보냄")
+                print(f"  - 지연 시간: p50 {latency['p50']:.2f}초, p95 {latency['p95']:.2f}초")
+            continue
+
+        if args.compare_profiles:
+            for profile in PROFILES:
+                print(f"\n🎚️ [{profile}] 동시 요청 {concurrency}개 × 요청 {args.requests}개 측정 중...")
+                result = run_profile_level(args, profile, concurrency)
+                results.append(result)
+                tokens = result["tokens_per_call"]
+                latency = result["latency_seconds"]
+                recipe_latency = result["recipe_latency_seconds"]
+                print(f"  - 성공 {result['succeeded']} / 실패 {result['failed']}, "
+                      f"스키마에 맞는 응답 {result['schema_valid_rate']:.0%}")
+                print(f"  - 호출당 토큰: 입력 {tokens['prompt']:.0f} / 출력 {tokens['output']:.0f} / 생각 {tokens['thoughts']:.0f}")
+                print(f"  - 레시피 지연 시간: p50 {recipe_latency['p50']:.2f}초, p95 {recipe_latency['p95']:.2f}초")
+                print(f"  - 전체 지연 시간: p50 {latency['p50']:.2f}초, p95 {latency['p95']:.2f}초")
+            continue
+
+        if args.compare_scheduling:
+            for mode in SCHEDULING_MODES:
+                print(f"\n🚦 [{mode}] 세션 {max(2, concurrency)}개 측정 중...")
+                result = run_scheduling_level(args, mode, max(2, concurrency))
+                results.append(result)
+                first_image = result["light_first_image_seconds"]
+                print(f"  - 작은 세션 첫 이미지: p50 {first_image['p50']:.2f}초, p95 {first_image['p95']:.2f}초, "
+                      f"완료 p50 {result['light_done_seconds']['p50']:.2f}초")
+                print(f"  - 큰 세션: 첫 이미지 {result['heavy_first_image_seconds']:.2f}초, "
+                      f"완료 {result['heavy_done_seconds']:.2f}초")
+                waits = ", ".join(f"{name} {seconds:.2f}초" for name, seconds in result["wait_seconds_by_priority"].items())
+                print(f"  - 우선순위별 평균 대기: {waits}")
+            continue
+
+        print(f"\n🚀 동시 요청 {concurrency}개 × 요청 {args.requests}개 측정 중...")
+        result = run_level(args, concurrency)
+        results.append(result)
+        latency = result["latency_seconds"]
+        print(f"  - 성공 {result['succeeded']} / 실패 {result['failed']}, 처리량 {result['throughput_rps']:.2f} 요청/초")
+        print(f"  - 지연 시간: p50 {latency['p50']:.2f}초, p95 {latency['p95']:.2f}초, p99 {latency['p99']:.2f}초")
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "verbose")},
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"\n💾 결과 저장: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
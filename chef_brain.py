@@ -1,34 +1,149 @@
-from google import genai
 from google.genai import types
+import argparse
+import asyncio
 import os
 import json
 import base64
+import io
+import threading
+import uuid
 from pathlib import Path
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from dotenv import load_dotenv
+from pydantic import BaseModel, TypeAdapter, create_model
+from json_stream import RecipeStreamParser
+from rate_limit import shared_call_layer
+from client_pool import ConnectionMetrics, create_client
+from artifact_store import current_owner, owner_scope
+from context_cache import ContextCache
+from deadline import Deadline, DeadlineExceeded, current_deadline, deadline_scope, iter_completed
+from ingredient_index import parse_query
+from profiles import DEFAULT_PROFILE, PROFILES, current_profile, get_profile, profile_scope
+from recipe_cache import RecipeCache
+from scheduler import step_scope
+from single_flight import SingleFlight
+from storyboard import build_storyboard_prompt, grid_shape, split_grid
+from telemetry import run_in_context
 
 # 환경 변수 로드
 load_dotenv()
 
 
+class Recipe(BaseModel):
+    """
+    레시피 구조 (Gemini 구조화 출력 스키마)
+    """
+    title: str
+    cooking_time: str
+    ingredients: list[str]
+    steps: list[str]
+
+
+# 레시피 필드별 타입 (잘린 응답의 뒷부분만 다시 요청할 때 스키마 구성에 사용)
+RECIPE_FIELD_TYPES = {
+    "title": str,
+    "cooking_time": str,
+    "ingredients": list[str],
+    "steps": list[str],
+}
+
+# 여러 요리를 한 번에 요청할 때의 배열 항목 (어느 요리의 레시피인지 dish로 구분)
+BatchRecipe = create_model("BatchRecipe", dish=(str, ...), **{key: (value, ...) for key, value in RECIPE_FIELD_TYPES.items()})
+
+# 레시피 하나의 출력 토큰 수 처음 추정값 (여러 요리 요청 결과로 계속 보정)
+RECIPE_OUTPUT_TOKENS = 1000
+# 생각 예산을 모델에 맡기는 프로필에서 생각 토큰 몫으로 남겨 둘 출력 토큰 수
+DYNAMIC_THINKING_RESERVE = 2048
+# 출력 토큰 상한 중 여러 요리 요청에 쓸 비율 (추정이 빗나가도 잘리지 않도록 여유를 둠)
+BATCH_OUTPUT_HEADROOM = 0.8
+
+
+# 생성 흐름 요청
+# 레시피/이미지 생성 로직은 RecipeAgent의 *_flow 제너레이터로 한 번만 작성하고, API 호출이나 로컬 I/O가 필요한 곳에서
+# 아래 요청을 yield해서 결과(또는 예외)를 돌려받습니다. 같은 흐름을 RecipeAgent._drive(client.models, 스레드)와
+# AsyncRecipeAgent._drive(client.aio.models, asyncio)가 실행하므로 두 API의 동작이 같습니다.
+
+def _api_op(method: str, model: str, **kwargs) -> tuple:
+    # API 호출: 호출 계층(model 제한)을 거쳐 client.models.{method}(model=model, **kwargs)
+    return "call", model, method, dict(kwargs, model=model)
+
+
+def _flight_op(kind: str, key, flow) -> tuple:
+    # 같은 요청 합치기: 같은 (kind, key)가 진행 중이면 그 결과를 받고, 없으면 flow를 실행
+    return "flight", kind, key, flow
+
+
+def _io_op(fn, *args) -> tuple:
+    # 로컬 I/O (캐시 조회/저장, 이미지 저장 등 - 비동기 실행기는 이벤트 루프를 막지 않도록 작업자 스레드에서 실행)
+    return "io", fn, args
+
+
 class RecipeAgent:
     """
     AI 셰프 에이전트: Gemini를 활용한 레시피 생성 및 이미지 생성
     """
 
-    def __init__(self):
+    # Imagen 한 번의 요청으로 받을 수 있는 최대 이미지 수
+    MAX_IMAGES_PER_REQUEST = 4
+    # 레시피 한 번의 요청에 묶을 최대 요리 수
+    MAX_RECIPES_PER_REQUEST = 8
+
+    def __init__(self, recipe_cache=None, image_cache=None, call_layer=None, image_dir: str = "temp", client=None,
+                 pool_options: dict = None, derivatives=None, dish_index=None, context_cache: bool = True,
+                 artifact_store=None, ingredient_index=None, profile: str = None):
         """
         RecipeAgent 초기화
         - Gemini API 설정
+
+        Args:
+            recipe_cache: 레시피 디스크 캐시 (RecipeCache, optional)
+            image_cache: 이미지 콘텐츠 주소 캐시 (ImageCache, optional)
+            call_layer: API 호출 계층 (CallLayer, None이면 프로세스 공용 계층 사용)
+            image_dir: 생성한 이미지를 저장할 폴더 (artifact_store가 없을 때)
+            client: 이미 만들어 둔 genai.Client 또는 같은 모양의 백엔드 (None이면 새로 생성,
+                SOUS_CHEF_BACKEND=fake이면 fake_backend.FakeGenaiClient 사용)
+            pool_options: 새 클라이언트의 HTTP 연결 풀 설정 (client_pool.DEFAULT_POOL_OPTIONS 참고)
+            derivatives: 이미지 저장 후 썸네일/표시용 파생본을 만드는 작업자 (DerivativeWorker, optional)
+            dish_index: 비슷한 요리명 색인 (DishNameIndex, optional) - 캐시에 정확히 같은 요리가 없을 때
+                표기만 다른 요리("김치 찌개", "kimchi jjigae" 등)의 레시피를 재사용
+            context_cache: 레시피 시스템 지시문을 Gemini 컨텍스트 캐시로 올려두고 재사용할지 여부
+                (지원하지 않으면 자동으로 system_instruction만 사용)
+            artifact_store: 이미지 아티팩트 저장소 (ArtifactStore, optional) - 있으면 이미지를 내용 해시로 저장하고
+                경로 대신 핸들("artifact:<해시>")을 돌려줌
+            ingredient_index: 레시피 재료 색인 (IngredientIndex, optional) - 가진 재료로 만들 수 있는 저장된 레시피를
+                LLM 호출 없이 찾을 때 사용
+            profile: 기본 생성 프로필 이름 또는 설정 dict (profiles.PROFILES 참고, None이면 "balanced")
+                - 텍스트/이미지 모델, 생각 토큰 예산, 출력 토큰 상한, 온도를 함께 정함
         """
-        api_key = os.getenv("GOOGLE_API_KEY")
-        if not api_key:
-            raise ValueError("GOOGLE_API_KEY가 .env 파일에 설정되지 않았습니다.")
+        # HTTP 연결 재사용 지표 (직접 만든 클라이언트에서만 수집)
+        self.connection_metrics = None
+
+        if client is None and os.getenv("SOUS_CHEF_BACKEND") == "fake":
+            # 오프라인 가짜 백엔드 (API 키/할당량 없이 실행)
+            from fake_backend import FakeGenaiClient
+            client = FakeGenaiClient()
+
+        if client is None:
+            api_key = os.getenv("GOOGLE_API_KEY")
+            if not api_key:
+                raise ValueError("GOOGLE_API_KEY가 .env 파일에 설정되지 않았습니다.")
 
-        # Gemini Client 생성
-        self.client = genai.Client(api_key=api_key)
+            # Gemini Client 생성 (연결 풀 설정 + 연결 재사용 지표)
+            self.connection_metrics = ConnectionMetrics()
+            client = create_client(api_key, metrics=self.connection_metrics, **(pool_options or {}))
 
-        # 모델 이름
-        self.model_name = "gemini-2.5-flash"
+        self.client = client
+
+        # 모델별 속도 제한/재시도를 담당하는 호출 계층
+        self.calls = call_layer or shared_call_layer()
+
+        # 스팬/지표 기록기 (호출 계층과 같은 기록기를 써서 API 호출 스팬이 같은 트레이스에 묶이도록)
+        self.telemetry = self.calls.telemetry
+
+        # 기본 생성 프로필 (텍스트/이미지 모델 이름은 model_name / image_model_name 속성으로 현재 프로필에서 읽음)
+        self.profile = get_profile(profile)
+        # 미리보기 이미지 모델 (빠르고 저렴한 대신 품질이 낮음 - 전체 품질 이미지가 나오기 전까지 표시)
+        self.preview_image_model_name = "imagen-4.0-fast-generate-001"
 
         # 시스템 프롬프트
         self.system_prompt = """
@@ -38,24 +153,10 @@ class RecipeAgent:
 단, 각 단계는 200자 이내로 간결하게 작성해줘.
 """
 
-    def generate_recipe(self, dish_name: str) -> dict:
-        """
-        요리명을 받아서 Gemini로 레시피를 생성
-
-        Args:
-            dish_name: 요리 이름
-
-        Returns:
-            dict: 레시피 정보 (제목, 소요시간, 재료, 조리과정)
-        """
-
-        # 프롬프트 구성
-        prompt = f"""
-{self.system_prompt}
-
-요리명: {dish_name}
+        # 레시피 시스템 지시문 (요청마다 바뀌지 않는 부분 - 요청 본문에는 요리명만 보냄)
+        self.recipe_instruction = f"""{self.system_prompt.strip()}
 
-위 요리에 대한 레시피를 아래 JSON 형식으로 작성해줘.
+사용자가 보낸 요리명에 대한 레시피를 아래 JSON 형식으로 작성해줘.
 반드시 유효한 JSON 형식으로만 답변해줘. 다른 설명은 붙이지 말고 오직 JSON만 출력해.
 
 {{
@@ -76,256 +177,1957 @@ class RecipeAgent:
 }}
 """
 
-        try:
-            # Gemini API 호출
-            response = self.client.models.generate_content(
-                model=self.model_name,
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    temperature=0.7,
-                    top_p=0.95,
-                    top_k=40,
-                    max_output_tokens=8192,
-                )
-            )
+        # 여러 요리 레시피 시스템 지시문 (묶음 요청 전용 - 응답이 레시피 하나가 아니라 요리마다 항목 하나인 배열)
+        self.recipe_batch_instruction = f"""{self.system_prompt.strip()}
 
-            # 응답 텍스트 추출
-            response_text = response.text.strip()
+사용자가 보낸 요리명마다 레시피를 하나씩 작성해서, 보낸 순서대로 아래 JSON 배열 하나로 답해줘.
+배열의 각 항목은 요리 하나의 레시피이고, "dish"에는 사용자가 보낸 요리명을 글자 그대로 적어줘.
+반드시 유효한 JSON 형식으로만 답변해줘. 다른 설명은 붙이지 말고 오직 JSON 배열만 출력해.
 
-            # JSON 파싱
-            # Gemini가 가끔 ```json ``` 로 감싸서 반환할 수 있으므로 처리
-            if response_text.startswith("```json"):
-                response_text = response_text[7:]  # ```json 제거
-            if response_text.startswith("```"):
-                response_text = response_text[3:]  # ``` 제거
-            if response_text.endswith("```"):
-                response_text = response_text[:-3]  # ``` 제거
+[
+  {{
+    "dish": "사용자가 보낸 요리명",
+    "title": "요리 제목 (감성적으로)",
+    "cooking_time": "소요 시간 (예: 30분)",
+    "ingredients": [
+      "재료1 (양)",
+      "재료2 (양)"
+    ],
+    "steps": [
+      "1단계: 구체적인 조리 방법과 팁",
+      "2단계: 구체적인 조리 방법과 팁"
+    ]
+  }}
+]
+"""
 
-            response_text = response_text.strip()
+        # 시스템 지시문 컨텍스트 캐시 (텍스트 모델마다 하나, 처음 쓸 때 생성 - context_cache 속성 참고)
+        self.use_context_cache = context_cache
+        self._context_caches = {}
+        self._context_caches_lock = threading.Lock()
 
-            # JSON 파싱
-            recipe_data = json.loads(response_text)
+        # 레시피 캐시 (None이면 매번 Gemini 호출)
+        self.recipe_cache = recipe_cache
 
-            return recipe_data
+        # 비슷한 요리명 색인 (레시피 캐시에 이미 있는 요리명으로 채움)
+        self.dish_index = dish_index
+        if dish_index is not None and recipe_cache is not None:
+            dish_index.add_many(recipe_cache.dish_names())
+
+        # 레시피 재료 색인 (레시피 캐시에 이미 있는 레시피로 채우고, 새 레시피는 저장할 때마다 추가)
+        self.ingredient_index = ingredient_index
+        if ingredient_index is not None and recipe_cache is not None:
+            ingredient_index.add_many(recipe_cache.recipes())
+
+        # 이미지 저장 폴더
+        self.image_dir = Path(image_dir)
+
+        # 이미지 아티팩트 저장소 (None이면 image_dir 아래에 요리명으로 저장)
+        self.artifacts = artifact_store
+
+        # 이미지 파생본 작업자 (None이면 원본만 저장)
+        self.derivatives = derivatives
+
+        # 이미지 캐시 (None이면 레시피 안에서만 같은 프롬프트 중복 제거)
+        self.image_cache = image_cache
+
+        # 진행 중인 같은 요청 합치기 (레시피 생성/스트림, Imagen 요청)
+        self.flights = SingleFlight(self.telemetry)
+
+        # 레시피 응답 처리 결과 통계 (정상 파싱 / 로컬 복구 / 뒷부분만 재요청 / 전체 재생성)
+        self._response_stats = {"parsed": 0, "repaired_locally": 0, "repaired_tail": 0, "regenerated": 0}
+        self._response_stats_lock = threading.Lock()
+
+        # 레시피 하나의 출력 토큰 수 추정값 (여러 요리 요청의 묶음 크기 계산용)
+        self._recipe_output_tokens = float(RECIPE_OUTPUT_TOKENS)
+        self._recipe_output_tokens_lock = threading.Lock()
+
+    def active_profile(self) -> dict:
+        """
+        지금 적용되는 생성 프로필 (profile_scope로 지정한 프로필, 없으면 에이전트 기본 프로필)
+        """
+        return current_profile() or self.profile
+
+    @property
+    def model_name(self) -> str:
+        """
+        현재 프로필의 텍스트 모델 이름
+        """
+        return self.active_profile()["text_model"]
+
+    @property
+    def image_model_name(self) -> str:
+        """
+        현재 프로필의 이미지 모델 이름
+        """
+        return self.active_profile()["image_model"]
+
+    @property
+    def context_cache(self):
+        """
+        현재 텍스트 모델의 시스템 지시문 컨텍스트 캐시 (캐시는 모델마다 따로 만들어야 함)
+
+        Returns:
+            ContextCache | None: 컨텍스트 캐시를 쓰지 않으면 None (요청마다 system_instruction으로 보냄)
+        """
+        if not self.use_context_cache:
+            return None
+        model = self.model_name
+        with self._context_caches_lock:
+            cache = self._context_caches.get(model)
+            if cache is None:
+                cache = ContextCache(self.client, model, self.recipe_instruction, telemetry=self.telemetry,
+                                     call_layer=self.calls)
+                self._context_caches[model] = cache
+            return cache
+
+    def generate_recipe(self, dish_name: str, use_cache: bool = True, profile=None) -> dict:
+        """
+        요리명을 받아서 Gemini로 레시피를 생성
+
+        Args:
+            dish_name: 요리 이름
+            use_cache: 레시피 캐시 사용 여부 (recipe_cache가 설정된 경우에만 의미 있음)
+            profile: 이 요청에만 쓸 생성 프로필 (None이면 현재 프로필)
+
+        Returns:
+            dict: 레시피 정보 (제목, 소요시간, 재료, 조리과정)
+        """
+        with profile_scope(profile), self.telemetry.span("recipe.generate", dish_name=dish_name):
+            return self._drive(self._generate_recipe_flow(dish_name, use_cache))
+
+    def _drive(self, flow):
+        """
+        생성 흐름을 호출한 스레드에서 실행 - yield한 요청을 처리해서 결과나 예외를 흐름에 돌려보냄
+        (API 호출은 client.models로 호출 계층을 거쳐 보내고, 같은 요청 합치기는 SingleFlight.do)
+
+        Args:
+            flow: 생성 흐름 (*_flow 제너레이터)
+
+        Returns:
+            흐름의 반환값
+        """
+        result, error = None, None
+        while True:
+            try:
+                op = flow.send(result) if error is None else flow.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            result, error = None, None
+            try:
+                if op[0] == "call":
+                    _, model, method, kwargs = op
+                    result = self.calls.call(model, getattr(self.client.models, method), **kwargs)
+                elif op[0] == "flight":
+                    _, kind, key, subflow = op
+                    result = self.flights.do(kind, key, self._drive, subflow)
+                else:
+                    _, fn, args = op
+                    result = fn(*args)
+            except BaseException as e:
+                error = e
+
+    def _generate_recipe_flow(self, dish_name: str, use_cache: bool = True):
+        """
+        레시피 생성 흐름 (캐시 조회 → 진행 중인 같은 요청 합치기 → Gemini 생성)
+
+        Args:
+            dish_name: 요리 이름
+            use_cache: 레시피 캐시 사용 여부
+
+        Returns:
+            dict: 레시피 정보
+        """
+        generation_key = self.generation_key(dish_name)
+        cache_key = None
+        if self.recipe_cache is not None and use_cache:
+            cache_key = generation_key
+            cached_recipe = yield _io_op(self._cached_recipe, dish_name, cache_key)
+            if cached_recipe is not None:
+                return cached_recipe
+
+        # 같은 요리/설정의 생성이 진행 중이면 그 결과를 함께 사용
+        return (yield _flight_op("recipe", generation_key, self._recipe_flow(dish_name, cache_key)))
+
+    def _recipe_flow(self, dish_name: str, cache_key: str = None):
+        """
+        Gemini로 레시피를 생성해서 캐시에 저장하는 흐름
+
+        Args:
+            dish_name: 요리 이름
+            cache_key: 레시피 캐시 키 (None이면 저장하지 않음)
+
+        Returns:
+            dict: 레시피 정보
+        """
+        # 프롬프트 구성
+        prompt = self._build_recipe_prompt(dish_name)
+
+        try:
+            # Gemini API 호출 (호출 계층에서 속도 제한 및 재시도)
+            # 생성 설정은 컨텍스트 캐시를 처음 만들 때 API를 부르므로 로컬 I/O와 같이 처리
+            config = yield _io_op(self._recipe_config)
+            response = yield _api_op("generate_content", self.model_name, contents=prompt, config=config)
+
+            # 응답 텍스트 추출 및 JSON 파싱 (잘린 응답은 복구)
+            recipe_data = yield from self._parse_recipe_flow(dish_name, response.text)
 
-        except json.JSONDecodeError as e:
-            error_msg = f"JSON 파싱 오류: {e}\n\n응답 내용 (처음 500자):\n{response_text[:500]}\n\n응답 내용 (마지막 500자):\n{response_text[-500:]}"
-            print(error_msg)
-            raise ValueError(error_msg)
         except Exception as e:
             print(f"레시피 생성 중 오류 발생: {e}")
             raise
 
-    def generate_image(self, prompt: str, dish_name: str = "dish") -> str:
+        if cache_key is not None:
+            yield _io_op(self._store_recipe, cache_key, dish_name, recipe_data)
+
+        return recipe_data
+
+    def generate_recipes(self, dish_names: list, use_cache: bool = True, profile=None, max_workers: int = 4) -> list:
         """
-        Imagen을 사용해서 요리 이미지 생성
+        여러 요리의 레시피를 한꺼번에 생성 (식단표, 메뉴 미리 만들기 등)
+
+        캐시에 없는 요리는 출력 토큰 상한에 맞는 수만큼 묶어서 요청 하나로 생성합니다 (레시피 배열 구조화 출력).
+        묶음 크기는 앞선 응답의 레시피당 출력 토큰 수로 계속 보정하므로, 다음 묶음은 그 결과를 보고 만듭니다.
+        응답에서 빠졌거나, 잘렸거나, 스키마에 맞지 않는 요리만 따로 떼어 generate_recipe로 하나씩 다시 생성하고,
+        요청 자체가 실패하면 묶음을 반으로 나눠 다시 요청합니다.
 
         Args:
-            prompt: 이미지 생성 프롬프트
-            dish_name: 요리 이름 (파일명에 사용)
+            dish_names: 요리 이름 리스트
+            use_cache: 레시피 캐시 사용 여부 (recipe_cache가 설정된 경우에만 의미 있음)
+            profile: 이 요청에만 쓸 생성 프로필 (None이면 현재 프로필)
+            max_workers: 동시에 보낼 요청 수
 
         Returns:
-            str: 생성된 이미지 파일 경로
+            list: 레시피 리스트 (입력 순서, 항목마다 generate_recipe 반환값과 같은 형식)
+
+        Raises:
+            Exception: 따로 다시 생성한 요리도 실패한 경우 (generate_recipe의 오류)
         """
-        try:
-            # temp 폴더 생성 (없으면)
-            temp_dir = Path("temp")
-            temp_dir.mkdir(exist_ok=True)
+        with profile_scope(profile), self.telemetry.span("recipe.generate_batch", dishes=len(dish_names)) as span:
+            recipes = {}
+            pending = []
+            for dish_name in dict.fromkeys(dish_names):
+                cached_recipe = None
+                if self.recipe_cache is not None and use_cache:
+                    cached_recipe = self._cached_recipe(dish_name, self.generation_key(dish_name))
+                if cached_recipe is not None:
+                    recipes[dish_name] = cached_recipe
+                else:
+                    pending.append(dish_name)
 
-            # 이미지 생성 프롬프트 (영어로 번역)
-            image_prompt = f"A professional food photography of {prompt}, beautifully plated, appetizing, high quality, restaurant style"
+            span.set(cached=len(recipes), pending=len(pending))
+            if pending:
+                print(f"🍱 레시피 {len(pending)}개를 묶어서 생성합니다 (캐시 {len(recipes)}개)")
 
-            print(f"🎨 이미지 생성 프롬프트: {image_prompt}")
+            executor = ThreadPoolExecutor(max_workers=max_workers)
+            futures = {}
+            # 아직 묶음으로 보내지 않은 요리 (작업자가 빌 때마다 그때의 묶음 크기로 꺼냄)
+            queued = list(pending)
+
+            def submit(batch: list):
+                # 한 요리만 남은 묶음은 단일 요청 경로 (응답 복구/재생성 포함)
+                fn = self.generate_recipe if len(batch) == 1 else self._request_recipe_batch
+                futures[executor.submit(run_in_context(fn), batch[0] if len(batch) == 1 else batch, use_cache)] = batch
+
+            def refill():
+                while queued and len(futures) < max_workers:
+                    batch_size = self.recipe_batch_size()
+                    submit(queued[:batch_size])
+                    del queued[:batch_size]
+
+            try:
+                refill()
+                while futures:
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        batch = futures.pop(future)
+                        if len(batch) == 1:
+                            recipes[batch[0]] = future.result()
+                            continue
+
+                        try:
+                            found = future.result()
+                        except DeadlineExceeded:
+                            raise
+                        except Exception as e:
+                            # 요청 자체가 실패하면 반으로 나눠서 다시 요청
+                            print(f"⚠️ 레시피 {len(batch)}개 묶음 요청 실패, 나눠서 다시 요청합니다: {e}")
+                            self.telemetry.metrics.inc("recipe_batch_splits_total")
+                            middle = len(batch) // 2
+                            submit(batch[:middle])
+                            submit(batch[middle:])
+                            continue
 
-            # Imagen 4 모델 사용
-            response = self.client.models.generate_images(
-                model="imagen-4.0-generate-001",
-                prompt=image_prompt,
-                config=types.GenerateImagesConfig(
-                    number_of_images=1,
-                    aspect_ratio="1:1",
-                )
+                        recipes.update(found)
+                        retry = [dish_name for dish_name in batch if dish_name not in found]
+                        self.telemetry.metrics.inc("recipe_batch_dishes_total", len(found), outcome="batched")
+                        if retry:
+                            print(f"🩹 묶음 응답에서 빠진 레시피 {len(retry)}개를 따로 생성합니다: {', '.join(retry)}")
+                            self.telemetry.metrics.inc("recipe_batch_dishes_total", len(retry), outcome="retried")
+                        for dish_name in retry:
+                            submit([dish_name])
+                    refill()
+            finally:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+            return [recipes[dish_name] for dish_name in dish_names]
+
+    def recipe_batch_size(self) -> int:
+        """
+        현재 프로필의 출력 토큰 상한에 맞는 한 번의 요청에 묶을 요리 수
+        (생각 토큰 몫을 빼고, 레시피 하나의 출력 토큰 추정값으로 나눔)
+
+        Returns:
+            int: 묶음 크기 (1 ~ MAX_RECIPES_PER_REQUEST)
+        """
+        profile = self.active_profile()
+        thinking_budget = profile.get("thinking_budget")
+        reserve = DYNAMIC_THINKING_RESERVE if thinking_budget is None or thinking_budget < 0 else thinking_budget
+        available = (profile["max_output_tokens"] - reserve) * BATCH_OUTPUT_HEADROOM
+        with self._recipe_output_tokens_lock:
+            per_recipe = self._recipe_output_tokens
+        return max(1, min(self.MAX_RECIPES_PER_REQUEST, int(available // per_recipe)))
+
+    def _request_recipe_batch(self, dish_names: list, use_cache: bool = True) -> dict:
+        """
+        여러 요리의 레시피를 한 번의 요청으로 생성해서 캐시에 저장
+
+        Args:
+            dish_names: 요리 이름 리스트 (2개 이상)
+            use_cache: 생성한 레시피를 캐시에 저장할지 여부
+
+        Returns:
+            dict: {요리 이름: 레시피} - 응답에서 빠졌거나 잘렸거나 스키마에 맞지 않는 요리는 없음
+        """
+        with self.telemetry.span("recipe.batch_request", dishes=len(dish_names)) as span:
+            # 컨텍스트 캐시에는 단일 레시피 지시문이 들어 있으므로 묶음 지시문은 system_instruction으로 보냄
+            config = self._recipe_config(cached=False)
+            config.system_instruction = self.recipe_batch_instruction
+            config.response_schema = list[BatchRecipe]
+            response = self.calls.call(
+                self.model_name,
+                self.client.models.generate_content,
+                model=self.model_name,
+                contents=self._build_recipe_batch_prompt(dish_names),
+                config=config
             )
 
-            # 생성된 이미지 추출
-            if response.generated_images:
-                generated_image = response.generated_images[0]
+            recipes = self._match_batch_recipes(dish_names, self._parse_recipe_array(response.text))
+            span.set(returned=len(recipes))
 
-                # 이미지 데이터를 파일로 저장
-                # dish_name에서 특수문자 제거
-                safe_dish_name = "".join(c for c in dish_name if c.isalnum() or c in (' ', '_')).strip()
-                safe_dish_name = safe_dish_name.replace(' ', '_')
+            # 레시피 하나의 출력 토큰 수 추정값 보정 (잘린 응답이면 완성된 레시피 수로 나눠서 크게 잡힘)
+            # (쓸 수 있는 레시피가 하나도 없으면 나눌 기준이 없으므로 보정하지 않음)
+            usage = getattr(response, "usage_metadata", None)
+            output_tokens = getattr(usage, "candidates_token_count", None) if usage is not None else None
+            if output_tokens and recipes:
+                self._observe_recipe_tokens(output_tokens / len(recipes))
 
-                image_path = temp_dir / f"{safe_dish_name}_image.png"
+        if self.recipe_cache is not None and use_cache:
+            for dish_name, recipe in recipes.items():
+                self._store_recipe(self.generation_key(dish_name), dish_name, recipe)
+        return recipes
 
-                # 이미지 데이터 저장
-                # PIL Image 객체인 경우
-                if hasattr(generated_image, 'save'):
-                    # PIL Image 객체인 경우 save 메서드 사용
-                    generated_image.save(image_path)
-                elif hasattr(generated_image, 'image'):
-                    # image 속성이 있는 경우
-                    image_data = generated_image.image
-                    if hasattr(image_data, 'save'):
-                        # PIL Image 객체
-                        image_data.save(image_path)
-                    elif isinstance(image_data, str):
-                        # base64 인코딩된 문자열인 경우
-                        image_bytes = base64.b64decode(image_data)
-                        with open(image_path, 'wb') as f:
-                            f.write(image_bytes)
-                    elif isinstance(image_data, bytes):
-                        # 이미 bytes인 경우
-                        with open(image_path, 'wb') as f:
-                            f.write(image_data)
-                elif hasattr(generated_image, 'bytes'):
-                    # bytes 속성이 있는 경우
-                    with open(image_path, 'wb') as f:
-                        f.write(generated_image.bytes)
-                else:
-                    raise Exception(f"알 수 없는 이미지 형식: {type(generated_image)}")
+    def _observe_recipe_tokens(self, tokens: float):
+        # 최근 응답에 더 무게를 두는 이동 평균
+        with self._recipe_output_tokens_lock:
+            self._recipe_output_tokens = 0.7 * self._recipe_output_tokens + 0.3 * tokens
 
-                print(f"✅ 이미지 저장 완료: {image_path}")
-                return str(image_path)
-            else:
-                raise Exception("이미지가 생성되지 않았습니다.")
+    def _build_recipe_batch_prompt(self, dish_names: list) -> str:
+        """
+        여러 요리 레시피 생성 프롬프트 구성 (페르소나와 배열 형식은 recipe_batch_instruction 시스템 지시문으로 보냄)
 
-        except Exception as e:
-            print(f"❌ 이미지 생성 중 오류 발생: {e}")
-            raise
+        Args:
+            dish_names: 요리 이름 리스트
 
-    def generate_step_images(self, dish_name: str, recipe_data: dict, progress_callback=None) -> list:
+        Returns:
+            str: Gemini에 보낼 프롬프트
         """
-        레시피의 각 조리 단계별로 이미지를 생성
+        dishes = "\n".join(self._build_recipe_prompt(dish_name) for dish_name in dish_names)
+        return f"""아래 요리 {len(dish_names)}개의 레시피를 배열 하나로 작성해줘.
+
+{dishes}"""
+
+    @staticmethod
+    def _parse_recipe_array(response_text: str) -> list:
+        """
+        레시피 배열 응답에서 완성된 항목만 추출 (잘린 응답이면 마지막 미완성 항목은 버림)
 
         Args:
-            dish_name: 요리 이름
-            recipe_data: 레시피 데이터 (steps 키 포함)
-            progress_callback: 진행 상황 콜백 함수 (optional)
+            response_text: Gemini 응답 텍스트
 
         Returns:
-            list: 생성된 이미지 파일 경로 리스트
+            list: 파싱한 항목 리스트
         """
-        image_paths = []
+        text = (response_text or "").strip()
+        start = text.find("[")
+        if start < 0:
+            return []
 
-        if 'steps' not in recipe_data:
-            raise ValueError("recipe_data에 'steps' 키가 없습니다.")
+        decoder = json.JSONDecoder()
+        items = []
+        position = start + 1
+        while True:
+            while position < len(text) and text[position] in " \t\r\n,":
+                position += 1
+            if position >= len(text) or text[position] == "]":
+                break
+            try:
+                item, position = decoder.raw_decode(text, position)
+            except json.JSONDecodeError:
+                break
+            items.append(item)
+        return items
 
-        steps = recipe_data['steps']
-        total_steps = len(steps)
+    def _match_batch_recipes(self, dish_names: list, items: list) -> dict:
+        """
+        배열 항목을 요청한 요리에 대응 (dish가 요청한 요리명과 맞는 항목만 - 순서로 짐작하면 다른 요리의 레시피가
+        붙을 수 있으므로, 요리명이 맞지 않는 항목은 버리고 그 요리는 단일 요청으로 다시 생성)
 
-        print(f"\n🎨 총 {total_steps}개의 조리 단계 이미지를 생성합니다...")
+        Args:
+            dish_names: 요청한 요리 이름 리스트
+            items: 배열 항목 리스트
 
-        for i, step in enumerate(steps, 1):
+        Returns:
+            dict: {요리 이름: 검증된 레시피}
+        """
+        by_key = {RecipeCache.normalize_dish_name(dish_name): dish_name for dish_name in dish_names}
+        recipes = {}
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            dish_name = by_key.get(RecipeCache.normalize_dish_name(str(item.get("dish", ""))))
+            if dish_name is None or dish_name in recipes:
+                continue
             try:
-                # 진행 상황 콜백 호출
-                if progress_callback:
-                    progress_callback(i, total_steps, "generating")
+                recipes[dish_name] = self._validate_recipe(item)
+            except ValueError:
+                continue
+        return recipes
 
-                # temp 폴더 생성 (없으면)
-                temp_dir = Path("temp")
-                temp_dir.mkdir(exist_ok=True)
-
-                # 단계별 프롬프트 생성
-                # 단계 설명에서 핵심 키워드 추출 (첫 100자)
-                step_desc = step[:100] if len(step) > 100 else step
-
-                # 조리 과정 키워드 파악
-                step_lower = step.lower()
-                cooking_action = ""
-                cookware = ""
-
-                # 조리 도구 파악
-                if "냄비" in step or "끓" in step or "삶" in step:
-                    cookware = "cooking pot"
-                    cooking_action = "cooking in pot"
-                elif "후라이팬" in step or "팬" in step or "볶" in step:
-                    cookware = "frying pan"
-                    cooking_action = "stir-frying in pan"
-                elif "도마" in step or "썰" in step or "자르" in step:
-                    cookware = "cutting board"
-                    cooking_action = "cutting and preparing"
-                elif "그릇" in step or "담" in step or "접시" in step:
-                    cookware = "ceramic bowl"
-                    cooking_action = "plated dish"
-                else:
-                    cookware = "cooking surface"
-                    cooking_action = "food preparation"
+    def _cached_recipe(self, dish_name: str, cache_key: str):
+        """
+        레시피 캐시 조회 - 같은 요리가 없으면 비슷한 요리명 색인으로 표기만 다른 요리의 레시피를 찾음
+
+        Args:
+            dish_name: 요리 이름
+            cache_key: 레시피 캐시 키 (generation_key)
 
-                # 이미지 생성 프롬프트 (조리 과정 중심, 적절한 도구 사용)
-                # 텍스트 오버레이 방지를 위해 맨 앞과 뒤에 강력히 명시
-                image_prompt = f"""NO TEXT, NO WORDS, NO LETTERS, NO TYPOGRAPHY - Pure photography only.
+        Returns:
+            dict | None: 캐시된 레시피 (없으면 None)
+        """
+        cached_recipe = self.recipe_cache.get(cache_key)
+        if cached_recipe is not None:
+            print(f"💾 레시피 캐시 적중: {dish_name}")
+            self._mark_span(cache="hit")
+            return cached_recipe
 
-Korean {dish_name} being prepared. {cooking_action} using {cookware}.
-Home kitchen scene with natural daylight, wooden table, realistic food photography.
-Hands visible during cooking action.
+        if self.dish_index is None:
+            return None
 
-CRITICAL: This must be a photograph with ZERO text overlays, ZERO labels, ZERO captions,
-ZERO watermarks, ZERO annotations. Just show the food and cooking tools. No written content."""
+        match = self.dish_index.match(dish_name)
+        if match is None:
+            return None
 
-                print(f"\n📸 단계 {i}/{total_steps} 이미지 생성 중...")
-                print(f"   프롬프트: {image_prompt[:80]}...")
-
-                # Imagen 4 모델 사용
-                response = self.client.models.generate_images(
-                    model="imagen-4.0-generate-001",
-                    prompt=image_prompt,
-                    config=types.GenerateImagesConfig(
-                        number_of_images=1,
-                        aspect_ratio="1:1",
-                    )
-                )
-
-                # 생성된 이미지 추출
-                if response.generated_images:
-                    generated_image = response.generated_images[0]
-
-                    # 이미지 파일 경로 생성
-                    safe_dish_name = "".join(c for c in dish_name if c.isalnum() or c in (' ', '_')).strip()
-                    safe_dish_name = safe_dish_name.replace(' ', '_')
-                    image_path = temp_dir / f"{safe_dish_name}_step_{i}.png"
-
-                    # 이미지 저장
-                    if hasattr(generated_image, 'save'):
-                        generated_image.save(image_path)
-                    elif hasattr(generated_image, 'image'):
-                        image_data = generated_image.image
-                        if hasattr(image_data, 'save'):
-                            image_data.save(image_path)
-                        elif isinstance(image_data, str):
-                            image_bytes = base64.b64decode(image_data)
-                            with open(image_path, 'wb') as f:
-                                f.write(image_bytes)
-                        elif isinstance(image_data, bytes):
-                            with open(image_path, 'wb') as f:
-                                f.write(image_data)
-                    elif hasattr(generated_image, 'bytes'):
-                        with open(image_path, 'wb') as f:
-                            f.write(generated_image.bytes)
-                    else:
-                        raise Exception(f"알 수 없는 이미지 형식: {type(generated_image)}")
-
-                    print(f"   ✅ 단계 {i} 이미지 저장: {image_path}")
-                    image_paths.append(str(image_path))
-
-                    # 성공 콜백
-                    if progress_callback:
-                        progress_callback(i, total_steps, "completed")
-                else:
-                    print(f"   ⚠️ 단계 {i} 이미지 생성 실패")
-                    image_paths.append(None)
+        # 비슷한 요리의 캐시 키도 같은 모델/프롬프트/설정으로 만들어야 적중 (설정이 바뀌었으면 새로 생성)
+        matched_name, score = match
+        cached_recipe = self.recipe_cache.get(self.generation_key(matched_name))
+        if cached_recipe is not None:
+            print(f"🔎 비슷한 요리 레시피 재사용: {dish_name} → {matched_name} (유사도 {score:.2f})")
+            self._mark_span(cache="similar", matched_dish=matched_name, similarity=round(score, 3))
+            self.telemetry.metrics.inc("recipe_similar_hits_total")
+        return cached_recipe
 
-                    # 실패 콜백
-                    if progress_callback:
-                        progress_callback(i, total_steps, "failed")
+    def _store_recipe(self, cache_key: str, dish_name: str, recipe: dict):
+        """
+        레시피를 캐시에 저장하고 비슷한 요리명 색인과 재료 색인에 추가
+
+        Args:
+            cache_key: 레시피 캐시 키
+            dish_name: 요리 이름
+            recipe: 레시피 정보
+        """
+        self.recipe_cache.set(cache_key, dish_name, recipe)
+        if self.dish_index is not None:
+            self.dish_index.add(dish_name)
+        if self.ingredient_index is not None:
+            self.ingredient_index.add(RecipeCache.normalize_dish_name(dish_name), recipe.get("ingredients", []))
+
+    def find_recipes_by_ingredients(self, ingredients, limit: int = 5) -> list:
+        """
+        가진 재료로 만들 수 있는 저장된 레시피 찾기 (LLM 호출 없음)
+
+        Args:
+            ingredients: 재료 ("돼지고기, 김치, 두부" 같은 문자열 또는 리스트)
+            limit: 최대 결과 수
+
+        Returns:
+            list: [{"dish_name", "coverage", "matched", "missing"}] 잘 맞는 순 (IngredientIndex.search 참고)
+                  - 현재 모델/프롬프트/설정의 레시피 캐시에 남아 있는 요리만
+        """
+        if self.ingredient_index is None or self.recipe_cache is None:
+            return []
+
+        with self.telemetry.span("recipe.ingredient_search") as span:
+            results = []
+            for result in self.ingredient_index.search(ingredients, limit=None):
+                if len(results) >= limit:
+                    break
+                # 예전 설정으로 만든 레시피나 캐시에서 정리된 레시피는 건너뜀
+                if self.recipe_cache.contains(self.generation_key(result["dish_name"])):
+                    results.append(result)
+            span.set(results=len(results))
+            return results
+
+    def dish_for_ingredients(self, ingredients) -> tuple:
+        """
+        재료로 만들 요리 정하기
+        잘 맞는 저장된 레시피(입력 재료 중 min_coverage 이상을 쓰는 레시피)가 있으면 그 요리를,
+        없으면 재료로 새 레시피를 생성할 요리명을 돌려줍니다.
+
+        Args:
+            ingredients: 재료 ("돼지고기, 김치, 두부" 같은 문자열 또는 리스트)
+
+        Returns:
+            tuple: (요리 이름, 검색 결과 항목 또는 None) - None이면 generate_recipe가 새로 생성함
+
+        Raises:
+            ValueError: 재료를 하나도 찾지 못한 경우
+        """
+        names = parse_query(ingredients)
+        if not names:
+            raise ValueError("재료를 입력해주세요.")
+
+        results = self.find_recipes_by_ingredients(names, limit=1)
+        if results and results[0]["coverage"] >= self.ingredient_index.min_coverage:
+            match = results[0]
+            print(f"🥕 재료로 저장된 레시피 찾음: {', '.join(names)} → {match['dish_name']} "
+                  f"({len(match['matched'])}/{len(names)}개 일치)")
+            self.telemetry.metrics.inc("ingredient_search_total", outcome="hit")
+            return match["dish_name"], match
+
+        self.telemetry.metrics.inc("ingredient_search_total", outcome="fallback")
+        return f"{', '.join(names)} 활용 요리", None
+
+    def generate_recipe_from_ingredients(self, ingredients, use_cache: bool = True, profile=None) -> dict:
+        """
+        가진 재료로 레시피 얻기 - 잘 맞는 저장된 레시피가 있으면 LLM 호출 없이 재사용하고, 없으면 새로 생성
+
+        Args:
+            ingredients: 재료 ("돼지고기, 김치, 두부" 같은 문자열 또는 리스트)
+            use_cache: 레시피 캐시 사용 여부
+            profile: 이 요청에만 쓸 생성 프로필 (None이면 현재 프로필)
+
+        Returns:
+            dict: 레시피 정보 (generate_recipe와 같은 형식)
+        """
+        # 저장된 레시피도 같은 프로필로 만든 것만 재사용
+        with profile_scope(profile):
+            dish_name, _ = self.dish_for_ingredients(ingredients)
+            return self.generate_recipe(dish_name, use_cache)
+
+    def generate_recipe_stream(self, dish_name: str, use_cache: bool = True, profile=None):
+        """
+        요리명을 받아서 Gemini 스트리밍으로 레시피를 생성하고, 완성된 항목을 도착하는 즉시 전달
+
+        Args:
+            dish_name: 요리 이름
+            use_cache: 레시피 캐시 사용 여부 (recipe_cache가 설정된 경우에만 의미 있음)
+            profile: 이 요청에만 쓸 생성 프로필 (None이면 현재 프로필)
+
+        Yields:
+            tuple: (이벤트 이름, 값)
+                - ("title", 제목), ("cooking_time", 소요 시간)
+                - ("ingredient", 재료) - 재료마다 한 번
+                - ("step", 조리 단계) - 단계마다 한 번
+                - ("recipe", 레시피 dict) - 마지막에 한 번, generate_recipe 반환값과 같은 형식
+        """
+        # 제너레이터는 yield 사이에 호출자 코드가 실행되므로, yield가 없는 구간에서만 프로필을 지정
+        profile = self.active_profile() if profile is None else get_profile(profile)
+        cache_key = cached_recipe = None
+        with profile_scope(profile):
+            flight_key = self.generation_key(dish_name)
+            if self.recipe_cache is not None and use_cache:
+                cache_key = flight_key
+                cached_recipe = self._cached_recipe(dish_name, cache_key)
+
+        if cached_recipe is not None:
+            yield from self._recipe_events(cached_recipe)
+            yield "recipe", cached_recipe
+            return
+
+        # 같은 요리/설정의 스트림이 진행 중이면 그 스트림의 이벤트를 처음부터 함께 받음
+        yield from self.flights.stream(
+            "recipe_stream", flight_key, lambda: self._stream_recipe(dish_name, cache_key, profile)
+        )
+
+    def _stream_recipe(self, dish_name: str, cache_key: str = None, profile: dict = None):
+        """
+        Gemini 스트리밍으로 레시피를 생성하면서 이벤트 전달 (generate_recipe_stream 참고)
+
+        Args:
+            dish_name: 요리 이름
+            cache_key: 레시피 캐시 키 (None이면 저장하지 않음)
+            profile: 생성 프로필 (None이면 현재 프로필)
+
+        Yields:
+            tuple: (이벤트 이름, 값)
+        """
+        # SingleFlight의 스트림 읽기 스레드에서만 실행되므로 생성이 끝날 때까지 프로필 유지
+        with profile_scope(profile):
+            # 프롬프트 구성
+            prompt = self._build_recipe_prompt(dish_name)
+            parser = RecipeStreamParser()
+            chunks = []
+
+            # 제너레이터는 yield 사이에 호출자 코드가 실행되므로, API 호출 구간에서만 이 스팬을 현재 스팬으로 지정
+            span = self.telemetry.start_span("recipe.stream", dish_name=dish_name)
+            try:
+                # Gemini 스트리밍 API 호출 (호출 계층에서 속도 제한 및 재시도)
+                stream = iter(self.calls.stream(
+                    self.model_name,
+                    self.client.models.generate_content_stream,
+                    model=self.model_name,
+                    contents=prompt,
+                    config=self._recipe_config()
+                ))
+
+                while True:
+                    with self.telemetry.activate(span):
+                        chunk = next(stream, None)
+                    if chunk is None:
+                        break
+                    if not chunk.text:
+                        continue
+                    chunks.append(chunk.text)
+                    yield from parser.feed(chunk.text)
+
+                # 전체 응답으로 최종 검증 (잘린 응답은 복구)
+                with self.telemetry.activate(span):
+                    recipe_data = self._parse_recipe_response(dish_name, "".join(chunks))
 
             except Exception as e:
-                print(f"   ❌ 단계 {i} 이미지 생성 중 오류: {e}")
-                image_paths.append(None)
+                print(f"레시피 생성 중 오류 발생: {e}")
+                self.telemetry.finish_span(span, e)
+                raise
+            except BaseException:
+                # 호출자가 스트림을 중간에 닫은 경우
+                span.set(cancelled=True)
+                self.telemetry.finish_span(span)
+                raise
 
-                # 에러 콜백
-                if progress_callback:
-                    progress_callback(i, total_steps, "error")
+            self.telemetry.finish_span(span)
 
-        print(f"\n✅ 단계별 이미지 생성 완료! (성공: {len([p for p in image_paths if p])}/{total_steps})")
-        return image_paths
+            if cache_key is not None:
+                self._store_recipe(cache_key, dish_name, recipe_data)
+
+            # 복구 과정에서 새로 채워진 항목 전달
+            yield from self._missing_events(parser.result(), recipe_data)
+            yield "recipe", recipe_data
+
+    @staticmethod
+    def _missing_events(streamed: dict, recipe_data: dict):
+        """
+        스트리밍 중 전달하지 못한 항목(복구로 채워진 항목)의 이벤트 생성
+
+        Args:
+            streamed: 스트리밍 중 전달한 항목 (RecipeStreamParser.result())
+            recipe_data: 최종 레시피
+
+        Yields:
+            tuple: (이벤트 이름, 값)
+        """
+        for key in ("title", "cooking_time"):
+            if key not in streamed:
+                yield key, recipe_data[key]
+        for key, event in (("ingredients", "ingredient"), ("steps", "step")):
+            for item in recipe_data[key][len(streamed.get(key, [])):]:
+                yield event, item
+
+    @staticmethod
+    def _recipe_events(recipe_data: dict):
+        """
+        완성된 레시피를 generate_recipe_stream과 같은 이벤트 순서로 변환
+
+        Args:
+            recipe_data: 레시피 정보
+
+        Yields:
+            tuple: (이벤트 이름, 값)
+        """
+        yield "title", recipe_data.get("title")
+        yield "cooking_time", recipe_data.get("cooking_time")
+        for ingredient in recipe_data.get("ingredients", []):
+            yield "ingredient", ingredient
+        for step in recipe_data.get("steps", []):
+            yield "step", step
+
+    @staticmethod
+    def _parse_recipe_text(response_text: str) -> dict:
+        """
+        Gemini 응답 텍스트를 레시피 dict로 파싱
+
+        Args:
+            response_text: Gemini 응답 텍스트
+
+        Returns:
+            dict: 레시피 정보
+        """
+        response_text = response_text.strip()
+
+        # Gemini가 가끔 ```json ``` 로 감싸서 반환할 수 있으므로 처리
+        if response_text.startswith("```json"):
+            response_text = response_text[7:]  # ```json 제거
+        if response_text.startswith("```"):
+            response_text = response_text[3:]  # ``` 제거
+        if response_text.endswith("```"):
+            response_text = response_text[:-3]  # ``` 제거
+
+        response_text = response_text.strip()
+
+        try:
+            # JSON 파싱
+            return json.loads(response_text)
+        except json.JSONDecodeError as e:
+            error_msg = f"JSON 파싱 오류: {e}\n\n응답 내용 (처음 500자):\n{response_text[:500]}\n\n응답 내용 (마지막 500자):\n{response_text[-500:]}"
+            print(error_msg)
+            raise ValueError(error_msg)
+
+    def _parse_recipe_response(self, dish_name: str, response_text: str) -> dict:
+        """
+        레시피 응답을 파싱하고, 잘리거나 조금 깨진 응답은 버리지 않고 복구 (_parse_recipe_flow를 호출한 스레드에서 실행)
+
+        Args:
+            dish_name: 요리 이름
+            response_text: Gemini 응답 텍스트
+
+        Returns:
+            dict: 레시피 정보 (title, cooking_time, ingredients, steps)
+        """
+        return self._drive(self._parse_recipe_flow(dish_name, response_text))
+
+    def _parse_recipe_flow(self, dish_name: str, response_text: str):
+        """
+        레시피 응답을 파싱하고, 잘리거나 조금 깨진 응답은 버리지 않고 복구하는 흐름
+
+        1. 정상 JSON이면 그대로 사용
+        2. 모든 필드가 완성된 상태로 잘렸으면 (닫는 괄호 누락 등) 로컬에서 복구
+        3. 일부 필드만 완성되었으면 빠진 뒷부분만 다시 요청해서 합침
+        4. 살릴 내용이 없거나 뒷부분 요청도 실패하면 전체를 한 번 다시 생성
+
+        Args:
+            dish_name: 요리 이름
+            response_text: Gemini 응답 텍스트
+
+        Returns:
+            dict: 레시피 정보 (title, cooking_time, ingredients, steps)
+        """
+        try:
+            recipe_data = self._validate_recipe(self._parse_recipe_text(response_text))
+            self._count_response("parsed")
+            return recipe_data
+        except ValueError:
+            pass
+
+        # 완성된 필드만 추출
+        parser = RecipeStreamParser()
+        parser.feed(response_text or "")
+        partial = {key: value for key, value in parser.result().items() if key in RECIPE_FIELD_TYPES}
+        missing = [key for key in RECIPE_FIELD_TYPES if not parser.is_complete(key)]
+
+        if partial and not missing:
+            print("🩹 잘린 레시피 응답을 로컬에서 복구했습니다.")
+            self._count_response("repaired_locally")
+            return self._validate_recipe(partial)
+
+        if partial:
+            try:
+                recipe_data = yield from self._recipe_tail_flow(dish_name, partial, missing)
+                print(f"🩹 잘린 레시피 응답의 뒷부분만 다시 받아 복구했습니다. (누락: {', '.join(missing)})")
+                self._count_response("repaired_tail")
+                return recipe_data
+            except Exception as e:
+                print(f"⚠️ 레시피 뒷부분 복구 실패: {e}")
+
+        # 전체 재생성 (한 번만)
+        print("🔄 레시피 응답을 복구할 수 없어 다시 생성합니다.")
+        self._count_response("regenerated")
+        config = yield _io_op(self._recipe_config)
+        response = yield _api_op("generate_content", self.model_name, contents=self._build_recipe_prompt(dish_name),
+                                 config=config)
+        return self._validate_recipe(self._parse_recipe_text(response.text))
+
+    def _recipe_tail_flow(self, dish_name: str, partial: dict, missing: list):
+        """
+        잘린 레시피의 빠진 필드만 다시 요청해서 기존 내용과 합치는 흐름
+
+        Args:
+            dish_name: 요리 이름
+            partial: 완성된 필드 (배열은 완성된 원소까지)
+            missing: 완성되지 않은 필드 이름 리스트
+
+        Returns:
+            dict: 합쳐진 레시피 정보
+        """
+        prompt = f"""
+요리명: {dish_name}
+
+아래는 이 요리의 레시피 JSON을 작성하다가 중간에 끊긴 내용이야.
+
+{json.dumps(partial, ensure_ascii=False, indent=2)}
+
+끊긴 뒷부분만 이어서 작성해줘. 다음 키만 포함한 JSON으로 답해줘: {", ".join(missing)}
+배열(ingredients, steps)은 위에 이미 있는 항목은 빼고, 그 다음에 올 항목만 넣어줘.
+"""
+        tail_schema = create_model("RecipeTail", **{key: (RECIPE_FIELD_TYPES[key], ...) for key in missing})
+        config = yield _io_op(self._recipe_config)
+        config.response_schema = tail_schema
+
+        response = yield _api_op("generate_content", self.model_name, contents=prompt, config=config)
+        tail = json.loads(response.text)
+
+        recipe_data = dict(partial)
+        for key in missing:
+            if isinstance(partial.get(key), list):
+                recipe_data[key] = partial[key] + tail[key]
+            else:
+                recipe_data[key] = tail[key]
+        return self._validate_recipe(recipe_data)
+
+    @staticmethod
+    def _validate_recipe(recipe_data) -> dict:
+        """
+        레시피 구조 검증 (필수 키와 타입 확인, 스키마에 없는 키는 제거)
+
+        Args:
+            recipe_data: 파싱한 레시피
+
+        Returns:
+            dict: 검증된 레시피 정보
+
+        Raises:
+            ValueError: 필수 키가 없거나 타입이 맞지 않는 경우
+        """
+        recipe = Recipe.model_validate(recipe_data)
+        if not recipe.steps:
+            raise ValueError("레시피에 조리 단계가 없습니다.")
+        return recipe.model_dump()
+
+    def _count_response(self, name: str):
+        with self._response_stats_lock:
+            self._response_stats[name] += 1
+
+    def coalesce_stats(self) -> dict:
+        """
+        진행 중인 같은 요청 합치기 통계
+
+        Returns:
+            dict: {"recipe" / "recipe_stream" / "image": {"leaders": 직접 실행, "followers": 합쳐진 호출 수}}
+        """
+        return self.flights.stats()
+
+    def response_stats(self) -> dict:
+        """
+        레시피 응답 처리 통계
+
+        Returns:
+            dict: parsed(정상), repaired_locally(로컬 복구), repaired_tail(뒷부분만 재요청), regenerated(전체 재생성) 횟수
+        """
+        with self._response_stats_lock:
+            return dict(self._response_stats)
+
+    def _build_recipe_prompt(self, dish_name: str) -> str:
+        """
+        레시피 생성 프롬프트 구성 (페르소나와 출력 형식은 시스템 지시문으로 보내므로 요리명만)
+
+        Args:
+            dish_name: 요리 이름
+
+        Returns:
+            str: Gemini에 보낼 프롬프트
+        """
+        return f"요리명: {dish_name}"
+
+    def _recipe_config(self, cached: bool = True) -> types.GenerateContentConfig:
+        """
+        레시피 생성 설정 - 시스템 지시문은 컨텍스트 캐시가 있으면 캐시 이름으로, 없으면 system_instruction으로 보냄
+        온도, 출력 토큰 상한, 생각 토큰 예산은 현재 프로필을 따름
+
+        Args:
+            cached: 컨텍스트 캐시 사용 여부 (False면 항상 system_instruction, 캐시 키 계산용)
+
+        Returns:
+            types.GenerateContentConfig: Gemini 생성 설정
+        """
+        profile = self.active_profile()
+        thinking_budget = profile.get("thinking_budget")
+        config = types.GenerateContentConfig(
+            system_instruction=self.recipe_instruction,
+            temperature=profile["temperature"],
+            top_p=0.95,
+            top_k=40,
+            # 출력 토큰 상한 (Gemini 2.5는 생각 토큰도 여기에 포함)
+            max_output_tokens=profile["max_output_tokens"],
+            # 생각 토큰 예산 (None이면 모델 기본값, 0이면 생각 끔, -1이면 모델이 정함)
+            thinking_config=None if thinking_budget is None else types.ThinkingConfig(thinking_budget=thinking_budget),
+            # 구조화 출력: 스키마에 맞는 JSON만 반환
+            response_mime_type="application/json",
+            response_schema=Recipe,
+        )
+
+        cache_name = self.context_cache.name() if cached and self.context_cache is not None else None
+        if cache_name is not None:
+            # 캐시에 이미 시스템 지시문이 있으므로 함께 보내면 안 됨
+            config.system_instruction = None
+            config.cached_content = cache_name
+        return config
+
+    @staticmethod
+    def _config_fingerprint(config) -> dict:
+        """
+        캐시 키용 생성 설정 dict (response_schema의 파이썬 타입은 JSON 스키마로 변환)
+
+        Args:
+            config: types.GenerateContentConfig
+
+        Returns:
+            dict: JSON 직렬화 가능한 설정
+        """
+        fingerprint = config.model_dump(mode="json", exclude_none=True, exclude={"response_schema"})
+        if config.response_schema is not None:
+            schema = config.response_schema
+            if isinstance(schema, types.Schema):
+                fingerprint["response_schema"] = schema.model_dump(mode="json", exclude_none=True)
+            else:
+                fingerprint["response_schema"] = TypeAdapter(schema).json_schema()
+        return fingerprint
+
+    def generation_key(self, dish_name: str) -> str:
+        """
+        생성 키 - 정규화된 요리명 + 모델 + 프롬프트 템플릿 + 생성 설정
+        레시피 캐시 키와 진행 중인 같은 요청 합치기(작업 큐 포함)에 사용하며, 설정이 바뀌면 키도 바뀜
+
+        Args:
+            dish_name: 요리 이름
+
+        Returns:
+            str: 생성 키
+        """
+        return RecipeCache.make_key(
+            dish_name,
+            self.model_name,
+            self._build_recipe_prompt("{dish_name}"),
+            self._config_fingerprint(self._recipe_config(cached=False)),
+        )
+
+    def generate_image(self, prompt: str, dish_name: str = "dish", profile=None) -> str:
+        """
+        Imagen을 사용해서 요리 이미지 생성
+
+        Args:
+            prompt: 이미지 생성 프롬프트
+            dish_name: 요리 이름 (파일명에 사용)
+            profile: 이 요청에만 쓸 생성 프로필 (None이면 현재 프로필)
+
+        Returns:
+            str: 생성된 이미지 파일 경로
+        """
+        with profile_scope(profile), owner_scope(), self.telemetry.span("image.hero", dish_name=dish_name):
+            return self._drive(self._hero_image_flow(prompt, dish_name))
+
+    def _hero_image_flow(self, prompt: str, dish_name: str):
+        """
+        대표 이미지 생성 흐름
+
+        Args:
+            prompt: 이미지 생성 프롬프트
+            dish_name: 요리 이름 (파일명에 사용)
+
+        Returns:
+            str: 생성된 이미지 파일 경로
+        """
+        try:
+            # 이미지 생성 프롬프트 (영어로 번역)
+            image_prompt = self._build_hero_image_prompt(prompt)
+
+            print(f"🎨 이미지 생성 프롬프트: {image_prompt}")
+
+            # Imagen 4 모델 사용 (캐시에 있으면 재사용)
+            images = yield from self._images_flow(image_prompt)
+
+            # 생성된 이미지 추출
+            if images:
+                # 이미지 데이터 저장
+                image_path = yield _io_op(self._store_image, dish_name, "image", images[0])
+
+                print(f"✅ 이미지 저장 완료: {image_path}")
+                return image_path
+            else:
+                raise Exception("이미지가 생성되지 않았습니다.")
+
+        except Exception as e:
+            print(f"❌ 이미지 생성 중 오류 발생: {e}")
+            raise
+
+    def generate_step_images(self, dish_name: str, recipe_data: dict, progress_callback=None, max_workers: int = 1,
+                             image_variations: bool = False, storyboard: bool = False, deadline=None,
+                             profile=None, on_step=None) -> list:
+        """
+        레시피의 각 조리 단계별로 이미지를 생성
+
+        조리 단계 프롬프트는 요리명과 조리 도구/동작 조합으로만 결정되므로,
+        같은 프롬프트를 쓰는 단계들은 Imagen을 한 번만 호출해서 결과를 나눠 씁니다.
+
+        Args:
+            dish_name: 요리 이름
+            recipe_data: 레시피 데이터 (steps 키 포함)
+            progress_callback: 진행 상황 콜백 함수 (optional)
+            max_workers: 동시에 생성할 이미지 수 (1이면 한 프롬프트씩 순서대로 생성)
+            image_variations: True면 같은 프롬프트를 쓰는 단계 수만큼 이미지를 한 번에 요청해서
+                단계마다 다른 이미지를 사용 (number_of_images > 1)
+            storyboard: True면 모든 단계를 격자 이미지 한 장으로 요청해서 칸별로 잘라 사용
+                (칸 경계를 찾지 못하거나 단계가 9개보다 많으면 단계별 요청으로 진행)
+            deadline: 제한 시간 (deadline.Deadline 또는 초, None이면 현재 컨텍스트의 Deadline) - 마감되면 남은 단계는
+                기다리지 않고 "timeout"(취소는 "cancelled") 상태로 콜백한 뒤 그때까지 끝난 이미지만 반환
+            profile: 이 요청에만 쓸 생성 프로필 (None이면 현재 프로필)
+            on_step: 단계가 끝날 때마다 (단계 번호, 상태, 이미지 경로)로 호출할 함수 (optional, progress_callback과
+                같은 스레드에서 호출) - 상태는 "completed" / "failed" / "error" / "timeout" / "cancelled"
+
+        Returns:
+            list: 생성된 이미지 파일 경로 리스트 (단계 순서, 실패하거나 끝나지 못한 단계는 None)
+        """
+        if 'steps' not in recipe_data:
+            raise ValueError("recipe_data에 'steps' 키가 없습니다.")
+
+        if deadline is None:
+            deadline = current_deadline()
+        elif not isinstance(deadline, Deadline):
+            deadline = Deadline(deadline)
+
+        with self.telemetry.span("images.steps", dish_name=dish_name, steps=len(recipe_data['steps'])) as span, \
+                deadline_scope(deadline), profile_scope(profile), owner_scope():
+            image_paths = self._generate_step_images(dish_name, recipe_data['steps'], progress_callback, max_workers,
+                                                     image_variations, storyboard, deadline, on_step)
+            span.set(completed=len([p for p in image_paths if p]))
+            if deadline is not None and deadline.expired():
+                span.set(deadline=deadline.reason)
+            return image_paths
+
+    def _generate_step_images(self, dish_name: str, steps: list, progress_callback, max_workers: int,
+                              image_variations: bool, storyboard: bool = False, deadline: Deadline = None,
+                              on_step=None) -> list:
+        total_steps = len(steps)
+        image_paths = [None] * total_steps
+        finished = set()
+
+        if storyboard:
+            if progress_callback:
+                for i in range(1, total_steps + 1):
+                    progress_callback(i, total_steps, "generating")
+
+            results = self._drive(self._storyboard_flow(dish_name, steps))
+            if results is not None:
+                for i, (status, image_path) in results.items():
+                    image_paths[i - 1] = image_path
+                    if progress_callback:
+                        progress_callback(i, total_steps, status)
+                    if on_step:
+                        on_step(i, status, image_path)
+                print(f"\n✅ 단계별 이미지 생성 완료! (스토리보드, 성공: {total_steps}/{total_steps})")
+                return image_paths
+            if deadline is not None and deadline.expired():
+                return self._abandon_steps(image_paths, finished, progress_callback, deadline, on_step)
+
+        # 같은 프롬프트를 쓰는 단계끼리 묶기 (첫 등장 순서 유지)
+        prompt_groups = self._group_step_prompts(dish_name, steps)
+
+        print(f"\n🎨 총 {total_steps}개의 조리 단계 이미지를 생성합니다... (고유 프롬프트 {len(prompt_groups)}개)")
+
+        def report(results):
+            for i, (status, image_path) in results.items():
+                image_paths[i - 1] = image_path
+                finished.add(i)
+                if progress_callback:
+                    progress_callback(i, total_steps, status)
+                if on_step:
+                    on_step(i, status, image_path)
+
+        if max_workers <= 1 or len(prompt_groups) <= 1:
+            # 순차 모드: 한 프롬프트씩 생성 (마감되면 남은 프롬프트는 요청하지 않음)
+            for image_prompt, indices in prompt_groups.items():
+                if deadline is not None and deadline.expired():
+                    break
+                if progress_callback:
+                    for i in indices:
+                        progress_callback(i, total_steps, "generating")
+
+                report(self._generate_prompt_group(dish_name, image_prompt, indices, total_steps, image_variations))
+        else:
+            # 동시 모드: 모든 프롬프트를 한 번에 요청하고 끝나는 순서대로 결과 수집
+            # 콜백은 Streamlit처럼 스레드에 민감한 호출자를 위해 항상 호출한 스레드에서 실행
+            executor = ThreadPoolExecutor(max_workers=min(max_workers, len(prompt_groups)))
+            try:
+                futures = []
+                for image_prompt, indices in prompt_groups.items():
+                    if progress_callback:
+                        for i in indices:
+                            progress_callback(i, total_steps, "generating")
+                    futures.append(executor.submit(
+                        run_in_context(self._generate_prompt_group),
+                        dish_name, image_prompt, indices, total_steps, image_variations
+                    ))
+
+                for future in iter_completed(futures, deadline):
+                    report(future.result())
+            finally:
+                # 마감으로 멈춘 경우 대기 중인 요청은 취소하고, 진행 중인 요청은 기다리지 않음
+                executor.shutdown(wait=False, cancel_futures=True)
+
+        if deadline is not None and len(finished) < total_steps and deadline.expired():
+            return self._abandon_steps(image_paths, finished, progress_callback, deadline, on_step)
+
+        print(f"\n✅ 단계별 이미지 생성 완료! (성공: {len([p for p in image_paths if p])}/{total_steps})")
+        return image_paths
+
+    def _abandon_steps(self, image_paths: list, finished: set, progress_callback, deadline: Deadline,
+                       on_step=None) -> list:
+        """
+        마감 때문에 끝나지 못한 단계를 마감 사유 상태로 보고
+
+        Args:
+            image_paths: 단계별 이미지 경로 리스트 (끝난 단계만 채워짐)
+            finished: 끝난 단계 번호 집합
+            progress_callback: 진행 상황 콜백 함수 (optional)
+            deadline: 마감된 Deadline
+            on_step: 단계별 결과 콜백 함수 (optional, generate_step_images 참고)
+
+        Returns:
+            list: image_paths
+        """
+        total_steps = len(image_paths)
+        abandoned = [i for i in range(1, total_steps + 1) if i not in finished]
+        for i in abandoned:
+            if progress_callback:
+                progress_callback(i, total_steps, deadline.reason)
+            if on_step:
+                on_step(i, deadline.reason, None)
+        self.telemetry.metrics.inc("deadline_abandoned_total", len(abandoned), kind="step_image", reason=deadline.reason)
+        print(f"\n⏱️ 제한 시간 안에 끝나지 않은 단계 {len(abandoned)}개를 두고 반환합니다 "
+              f"(성공: {len([p for p in image_paths if p])}/{total_steps})")
+        return image_paths
+
+    def _storyboard_flow(self, dish_name: str, steps: list):
+        """
+        모든 단계를 격자 이미지 한 장으로 생성해서 칸별로 저장하는 흐름
+
+        Args:
+            dish_name: 요리 이름
+            steps: 조리 단계 리스트
+
+        Returns:
+            dict | None: {단계 번호: ("completed", 이미지 경로)}, 실패하면 None (단계별 요청으로 진행)
+        """
+        shape = grid_shape(len(steps))
+        if shape is None:
+            print(f"   ℹ️ 단계가 {len(steps)}개라서 스토리보드 대신 단계별로 생성합니다")
+            return None
+
+        rows, cols, aspect_ratio = shape
+        with self.telemetry.span("image.storyboard", steps=len(steps), grid=f"{rows}x{cols}") as span:
+            try:
+                print(f"\n🎞️ 스토리보드 ({rows}x{cols}) 이미지 생성 중...")
+                scenes = [self._step_scene(step) for step in steps]
+                image_prompt = build_storyboard_prompt(dish_name, scenes, rows, cols)
+                images = yield from self._images_flow(image_prompt, 1, aspect_ratio)
+                panels = (yield _io_op(split_grid, images[0], rows, cols, len(steps))) if images else None
+            except Exception as e:
+                print(f"   ⚠️ 스토리보드 생성 중 오류: {e}")
+                panels = None
+
+            if panels is None:
+                print("   ⚠️ 스토리보드 칸을 나누지 못해서 단계별로 생성합니다")
+                span.set(outcome="fallback")
+                self.telemetry.metrics.inc("storyboard_total", outcome="fallback")
+                return None
+
+            results = {}
+            for i, panel in enumerate(panels, 1):
+                image_path = yield _io_op(self._store_image, dish_name, self._step_image_name(i), panel)
+                print(f"   ✅ 단계 {i} 이미지 저장: {image_path}")
+                results[i] = ("completed", image_path)
+
+            span.set(outcome="ok")
+            self.telemetry.metrics.inc("storyboard_total", outcome="ok")
+            return results
+
+    def generate_step_image(self, dish_name: str, step: str, index: int, total_steps: int = None,
+                            quality: str = "full", profile=None) -> tuple:
+        """
+        조리 단계 하나의 이미지를 생성 (스트리밍 파이프라인처럼 단계가 하나씩 도착할 때 사용)
+
+        Args:
+            dish_name: 요리 이름
+            step: 조리 단계 설명
+            index: 단계 번호 (1부터 시작)
+            total_steps: 전체 단계 수 (로그 출력용, 모르면 None)
+            quality: "full"(현재 프로필의 이미지 모델) 또는 "preview"(미리보기 모델, 별도 파일로 저장)
+            profile: 이 요청에만 쓸 생성 프로필 (None이면 현재 프로필)
+
+        Returns:
+            tuple: (상태, 이미지 경로) - 상태는 "completed" / "failed" / "error" / "timeout" / "cancelled", 실패 시 경로는 None
+        """
+        image_prompt = self._build_step_image_prompt(dish_name, step)
+        with profile_scope(profile):
+            return self._generate_prompt_group(dish_name, image_prompt, [index], total_steps, quality=quality)[index]
+
+    def image_load(self) -> float:
+        """
+        현재 프로필 이미지 모델의 현재 부하 (진행 중 요청 수 / 동시성 상한, 1 이상이면 대기 중인 요청이 생김)
+
+        Returns:
+            float: 부하
+        """
+        return self.calls.load(self.image_model_name)
+
+    def _generate_prompt_group(self, dish_name: str, image_prompt: str, indices: list, total_steps: int,
+                               image_variations: bool = False, quality: str = "full") -> dict:
+        """
+        같은 프롬프트를 쓰는 조리 단계들의 이미지를 한 번의 요청으로 생성해서 단계별로 저장
+
+        Args:
+            dish_name: 요리 이름
+            image_prompt: 이미지 생성 프롬프트
+            indices: 이 프롬프트를 쓰는 단계 번호 리스트 (1부터 시작)
+            total_steps: 전체 단계 수 (로그 출력용, 모르면 None)
+            image_variations: True면 단계 수만큼 서로 다른 이미지를 요청
+            quality: "full" 또는 "preview"
+
+        Returns:
+            dict: {단계 번호: (상태, 이미지 경로)} - 상태는 "completed" / "failed" / "error" / "timeout" / "cancelled", 실패 시 경로는 None
+        """
+        return self._drive(self._prompt_group_flow(dish_name, image_prompt, indices, total_steps, image_variations,
+                                                   quality))
+
+    def _prompt_group_flow(self, dish_name: str, image_prompt: str, indices: list, total_steps: int,
+                           image_variations: bool = False, quality: str = "full"):
+        """
+        같은 프롬프트를 쓰는 조리 단계들의 이미지 생성 흐름 (_generate_prompt_group 참고)
+
+        Returns:
+            dict: {단계 번호: (상태, 이미지 경로)}
+        """
+        # 스케줄러가 앞쪽 단계를 먼저 보내도록 첫 단계 번호를 지정
+        with self.telemetry.span("image.steps_group", steps=list(indices), quality=quality) as span, \
+                step_scope(min(indices)):
+            results = yield from self._prompt_group_images_flow(dish_name, image_prompt, indices, total_steps,
+                                                                image_variations, quality)
+            span.set(statuses=sorted({status for status, _ in results.values()}))
+            return results
+
+    def _prompt_group_images_flow(self, dish_name: str, image_prompt: str, indices: list, total_steps: int,
+                                  image_variations: bool, quality: str = "full"):
+        step_label = ", ".join(str(i) for i in indices)
+        preview = quality == "preview"
+        try:
+            print(f"\n📸 단계 {step_label}/{total_steps or '?'} {'미리보기 ' if preview else ''}이미지 생성 중...")
+            print(f"   프롬프트: {image_prompt[:80]}...")
+
+            number_of_images = min(len(indices), self.MAX_IMAGES_PER_REQUEST) if image_variations else 1
+            model = self.preview_image_model_name if preview else self.image_model_name
+            images = yield from self._images_flow(image_prompt, number_of_images, model=model)
+
+            if not images:
+                print(f"   ⚠️ 단계 {step_label} 이미지 생성 실패")
+                return {i: ("failed", None) for i in indices}
+
+            # 단계별 파일로 저장 (변형이 부족하면 돌려가며 사용)
+            results = {}
+            for n, i in enumerate(indices):
+                image_path = yield _io_op(self._store_image, dish_name, self._step_image_name(i, preview),
+                                          images[n % len(images)])
+                print(f"   ✅ 단계 {i} 이미지 저장: {image_path}")
+                results[i] = ("completed", image_path)
+            return results
+
+        except DeadlineExceeded as e:
+            print(f"   ⏱️ 단계 {step_label} 이미지: {e}")
+            return {i: (e.reason, None) for i in indices}
+        except Exception as e:
+            print(f"   ❌ 단계 {step_label} 이미지 생성 중 오류: {e}")
+            return {i: ("error", None) for i in indices}
+
+    def _images_flow(self, image_prompt: str, number_of_images: int = 1, aspect_ratio: str = "1:1",
+                     model: str = None):
+        """
+        Imagen 호출 흐름 (이미지 캐시에 같은 프롬프트/모델/설정의 결과가 있으면 재사용)
+
+        Args:
+            image_prompt: 이미지 생성 프롬프트
+            number_of_images: 요청할 이미지 수
+            aspect_ratio: 가로세로 비율
+            model: Imagen 모델 이름 (None이면 전체 품질 모델)
+
+        Returns:
+            list: 이미지 데이터(bytes) 리스트 (생성된 이미지가 없으면 빈 리스트)
+        """
+        model = model or self.image_model_name
+        config = self._image_config(number_of_images, aspect_ratio)
+
+        cache_key = self._image_cache_key(image_prompt, config, model)
+        if cache_key is not None:
+            cached_images = yield _io_op(self.image_cache.get, cache_key, number_of_images)
+            if cached_images is not None:
+                print("   💾 이미지 캐시 적중")
+                self._mark_span(image_cache="hit")
+                return cached_images
+
+        # 같은 요청이 이미 진행 중이면 그 결과를 기다려서 공유
+        return (yield _flight_op("image", (image_prompt, number_of_images, aspect_ratio, model),
+                                 self._imagen_flow(image_prompt, config, cache_key, model)))
+
+    def _imagen_flow(self, image_prompt: str, config: types.GenerateImagesConfig, cache_key: str = None,
+                     model: str = None):
+        """
+        Imagen 호출 후 이미지 캐시에 저장하는 흐름
+
+        Args:
+            image_prompt: 이미지 생성 프롬프트
+            config: Imagen 생성 설정
+            cache_key: 이미지 캐시 키 (None이면 저장하지 않음)
+            model: Imagen 모델 이름 (None이면 전체 품질 모델)
+
+        Returns:
+            list: 이미지 데이터(bytes) 리스트
+        """
+        model = model or self.image_model_name
+        response = yield _api_op("generate_images", model, prompt=image_prompt, config=config)
+
+        images = [self._image_bytes(generated_image) for generated_image in response.generated_images or []]
+
+        if images and cache_key is not None:
+            yield _io_op(self.image_cache.put, cache_key, images)
+
+        return images
+
+    def _image_config(self, number_of_images: int = 1, aspect_ratio: str = "1:1") -> types.GenerateImagesConfig:
+        """
+        Imagen 생성 설정
+
+        Args:
+            number_of_images: 요청할 이미지 수
+            aspect_ratio: 가로세로 비율 (스토리보드는 격자 모양에 맞춤)
+
+        Returns:
+            types.GenerateImagesConfig: 생성 설정
+        """
+        return types.GenerateImagesConfig(
+            number_of_images=number_of_images,
+            aspect_ratio=aspect_ratio,
+        )
+
+    def _image_cache_key(self, image_prompt: str, config: types.GenerateImagesConfig, model: str = None) -> str:
+        """
+        이미지 캐시 키 (이미지 캐시가 없으면 None)
+
+        Args:
+            image_prompt: 이미지 생성 프롬프트
+            config: Imagen 생성 설정
+            model: Imagen 모델 이름 (None이면 전체 품질 모델)
+
+        Returns:
+            str: 캐시 키
+        """
+        if self.image_cache is None:
+            return None
+        return self.image_cache.make_key(
+            image_prompt, model or self.image_model_name, config.model_dump(mode="json", exclude_none=True)
+        )
+
+    @staticmethod
+    def _step_image_name(index: int, preview: bool = False) -> str:
+        """
+        레시피 안에서의 단계 이미지 이름 (미리보기는 전체 품질 이미지와 따로 저장해서 교체 전까지 둘 다 유지)
+
+        Args:
+            index: 단계 번호
+            preview: 미리보기 이미지 여부
+
+        Returns:
+            str: 이미지 이름 (예: "step_1", "step_1.preview")
+        """
+        suffix = ".preview" if preview else ""
+        return f"step_{index}{suffix}"
+
+    def _store_image(self, dish_name: str, name: str, image_data: bytes) -> str:
+        """
+        생성한 이미지 저장
+        - 아티팩트 저장소가 있으면 내용 해시로 저장하고 현재 레시피/작업(artifact_store.owner_scope)의 name 참조를 갱신
+          (전체 품질 단계 이미지를 저장하면 같은 단계의 미리보기 참조는 해제)
+        - 없으면 image_dir/{요리명}_{name}.png 파일로 저장
+
+        Args:
+            dish_name: 요리 이름
+            name: 레시피 안에서의 이미지 이름 ("image", "step_1", "step_1.preview" 등)
+            image_data: 이미지 데이터
+
+        Returns:
+            str: 아티팩트 핸들 또는 파일 경로
+        """
+        if self.artifacts is None:
+            image_path = self.image_dir / f"{self._safe_dish_name(dish_name)}_{name}.png"
+            image_path.parent.mkdir(parents=True, exist_ok=True)
+            self._save_image(image_path, image_data)
+            return str(image_path)
+
+        # owner_scope 밖에서 불린 경우에는 이 이미지만의 주인 (다른 요청의 참조를 덮어쓰지 않도록)
+        owner = current_owner() or uuid.uuid4().hex
+        with self.telemetry.span("image.save", artifact=name, bytes=len(image_data)):
+            handle = self.artifacts.put(image_data, owner, name)
+            if name.startswith("step_") and not name.endswith(".preview"):
+                self.artifacts.release(owner, f"{name}.preview")
+        self.telemetry.metrics.inc("image_write_bytes_total", len(image_data))
+        image_path = self.artifacts.path(handle)
+        if image_path is not None:
+            self._on_image_saved(image_path)
+        return handle
+
+    def _save_image(self, image_path: Path, image_data: bytes):
+        """
+        이미지 파일 저장 (image.save 스팬 기록 후 파생본 생성 제출)
+
+        Args:
+            image_path: 저장할 경로
+            image_data: 이미지 데이터
+        """
+        with self.telemetry.span("image.save", path=str(image_path), bytes=len(image_data)):
+            image_path.write_bytes(image_data)
+        self.telemetry.metrics.inc("image_write_bytes_total", len(image_data))
+        self._on_image_saved(image_path)
+
+    def _mark_span(self, **attributes):
+        # 현재 스팬에 속성 추가 (스팬 밖에서 호출되면 무시)
+        span = self.telemetry.current_span()
+        if span is not None:
+            span.set(**attributes)
+
+    def _on_image_saved(self, image_path: Path):
+        """
+        이미지 저장 직후 처리 - 파생본 생성을 백그라운드에 제출
+
+        Args:
+            image_path: 저장한 이미지 경로
+        """
+        if self.derivatives is not None:
+            self.derivatives.submit(str(image_path))
+
+    @staticmethod
+    def _safe_dish_name(dish_name: str) -> str:
+        """
+        파일명에 쓸 수 있도록 요리 이름에서 특수문자 제거
+
+        Args:
+            dish_name: 요리 이름
+
+        Returns:
+            str: 파일명용 요리 이름
+        """
+        safe_dish_name = "".join(c for c in dish_name if c.isalnum() or c in (' ', '_')).strip()
+        return safe_dish_name.replace(' ', '_')
+
+    @staticmethod
+    def _build_hero_image_prompt(prompt: str) -> str:
+        """
+        대표 이미지 Imagen 프롬프트 구성
+
+        Args:
+            prompt: 이미지 주제 (보통 요리 이름)
+
+        Returns:
+            str: 이미지 생성 프롬프트
+        """
+        return f"A professional food photography of {prompt}, beautifully plated, appetizing, high quality, restaurant style"
+
+    def _group_step_prompts(self, dish_name: str, steps: list) -> dict:
+        """
+        같은 Imagen 프롬프트를 쓰는 조리 단계끼리 묶기 (첫 등장 순서 유지)
+
+        Args:
+            dish_name: 요리 이름
+            steps: 조리 단계 리스트
+
+        Returns:
+            dict: {이미지 프롬프트: [단계 번호, ...]} (단계 번호는 1부터 시작)
+        """
+        prompt_groups = {}
+        for i, step in enumerate(steps, 1):
+            prompt_groups.setdefault(self._build_step_image_prompt(dish_name, step), []).append(i)
+        return prompt_groups
+
+    @staticmethod
+    def _step_scene(step: str) -> str:
+        """
+        조리 단계 설명에서 조리 도구/동작 키워드를 파악해 장면 설명 구성
+
+        Args:
+            step: 조리 단계 설명
+
+        Returns:
+            str: 장면 설명 (영어, 예: "stir-frying in pan using frying pan")
+        """
+        # 조리 도구 파악
+        if "냄비" in step or "끓" in step or "삶" in step:
+            cookware = "cooking pot"
+            cooking_action = "cooking in pot"
+        elif "후라이팬" in step or "팬" in step or "볶" in step:
+            cookware = "frying pan"
+            cooking_action = "stir-frying in pan"
+        elif "도마" in step or "썰" in step or "자르" in step:
+            cookware = "cutting board"
+            cooking_action = "cutting and preparing"
+        elif "그릇" in step or "담" in step or "접시" in step:
+            cookware = "ceramic bowl"
+            cooking_action = "plated dish"
+        else:
+            cookware = "cooking surface"
+            cooking_action = "food preparation"
+
+        return f"{cooking_action} using {cookware}"
+
+    @classmethod
+    def _build_step_image_prompt(cls, dish_name: str, step: str) -> str:
+        """
+        조리 단계 설명에서 조리 도구/동작 키워드를 파악해 Imagen 프롬프트를 구성
+
+        Args:
+            dish_name: 요리 이름
+            step: 조리 단계 설명
+
+        Returns:
+            str: 이미지 생성 프롬프트
+        """
+        # 이미지 생성 프롬프트 (조리 과정 중심, 적절한 도구 사용)
+        # 텍스트 오버레이 방지를 위해 맨 앞과 뒤에 강력히 명시
+        return f"""NO TEXT, NO WORDS, NO LETTERS, NO TYPOGRAPHY - Pure photography only.
+
+Korean {dish_name} being prepared. {cls._step_scene(step)}.
+Home kitchen scene with natural daylight, wooden table, realistic food photography.
+Hands visible during cooking action.
+
+CRITICAL: This must be a photograph with ZERO text overlays, ZERO labels, ZERO captions,
+ZERO watermarks, ZERO annotations. Just show the food and cooking tools. No written content."""
+
+    @staticmethod
+    def _image_bytes(generated_image) -> bytes:
+        """
+        Imagen 응답의 이미지 객체에서 이미지 데이터를 추출
+
+        Args:
+            generated_image: response.generated_images의 원소
+
+        Returns:
+            bytes: 이미지 데이터
+        """
+        if hasattr(generated_image, 'image'):
+            # image 속성이 있는 경우
+            image_data = generated_image.image
+            if getattr(image_data, 'image_bytes', None):
+                # google.genai types.Image
+                return image_data.image_bytes
+            elif hasattr(image_data, 'save'):
+                # PIL Image 객체
+                buffer = io.BytesIO()
+                image_data.save(buffer, format="PNG")
+                return buffer.getvalue()
+            elif isinstance(image_data, str):
+                # base64 인코딩된 문자열인 경우
+                return base64.b64decode(image_data)
+            elif isinstance(image_data, bytes):
+                # 이미 bytes인 경우
+                return image_data
+        elif hasattr(generated_image, 'save'):
+            # PIL Image 객체인 경우 save 메서드 사용
+            buffer = io.BytesIO()
+            generated_image.save(buffer, format="PNG")
+            return buffer.getvalue()
+        elif hasattr(generated_image, 'bytes'):
+            # bytes 속성이 있는 경우
+            return generated_image.bytes
+
+        raise Exception(f"알 수 없는 이미지 형식: {type(generated_image)}")
+
+
+class AsyncRecipeAgent:
+    """
+    RecipeAgent의 asyncio 버전 (client.aio 사용)
+    레시피/이미지 생성 흐름(RecipeAgent의 *_flow)은 동기 API와 같은 코드를 그대로 쓰고, 흐름이 yield한 요청만
+    이 클래스의 _drive가 비동기로 처리하므로 캐시, 같은 요청 합치기, 응답 복구, 생성 프로필, 통계가 동기 API와 같습니다.
+    - API 호출은 client.aio.models로 CallLayer.acall을 거쳐 보냄 (동기 호출과 같은 속도 제한/스케줄러/재시도)
+    - 같은 요청 합치기는 SingleFlight.ado (진행 중인 동기 호출과도 합쳐짐)
+    - 캐시 조회/저장, 이미지 저장 같은 로컬 I/O만 작업자 스레드에서 실행 (진행 중인 API 호출마다 스레드를 쓰지 않음)
+    - timeout 인자(초)는 deadline.Deadline으로 넘김 - 넘기면 DeadlineExceeded(TimeoutError),
+      단계 이미지는 끝나지 못한 단계를 "timeout" 상태로 보고
+    - 작업이 취소(asyncio.CancelledError)되면 진행 중인 API 호출과 재시도 대기도 함께 취소
+    """
+
+    def __init__(self, agent: RecipeAgent = None, timeout: float = None, **agent_kwargs):
+        """
+        AsyncRecipeAgent 초기화
+
+        Args:
+            agent: 생성 흐름과 캐시/클라이언트/호출 계층을 함께 쓸 RecipeAgent (None이면 agent_kwargs로 새로 생성)
+            timeout: 기본 제한 시간 (초, None이면 제한 없음)
+            **agent_kwargs: 새 RecipeAgent에 전달할 인자
+        """
+        self.agent = agent or RecipeAgent(**agent_kwargs)
+        self.timeout = timeout
+
+    @property
+    def telemetry(self):
+        """
+        스팬/지표 기록기 (RecipeAgent와 같음)
+        """
+        return self.agent.telemetry
+
+    def _deadline(self, timeout: float) -> Deadline:
+        # 호출 하나의 Deadline (현재 컨텍스트의 Deadline이 먼저 끝나면 그쪽을 따르고, 취소도 함께 전달)
+        timeout = self.timeout if timeout is None else timeout
+        parent = current_deadline()
+        if parent is not None:
+            remaining = parent.remaining()
+            if remaining is not None and (timeout is None or remaining < timeout):
+                timeout = remaining
+        deadline = Deadline(timeout)
+        if parent is not None:
+            parent.on_cancel(deadline.cancel)
+        return deadline
+
+    async def _drive(self, flow):
+        """
+        생성 흐름을 이벤트 루프에서 실행 (RecipeAgent._drive의 asyncio 버전)
+        API 호출은 client.aio.models로 CallLayer.acall, 같은 요청 합치기는 SingleFlight.ado,
+        로컬 I/O는 작업자 스레드(asyncio.to_thread)에서 처리하고, 취소도 흐름에 그대로 전달
+
+        Args:
+            flow: 생성 흐름 (RecipeAgent의 *_flow 제너레이터)
+
+        Returns:
+            흐름의 반환값
+        """
+        agent = self.agent
+        result, error = None, None
+        while True:
+            try:
+                op = flow.send(result) if error is None else flow.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            result, error = None, None
+            try:
+                if op[0] == "call":
+                    _, model, method, kwargs = op
+                    result = await agent.calls.acall(model, getattr(agent.client.aio.models, method), **kwargs)
+                elif op[0] == "flight":
+                    _, kind, key, subflow = op
+                    result = await agent.flights.ado(kind, key, self._drive, subflow)
+                else:
+                    _, fn, args = op
+                    result = await asyncio.to_thread(fn, *args)
+            except BaseException as e:
+                error = e
+
+    async def _run(self, deadline: Deadline, flow):
+        # 흐름을 deadline 아래 실행 (취소되면 Deadline도 취소해서 이 호출에서 이어진 대기를 함께 멈춤)
+        with deadline_scope(deadline):
+            try:
+                return await self._drive(flow)
+            except asyncio.CancelledError:
+                deadline.cancel()
+                raise
+
+    async def generate_recipe(self, dish_name: str, use_cache: bool = True, timeout: float = None,
+                              profile=None) -> dict:
+        """
+        RecipeAgent.generate_recipe의 비동기 버전
+
+        Args:
+            dish_name: 요리 이름
+            use_cache: 레시피 캐시 사용 여부
+            timeout: 제한 시간 (초, None이면 에이전트 기본값)
+            profile: 이 요청에만 쓸 생성 프로필 (None이면 현재 프로필)
+
+        Returns:
+            dict: 레시피 정보 (제목, 소요시간, 재료, 조리과정)
+
+        Raises:
+            DeadlineExceeded: 제한 시간 초과 (TimeoutError)
+        """
+        with profile_scope(profile), self.telemetry.span("recipe.generate", dish_name=dish_name, mode="async"):
+            return await self._run(self._deadline(timeout), self.agent._generate_recipe_flow(dish_name, use_cache))
+
+    async def generate_image(self, prompt: str, dish_name: str = "dish", timeout: float = None,
+                             profile=None) -> str:
+        """
+        RecipeAgent.generate_image의 비동기 버전
+
+        Args:
+            prompt: 이미지 생성 프롬프트
+            dish_name: 요리 이름 (파일명에 사용)
+            timeout: 제한 시간 (초, None이면 에이전트 기본값)
+            profile: 이 요청에만 쓸 생성 프로필 (None이면 현재 프로필)
+
+        Returns:
+            str: 생성된 이미지 파일 경로
+
+        Raises:
+            DeadlineExceeded: 제한 시간 초과 (TimeoutError)
+        """
+        with profile_scope(profile), owner_scope(), \
+                self.telemetry.span("image.hero", dish_name=dish_name, mode="async"):
+            return await self._run(self._deadline(timeout), self.agent._hero_image_flow(prompt, dish_name))
+
+    async def generate_step_images(self, dish_name: str, recipe_data: dict, progress_callback=None,
+                                   max_workers: int = 4, image_variations: bool = False,
+                                   timeout: float = None, storyboard: bool = False, profile=None,
+                                   on_step=None) -> list:
+        """
+        RecipeAgent.generate_step_images의 비동기 버전
+
+        Args:
+            dish_name: 요리 이름
+            recipe_data: 레시피 데이터 (steps 키 포함)
+            progress_callback: 진행 상황 콜백 함수 (optional, 이벤트 루프에서 호출)
+            max_workers: 동시에 진행할 Imagen 요청 수
+            image_variations: True면 같은 프롬프트를 쓰는 단계 수만큼 서로 다른 이미지를 요청
+            timeout: 전체 제한 시간 (초, None이면 에이전트 기본값) - 넘기면 끝나지 못한 단계는 "timeout"
+            storyboard: True면 모든 단계를 격자 이미지 한 장으로 요청 (실패하면 단계별 요청)
+            profile: 이 요청에만 쓸 생성 프로필 (None이면 현재 프로필)
+            on_step: 단계가 끝날 때마다 (단계 번호, 상태, 이미지 경로)로 호출할 함수 (optional, 이벤트 루프에서 호출)
+
+        Returns:
+            list: 생성된 이미지 파일 경로 리스트 (단계 순서, 실패하거나 끝나지 못한 단계는 None)
+        """
+        if 'steps' not in recipe_data:
+            raise ValueError("recipe_data에 'steps' 키가 없습니다.")
+
+        total_steps = len(recipe_data['steps'])
+        image_paths = [None] * total_steps
+        if progress_callback:
+            for i in range(1, total_steps + 1):
+                progress_callback(i, total_steps, "generating")
+
+        async for i, status, image_path in self.iter_step_images(dish_name, recipe_data, max_workers,
+                                                                 image_variations, timeout, storyboard, profile):
+            image_paths[i - 1] = image_path
+            if progress_callback:
+                progress_callback(i, total_steps, status)
+            if on_step:
+                on_step(i, status, image_path)
+        return image_paths
+
+    async def iter_step_images(self, dish_name: str, recipe_data: dict, max_workers: int = 4,
+                               image_variations: bool = False, timeout: float = None, storyboard: bool = False,
+                               profile=None):
+        """
+        조리 단계 이미지를 생성하면서 끝나는 순서대로 결과 전달
+        중간에 반복을 멈추거나 취소하면 진행 중인 이미지 요청도 취소됩니다.
+
+        Args:
+            dish_name: 요리 이름
+            recipe_data: 레시피 데이터 (steps 키 포함)
+            max_workers: 동시에 진행할 Imagen 요청 수
+            image_variations: True면 같은 프롬프트를 쓰는 단계 수만큼 서로 다른 이미지를 요청
+            timeout: 전체 제한 시간 (초, None이면 에이전트 기본값)
+            storyboard: True면 모든 단계를 격자 이미지 한 장으로 요청 (실패하면 단계별 요청)
+            profile: 이 요청에만 쓸 생성 프로필 (None이면 현재 프로필)
+
+        Yields:
+            tuple: (단계 번호, 상태, 이미지 경로) - 상태는 "completed" / "failed" / "error" / "timeout" / "cancelled"
+        """
+        if 'steps' not in recipe_data:
+            raise ValueError("recipe_data에 'steps' 키가 없습니다.")
+
+        steps = recipe_data['steps']
+        deadline = self._deadline(timeout)
+        results = asyncio.Queue()
+
+        # 비동기 제너레이터는 yield 사이에 호출자 코드가 실행되므로, 생성 작업을 만들 때만 컨텍스트를 지정
+        # (작업은 만들어질 때의 컨텍스트를 복사하므로 스팬/Deadline/프로필/이미지 주인이 작업 안에서 유지됨)
+        span = self.telemetry.start_span("images.steps", dish_name=dish_name, steps=len(steps), mode="async")
+        with self.telemetry.activate(span), deadline_scope(deadline), profile_scope(profile), owner_scope():
+            task = asyncio.create_task(self._generate_step_images(dish_name, steps, max_workers, image_variations,
+                                                                  storyboard, results.put_nowait))
+        # 단계 결과는 모두 작업이 끝나기 전에 넣으므로 끝났다는 표시는 항상 마지막
+        task.add_done_callback(lambda _: results.put_nowait(None))
+
+        completed = 0
+        try:
+            while True:
+                result = await results.get()
+                if result is None:
+                    break
+                completed += result[1] == "completed"
+                yield result
+            await task
+        except Exception as e:
+            self.telemetry.finish_span(span, e)
+            raise
+        except BaseException:
+            # 호출자가 반복을 중간에 멈췄거나 취소한 경우
+            span.set(cancelled=True)
+            self.telemetry.finish_span(span)
+            raise
+        finally:
+            if not task.done():
+                deadline.cancel()
+                task.cancel()
+
+        span.set(completed=completed)
+        if deadline.expired():
+            span.set(deadline=deadline.reason)
+        self.telemetry.finish_span(span)
+
+    async def _generate_step_images(self, dish_name: str, steps: list, max_workers: int, image_variations: bool,
+                                    storyboard: bool, report):
+        """
+        RecipeAgent._generate_step_images의 asyncio 버전 - 프롬프트마다 작업을 만들어 동시에 요청하고,
+        단계가 끝날 때마다 report((단계 번호, 상태, 이미지 경로)) 호출
+
+        Args:
+            dish_name: 요리 이름
+            steps: 조리 단계 리스트
+            max_workers: 동시에 진행할 Imagen 요청 수
+            image_variations: True면 같은 프롬프트를 쓰는 단계 수만큼 서로 다른 이미지를 요청
+            storyboard: True면 모든 단계를 격자 이미지 한 장으로 요청 (실패하면 단계별 요청)
+            report: 단계 결과를 받을 함수
+        """
+        agent = self.agent
+        total_steps = len(steps)
+
+        if storyboard:
+            results = await self._drive(agent._storyboard_flow(dish_name, steps))
+            if results is not None:
+                for i, result in sorted(results.items()):
+                    report((i,) + result)
+                print(f"\n✅ 단계별 이미지 생성 완료! (스토리보드, 성공: {total_steps}/{total_steps})")
+                return
+
+        # 같은 프롬프트를 쓰는 단계끼리 묶기 (첫 등장 순서 유지)
+        prompt_groups = agent._group_step_prompts(dish_name, steps)
+
+        print(f"\n🎨 총 {total_steps}개의 조리 단계 이미지를 생성합니다... (고유 프롬프트 {len(prompt_groups)}개)")
+
+        # 마감되면 자리를 기다리던 프롬프트도 호출 계층에서 바로 마감 상태("timeout"/"cancelled")로 끝남
+        semaphore = asyncio.Semaphore(max(1, max_workers))
+
+        async def generate_group(image_prompt, indices):
+            async with semaphore:
+                return await self._drive(agent._prompt_group_flow(dish_name, image_prompt, indices, total_steps,
+                                                                  image_variations))
+
+        tasks = [asyncio.create_task(generate_group(image_prompt, indices))
+                 for image_prompt, indices in prompt_groups.items()]
+        completed = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                for i, (status, image_path) in sorted((await next_done).items()):
+                    completed += status == "completed"
+                    report((i, status, image_path))
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        print(f"\n✅ 단계별 이미지 생성 완료! (성공: {completed}/{total_steps})")
+
+
+_shared_agent = None
+_shared_agent_lock = threading.Lock()
+
+
+def get_shared_agent(**agent_kwargs) -> RecipeAgent:
+    """
+    프로세스 전체에서 함께 쓰는 RecipeAgent
+    Streamlit 재실행/세션마다 새 genai.Client(새 HTTP 연결, TLS 핸드셰이크)를 만들지 않도록 한 번만 생성합니다.
+
+    Args:
+        **agent_kwargs: 처음 생성할 때 RecipeAgent에 전달할 인자 (이후 호출에서는 무시)
+
+    Returns:
+        RecipeAgent: 공용 에이전트
+    """
+    global _shared_agent
+    with _shared_agent_lock:
+        if _shared_agent is None:
+            _shared_agent = RecipeAgent(**agent_kwargs)
+        return _shared_agent
+
+
+def warm_up(agent: RecipeAgent) -> bool:
+    """
+    가벼운 API 호출(모델 정보 조회)로 HTTP 연결과 TLS 세션을 미리 열어 둠
+    첫 사용자 요청이 연결 설정 비용을 내지 않도록 서버 시작 시 호출합니다.
+
+    Args:
+        agent: 예열할 에이전트
+
+    Returns:
+        bool: 예열 성공 여부
+    """
+    try:
+        agent.client.models.get(model=agent.model_name)
+        # 레시피 시스템 지시문 컨텍스트 캐시도 미리 생성 (첫 요청이 생성 비용을 내지 않도록)
+        if agent.context_cache is not None:
+            agent.context_cache.name()
+        print("🔥 Gemini 연결 예열 완료")
+        return True
+    except Exception as e:
+        print(f"⚠️ Gemini 연결 예열 실패: {e}")
+        return False
+
+
+def main(argv=None):
+    """
+    명령줄 진입점 (python -m chef_brain ...)
+
+    Args:
+        argv: 명령줄 인자 (None이면 sys.argv 사용)
+    """
+    parser = argparse.ArgumentParser(prog="python -m chef_brain", description="Sous Chef AI 명령줄 도구")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    batch_parser = subparsers.add_parser("batch", help="요리 이름 목록 파일로 레시피와 이미지를 대량 생성")
+    batch_parser.add_argument("dish_file", help="요리 이름 목록 파일 (한 줄에 하나)")
+    batch_parser.add_argument("--output-dir", default="batch_output", help="결과 폴더 (기본: batch_output)")
+    batch_parser.add_argument("--workers", type=int, default=4, help="동시에 처리할 요리 수 (기본: 4)")
+    batch_parser.add_argument("--image-workers", type=int, default=8, help="동시에 생성할 이미지 수 (기본: 8)")
+    batch_parser.add_argument("--no-images", action="store_true", help="단계별 이미지 생성 생략")
+    batch_parser.add_argument("--no-cache", action="store_true", help="레시피/이미지 캐시 사용 안 함")
+    batch_parser.add_argument("--match-threshold", type=float, default=0.8,
+                              help="표기만 다른 요리의 캐시 레시피를 재사용할 최소 유사도 (0~1, 기본: 0.8)")
+    batch_parser.add_argument("--profile", choices=list(PROFILES), default=DEFAULT_PROFILE,
+                              help=f"생성 프로필 (모델/생각 예산/출력 상한, 기본: {DEFAULT_PROFILE})")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "batch":
+        from batch import BatchRunner, load_dish_names, print_summary
+        from dish_index import DishNameIndex
+        from image_cache import ImageCache
+        from recipe_cache import RecipeCache
+
+        if args.no_cache:
+            agent = RecipeAgent()
+        else:
+            agent = RecipeAgent(recipe_cache=RecipeCache(), image_cache=ImageCache(),
+                                dish_index=DishNameIndex(threshold=args.match_threshold))
+
+        runner = BatchRunner(
+            agent,
+            output_dir=args.output_dir,
+            max_workers=args.workers,
+            image_workers=args.image_workers,
+            with_images=not args.no_images,
+            profile=args.profile,
+        )
+        summary = runner.run(load_dish_names(args.dish_file))
+        print_summary(summary)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+genai.Client 생성 및 연결 재사용 지표
+HTTP 연결 풀 크기를 설정할 수 있는 클라이언트를 만들고, 새 연결/TLS 핸드셰이크가
+요청마다 얼마나 발생하는지 기록합니다.
+"""
+
+import threading
+
+import httpx
+from google import genai
+from google.genai import types
+
+# 기본 연결 풀 설정
+DEFAULT_POOL_OPTIONS = {
+    "max_connections": 32,
+    "max_keepalive_connections": 16,
+    "keepalive_expiry": 120.0,
+}
+
+
+class ConnectionMetrics:
+    """
+    HTTP 연결 재사용 지표 (httpx 요청 훅 + httpcore trace 확장으로 수집)
+    - requests: 보낸 HTTP 요청 수
+    - new_connections: 새로 연 (또는 열려고 시도한) TCP 연결 수
+    - tls_handshakes: TLS 핸드셰이크 수
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+        self.tls_handshakes = 0
+
+    def on_request(self, request: httpx.Request):
+        """
+        httpx 요청 이벤트 훅 - 요청 수를 세고 연결 단계 trace 콜백을 연결
+        """
+        with self._lock:
+            self.requests += 1
+        request.extensions["trace"] = self._trace
+
+    async def aon_request(self, request: httpx.Request):
+        """
+        on_request의 비동기 버전 (client.aio의 httpx.AsyncClient는 비동기 훅과 비동기 trace 콜백만 받음)
+        """
+        with self._lock:
+            self.requests += 1
+        request.extensions["trace"] = self._atrace
+
+    def _trace(self, event_name: str, info: dict):
+        if event_name == "connection.connect_tcp.started":
+            with self._lock:
+                self.new_connections += 1
+        elif event_name == "connection.start_tls.complete":
+            with self._lock:
+                self.tls_handshakes += 1
+
+    async def _atrace(self, event_name: str, info: dict):
+        self._trace(event_name, info)
+
+    def stats(self) -> dict:
+        """
+        연결 재사용 통계
+
+        Returns:
+            dict: requests, new_connections, tls_handshakes, reuse_rate (기존 연결을 재사용한 요청 비율)
+        """
+        with self._lock:
+            reused = max(self.requests - self.new_connections, 0)
+            return {
+                "requests": self.requests,
+                "new_connections": self.new_connections,
+                "tls_handshakes": self.tls_handshakes,
+                "reuse_rate": reused / self.requests if self.requests else 0.0,
+            }
+
+
+def create_client(api_key: str, metrics: ConnectionMetrics = None, **pool_options) -> genai.Client:
+    """
+    연결 풀 설정과 재사용 지표 훅을 적용한 genai.Client 생성
+    (동기 클라이언트와 client.aio는 연결 풀을 따로 쓰며, 둘 다 같은 풀 설정과 지표를 적용)
+
+    Args:
+        api_key: Google API Key
+        metrics: 연결 재사용 지표 (None이면 수집하지 않음)
+        **pool_options: max_connections, max_keepalive_connections, keepalive_expiry (DEFAULT_POOL_OPTIONS 덮어쓰기)
+
+    Returns:
+        genai.Client: Gemini 클라이언트
+    """
+    options = dict(DEFAULT_POOL_OPTIONS, **pool_options)
+    limits = httpx.Limits(
+        max_connections=options["max_connections"],
+        max_keepalive_connections=options["max_keepalive_connections"],
+        keepalive_expiry=options["keepalive_expiry"],
+    )
+    client_args = {"limits": limits}
+    # 비동기 쪽은 transport를 직접 넘겨야 aiohttp가 설치되어 있어도 풀 설정과 훅을 적용할 수 있는 httpx를 사용
+    async_client_args = {"transport": httpx.AsyncHTTPTransport(limits=limits)}
+    if metrics is not None:
+        client_args["event_hooks"] = {"request": [metrics.on_request]}
+        async_client_args["event_hooks"] = {"request": [metrics.aon_request]}
+
+    return genai.Client(
+        api_key=api_key,
+        http_options=types.HttpOptions(client_args=client_args, async_client_args=async_client_args),
+    )
@@ -0,0 +1,230 @@
+"""
+Gemini 컨텍스트 캐시 (cachedContents)
+요청마다 같은 시스템 지시문(셰프 페르소나 + 출력 형식)을 보내지 않도록 한 번만 올려두고 이름으로 참조합니다.
+"""
+
+import threading
+import time
+
+from google.genai import errors, types
+
+# 모델별 컨텍스트 캐시 최소 토큰 수 (이보다 작은 내용은 caches.create가 400으로 거절)
+MIN_CACHE_TOKENS = {
+    "gemini-2.5-flash": 1024,
+    "gemini-2.5-pro": 4096,
+}
+
+# 표에 없는 모델의 최소 토큰 수 (모르면 크게 잡아서 거절될 생성 요청을 보내지 않음)
+DEFAULT_MIN_CACHE_TOKENS = 4096
+
+
+def min_cache_tokens(model: str) -> int:
+    """
+    모델의 컨텍스트 캐시 최소 토큰 수
+
+    Args:
+        model: 모델 이름 ("models/" 접두사나 "-lite" 같은 변형 이름도 가능)
+
+    Returns:
+        int: 최소 토큰 수
+    """
+    name = model.split("/")[-1]
+    for prefix in sorted(MIN_CACHE_TOKENS, key=len, reverse=True):
+        if name.startswith(prefix):
+            return MIN_CACHE_TOKENS[prefix]
+    return DEFAULT_MIN_CACHE_TOKENS
+
+
+class ContextCache:
+    """
+    정적인 시스템 지시문을 컨텍스트 캐시 하나로 관리
+    - 처음 필요할 때 생성하고, 만료 refresh_margin초 전에 TTL을 연장 (연장이 실패하면 새로 생성)
+    - 생성 전에 지시문 토큰 수를 세서 모델의 최소 캐시 크기보다 작으면 생성 요청 없이 끔
+    - 모델/계정이 지원하지 않거나 지시문이 최소 캐시 크기보다 작아서 거절(4xx)되면 끄고,
+      호출하는 쪽은 system_instruction으로 보냄 (Gemini 2.5의 암묵적 캐싱은 그대로 적용됨)
+    - 일시적인 오류(429/5xx)는 retry_after초 동안 캐시 없이 진행한 뒤 다시 시도
+    - 생성/연장 중에도 다른 스레드는 기다리지 않고 기존 캐시(또는 캐시 없이)로 진행
+    - call_layer를 주면 토큰 수 확인/생성/연장/삭제도 다른 API 호출처럼 호출 계층(제한, 재시도, 공정 스케줄러)을 거침
+    """
+
+    def __init__(self, client, model: str, system_instruction: str, ttl_seconds: int = 3600,
+                 refresh_margin: int = 300, retry_after: int = 300, telemetry=None, call_layer=None,
+                 min_tokens: int = None):
+        """
+        ContextCache 초기화
+
+        Args:
+            client: genai.Client (또는 같은 모양의 백엔드)
+            model: 캐시를 사용할 모델 이름 (캐시는 모델마다 따로 만들어야 함)
+            system_instruction: 캐시에 올릴 시스템 지시문
+            ttl_seconds: 캐시 유효 시간 (초)
+            refresh_margin: 만료 몇 초 전에 연장할지
+            retry_after: 일시적 오류 후 다시 시도하기까지 대기 시간 (초)
+            telemetry: 스팬/지표 기록기 (Telemetry, optional)
+            call_layer: API 호출 계층 (CallLayer, None이면 클라이언트를 바로 호출)
+            min_tokens: 캐시를 만들 최소 지시문 토큰 수 (None이면 모델의 최소 캐시 크기)
+        """
+        self.client = client
+        self.model = model
+        self.system_instruction = system_instruction
+        self.ttl_seconds = ttl_seconds
+        self.refresh_margin = refresh_margin
+        self.retry_after = retry_after
+        self.telemetry = telemetry
+        self.call_layer = call_layer
+        self.min_tokens = min_cache_tokens(model) if min_tokens is None else min_tokens
+
+        self._lock = threading.Lock()
+        self._name = None
+        self._expires_at = 0.0
+        self._retry_at = 0.0
+        self._disabled = False
+        self._busy = False
+        self._size_checked = False
+
+    def name(self) -> str:
+        """
+        사용할 캐시 이름 (필요하면 생성/연장)
+
+        Returns:
+            str | None: cachedContents 이름, 캐시를 쓸 수 없으면 None
+        """
+        now = time.time()
+        with self._lock:
+            if self._disabled:
+                return None
+            if self._name is not None and now < self._expires_at - self.refresh_margin:
+                return self._name
+            if self._busy or now < self._retry_at:
+                return self._valid_name(now)
+            self._busy = True
+
+        try:
+            self._refresh()
+        finally:
+            with self._lock:
+                self._busy = False
+
+        with self._lock:
+            return self._valid_name(time.time())
+
+    def _valid_name(self, now: float) -> str:
+        return self._name if self._name is not None and now < self._expires_at else None
+
+    def _refresh(self):
+        # 기존 캐시가 있으면 TTL 연장, 없거나 연장에 실패하면 새로 생성
+        if self._name is not None:
+            try:
+                cached = self._call(
+                    "update", self.client.caches.update,
+                    name=self._name, config=types.UpdateCachedContentConfig(ttl=f"{self.ttl_seconds}s"),
+                )
+                self._store(cached)
+                return
+            except Exception as e:
+                print(f"⚠️ 컨텍스트 캐시 연장 실패, 새로 만듭니다: {e}")
+
+        if not self._size_checked:
+            tokens = self._instruction_tokens()
+            if tokens is not None and tokens < self.min_tokens:
+                # 만들어도 최소 캐시 크기 미만으로 거절됨
+                self._disable(f"지시문 {tokens}토큰 < 최소 캐시 크기 {self.min_tokens}토큰")
+                return
+            self._size_checked = True
+
+        try:
+            cached = self._call(
+                "create", self.client.caches.create,
+                model=self.model,
+                config=types.CreateCachedContentConfig(
+                    system_instruction=self.system_instruction,
+                    ttl=f"{self.ttl_seconds}s",
+                    display_name="sous-chef-recipe-instruction",
+                ),
+            )
+            self._store(cached)
+            print(f"🗂️ 컨텍스트 캐시 생성: {cached.name}")
+        except AttributeError:
+            # caches API가 없는 클라이언트
+            self._disable("caches API 없음")
+        except errors.ClientError as e:
+            if e.code == 429:
+                self._back_off(e)
+            else:
+                # 지원하지 않는 모델이거나 최소 캐시 크기 미만 - 다시 시도해도 같은 결과
+                self._disable(e)
+        except Exception as e:
+            self._back_off(e)
+
+    def _instruction_tokens(self):
+        # 지시문 토큰 수 (count_tokens를 쓸 수 없으면 None - 생성 요청의 결과로 판단)
+        # 생성/연장과 같이 호출 계층을 거치므로 분당 요청 한도와 재시도가 적용됨
+        try:
+            response = self._call("count_tokens", self.client.models.count_tokens,
+                                  model=self.model, contents=self.system_instruction)
+        except Exception as e:
+            print(f"⚠️ 지시문 토큰 수를 세지 못했습니다: {e}")
+            return None
+        return response.total_tokens
+
+    def _send(self, fn, **kwargs):
+        if self.call_layer is None:
+            return fn(**kwargs)
+        return self.call_layer.call(self.model, fn, **kwargs)
+
+    def _call(self, event: str, fn, **kwargs):
+        if self.telemetry is None:
+            return self._send(fn, **kwargs)
+        with self.telemetry.span(f"context_cache.{event}", model=self.model):
+            try:
+                result = self._send(fn, **kwargs)
+            except Exception:
+                self.telemetry.metrics.inc("context_cache_events_total", event=event, outcome="error")
+                raise
+            self.telemetry.metrics.inc("context_cache_events_total", event=event, outcome="ok")
+            return result
+
+    def _store(self, cached: types.CachedContent):
+        expire_time = getattr(cached, "expire_time", None)
+        expires_at = expire_time.timestamp() if expire_time is not None else time.time() + self.ttl_seconds
+        with self._lock:
+            self._name = cached.name
+            self._expires_at = expires_at
+
+    def _disable(self, reason):
+        print(f"ℹ️ 컨텍스트 캐시를 사용할 수 없어 system_instruction으로 보냅니다: {reason}")
+        with self._lock:
+            self._disabled = True
+            self._name = None
+
+    def _back_off(self, error: Exception):
+        print(f"⚠️ 컨텍스트 캐시 생성 실패, {self.retry_after}초 뒤 다시 시도합니다: {error}")
+        with self._lock:
+            self._retry_at = time.time() + self.retry_after
+
+    def stats(self) -> dict:
+        """
+        캐시 상태
+
+        Returns:
+            dict: name(현재 캐시 이름), expires_in(남은 시간, 초), disabled(사용 안 함 여부)
+        """
+        with self._lock:
+            return {
+                "name": self._name,
+                "expires_in": max(0.0, self._expires_at - time.time()) if self._name else 0.0,
+                "disabled": self._disabled,
+            }
+
+    def close(self):
+        """
+        캐시 삭제 (남은 TTL 동안의 저장 비용 절약, 실패는 무시 - TTL이 지나면 자동 삭제)
+        """
+        with self._lock:
+            name, self._name = self._name, None
+        if name is None:
+            return
+        try:
+            self._send(self.client.caches.delete, name=name)
+        except Exception as e:
+            print(f"⚠️ 컨텍스트 캐시 삭제 실패: {e}")
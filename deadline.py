@@ -0,0 +1,226 @@
+"""
+요청 제한 시간(deadline)과 취소
+생성 요청 하나의 남은 시간 예산을 contextvars로 전달해서, 레시피/이미지 API 호출과 단계 이미지 대기가
+모두 같은 마감 시각을 따르도록 합니다. 마감이 지나거나 취소되면 진행 중인 대기는 바로 끝나고,
+호출하는 쪽은 그때까지 끝난 결과만 사용합니다.
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, InvalidStateError, as_completed, wait
+from contextlib import contextmanager
+
+# 끝나지 못한 작업의 상태
+TIMEOUT = "timeout"
+CANCELLED = "cancelled"
+
+_current_deadline = contextvars.ContextVar("sous_chef_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """
+    제한 시간을 넘었거나 취소된 요청
+    """
+
+    def __init__(self, reason: str = TIMEOUT):
+        """
+        Args:
+            reason: TIMEOUT 또는 CANCELLED
+        """
+        self.reason = reason
+        super().__init__("요청이 취소되었습니다." if reason == CANCELLED else "제한 시간을 넘었습니다.")
+
+
+class Deadline:
+    """
+    마감 시각 + 취소 신호 (스레드 안전)
+    """
+
+    def __init__(self, seconds: float = None):
+        """
+        Deadline 초기화
+
+        Args:
+            seconds: 지금부터 남은 시간 (초, None이면 시간 제한 없이 취소만 가능, 0 이하이면 이미 마감)
+        """
+        self.expires_at = None if seconds is None else time.monotonic() + seconds
+        self._cancelled = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def reason(self) -> str:
+        """
+        마감 사유 (CANCELLED / TIMEOUT, 아직 마감 전이면 None)
+        """
+        if self._cancelled.is_set():
+            return CANCELLED
+        if self.expires_at is not None and time.monotonic() >= self.expires_at:
+            return TIMEOUT
+        return None
+
+    def expired(self) -> bool:
+        """
+        마감 시각이 지났거나 취소되었는지 확인
+        """
+        return self.reason is not None
+
+    def remaining(self) -> float:
+        """
+        남은 시간
+
+        Returns:
+            float | None: 남은 시간 (초, 마감 후에는 0), 시간 제한이 없으면 None
+        """
+        if self._cancelled.is_set():
+            return 0.0
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def check(self):
+        """
+        마감되었으면 DeadlineExceeded 발생
+        """
+        reason = self.reason
+        if reason is not None:
+            raise DeadlineExceeded(reason)
+
+    def wait(self, seconds: float) -> bool:
+        """
+        최대 seconds초 대기 (마감 시각이나 취소 중 먼저 오는 쪽에서 깨어남)
+
+        Args:
+            seconds: 대기 시간 (초)
+
+        Returns:
+            bool: 대기 후 마감되었으면 True
+        """
+        remaining = self.remaining()
+        self._cancelled.wait(seconds if remaining is None else min(seconds, remaining))
+        return self.expired()
+
+    def cancel(self):
+        """
+        취소 (등록된 콜백은 한 번만 호출)
+        """
+        with self._lock:
+            if self._cancelled.is_set():
+                return
+            self._cancelled.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def on_cancel(self, callback):
+        """
+        취소될 때 호출할 함수 등록 (이미 취소되었으면 바로 호출)
+
+        Args:
+            callback: 인자 없는 함수
+        """
+        with self._lock:
+            if not self._cancelled.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+
+def current_deadline() -> Deadline:
+    """
+    현재 컨텍스트의 Deadline (없으면 None)
+    """
+    return _current_deadline.get()
+
+
+@contextmanager
+def deadline_scope(deadline: Deadline):
+    """
+    블록 안에서 current_deadline()이 deadline을 돌려주도록 지정
+    (블록 안에서 run_in_context로 넘긴 작업자 스레드도 같은 deadline을 따름)
+
+    Args:
+        deadline: 적용할 Deadline (None이면 제한 없음)
+    """
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def iter_completed(futures, deadline: Deadline = None):
+    """
+    concurrent.futures.as_completed와 같지만, 마감되면 남은 작업을 기다리지 않고 멈춤
+    (멈춘 뒤 끝나지 않은 작업은 future.done()으로 확인)
+
+    Args:
+        futures: Future 목록
+        deadline: 따를 Deadline (None이면 끝까지 기다림)
+
+    Yields:
+        Future: 끝난 순서대로
+    """
+    if deadline is None:
+        yield from as_completed(futures)
+        return
+
+    # 취소되면 바로 깨어나도록 대기 목록에 함께 넣는 Future
+    woken = Future()
+
+    def wake():
+        try:
+            woken.set_result(None)
+        except InvalidStateError:
+            pass
+
+    deadline.on_cancel(wake)
+    pending = set(futures)
+    while pending and not deadline.expired():
+        done, pending = wait(pending | {woken}, timeout=deadline.remaining(), return_when=FIRST_COMPLETED)
+        done.discard(woken)
+        pending.discard(woken)
+        yield from done
+
+
+async def until_deadline(awaitable, deadline: Deadline):
+    """
+    awaitable을 마감까지만 기다림 - 마감되거나 취소되면(다른 스레드에서 취소해도) 기다리던 작업을 취소하고 DeadlineExceeded
+    호출한 작업 자체가 취소되면 asyncio.CancelledError를 그대로 전달
+
+    Args:
+        awaitable: 기다릴 코루틴 또는 Future
+        deadline: 따를 Deadline (None이면 끝까지 기다림)
+
+    Returns:
+        awaitable의 결과
+    """
+    if deadline is None:
+        return await awaitable
+    loop = asyncio.get_running_loop()
+    task = asyncio.ensure_future(awaitable)
+    # Deadline 취소로 멈춘 것인지 (호출한 작업 자체가 취소된 경우와 구분 - Task.cancelling()은 3.11부터)
+    cancelled_by_deadline = False
+
+    def cancel():
+        nonlocal cancelled_by_deadline
+        cancelled_by_deadline = True
+        try:
+            loop.call_soon_threadsafe(task.cancel)
+        except RuntimeError:
+            # 이미 닫힌 이벤트 루프
+            pass
+
+    deadline.on_cancel(cancel)
+    try:
+        return await asyncio.wait_for(task, deadline.remaining())
+    except asyncio.TimeoutError:
+        if deadline.expired():
+            raise DeadlineExceeded(deadline.reason or TIMEOUT) from None
+        raise
+    except asyncio.CancelledError:
+        if cancelled_by_deadline:
+            raise DeadlineExceeded(CANCELLED) from None
+        raise
@@ -0,0 +1,470 @@
+"""
+오프라인 Gemini/Imagen 백엔드
+genai.Client와 같은 모양(client.models.generate_content 등)의 가짜 클라이언트입니다.
+미리 준비한 레시피 JSON과 단색 이미지(스토리보드 프롬프트는 격자 이미지)를 돌려주며, 지연 시간/지터/오류율/429 비율을 설정할 수 있어서
+API 할당량을 쓰지 않고 벤치마크와 회귀 테스트를 돌릴 수 있습니다.
+
+사용법:
+    agent = RecipeAgent(client=FakeGenaiClient(latency=0.5, jitter=0.2, throttle_rate=0.05))
+"""
+
+import asyncio
+import hashlib
+import io
+import itertools
+import json
+import random
+import re
+import threading
+import time
+import typing
+from datetime import datetime, timedelta, timezone
+
+from google.genai import errors, types
+from PIL import Image, ImageDraw
+
+from context_cache import min_cache_tokens
+
+# 스토리보드 프롬프트의 격자 모양 ("grid of 2 rows and 3 columns")
+GRID_PATTERN = re.compile(r"grid of (\d+) rows and (\d+) columns")
+
+# 빠른 이미지 모델(imagen-4.0-fast-generate-001 등)의 지연 시간 비율 (image_latency 대비)
+FAST_IMAGE_LATENCY_RATIO = 0.3
+# 최고 품질 이미지 모델(imagen-4.0-ultra-generate-001 등)의 지연 시간 비율
+ULTRA_IMAGE_LATENCY_RATIO = 1.5
+
+# 텍스트 모델 이름에 들어간 단어별 지연 시간 비율 (latency 대비, 예: gemini-2.5-flash-lite / gemini-2.5-pro)
+TEXT_MODEL_LATENCY_RATIOS = {"lite": 0.5, "pro": 2.0}
+# 생각 예산을 모델에 맡길 때(-1 또는 지정 안 함) 쓰는 생각 토큰 수 (lite 모델은 기본으로 생각하지 않음)
+DYNAMIC_THINKING_TOKENS = 1000
+
+# 가짜 레시피 조리 단계 (조리 도구 키워드가 골고루 섞이도록 구성)
+CANNED_STEPS = [
+    "1단계: 도마 위에서 재료를 먹기 좋은 크기로 썰어 주세요. 크기를 맞추면 골고루 익어요.",
+    "2단계: 달군 팬에 기름을 두르고 고기를 볶아 주세요. 센 불에서 빠르게 볶는 게 포인트예요.",
+    "3단계: 냄비에 물과 양념을 넣고 한소끔 끓여 주세요.",
+    "4단계: 손질한 채소를 넣고 중불에서 푹 끓여 맛이 배게 해 주세요.",
+    "5단계: 간을 본 뒤 예쁜 그릇에 담아 따뜻하게 내주세요.",
+]
+
+
+class FakeGenaiClient:
+    """
+    genai.Client를 흉내 내는 오프라인 클라이언트
+    """
+
+    def __init__(self, latency: float = 1.0, image_latency: float = 3.0, jitter: float = 0.2,
+                 error_rate: float = 0.0, throttle_rate: float = 0.0, image_size: int = 256, seed: int = None,
+                 prefill_latency: float = 0.0, min_cache_tokens: int = None, thinking_latency: float = 0.0):
+        """
+        FakeGenaiClient 초기화
+
+        Args:
+            latency: 텍스트 생성 평균 지연 시간 (초)
+            image_latency: 이미지 생성 평균 지연 시간 (초)
+            jitter: 지연 시간 변동 비율 (0.2면 ±20%)
+            error_rate: 일시적 서버 오류(503) 비율
+            throttle_rate: 할당량 초과(429) 비율
+            image_size: 생성할 이미지 한 변 길이 (px)
+            seed: 난수 시드 (재현 가능한 벤치마크용)
+            prefill_latency: 캐시되지 않은 입력 토큰 1000개당 추가 지연 시간 (초)
+            min_cache_tokens: 컨텍스트 캐시 최소 토큰 수 (미만이면 caches.create가 400 오류, None이면 실제 API처럼 모델별 최소값)
+            thinking_latency: 생각 토큰 1000개당 추가 지연 시간 (초) - 생각 토큰 수는 thinking_config의 예산을 따르고,
+                출력 토큰 상한(max_output_tokens)에 함께 포함되어 넘으면 응답이 잘림
+        """
+        self.caches = FakeCaches(min_cache_tokens)
+        self.models = FakeModels(self, latency, image_latency, jitter, error_rate, throttle_rate, image_size, seed,
+                                 prefill_latency, thinking_latency)
+        self.aio = FakeAsyncClient(self.models)
+
+
+def _token_count(text: str) -> int:
+    # 대략적인 토큰 수 (한글 기준 약 2자당 1토큰)
+    return max(1, len(text) // 2) if text else 0
+
+
+class FakeCaches:
+    """
+    client.caches 흉내 (시스템 지시문 컨텍스트 캐시)
+    """
+
+    def __init__(self, min_tokens: int = None):
+        self.min_tokens = min_tokens
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._entries = {}
+
+        # 호출 통계
+        self.calls = {"create": 0, "update": 0, "delete": 0}
+
+    @staticmethod
+    def _ttl_seconds(config) -> float:
+        ttl = getattr(config, "ttl", None) or "3600s"
+        return float(ttl.rstrip("s"))
+
+    def create(self, model: str, config=None) -> types.CachedContent:
+        """
+        시스템 지시문을 캐시에 저장
+        """
+        text = getattr(config, "system_instruction", None) or ""
+        tokens = _token_count(text)
+        min_tokens = min_cache_tokens(model) if self.min_tokens is None else self.min_tokens
+        with self._lock:
+            self.calls["create"] += 1
+            if tokens < min_tokens:
+                raise errors.ClientError(400, {"error": {
+                    "code": 400,
+                    "status": "INVALID_ARGUMENT",
+                    "message": f"[fake] Cached content is too small. total_token_count={tokens}, min_total_token_count={min_tokens}",
+                }})
+            name = f"cachedContents/fake-{next(self._ids)}"
+            expire_time = datetime.now(timezone.utc) + timedelta(seconds=self._ttl_seconds(config))
+            self._entries[name] = {"text": text, "expire_time": expire_time}
+        return types.CachedContent(name=name, model=model, expire_time=expire_time,
+                                   usage_metadata=types.CachedContentUsageMetadata(total_token_count=tokens))
+
+    def update(self, name: str, config=None) -> types.CachedContent:
+        """
+        캐시 TTL 연장
+        """
+        with self._lock:
+            self.calls["update"] += 1
+            entry = self._entry(name)
+            entry["expire_time"] = datetime.now(timezone.utc) + timedelta(seconds=self._ttl_seconds(config))
+            return types.CachedContent(name=name, expire_time=entry["expire_time"])
+
+    def delete(self, name: str, config=None):
+        """
+        캐시 삭제
+        """
+        with self._lock:
+            self.calls["delete"] += 1
+            self._entry(name)
+            del self._entries[name]
+
+    def text(self, name: str) -> str:
+        """
+        캐시된 시스템 지시문 (generate_content에서 사용)
+        """
+        with self._lock:
+            return self._entry(name)["text"]
+
+    def _entry(self, name: str) -> dict:
+        entry = self._entries.get(name)
+        if entry is None or entry["expire_time"] <= datetime.now(timezone.utc):
+            raise errors.ClientError(404, {"error": {
+                "code": 404,
+                "status": "NOT_FOUND",
+                "message": f"[fake] CachedContent not found (or expired): {name}",
+            }})
+        return entry
+
+
+class FakeAsyncClient:
+    """
+    client.aio 흉내 (같은 설정/통계를 쓰는 비동기 모델 API)
+    """
+
+    def __init__(self, models):
+        self.models = FakeAsyncModels(models)
+
+
+class FakeModels:
+    """
+    client.models 흉내 (generate_content, generate_content_stream, generate_images, get)
+    """
+
+    def __init__(self, client, latency, image_latency, jitter, error_rate, throttle_rate, image_size, seed,
+                 prefill_latency=0.0, thinking_latency=0.0):
+        self._client = client
+        self.latency = latency
+        self.prefill_latency = prefill_latency
+        self.thinking_latency = thinking_latency
+        self.image_latency = image_latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.image_size = image_size
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+        # 호출 통계
+        self.calls = {"generate_content": 0, "generate_content_stream": 0, "generate_images": 0, "get": 0, "count_tokens": 0}
+
+    def _delay(self, base: float) -> float:
+        with self._lock:
+            factor = 1 + self._random.uniform(-self.jitter, self.jitter)
+        return max(0.0, base * factor)
+
+    def _sleep(self, base: float):
+        time.sleep(self._delay(base))
+
+    def _maybe_fail(self, model: str):
+        with self._lock:
+            roll = self._random.random()
+
+        if roll < self.throttle_rate:
+            raise errors.ClientError(429, {"error": {
+                "code": 429,
+                "status": "RESOURCE_EXHAUSTED",
+                "message": f"[fake] Quota exceeded for {model}",
+            }})
+        if roll < self.throttle_rate + self.error_rate:
+            raise errors.ServerError(503, {"error": {
+                "code": 503,
+                "status": "UNAVAILABLE",
+                "message": "[fake] The model is overloaded",
+            }})
+
+    def _count(self, name: str):
+        with self._lock:
+            self.calls[name] += 1
+
+    @staticmethod
+    def _prompt_text(contents) -> str:
+        return contents if isinstance(contents, str) else json.dumps(contents, ensure_ascii=False, default=str)
+
+    @staticmethod
+    def _dish_names(prompt: str) -> list:
+        # 프롬프트의 "요리명:" 줄마다 요리 하나 (여러 요리를 한 번에 요청하면 여러 줄)
+        names = [line.split(":", 1)[1].strip() for line in prompt.splitlines() if line.startswith("요리명:")]
+        return names or ["오늘의 요리"]
+
+    @staticmethod
+    def _recipe(dish_name: str) -> dict:
+        return {
+            "title": f"집에서 즐기는 {dish_name}",
+            "cooking_time": "30분",
+            "ingredients": [f"{dish_name} 주재료 (300g)", "양파 (1개)", "대파 (1대)", "다진 마늘 (1큰술)", "간장 (2큰술)"],
+            "steps": CANNED_STEPS,
+        }
+
+    def _recipe_json(self, prompt: str, config=None) -> str:
+        # 응답 스키마가 배열이면 요리마다 {"dish", 레시피 필드} 항목 하나씩
+        if typing.get_origin(getattr(config, "response_schema", None)) is list:
+            return json.dumps([{"dish": dish_name, **self._recipe(dish_name)} for dish_name in self._dish_names(prompt)],
+                              ensure_ascii=False)
+        return json.dumps(self._recipe(self._dish_names(prompt)[0]), ensure_ascii=False)
+
+    def _instruction(self, config) -> tuple:
+        # (system_instruction 텍스트, 컨텍스트 캐시 텍스트) - 실제 API처럼 둘을 함께 보내면 400 오류
+        system_instruction = getattr(config, "system_instruction", None)
+        cached_content = getattr(config, "cached_content", None)
+        if system_instruction and cached_content:
+            raise errors.ClientError(400, {"error": {
+                "code": 400,
+                "status": "INVALID_ARGUMENT",
+                "message": "[fake] CachedContent can not be used with GenerateContent request setting system_instruction",
+            }})
+        cached_text = self._client.caches.text(cached_content) if cached_content else ""
+        return self._prompt_text(system_instruction) if system_instruction else "", cached_text
+
+    def _prefill_delay(self, prompt: str, config) -> float:
+        # 캐시되지 않은 입력 토큰 처리 시간
+        system_text, _ = self._instruction(config)
+        return self.prefill_latency * (_token_count(prompt) + _token_count(system_text)) / 1000
+
+    def _text_latency(self, model: str) -> float:
+        # 가벼운 모델(이름에 "lite")은 빠르고 큰 모델(이름에 "pro")은 느림
+        for keyword, ratio in TEXT_MODEL_LATENCY_RATIOS.items():
+            if keyword in model:
+                return self.latency * ratio
+        return self.latency
+
+    @staticmethod
+    def _thinking_tokens(model: str, config) -> int:
+        # 생각 토큰 수: 예산이 있으면 예산만큼, -1/미지정이면 모델에 맡김 (lite 모델은 기본으로 생각하지 않음)
+        thinking_config = getattr(config, "thinking_config", None)
+        budget = getattr(thinking_config, "thinking_budget", None)
+        if budget is None:
+            return 0 if "lite" in model else DYNAMIC_THINKING_TOKENS
+        if budget < 0:
+            return DYNAMIC_THINKING_TOKENS
+        return budget
+
+    def _thinking_delay(self, model: str, config) -> float:
+        # 생각 토큰 생성 시간 (첫 출력 토큰 전에 걸림)
+        return self.thinking_latency * self._thinking_tokens(model, config) / 1000
+
+    @staticmethod
+    def _truncate(text: str, thoughts: int, config) -> tuple:
+        # 생각 토큰 + 출력 토큰이 max_output_tokens를 넘으면 남은 만큼만 출력 (실제 API처럼 finish_reason=MAX_TOKENS)
+        max_output_tokens = getattr(config, "max_output_tokens", None)
+        if max_output_tokens is None or thoughts + _token_count(text) <= max_output_tokens:
+            return text, types.FinishReason.STOP
+        return text[:max(0, max_output_tokens - thoughts) * 2], types.FinishReason.MAX_TOKENS
+
+    @staticmethod
+    def _usage(prompt: str, text: str, system_text: str = "", cached_text: str = "",
+               thoughts: int = 0) -> types.GenerateContentResponseUsageMetadata:
+        # 입력 토큰은 요청 본문 + 시스템 지시문 + 컨텍스트 캐시 (실제 API처럼 캐시 토큰도 prompt_token_count에 포함)
+        cached_tokens = _token_count(cached_text)
+        prompt_tokens = max(1, _token_count(prompt) + _token_count(system_text) + cached_tokens)
+        output_tokens = max(1, _token_count(text))
+        return types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=prompt_tokens,
+            cached_content_token_count=cached_tokens or None,
+            candidates_token_count=output_tokens,
+            thoughts_token_count=thoughts or None,
+            total_token_count=prompt_tokens + output_tokens + thoughts,
+        )
+
+    @staticmethod
+    def _response(text: str, usage=None, finish_reason=None) -> types.GenerateContentResponse:
+        return types.GenerateContentResponse(
+            candidates=[types.Candidate(content=types.Content(role="model", parts=[types.Part(text=text)]),
+                                        finish_reason=finish_reason)],
+            usage_metadata=usage,
+        )
+
+    def generate_content(self, model: str, contents, config=None) -> types.GenerateContentResponse:
+        """
+        레시피 JSON 반환 (요청 프롬프트의 "요리명:" 줄을 제목에 사용)
+        """
+        self._count("generate_content")
+        prefill = self._prefill_delay(self._prompt_text(contents), config)
+        self._sleep(self._text_latency(model))
+        time.sleep(prefill + self._thinking_delay(model, config))
+        self._maybe_fail(model)
+
+        return self._content_response(model, contents, config)
+
+    def _content_response(self, model: str, contents, config=None) -> types.GenerateContentResponse:
+        prompt = self._prompt_text(contents)
+        thoughts = self._thinking_tokens(model, config)
+        text, finish_reason = self._truncate(self._recipe_json(prompt, config), thoughts, config)
+        return self._response(text, self._usage(prompt, text, *self._instruction(config), thoughts), finish_reason)
+
+    def generate_content_stream(self, model: str, contents, config=None):
+        """
+        레시피 JSON을 여러 조각으로 나눠서 지연 시간에 걸쳐 전달
+        """
+        self._count("generate_content_stream")
+        prompt = self._prompt_text(contents)
+        # 첫 조각까지는 지연 시간의 30% + 입력 처리 시간 + 생각 시간, 나머지는 조각들 사이에 나눠서 대기
+        latency = self._text_latency(model)
+        prefill = self._prefill_delay(prompt, config)
+        self._sleep(latency * 0.3)
+        time.sleep(prefill + self._thinking_delay(model, config))
+        self._maybe_fail(model)
+
+        instruction = self._instruction(config)
+        thoughts = self._thinking_tokens(model, config)
+        text, finish_reason = self._truncate(self._recipe_json(prompt, config), thoughts, config)
+        chunk_size = 40
+        chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)] or [""]
+        for n, chunk in enumerate(chunks):
+            if n:
+                self._sleep(latency * 0.7 / max(len(chunks) - 1, 1))
+            last = n == len(chunks) - 1
+            usage = self._usage(prompt, text, *instruction, thoughts) if last else None
+            yield self._response(chunk, usage, finish_reason if last else None)
+
+    def generate_images(self, model: str, prompt: str, config=None) -> types.GenerateImagesResponse:
+        """
+        프롬프트마다 다른 색의 단색 PNG 이미지 반환
+        """
+        self._count("generate_images")
+        self._sleep(self._image_latency(model))
+        self._maybe_fail(model)
+        return self._images_response(prompt, config)
+
+    def _image_latency(self, model: str) -> float:
+        # 빠른 이미지 모델(이름에 "fast")은 지연 시간이 짧고, 최고 품질 모델(이름에 "ultra")은 김
+        if "fast" in model:
+            return self.image_latency * FAST_IMAGE_LATENCY_RATIO
+        if "ultra" in model:
+            return self.image_latency * ULTRA_IMAGE_LATENCY_RATIO
+        return self.image_latency
+
+    def _image_size(self, config) -> tuple:
+        # aspect_ratio("4:3" 등)에 맞춘 (너비, 높이), 짧은 변이 image_size
+        width_ratio, height_ratio = (int(part) for part in (getattr(config, "aspect_ratio", None) or "1:1").split(":"))
+        scale = self.image_size / min(width_ratio, height_ratio)
+        return round(width_ratio * scale), round(height_ratio * scale)
+
+    @staticmethod
+    def _draw_grid(image: Image.Image, rows: int, cols: int, seed: str):
+        # 흰 여백으로 나뉜 칸마다 다른 색 배경 + 원 하나 (스토리보드 칸 나누기 확인용)
+        draw = ImageDraw.Draw(image)
+        width, height = image.size
+        gutter = max(2, min(width, height) // 50)
+        draw.rectangle((0, 0, width, height), fill=(255, 255, 255))
+        cell_width = (width - gutter) / cols
+        cell_height = (height - gutter) / rows
+        for n in range(rows * cols):
+            digest = hashlib.sha256(f"{seed}|panel|{n}".encode("utf-8")).digest()
+            left = gutter + (n % cols) * cell_width
+            top = gutter + (n // cols) * cell_height
+            right, bottom = left + cell_width - gutter, top + cell_height - gutter
+            background = tuple(digest[:3])
+            draw.rectangle((left, top, right, bottom), fill=background)
+            # 배경과 밝기가 확실히 다른 원 (칸이 단색으로 보이지 않도록)
+            foreground = (20, 20, 20) if sum(background) > 384 else (235, 235, 235)
+            inset_x, inset_y = (right - left) / 4, (bottom - top) / 4
+            draw.ellipse((left + inset_x, top + inset_y, right - inset_x, bottom - inset_y), fill=foreground)
+
+    def _images_response(self, prompt: str, config) -> types.GenerateImagesResponse:
+        number_of_images = getattr(config, "number_of_images", None) or 1
+        grid = GRID_PATTERN.search(prompt)
+        generated_images = []
+        for n in range(number_of_images):
+            digest = hashlib.sha256(f"{prompt}|{n}".encode("utf-8")).digest()
+            image = Image.new("RGB", self._image_size(config), tuple(digest[:3]))
+            if grid:
+                self._draw_grid(image, int(grid.group(1)), int(grid.group(2)), f"{prompt}|{n}")
+            buffer = io.BytesIO()
+            image.save(buffer, format="PNG")
+            generated_images.append(types.GeneratedImage(image=types.Image(image_bytes=buffer.getvalue(), mime_type="image/png")))
+
+        return types.GenerateImagesResponse(generated_images=generated_images)
+
+    def count_tokens(self, model: str, contents, config=None) -> types.CountTokensResponse:
+        """
+        입력 토큰 수 세기 (지연 없음, 실패하지 않음)
+        """
+        self._count("count_tokens")
+        return types.CountTokensResponse(total_tokens=_token_count(self._prompt_text(contents)))
+
+    def get(self, model: str, config=None) -> types.Model:
+        """
+        모델 정보 조회 (연결 예열용)
+        """
+        self._count("get")
+        return types.Model(name=f"models/{model}")
+
+
+class FakeAsyncModels:
+    """
+    client.aio.models 흉내 (asyncio.sleep으로 대기해서 이벤트 루프를 막지 않음)
+    """
+
+    def __init__(self, models: FakeModels):
+        self._models = models
+
+    async def generate_content(self, model: str, contents, config=None) -> types.GenerateContentResponse:
+        """
+        FakeModels.generate_content의 비동기 버전
+        """
+        self._models._count("generate_content")
+        prefill = self._models._prefill_delay(self._models._prompt_text(contents), config)
+        thinking = self._models._thinking_delay(model, config)
+        await asyncio.sleep(self._models._delay(self._models._text_latency(model)) + prefill + thinking)
+        self._models._maybe_fail(model)
+        return self._models._content_response(model, contents, config)
+
+    async def generate_images(self, model: str, prompt: str, config=None) -> types.GenerateImagesResponse:
+        """
+        FakeModels.generate_images의 비동기 버전
+        """
+        self._models._count("generate_images")
+        await asyncio.sleep(self._models._delay(self._models._image_latency(model)))
+        self._models._maybe_fail(model)
+        return self._models._images_response(prompt, config)
+
+    async def get(self, model: str, config=None) -> types.Model:
+        """
+        FakeModels.get의 비동기 버전
+        """
+        return self._models.get(model=model, config=config)
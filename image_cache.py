@@ -0,0 +1,205 @@
+"""
+이미지 콘텐츠 주소 캐시
+Imagen 프롬프트/모델/설정이 완전히 같으면 이미 생성한 이미지를 재사용해서 API 호출을 생략합니다.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+
+# 아티팩트 저장소에 남기는 캐시 항목의 참조 주인 접두사 (뒤에 캐시 키)
+ARTIFACT_OWNER_PREFIX = "image-cache:"
+
+
+class ImageCache:
+    """
+    Imagen 결과 이미지 캐시
+    - 키: 프롬프트 + 모델명 + 생성 설정의 SHA-256 해시
+    - artifact_store가 있으면 이미지는 아티팩트 저장소에 한 번만 저장하고 캐시 항목은 참조로만 기록
+      (주인 "image-cache:<키>", 이름은 순번) - 화면에 쓰는 이미지와 같은 파일을 쓰고 용량 정리도 저장소가 맡음
+    - 없으면 {cache_dir}/{키 앞 2자리}/{키}/{순번}.png 파일로 저장하고,
+      quota_bytes를 넘으면 가장 오래 쓰지 않은 항목부터 제거
+    - 파일은 임시 파일에 쓴 뒤 교체하므로 여러 프로세스가 같은 폴더를 공유해도 반쯤 쓰인 파일을 읽지 않음
+    """
+
+    def __init__(self, cache_dir: str = "cache/images", quota_bytes: int = 512 * 1024 ** 2, artifact_store=None):
+        """
+        ImageCache 초기화
+
+        Args:
+            cache_dir: 이미지 캐시 폴더 (artifact_store가 없을 때)
+            quota_bytes: 캐시 폴더 전체 크기 상한 (바이트, 0 이하면 제한 없음, artifact_store가 없을 때)
+            artifact_store: 이미지를 저장할 아티팩트 저장소 (ArtifactStore, optional)
+        """
+        self.cache_dir = Path(cache_dir)
+        self.quota_bytes = quota_bytes
+        self.artifacts = artifact_store
+
+        # 이 프로세스의 적중/미스 횟수
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        # 캐시 폴더 크기 추정값 (처음 한 번 세고 저장할 때마다 더함, 상한을 넘으면 다시 세면서 정리)
+        self._evict_lock = threading.Lock()
+        self._bytes = 0
+        if self.artifacts is None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._bytes = self._scan()[1]
+
+    @staticmethod
+    def make_key(prompt: str, model_name: str, config: dict) -> str:
+        """
+        캐시 키 생성
+
+        Args:
+            prompt: 이미지 생성 프롬프트
+            model_name: 이미지 모델 이름
+            config: 생성 설정 (JSON 직렬화 가능한 dict)
+
+        Returns:
+            str: SHA-256 해시 키
+        """
+        payload = json.dumps(
+            {"prompt": prompt, "model": model_name, "config": config},
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / key
+
+    def get(self, key: str, count: int = 1):
+        """
+        캐시 조회
+
+        Args:
+            key: make_key로 만든 캐시 키
+            count: 필요한 이미지 수
+
+        Returns:
+            list[bytes] | None: 저장된 이미지 데이터, count개가 모두 없으면 None
+        """
+        images = self._read(key, count)
+
+        with self._lock:
+            if images is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        return images
+
+    def _read(self, key: str, count: int):
+        # 저장된 이미지 count개 (하나라도 없으면 None)
+        if self.artifacts is not None:
+            handles = self.artifacts.refs(ARTIFACT_OWNER_PREFIX + key)
+            paths = [self.artifacts.path(handles.get(str(n))) for n in range(count)]
+        else:
+            entry_dir = self._entry_dir(key)
+            paths = [entry_dir / f"{n}.png" for n in range(count)]
+
+        if any(path is None for path in paths):
+            return None
+        try:
+            images = [Path(path).read_bytes() for path in paths]
+            if self.artifacts is None:
+                # 정리 순서에 쓰는 마지막 사용 시각
+                os.utime(self._entry_dir(key))
+        except OSError:
+            # 없거나 읽는 사이에 정리된 경우
+            return None
+        return images
+
+    def put(self, key: str, images: list):
+        """
+        이미지 저장
+
+        Args:
+            key: make_key로 만든 캐시 키
+            images: 이미지 데이터(bytes) 리스트
+        """
+        if self.artifacts is not None:
+            owner = ARTIFACT_OWNER_PREFIX + key
+            for n, image_bytes in enumerate(images):
+                self.artifacts.put(image_bytes, owner, str(n))
+            return
+
+        entry_dir = self._entry_dir(key)
+        entry_dir.mkdir(parents=True, exist_ok=True)
+
+        for n, image_bytes in enumerate(images):
+            fd, tmp_path = tempfile.mkstemp(dir=entry_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(image_bytes)
+                os.replace(tmp_path, entry_dir / f"{n}.png")
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+        with self._lock:
+            self._bytes += sum(len(image_bytes) for image_bytes in images)
+            over = 0 < self.quota_bytes < self._bytes
+        if over:
+            self.evict()
+
+    def _scan(self) -> tuple:
+        # 캐시 폴더의 항목 [(마지막 사용 시각, 크기, 폴더)]과 전체 크기
+        entries = []
+        for entry_dir in self.cache_dir.glob("*/*"):
+            try:
+                size = sum(path.stat().st_size for path in entry_dir.iterdir())
+                entries.append((entry_dir.stat().st_mtime, size, entry_dir))
+            except OSError:
+                # 다른 프로세스가 정리 중
+                continue
+        return entries, sum(size for _, size, _ in entries)
+
+    def evict(self) -> int:
+        """
+        캐시 폴더가 상한을 넘은 만큼 가장 오래 쓰지 않은 항목부터 제거 (artifact_store를 쓰면 저장소가 정리)
+
+        Returns:
+            int: 제거한 항목 수
+        """
+        if self.artifacts is not None or self.quota_bytes <= 0:
+            return 0
+
+        with self._evict_lock:
+            entries, total = self._scan()
+            removed = 0
+            for _, size, entry_dir in sorted(entries, key=lambda entry: entry[0]):
+                if total <= self.quota_bytes:
+                    break
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                total -= size
+                removed += 1
+            with self._lock:
+                self._bytes = total
+
+        if removed:
+            print(f"🧹 이미지 캐시 정리: 항목 {removed}개 제거 ({total / 1024 ** 2:.1f}MB 남음)")
+        return removed
+
+    def stats(self) -> dict:
+        """
+        캐시 통계 (현재 프로세스 기준)
+
+        Returns:
+            dict: hits, misses, hit_rate, bytes(캐시 폴더 크기 추정값, artifact_store를 쓰면 0)
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "bytes": self._bytes,
+            }
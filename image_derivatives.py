@@ -0,0 +1,136 @@
+"""
+이미지 파생본 (썸네일/화면 표시용)
+원본 PNG를 저장할 때 백그라운드에서 작은 WebP(또는 JPEG) 버전을 만들어 두고,
+화면에서는 표시할 폭에 맞는 가장 작은 버전을 사용해서 페이지 전송량을 줄입니다.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from PIL import Image, features
+
+# 파생본 이름 -> 최대 변 길이 (px), 작은 것부터
+DERIVATIVE_SIZES = {
+    "thumb": 320,
+    "display": 768,
+}
+
+
+def derivative_format() -> tuple:
+    """
+    파생본 이미지 형식 (Pillow가 WebP를 지원하면 WebP, 아니면 JPEG)
+
+    Returns:
+        tuple: (Pillow 형식 이름, 확장자)
+    """
+    if features.check("webp"):
+        return "WEBP", "webp"
+    return "JPEG", "jpg"
+
+
+def derivative_path(image_path: str, name: str) -> Path:
+    """
+    원본 이미지에 대한 파생본 파일 경로 (원본과 같은 폴더, 예: temp/김치찌개_step_1.thumb.webp)
+
+    Args:
+        image_path: 원본 이미지 경로
+        name: 파생본 이름 (DERIVATIVE_SIZES의 키)
+
+    Returns:
+        Path: 파생본 경로
+    """
+    path = Path(image_path)
+    _, extension = derivative_format()
+    return path.with_name(f"{path.stem}.{name}.{extension}")
+
+
+def create_derivatives(image_path: str, quality: int = 80) -> dict:
+    """
+    원본 이미지의 파생본을 모두 생성
+
+    Args:
+        image_path: 원본 이미지 경로
+        quality: 압축 품질 (1~100)
+
+    Returns:
+        dict: {파생본 이름: 파생본 경로}
+    """
+    image_format, _ = derivative_format()
+    results = {}
+
+    with Image.open(image_path) as original:
+        original = original.convert("RGB")
+        for name, max_size in DERIVATIVE_SIZES.items():
+            resized = original.copy()
+            # 원본보다 크게 늘리지는 않음
+            resized.thumbnail((max_size, max_size), Image.LANCZOS)
+
+            target = derivative_path(image_path, name)
+            tmp_target = target.with_name(target.name + ".tmp")
+            resized.save(tmp_target, format=image_format, quality=quality)
+            tmp_target.replace(target)
+            results[name] = str(target)
+
+    return results
+
+
+def best_image(image_path: str, width: int) -> str:
+    """
+    표시할 폭에 맞는 가장 작은 이미지 경로
+    파생본이 아직 없거나 원본보다 오래되었으면(같은 파일명으로 원본이 다시 저장된 경우) 원본 경로를 반환
+
+    Args:
+        image_path: 원본 이미지 경로
+        width: 화면에 표시할 폭 (px)
+
+    Returns:
+        str: 사용할 이미지 경로
+    """
+    original = Path(image_path)
+    if not original.exists():
+        return image_path
+
+    original_mtime = original.stat().st_mtime
+    for name, max_size in DERIVATIVE_SIZES.items():
+        if max_size < width:
+            continue
+        candidate = derivative_path(image_path, name)
+        if candidate.exists() and candidate.stat().st_mtime >= original_mtime:
+            return str(candidate)
+    return image_path
+
+
+class DerivativeWorker:
+    """
+    파생본 생성 백그라운드 작업자 (이미지 저장 직후 제출, 요청 처리 경로를 막지 않음)
+    """
+
+    def __init__(self, max_workers: int = 2, quality: int = 80):
+        """
+        DerivativeWorker 초기화
+
+        Args:
+            max_workers: 동시에 변환할 이미지 수
+            quality: 압축 품질 (1~100)
+        """
+        self.quality = quality
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image-derivatives")
+
+    def submit(self, image_path: str):
+        """
+        파생본 생성 작업 제출
+
+        Args:
+            image_path: 원본 이미지 경로
+
+        Returns:
+            Future: create_derivatives 결과
+        """
+        return self._executor.submit(self._run, image_path)
+
+    def _run(self, image_path: str) -> dict:
+        try:
+            return create_derivatives(image_path, self.quality)
+        except Exception as e:
+            print(f"⚠️ 이미지 파생본 생성 실패 ({image_path}): {e}")
+            return {}
@@ -0,0 +1,272 @@
+"""
+재료 색인 ("돼지고기, 김치로 뭘 만들지?")
+이미 생성한 레시피의 재료 목록으로 역색인을 만들어서, 가진 재료로 만들 수 있는 요리를 LLM 호출 없이 찾습니다.
+(외부 의존성 없이 메모리에서 동작)
+
+- 재료 파싱: "돼지고기 (200g)", "양파 1/2개", "다진 마늘 1큰술" → (정규 재료명, 분량)
+- 정규 재료명: 유니코드 NFC, 소문자, 손질 표현("다진", "채 썬" 등) 제거, 같은 재료 다른 이름 통일, 공백 제거
+- 검색: 입력 재료를 많이 쓰는 레시피 순 (같으면 입력에 없는 재료가 적은 순)
+  두 글자 이상인 재료는 앞뒤로 붙은 재료명에도 일치 ("김치" → "신김치", "돼지고기" → "돼지고기목살")
+"""
+
+import re
+import threading
+import unicodedata
+
+# 분량 단위 (긴 것부터)
+_UNITS = ["큰술", "작은술", "스푼", "숟가락", "티스푼", "컵", "개", "쪽", "줌", "모", "대", "장", "포기", "마리", "뿌리",
+          "줄기", "봉지", "팩", "캔", "알", "톨", "인분", "kg", "g", "ml", "l", "cc", "tbsp", "tsp", "t"]
+# 숫자 없이 쓰는 분량 표현
+_AMOUNT_WORDS = ["약간", "적당량", "조금", "한줌", "한 줌", "한꼬집", "한 꼬집", "넉넉히", "취향껏"]
+
+_NUMBER = r"\d+(?:[./]\d+)?"
+_QUANTITY = (rf"(?:{_NUMBER}\s*(?:~\s*{_NUMBER}\s*)?(?:{'|'.join(_UNITS)})?|{'|'.join(_AMOUNT_WORDS)})"
+             rf"(?:\s*(?:\+|~)\s*(?:{_NUMBER}\s*(?:{'|'.join(_UNITS)})?))*")
+_TRAILING_QUANTITY = re.compile(rf"\s+({_QUANTITY})\s*$", re.IGNORECASE)
+_PARENTHESES = re.compile(r"\s*[(\[]([^)\]]*)[)\]]")
+_QUANTITY_ONLY = re.compile(rf"^\s*{_QUANTITY}\s*$", re.IGNORECASE)
+
+# 재료명 앞의 손질/상태 표현 (띄어 쓴 경우만 제거 - "신김치"는 그대로)
+MODIFIERS = ["다진", "간", "채 썬", "송송 썬", "잘게 썬", "얇게 썬", "깍둑 썬", "썬", "삶은", "데친", "볶은", "구운", "불린",
+             "손질한", "손질된", "냉동", "생", "익은", "묵은", "신"]
+
+# 같은 재료의 다른 이름 -> 대표 이름 (공백 제거 후)
+ALIASES = {
+    "계란": "달걀",
+    "쇠고기": "소고기",
+    "파": "대파",
+    "후춧가루": "후추",
+    "다진마늘": "마늘",
+    "돼지고기앞다리살": "돼지고기앞다리",
+}
+
+# 집에 늘 있다고 보는 기본 양념 (입력에 없어도 "없는 재료"로 치지 않음)
+PANTRY_STAPLES = frozenset(["소금", "후추", "설탕", "물", "식용유", "참기름", "들기름", "깨", "통깨", "참깨", "간장", "식초",
+                            "올리브유", "맛술", "미림"])
+
+# 입력을 나누는 구분자 (쉼표 등이 없으면 공백으로 나눔)
+_QUERY_SEPARATORS = re.compile(r"[,，、/+&·\n]|\s+(?:and|그리고)\s+")
+# 공백으로 나눈 입력 단어 끝의 조사 ("돼지고기랑 김치")
+_QUERY_PARTICLES = re.compile(r"(?:이랑|랑|하고)$")
+
+# 앞뒤 일치를 허용할 최소 재료명 길이 ("파"가 "양파"에 일치하지 않도록)
+MIN_PARTIAL_LENGTH = 2
+
+
+def parse_ingredient(text: str) -> tuple:
+    """
+    재료 문자열을 정규 재료명과 분량으로 분리
+
+    Args:
+        text: 레시피의 재료 항목 (예: "돼지고기 (200g)", "양파 1/2개", "소금 약간")
+
+    Returns:
+        tuple: (정규 재료명, 분량) - 분량이 없으면 None, 재료명을 찾지 못하면 ("", 분량)
+    """
+    text = unicodedata.normalize("NFC", str(text)).strip().lower()
+    text = re.sub(r"^(?:[-*•·]|\d+[.)])\s*", "", text)
+    # 묶음 이름은 버림 ("양념: 고추장 2큰술")
+    text = text.split(":", 1)[-1].strip()
+
+    # 괄호 안이 분량이면 분량으로, 아니면 설명이므로 버림 ("간장 (진간장)")
+    quantity = None
+    for note in _PARENTHESES.findall(text):
+        if quantity is None and _QUANTITY_ONLY.match(note):
+            quantity = note.strip()
+    text = _PARENTHESES.sub(" ", text).strip()
+
+    # 뒤에 붙은 분량 ("양파 1/2개")
+    match = _TRAILING_QUANTITY.search(text)
+    if match:
+        quantity = quantity or match.group(1).strip()
+        text = text[:match.start()]
+
+    # 대체 재료는 첫 번째만 ("돼지고기 또는 소고기")
+    text = re.split(r"\s+(?:또는|혹은|or)\s+|\s*/\s*", text)[0]
+    return canonical_name(text), quantity
+
+
+def canonical_name(name: str) -> str:
+    """
+    비교용 재료명 (손질 표현 제거, 같은 재료 다른 이름 통일, 공백 제거)
+
+    Args:
+        name: 재료 이름
+
+    Returns:
+        str: 정규 재료명 (손질 표현만 있으면 빈 문자열)
+    """
+    name = " ".join(unicodedata.normalize("NFC", name).lower().split())
+    stripped = True
+    while stripped:
+        stripped = False
+        for modifier in MODIFIERS:
+            if name.startswith(modifier + " "):
+                name = name[len(modifier) + 1:]
+                stripped = True
+                break
+    if name in MODIFIERS:
+        return ""
+    compact = name.replace(" ", "")
+    return ALIASES.get(compact, compact)
+
+
+def parse_query(ingredients) -> list:
+    """
+    사용자가 입력한 재료 목록 파싱
+
+    Args:
+        ingredients: "돼지고기, 김치, 두부" 같은 문자열 또는 재료 리스트
+
+    Returns:
+        list: 정규 재료명 리스트 (입력 순서, 중복 없음)
+    """
+    if isinstance(ingredients, str):
+        pieces = _QUERY_SEPARATORS.split(ingredients)
+        if len(pieces) == 1:
+            pieces = [_QUERY_PARTICLES.sub("", word) if len(word) > 2 else word for word in ingredients.split()]
+    else:
+        pieces = list(ingredients)
+
+    names = []
+    for piece in pieces:
+        name, _ = parse_ingredient(piece)
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+class IngredientIndex:
+    """
+    레시피 재료 역색인 (스레드 안전)
+    """
+
+    def __init__(self, min_coverage: float = 0.75):
+        """
+        IngredientIndex 초기화
+
+        Args:
+            min_coverage: 잘 맞는 레시피로 볼 최소 재료 일치율 (입력 재료 중 레시피가 쓰는 비율, 0~1)
+        """
+        self.min_coverage = min_coverage
+        # 요리 키 -> (요리 이름, 정규 재료명 집합)
+        self._recipes = {}
+        # 정규 재료명 -> 요리 키 집합
+        self._postings = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._recipes)
+
+    @staticmethod
+    def _dish_key(dish_name: str) -> str:
+        return " ".join(unicodedata.normalize("NFC", dish_name).split()).lower()
+
+    def add(self, dish_name: str, ingredients: list):
+        """
+        레시피 추가 (같은 요리가 이미 있으면 재료 목록을 교체)
+
+        Args:
+            dish_name: 요리 이름
+            ingredients: 레시피의 재료 항목 리스트
+        """
+        names = frozenset(name for name, _ in map(parse_ingredient, ingredients or []) if name)
+        if not names:
+            return
+
+        key = self._dish_key(dish_name)
+        with self._lock:
+            self._remove(key)
+            self._recipes[key] = (dish_name, names)
+            for name in names:
+                self._postings.setdefault(name, set()).add(key)
+
+    def add_many(self, recipes):
+        """
+        레시피 여러 개 추가
+
+        Args:
+            recipes: (요리 이름, 레시피 dict) 목록 - 같은 요리는 뒤의 것이 남음
+        """
+        for dish_name, recipe in recipes:
+            self.add(dish_name, recipe.get("ingredients", []))
+
+    def remove(self, dish_name: str):
+        """
+        레시피 제거 (레시피 캐시에서 사라진 요리)
+
+        Args:
+            dish_name: 요리 이름
+        """
+        with self._lock:
+            self._remove(self._dish_key(dish_name))
+
+    def _remove(self, key: str):
+        entry = self._recipes.pop(key, None)
+        if entry is None:
+            return
+        for name in entry[1]:
+            dishes = self._postings.get(name)
+            if dishes is not None:
+                dishes.discard(key)
+                if not dishes:
+                    del self._postings[name]
+
+    def _expand(self, name: str) -> set:
+        # 입력 재료명과 같거나 앞뒤로 붙은 색인 재료명
+        if len(name) < MIN_PARTIAL_LENGTH:
+            return {name} if name in self._postings else set()
+        return {other for other in self._postings if other.startswith(name) or other.endswith(name)}
+
+    def search(self, ingredients, limit: int = 5, min_coverage: float = 0.0) -> list:
+        """
+        가진 재료로 만들 수 있는 레시피 찾기
+
+        Args:
+            ingredients: 입력 재료 (문자열 또는 리스트, parse_query 참고)
+            limit: 최대 결과 수 (None이면 전부)
+            min_coverage: 최소 재료 일치율 (0~1)
+
+        Returns:
+            list: [{"dish_name", "coverage"(입력 재료 중 쓰이는 비율), "matched"(쓰이는 입력 재료),
+                   "missing"(입력에 없는 레시피 재료, 기본 양념 제외)}] 잘 맞는 순
+        """
+        query = parse_query(ingredients)
+        if not query:
+            return []
+
+        with self._lock:
+            expansions = {name: self._expand(name) for name in query}
+            candidates = set()
+            for names in expansions.values():
+                for name in names:
+                    candidates.update(self._postings[name])
+
+            results = []
+            for key in candidates:
+                dish_name, recipe_names = self._recipes[key]
+                matched = [name for name in query if expansions[name] & recipe_names]
+                coverage = len(matched) / len(query)
+                if coverage < min_coverage:
+                    continue
+                used = set().union(*(expansions[name] for name in matched))
+                missing = sorted(name for name in recipe_names - used if name not in PANTRY_STAPLES)
+                results.append({"dish_name": dish_name, "coverage": coverage, "matched": matched, "missing": missing})
+
+        results.sort(key=lambda result: (-result["coverage"], len(result["missing"]), result["dish_name"]))
+        return results if limit is None else results[:limit]
+
+    def best_match(self, ingredients, min_coverage: float = None):
+        """
+        가장 잘 맞는 레시피 하나
+
+        Args:
+            ingredients: 입력 재료 (문자열 또는 리스트)
+            min_coverage: 최소 재료 일치율 (None이면 색인 기본값)
+
+        Returns:
+            dict | None: search 결과 항목, min_coverage 이상인 레시피가 없으면 None
+        """
+        min_coverage = self.min_coverage if min_coverage is None else min_coverage
+        results = self.search(ingredients, limit=1, min_coverage=min_coverage)
+        return results[0] if results else None
@@ -0,0 +1,624 @@
+"""
+레시피 생성 작업 큐 (SQLite)
+레시피/단계 이미지 생성을 Streamlit 스크립트 실행과 분리해서 백그라운드 작업자가 처리하고,
+결과가 도착할 때마다 바로 저장합니다. 새로고침하거나 연결이 끊겨도 작업 ID로 진행 상황과
+이미 만든 결과를 다시 불러올 수 있으며, 작업자가 죽으면 다른 작업자가 이어서 처리합니다.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+from artifact_store import owner_scope
+from deadline import Deadline, DeadlineExceeded, deadline_scope, iter_completed
+from profiles import profile_scope
+from recipe_cache import RecipeCache
+from recipe_pipeline import RecipePipeline
+from scheduler import session_scope
+from telemetry import run_in_context
+
+# 작업 상태
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobStore:
+    """
+    작업 저장소
+    - jobs: 작업 하나 (상태, 작업자 임대, 스트리밍 중인 레시피 일부, 완성된 레시피, 대표 이미지)
+    - job_steps: 단계별 이미지 결과 (도착할 때마다 기록)
+    - 작업자는 임대(lease)를 주기적으로 연장하며, 임대가 끝난 실행 중 작업은 다른 작업자가 다시 가져감
+    - 진행/결과 기록(set_*, complete, fail)에 owner(작업자 ID)를 주면 그 작업자가 아직 임대를 가진 경우에만 기록하고
+      기록 여부를 돌려줌 (임대를 잃은 작업자가 새로 가져간 작업자의 결과를 덮어쓰지 않도록)
+    - 작업마다 지켜보는 세션 수(watchers)를 세고, 모든 세션이 떠나면(release) 대기 중인 작업은 바로 취소,
+      실행 중인 작업은 취소 요청(cancel_requested)을 남겨서 작업자가 멈추도록 함
+    - SQLite WAL 모드를 사용하므로 여러 Streamlit 워커 프로세스가 같은 파일을 공유해도 안전
+    """
+
+    def __init__(self, db_path: str = "cache/jobs.db", max_attempts: int = 3):
+        """
+        JobStore 초기화
+
+        Args:
+            db_path: SQLite 파일 경로
+            max_attempts: 작업 하나를 시도할 최대 횟수 (넘으면 failed)
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_attempts = max_attempts
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    dish_name TEXT NOT NULL,
+                    dish_key TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    lease_owner TEXT,
+                    lease_expires REAL,
+                    partial_json TEXT,
+                    recipe_json TEXT,
+                    hero_status TEXT,
+                    hero_image TEXT,
+                    trace_id TEXT,
+                    error TEXT,
+                    watchers INTEGER NOT NULL DEFAULT 1,
+                    cancel_requested INTEGER NOT NULL DEFAULT 0,
+                    profile TEXT,
+                    session TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            # 이전 버전에서 만든 파일에는 없는 열 추가
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column in ("watchers INTEGER NOT NULL DEFAULT 1", "cancel_requested INTEGER NOT NULL DEFAULT 0",
+                           "profile TEXT", "session TEXT"):
+                if column.split()[0] not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column}")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_dish_key ON jobs (dish_key, status)")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS job_steps (
+                    job_id TEXT NOT NULL,
+                    step_index INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    path TEXT,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (job_id, step_index)
+                )
+                """
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS job_counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    @contextmanager
+    def _connect(self):
+        # 스레드/프로세스마다 새 연결을 사용 (잠금은 SQLite가 처리)
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def submit(self, dish_name: str, dedup_key: str = None, profile: str = None, session: str = None) -> str:
+        """
+        작업 제출 (같은 키의 작업이 이미 대기/실행 중이면 새로 만들지 않고 지켜보는 세션 수만 늘린 뒤 그 작업 ID를 반환)
+
+        Args:
+            dish_name: 요리 이름
+            dedup_key: 합치기 키 (보통 RecipeAgent.generation_key, None이면 정규화된 요리명)
+                - 프로필마다 다른 작업이 되도록 generation_key는 같은 프로필로 계산해서 넘김
+            profile: 생성 프로필 이름 (profiles.PROFILES 참고, None이면 작업자 에이전트의 기본 프로필)
+            session: 제출한 세션 ID - 작업자는 이 세션의 대기열로 API를 호출 (scheduler.session_scope, None이면 기본 세션)
+                합쳐진 작업은 처음 제출한 세션을 따름
+
+        Returns:
+            str: 작업 ID
+        """
+        dish_key = dedup_key or RecipeCache.normalize_dish_name(dish_name)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE dish_key = ? AND status IN (?, ?) ORDER BY created_at LIMIT 1",
+                (dish_key, QUEUED, RUNNING),
+            ).fetchone()
+            if row is not None:
+                conn.execute("UPDATE jobs SET watchers = watchers + 1 WHERE id = ?", (row["id"],))
+                conn.execute(
+                    "INSERT INTO job_counters (name, value) VALUES ('coalesced', 1) "
+                    "ON CONFLICT(name) DO UPDATE SET value = value + 1"
+                )
+                conn.execute("COMMIT")
+                return row["id"]
+
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO jobs (id, dish_name, dish_key, status, profile, session, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, dish_name, dish_key, QUEUED, profile, session, now, now),
+            )
+            conn.execute("COMMIT")
+        return job_id
+
+    def claim(self, worker_id: str, lease_seconds: float = 60.0) -> dict:
+        """
+        처리할 작업 하나를 가져옴 (대기 중인 작업 또는 임대가 끝난 실행 중 작업, 오래된 것부터)
+
+        Args:
+            worker_id: 작업자 ID
+            lease_seconds: 임대 시간 (초) - 이 시간 안에 renew하지 않으면 다른 작업자가 가져갈 수 있음
+
+        Returns:
+            dict: 작업 정보 (get 참고), 처리할 작업이 없으면 None
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            while True:
+                row = conn.execute(
+                    """
+                    SELECT id, attempts FROM jobs
+                    WHERE status = ? OR (status = ? AND lease_expires < ?)
+                    ORDER BY created_at LIMIT 1
+                    """,
+                    (QUEUED, RUNNING, now),
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+
+                if row["attempts"] >= self.max_attempts:
+                    # 작업자가 계속 죽는 작업은 더 시도하지 않음
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                        (FAILED, "최대 시도 횟수를 넘었습니다.", now, row["id"]),
+                    )
+                    continue
+
+                conn.execute(
+                    """
+                    UPDATE jobs SET status = ?, lease_owner = ?, lease_expires = ?, attempts = attempts + 1,
+                                    updated_at = ?
+                    WHERE id = ?
+                    """,
+                    (RUNNING, worker_id, now + lease_seconds, now, row["id"]),
+                )
+                conn.execute("COMMIT")
+                return self.get(row["id"])
+
+    def release(self, job_id: str) -> bool:
+        """
+        세션이 작업 결과를 더 기다리지 않음 (새 요리를 생성하는 경우 등)
+        지켜보는 세션이 하나도 남지 않으면 대기 중인 작업은 취소(failed)하고, 실행 중인 작업에는 취소를 요청
+
+        Args:
+            job_id: 작업 ID
+
+        Returns:
+            bool: 작업을 취소했거나 취소를 요청했으면 True (다른 세션이 아직 기다리거나 이미 끝났으면 False)
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT status, watchers FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None or row["status"] not in (QUEUED, RUNNING):
+                conn.execute("COMMIT")
+                return False
+
+            watchers = max(0, row["watchers"] - 1)
+            if watchers > 0:
+                conn.execute("UPDATE jobs SET watchers = ? WHERE id = ?", (watchers, job_id))
+            elif row["status"] == QUEUED:
+                conn.execute(
+                    "UPDATE jobs SET watchers = 0, status = ?, error = ?, updated_at = ? WHERE id = ?",
+                    (FAILED, "요청이 취소되었습니다.", now, job_id),
+                )
+            else:
+                conn.execute("UPDATE jobs SET watchers = 0, cancel_requested = 1, updated_at = ? WHERE id = ?",
+                             (now, job_id))
+            conn.execute("COMMIT")
+        return watchers == 0
+
+    def cancel_requested(self, job_id: str) -> bool:
+        """
+        작업에 취소 요청이 있는지 확인 (작업자가 주기적으로 확인)
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row is not None and bool(row["cancel_requested"])
+
+    def renew(self, job_id: str, worker_id: str, lease_seconds: float = 60.0) -> bool:
+        """
+        임대 연장
+
+        Returns:
+            bool: 연장 성공 여부 (다른 작업자가 가져갔으면 False)
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE id = ? AND lease_owner = ? AND status = ?",
+                (time.time() + lease_seconds, job_id, worker_id, RUNNING),
+            )
+            return cursor.rowcount == 1
+
+    def _update(self, job_id: str, owner: str = None, **fields) -> bool:
+        # owner를 주면 그 작업자가 임대를 가진 경우에만 기록
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._connect() as conn:
+            if owner is None:
+                cursor = conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+            else:
+                cursor = conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ? AND lease_owner = ?",
+                                      (*fields.values(), job_id, owner))
+            return cursor.rowcount == 1
+
+    def set_trace(self, job_id: str, trace_id: str, owner: str = None) -> bool:
+        """
+        작업을 처리한 트레이스 ID 기록 (타이밍 분석 패널용)
+        """
+        return self._update(job_id, owner, trace_id=trace_id)
+
+    def set_partial(self, job_id: str, partial: dict, owner: str = None) -> bool:
+        """
+        스트리밍 중인 레시피 일부 기록 (title, cooking_time, ingredients, steps 중 도착한 것)
+        """
+        return self._update(job_id, owner, partial_json=json.dumps(partial, ensure_ascii=False))
+
+    def set_recipe(self, job_id: str, recipe: dict, owner: str = None) -> bool:
+        """
+        완성된 레시피 기록
+        """
+        return self._update(job_id, owner, recipe_json=json.dumps(recipe, ensure_ascii=False))
+
+    def set_hero(self, job_id: str, status: str, image_path: str = None, owner: str = None) -> bool:
+        """
+        대표 이미지 결과 기록 (상태: generating / completed / error)
+        """
+        return self._update(job_id, owner, hero_status=status, hero_image=image_path)
+
+    def set_step(self, job_id: str, index: int, status: str, image_path: str = None, owner: str = None) -> bool:
+        """
+        단계 이미지 결과 기록
+
+        Args:
+            job_id: 작업 ID
+            index: 단계 번호 (1부터 시작)
+            status: "generating" / "preview" / "completed" / "failed" / "error" / "timeout" / "cancelled"
+            image_path: 이미지 경로 (미리보기 또는 완료된 경우)
+            owner: 작업자 ID (주면 그 작업자가 임대를 가진 경우에만 기록)
+
+        Returns:
+            bool: 기록 여부
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                """
+                INSERT INTO job_steps (job_id, step_index, status, path, updated_at)
+                SELECT ?, ?, ?, ?, ?
+                WHERE ? IS NULL OR EXISTS (SELECT 1 FROM jobs WHERE id = ? AND lease_owner = ?)
+                ON CONFLICT (job_id, step_index) DO UPDATE
+                SET status = excluded.status, path = excluded.path, updated_at = excluded.updated_at
+                """,
+                (job_id, index, status, image_path, time.time(), owner, job_id, owner),
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id: str, owner: str = None) -> bool:
+        """
+        작업 완료 처리
+        """
+        return self._update(job_id, owner, status=DONE, lease_owner=None, lease_expires=None, error=None)
+
+    def fail(self, job_id: str, error: str, retry: bool = True, owner: str = None) -> bool:
+        """
+        작업 실패 처리 (최대 시도 횟수 전이면 다시 대기열로)
+
+        Args:
+            job_id: 작업 ID
+            error: 오류 메시지
+            retry: False면 시도 횟수와 관계없이 바로 failed (제한 시간 초과/취소처럼 다시 해도 소용없는 경우)
+            owner: 작업자 ID (주면 그 작업자가 임대를 가진 경우에만 기록)
+
+        Returns:
+            bool: 기록 여부
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE jobs SET status = CASE WHEN attempts < ? THEN ? ELSE ? END,
+                                lease_owner = NULL, lease_expires = NULL, error = ?, updated_at = ?
+                WHERE id = ? AND (? IS NULL OR lease_owner = ?)
+                """,
+                (self.max_attempts if retry else 0, QUEUED, FAILED, error, time.time(), job_id, owner, owner),
+            )
+            return cursor.rowcount == 1
+
+    def get(self, job_id: str) -> dict:
+        """
+        작업 정보 조회
+
+        Args:
+            job_id: 작업 ID
+
+        Returns:
+            dict: id, dish_name, status, attempts, partial(스트리밍 중인 레시피 일부), recipe(완성된 레시피),
+                hero_status, hero_image, steps({단계 번호: {"status", "path"}}), trace_id, error,
+                profile(생성 프로필 이름, 기본이면 None), session(제출한 세션 ID), created_at(제출 시각, epoch 초),
+                lease_owner(임대를 가진 작업자 ID, 없으면 None), 작업이 없으면 None
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            step_rows = conn.execute(
+                "SELECT step_index, status, path FROM job_steps WHERE job_id = ?", (job_id,)
+            ).fetchall()
+
+        return {
+            "id": row["id"],
+            "dish_name": row["dish_name"],
+            "status": row["status"],
+            "attempts": row["attempts"],
+            "partial": json.loads(row["partial_json"]) if row["partial_json"] else {},
+            "recipe": json.loads(row["recipe_json"]) if row["recipe_json"] else None,
+            "hero_status": row["hero_status"],
+            "hero_image": row["hero_image"],
+            "steps": {step["step_index"]: {"status": step["status"], "path": step["path"]} for step in step_rows},
+            "trace_id": row["trace_id"],
+            "error": row["error"],
+            "profile": row["profile"],
+            "session": row["session"],
+            "created_at": row["created_at"],
+            "lease_owner": row["lease_owner"],
+        }
+
+    def stats(self) -> dict:
+        """
+        상태별 작업 수와 진행 중인 작업에 합쳐진 제출 수
+
+        Returns:
+            dict: {queued, running, done, failed, coalesced}
+        """
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS count FROM jobs GROUP BY status").fetchall()
+            counter = conn.execute("SELECT value FROM job_counters WHERE name = 'coalesced'").fetchone()
+        stats = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        stats.update({row["status"]: row["count"] for row in rows})
+        stats["coalesced"] = counter["value"] if counter else 0
+        return stats
+
+
+class JobWorkerPool:
+    """
+    작업 큐 작업자 (백그라운드 스레드)
+    - 레시피는 RecipePipeline으로 스트리밍하면서 도착한 항목/단계 이미지를 바로 저장
+    - 레시피가 이미 저장된 작업(이전 작업자가 중간에 죽은 경우)은 끝나지 않은 단계 이미지만 다시 생성
+    - progressive 모드에서는 미리보기 이미지를 먼저 저장하고, 전체 품질 이미지가 도착하면 같은 단계를 덮어씀
+    - deadline_seconds가 있으면 제출 시각부터 그 시간 안에 끝난 결과만 저장하고, 끝나지 못한 단계는 "timeout"
+      (취소 요청을 받으면 "cancelled")으로 남긴 채 작업을 마침 - 레시피도 완성하지 못했으면 다시 시도하지 않고 실패
+    """
+
+    def __init__(self, agent, store: JobStore, workers: int = 2, step_workers: int = 4, poll_interval: float = 0.5,
+                 lease_seconds: float = 60.0, image_quality: str = "full", upgrade_max_load: float = None,
+                 deadline_seconds: float = None):
+        """
+        JobWorkerPool 초기화
+
+        Args:
+            agent: RecipeAgent 인스턴스
+            store: 작업 저장소
+            workers: 동시에 처리할 작업 수
+            step_workers: 작업 하나에서 동시에 생성할 이미지 수
+            poll_interval: 처리할 작업이 없을 때 다시 확인하는 간격 (초)
+            lease_seconds: 작업 임대 시간 (초)
+            image_quality: 단계 이미지 품질 모드 (recipe_pipeline.IMAGE_QUALITIES 참고)
+            upgrade_max_load: progressive 모드에서 교체를 건너뛸 전체 품질 모델 부하 (None이면 항상 교체)
+            deadline_seconds: 작업 제출부터의 제한 시간 (초, None이면 제한 없음)
+        """
+        self.agent = agent
+        self.store = store
+        self.workers = workers
+        self.step_workers = step_workers
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.image_quality = image_quality
+        self.upgrade_max_load = upgrade_max_load
+        self.deadline_seconds = deadline_seconds
+
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        """
+        작업자 스레드 시작
+        """
+        for n in range(self.workers):
+            thread = threading.Thread(target=self._worker_loop, args=(f"{self.worker_id}-{n}",),
+                                      name=f"job-worker-{n}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = None):
+        """
+        작업자 스레드 종료 (진행 중인 작업은 끝날 때까지 기다림)
+        """
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _worker_loop(self, worker_id: str):
+        while not self._stop.is_set():
+            try:
+                job = self.store.claim(worker_id, self.lease_seconds)
+            except sqlite3.Error as e:
+                print(f"⚠️ 작업 큐 조회 실패: {e}")
+                job = None
+
+            if job is None:
+                self._stop.wait(self.poll_interval)
+                continue
+
+            self._process(job, worker_id)
+
+    def _process(self, job: dict, worker_id: str):
+        # 제출 시각 기준 제한 시간 (다시 시도하는 작업도 처음 제출한 시각을 기준으로 함)
+        remaining = None
+        if self.deadline_seconds is not None:
+            remaining = job["created_at"] + self.deadline_seconds - time.time()
+        deadline = Deadline(remaining)
+
+        # 작업하는 동안 임대를 주기적으로 연장하고 취소 요청 확인
+        # (연장하지 못했으면 다른 작업자가 가져간 것이므로 멈춤 - 이후 기록은 임대 확인에 걸려 버려짐)
+        done = threading.Event()
+
+        def keep_lease():
+            renewed = time.monotonic()
+            while not done.wait(self.poll_interval):
+                if time.monotonic() - renewed >= self.lease_seconds / 3:
+                    if not self.store.renew(job["id"], worker_id, self.lease_seconds):
+                        print(f"⚠️ 작업 임대를 잃어서 멈춥니다: {job['dish_name']} ({job['id'][:8]})")
+                        deadline.cancel()
+                        return
+                    renewed = time.monotonic()
+                if not deadline.expired() and self.store.cancel_requested(job["id"]):
+                    print(f"🛑 작업 취소 요청: {job['dish_name']} ({job['id'][:8]})")
+                    deadline.cancel()
+
+        lease_thread = threading.Thread(target=keep_lease, name="job-lease", daemon=True)
+        lease_thread.start()
+
+        print(f"📋 작업 시작: {job['dish_name']} ({job['id'][:8]}, 시도 {job['attempts']}회)")
+        try:
+            # 작업의 모든 API 호출은 제출한 세션의 대기열로 (세션 사이에 공정하게 나눠 씀)
+            # 저장하는 이미지는 작업 ID로 참조 (같은 요리의 다른 작업과 참조가 섞이지 않도록)
+            with session_scope(job["session"]), owner_scope(job["id"]), \
+                    self.agent.telemetry.trace("job", job_id=job["id"], dish_name=job["dish_name"]) as root:
+                self.store.set_trace(job["id"], root.trace_id, worker_id)
+                if job["recipe"] is None:
+                    self._run_pipeline(job, deadline, worker_id)
+                else:
+                    self._resume_images(job, deadline, worker_id)
+                if deadline.expired():
+                    root.set(deadline=deadline.reason)
+            if self.store.complete(job["id"], worker_id):
+                print(f"✅ 작업 완료: {job['dish_name']} ({job['id'][:8]})")
+        except DeadlineExceeded as e:
+            print(f"⏱️ 작업 중단: {job['dish_name']} ({job['id'][:8]}): {e}")
+            self.store.fail(job["id"], str(e), retry=False, owner=worker_id)
+        except Exception as e:
+            print(f"❌ 작업 실패: {job['dish_name']} ({job['id'][:8]}): {e}")
+            self.store.fail(job["id"], str(e), owner=worker_id)
+        finally:
+            done.set()
+
+    def _pipeline(self, hero_image: bool = True) -> RecipePipeline:
+        return RecipePipeline(self.agent, max_workers=self.step_workers, hero_image=hero_image,
+                              image_quality=self.image_quality, upgrade_max_load=self.upgrade_max_load)
+
+    def _run_pipeline(self, job: dict, deadline: Deadline = None, owner: str = None):
+        # 레시피 스트리밍 + 단계 이미지 생성을 함께 진행하면서 결과가 도착할 때마다 저장 (owner가 임대를 가진 동안만)
+        job_id = job["id"]
+        partial = {"ingredients": [], "steps": []}
+        pipeline = self._pipeline(hero_image=job["hero_image"] is None)
+
+        for event, value in pipeline.run(job["dish_name"], deadline, job["profile"]):
+            if event in ("title", "cooking_time"):
+                partial[event] = value
+                self.store.set_partial(job_id, partial, owner)
+            elif event in ("ingredient", "step"):
+                partial[f"{event}s"].append(value)
+                self.store.set_partial(job_id, partial, owner)
+            elif event == "recipe":
+                self.store.set_recipe(job_id, value, owner)
+            elif event == "step_image":
+                self.store.set_step(job_id, value["index"], value["status"], value["path"], owner)
+            elif event == "hero_image":
+                self.store.set_hero(job_id, value["status"], value["path"], owner)
+
+    def _resume_images(self, job: dict, deadline: Deadline = None, owner: str = None):
+        # 레시피는 이미 있으므로 완료되지 않은 단계/대표 이미지만 생성
+        # (미리보기만 있는 단계는 progressive 모드일 때 전체 품질로 교체만 진행)
+        job_id = job["id"]
+        dish_name = job["dish_name"]
+        steps = job["recipe"]["steps"]
+        pipeline = self._pipeline()
+        finished = ("completed",) if self.image_quality == "progressive" else ("completed", "preview")
+        missing = [i for i in range(1, len(steps) + 1) if job["steps"].get(i, {}).get("status") not in finished]
+        print(f"🔁 작업 이어서 진행: {dish_name} (남은 단계 이미지 {len(missing)}개)")
+
+        executor = ThreadPoolExecutor(max_workers=self.step_workers)
+        futures = {}
+        try:
+            with deadline_scope(deadline), profile_scope(job["profile"]):
+                for i in missing:
+                    step = job["steps"].get(i, {})
+                    if step.get("status") == "preview":
+                        if not pipeline.should_upgrade():
+                            continue
+                        future = executor.submit(run_in_context(pipeline.upgrade_step_image), dish_name,
+                                                 steps[i - 1], i, len(steps), step["path"])
+                    else:
+                        self.store.set_step(job_id, i, "generating", owner=owner)
+
+                        def emit(status, image_path, index=i):
+                            self.store.set_step(job_id, index, status, image_path, owner)
+
+                        future = executor.submit(run_in_context(pipeline.generate_step_image), dish_name,
+                                                 steps[i - 1], i, len(steps), emit)
+                    futures[future] = i
+                if job["hero_image"] is None:
+                    self.store.set_hero(job_id, "generating", owner=owner)
+                    futures[executor.submit(run_in_context(self.agent.generate_image), dish_name, dish_name)] = None
+
+            for future in iter_completed(futures, deadline):
+                self._store_resumed(job_id, futures.pop(future), future, owner)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        # 마감으로 멈춘 경우 (futures에는 아직 저장하지 않은 작업만 남음):
+        # 그 사이에 끝난 결과는 저장하고, 끝나지 못한 이미지는 마감 사유로 기록
+        # (미리보기가 있는 단계는 미리보기를 그대로 사용)
+        if deadline is None or not deadline.expired():
+            return
+        reason = deadline.reason
+        for future, i in futures.items():
+            if future.done():
+                if not future.cancelled():
+                    self._store_resumed(job_id, i, future, owner)
+                continue
+            if i is None:
+                self.store.set_hero(job_id, reason, owner=owner)
+            elif job["steps"].get(i, {}).get("status") == "preview":
+                self.store.set_step(job_id, i, "preview", job["steps"][i]["path"], owner)
+            else:
+                self.store.set_step(job_id, i, reason, owner=owner)
+
+    def _store_resumed(self, job_id: str, index: int, future, owner: str = None):
+        # 이어서 생성한 이미지 결과 저장 (index가 None이면 대표 이미지)
+        if index is None:
+            try:
+                self.store.set_hero(job_id, "completed", future.result(), owner)
+            except Exception as e:
+                print(f"❌ 대표 이미지 생성 중 오류: {e}")
+                self.store.set_hero(job_id, "error", owner=owner)
+        else:
+            status, image_path = future.result()
+            self.store.set_step(job_id, index, status, image_path, owner)
@@ -0,0 +1,180 @@
+"""
+레시피 JSON 점진 파서
+스트리밍으로 조금씩 도착하는 JSON 텍스트를 받아서, 완성된 필드와 배열 원소를 도착하는 즉시 알려줍니다.
+"""
+
+import json
+
+# 최상위 배열 키 -> 원소 이벤트 이름
+ITEM_EVENTS = {
+    "ingredients": "ingredient",
+    "steps": "step",
+}
+
+
+class RecipeStreamParser:
+    """
+    레시피 JSON 점진 파서
+    - 최상위 객체의 스칼라 값 (title, cooking_time 등): (키, 값) 이벤트
+    - 최상위 배열의 원소 (ingredients, steps): ("ingredient", 값) / ("step", 값) 이벤트
+    - 첫 '{' 이전의 텍스트(```json 코드 펜스 등)와 루트 객체가 닫힌 뒤의 텍스트는 무시
+    """
+
+    def __init__(self):
+        # 열려 있는 컨테이너 스택: {"type": "object" | "array", "key": 현재 키, "expect_key": 키 차례 여부}
+        self._stack = []
+        self._started = False
+        self._done = False
+
+        # 문자열 토큰 상태
+        self._in_string = False
+        self._escape = False
+        self._string_chars = []
+
+        # 문자열이 아닌 스칼라 토큰 (숫자, true/false/null)
+        self._scalar_chars = []
+
+        # 지금까지 완성된 값으로 만든 레시피
+        self._result = {}
+
+        # 값이 끝까지 완성된 최상위 키 (스칼라는 값이 끝났을 때, 배열은 ']'로 닫혔을 때)
+        self._completed_keys = set()
+
+    @property
+    def done(self) -> bool:
+        """
+        루트 객체가 닫혔는지 여부
+        """
+        return self._done
+
+    def is_complete(self, key: str) -> bool:
+        """
+        최상위 키의 값이 끝까지 완성되었는지 확인 (배열은 닫는 ']'까지 받아야 완성)
+
+        Args:
+            key: 최상위 키
+
+        Returns:
+            bool: 완성 여부
+        """
+        return key in self._completed_keys
+
+    def result(self) -> dict:
+        """
+        지금까지 완성된 필드로 구성한 레시피 (응답이 잘렸으면 일부 필드만 있을 수 있음)
+
+        Returns:
+            dict: 레시피 정보
+        """
+        return {key: list(value) if isinstance(value, list) else value for key, value in self._result.items()}
+
+    def feed(self, chunk: str) -> list:
+        """
+        텍스트 조각을 파싱해서 새로 완성된 값들의 이벤트를 반환
+
+        Args:
+            chunk: 스트리밍으로 받은 텍스트 조각
+
+        Returns:
+            list: (이벤트 이름, 값) 튜플 리스트
+        """
+        events = []
+
+        for char in chunk:
+            if self._done:
+                break
+
+            if not self._started:
+                if char == "{":
+                    self._started = True
+                    self._stack.append({"type": "object", "key": None, "expect_key": True})
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    self._string_chars.append(char)
+                elif char == "\\":
+                    self._escape = True
+                    self._string_chars.append(char)
+                elif char == '"':
+                    self._in_string = False
+                    raw = "".join(self._string_chars)
+                    self._string_chars = []
+                    try:
+                        value = json.loads('"' + raw + '"')
+                    except json.JSONDecodeError:
+                        # 잘못된 이스케이프 등은 원문 그대로 사용 (잘린 응답 복구 시에도 최대한 살리기 위해)
+                        value = raw
+                    self._on_string(value, events)
+                else:
+                    self._string_chars.append(char)
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._open(char)
+            elif char in "}]":
+                self._flush_scalar(events)
+                self._stack.pop()
+                if not self._stack:
+                    self._done = True
+                elif len(self._stack) == 1:
+                    self._completed_keys.add(self._stack[0]["key"])
+            elif char == ",":
+                self._flush_scalar(events)
+                frame = self._stack[-1]
+                if frame["type"] == "object":
+                    frame["expect_key"] = True
+            elif char == ":" or char.isspace():
+                self._flush_scalar(events)
+            else:
+                self._scalar_chars.append(char)
+
+        return events
+
+    def _open(self, char: str):
+        # 최상위 키 아래에 배열이 열리면 결과에 빈 리스트 준비
+        if char == "[" and len(self._stack) == 1:
+            self._result[self._stack[0]["key"]] = []
+
+        if char == "{":
+            self._stack.append({"type": "object", "key": None, "expect_key": True})
+        else:
+            self._stack.append({"type": "array", "key": None, "expect_key": False})
+
+    def _flush_scalar(self, events: list):
+        if not self._scalar_chars:
+            return
+
+        raw = "".join(self._scalar_chars)
+        self._scalar_chars = []
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            value = raw
+        self._on_value(value, events)
+
+    def _on_string(self, value: str, events: list):
+        frame = self._stack[-1]
+        if frame["type"] == "object" and frame["expect_key"]:
+            frame["key"] = value
+            frame["expect_key"] = False
+        else:
+            self._on_value(value, events)
+
+    def _on_value(self, value, events: list):
+        depth = len(self._stack)
+
+        if depth == 1:
+            # 최상위 스칼라 필드
+            key = self._stack[0]["key"]
+            self._result[key] = value
+            self._completed_keys.add(key)
+            events.append((key, value))
+        elif depth == 2 and self._stack[1]["type"] == "array":
+            # 최상위 배열의 원소
+            key = self._stack[0]["key"]
+            self._result[key].append(value)
+            events.append((ITEM_EVENTS.get(key, key), value))
@@ -0,0 +1,97 @@
+"""
+생성 프로필 (속도/품질 단계)
+텍스트 모델, 이미지 모델, 생각(thinking) 토큰 예산, 출력 토큰 상한, 온도를 한 묶음으로 정해 둔 설정입니다.
+기본값(balanced)은 프로필 도입 전과 같은 설정(모델 기본 생각, 출력 상한 8192)이고,
+생각 예산이나 출력 상한을 줄이는 것은 실제 API로 측정해 본 뒤 fast 쪽에서 조정합니다.
+
+- 요청 하나에만 다른 프로필을 쓰려면 profile_scope로 감싸거나, 생성 메서드의 profile 인자로 넘김
+  (contextvars로 전달되므로 run_in_context로 넘긴 작업자 스레드도 같은 프로필을 따름)
+"""
+
+import contextvars
+from contextlib import contextmanager
+
+# thinking_budget 값: 0이면 생각 끔, -1이면 모델이 알아서 정함 (dynamic), None이면 지정하지 않음 (모델 기본값)
+DYNAMIC_THINKING = -1
+
+PROFILES = {
+    # 가장 빠름: 가벼운 모델, 생각 없음, 빠른 이미지 모델
+    "fast": {
+        "text_model": "gemini-2.5-flash-lite",
+        "image_model": "imagen-4.0-fast-generate-001",
+        "thinking_budget": 0,
+        "max_output_tokens": 2048,
+        "temperature": 0.7,
+    },
+    # 기본: 프로필 도입 전과 같은 설정 (생각 설정 없음, 출력 상한 8192)
+    "balanced": {
+        "text_model": "gemini-2.5-flash",
+        "image_model": "imagen-4.0-generate-001",
+        "thinking_budget": None,
+        "max_output_tokens": 8192,
+        "temperature": 0.7,
+    },
+    # 최고 품질: 큰 모델, 생각 예산은 모델에 맡김, 최고 품질 이미지 모델
+    "quality": {
+        "text_model": "gemini-2.5-pro",
+        "image_model": "imagen-4.0-ultra-generate-001",
+        "thinking_budget": DYNAMIC_THINKING,
+        "max_output_tokens": 8192,
+        "temperature": 0.8,
+    },
+}
+
+DEFAULT_PROFILE = "balanced"
+
+_current_profile = contextvars.ContextVar("sous_chef_profile", default=None)
+
+
+def get_profile(profile) -> dict:
+    """
+    프로필 설정 찾기
+
+    Args:
+        profile: 프로필 이름 ("fast", "balanced", "quality") 또는 설정 dict (None이면 기본 프로필)
+
+    Returns:
+        dict: 프로필 설정 ("name", "text_model", "image_model", "thinking_budget", "max_output_tokens", "temperature")
+
+    Raises:
+        ValueError: 알 수 없는 프로필 이름
+    """
+    if isinstance(profile, dict):
+        return {"name": "custom", **profile}
+    name = DEFAULT_PROFILE if profile is None else str(profile).strip().lower()
+    if name not in PROFILES:
+        raise ValueError(f"알 수 없는 프로필입니다: {profile} (사용 가능: {', '.join(PROFILES)})")
+    return {"name": name, **PROFILES[name]}
+
+
+def current_profile() -> dict:
+    """
+    현재 컨텍스트에 지정된 프로필 (없으면 None - 에이전트 기본 프로필 사용)
+    """
+    return _current_profile.get()
+
+
+@contextmanager
+def profile_scope(profile):
+    """
+    블록 안에서 current_profile()이 profile을 돌려주도록 지정
+
+    Args:
+        profile: 프로필 이름 또는 설정 dict (None이면 바깥에서 지정한 프로필을 그대로 사용)
+
+    Yields:
+        dict | None: 적용된 프로필 설정
+    """
+    if profile is None:
+        yield current_profile()
+        return
+
+    resolved = get_profile(profile)
+    token = _current_profile.set(resolved)
+    try:
+        yield resolved
+    finally:
+        _current_profile.reset(token)
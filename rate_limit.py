@@ -0,0 +1,749 @@
+"""
+Gemini / Imagen 호출 계층
+모델별 토큰 버킷과 AIMD 동시성 제한으로 호출 속도를 조절하고,
+429(할당량 초과)나 일시적인 5xx 오류는 지터를 섞은 지수 백오프로 재시도합니다.
+현재 요청에 제한 시간(deadline.Deadline)이 있으면 대기/재시도/HTTP 타임아웃이 모두 남은 시간 안에서만 진행됩니다.
+모든 호출은 세션 간 공정 스케줄러(scheduler.FairScheduler)에 줄을 서서 자리를 받습니다.
+"""
+
+import asyncio
+import random
+import re
+import threading
+import time
+
+import httpx
+from google.genai import errors, types
+
+from deadline import DeadlineExceeded, current_deadline, until_deadline
+from scheduler import FairScheduler
+from telemetry import shared_telemetry
+
+# 재시도할 일시적 서버 오류 코드
+TRANSIENT_STATUS_CODES = (500, 502, 503, 504)
+
+# 호출 결과 (AdaptiveConcurrency.exit에 넘겨 동시성 조정에 사용)
+CALL_SUCCEEDED = "succeeded"  # 응답을 끝까지 받음 - 동시성을 조금 늘림
+CALL_THROTTLED = "throttled"  # 할당량 초과(429) - 동시성을 줄임
+CALL_ABORTED = "aborted"  # 그 밖의 실패, 마감, 취소, 보내기 전 반납 - 동시성 그대로
+
+
+class ModelLimit:
+    """
+    모델별 호출 제한 설정
+    """
+
+    def __init__(self, requests_per_minute: float, max_concurrency: int, initial_concurrency: int = None):
+        """
+        Args:
+            requests_per_minute: 분당 최대 요청 수 (토큰 버킷 충전 속도)
+            max_concurrency: 최대 동시 요청 수 (AIMD 상한)
+            initial_concurrency: 시작 동시 요청 수 (None이면 상한의 절반)
+        """
+        self.requests_per_minute = requests_per_minute
+        self.max_concurrency = max_concurrency
+        self.initial_concurrency = initial_concurrency or max(1, max_concurrency // 2)
+
+
+# 기본 모델별 제한 (API 등급에 맞게 CallLayer(limits=...)로 조정)
+DEFAULT_LIMITS = {
+    "gemini-2.5-flash": ModelLimit(requests_per_minute=1000, max_concurrency=16),
+    "gemini-2.5-flash-lite": ModelLimit(requests_per_minute=4000, max_concurrency=16),
+    "gemini-2.5-pro": ModelLimit(requests_per_minute=150, max_concurrency=8),
+    "imagen-4.0-generate-001": ModelLimit(requests_per_minute=60, max_concurrency=8),
+    "imagen-4.0-fast-generate-001": ModelLimit(requests_per_minute=60, max_concurrency=8),
+    "imagen-4.0-ultra-generate-001": ModelLimit(requests_per_minute=30, max_concurrency=4),
+}
+
+# 설정에 없는 모델에 적용할 제한
+FALLBACK_LIMIT = ModelLimit(requests_per_minute=60, max_concurrency=4)
+
+
+class TokenBucket:
+    """
+    토큰 버킷 - 평균 요청 속도 제한 (순간적으로는 capacity만큼 몰아서 보낼 수 있음)
+    """
+
+    def __init__(self, rate_per_second: float, capacity: float = None):
+        """
+        Args:
+            rate_per_second: 초당 충전되는 토큰 수
+            capacity: 버킷 크기 (None이면 1초 분량, 최소 1)
+        """
+        self.rate = rate_per_second
+        self.capacity = capacity or max(1.0, rate_per_second)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        # 지난 시간만큼 토큰 충전 (self._lock을 잡은 상태에서 호출)
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """
+        토큰 하나를 예약
+
+        Returns:
+            float: 예약한 토큰을 쓸 수 있을 때까지 기다려야 하는 시간 (초, 바로 쓸 수 있으면 0)
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def wait_time(self) -> float:
+        """
+        토큰 하나를 쓸 수 있을 때까지 남은 시간 (예약하지는 않음)
+
+        Returns:
+            float: 초 (바로 쓸 수 있으면 0)
+        """
+        with self._lock:
+            self._refill()
+            return max(0.0, (1 - self._tokens) / self.rate)
+
+    def try_take(self) -> bool:
+        """
+        토큰이 있으면 바로 하나 사용
+
+        Returns:
+            bool: 사용 성공 여부
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def refund(self):
+        """
+        쓰지 않은 토큰 하나를 돌려놓음 (요청을 보내기 전에 그만둔 경우)
+        """
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + 1)
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD 동시성 제한 - 성공하면 조금씩 늘리고(additive increase), 할당량 초과가 나면 절반으로 줄임(multiplicative decrease)
+    """
+
+    def __init__(self, initial: int, max_limit: int, min_limit: int = 1, decrease_factor: float = 0.5,
+                 decrease_cooldown: float = 1.0):
+        """
+        Args:
+            initial: 시작 동시성
+            max_limit: 최대 동시성
+            min_limit: 최소 동시성
+            decrease_factor: 할당량 초과 시 곱할 비율
+            decrease_cooldown: 연속된 할당량 초과를 한 번으로 볼 시간 (초) - 동시에 실패한 요청들 때문에 여러 번 줄지 않도록
+        """
+        self.limit = float(initial)
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.decrease_factor = decrease_factor
+        self.decrease_cooldown = decrease_cooldown
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    def available(self) -> bool:
+        """
+        지금 진입할 자리가 있는지 확인 (진입하지는 않음)
+        """
+        with self._condition:
+            return self.in_flight < int(self.limit)
+
+    def try_enter(self) -> bool:
+        """
+        자리가 있으면 바로 진입
+
+        Returns:
+            bool: 진입 성공 여부
+        """
+        with self._condition:
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return True
+            return False
+
+    def enter(self, timeout: float = None) -> bool:
+        """
+        자리가 날 때까지 기다렸다가 진입
+
+        Args:
+            timeout: 최대 대기 시간 (초, None이면 자리가 날 때까지)
+
+        Returns:
+            bool: 진입 성공 여부 (timeout 안에 자리가 나지 않으면 False)
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self.in_flight < int(self.limit), timeout):
+                return False
+            self.in_flight += 1
+            return True
+
+    def exit(self, outcome: str):
+        """
+        요청 종료 후 동시성 조정 (응답을 끝까지 받았을 때만 늘리고, 할당량 초과일 때만 줄임)
+
+        Args:
+            outcome: 호출 결과 (CALL_SUCCEEDED / CALL_THROTTLED / CALL_ABORTED)
+        """
+        with self._condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if outcome == CALL_THROTTLED:
+                if now - self._last_decrease >= self.decrease_cooldown:
+                    self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+                    self._last_decrease = now
+            elif outcome == CALL_SUCCEEDED:
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self._condition.notify_all()
+
+
+class ModelGate:
+    """
+    모델 하나의 호출 자리 (토큰 버킷 + AIMD 동시성)
+    FairScheduler가 동시성 자리와 토큰이 모두 있을 때 차례를 주면서 둘을 함께 가져가므로,
+    자리를 잡은 채로 토큰을 기다리지 않고 토큰도 공정 순서대로 나눠 줌
+    """
+
+    def __init__(self, bucket: TokenBucket, concurrency: AdaptiveConcurrency):
+        self.bucket = bucket
+        self.concurrency = concurrency
+
+    def available(self) -> bool:
+        """
+        지금 진입할 수 있는지 확인 (진입하지는 않음)
+        """
+        return self.concurrency.available() and self.bucket.wait_time() <= 0
+
+    def try_enter(self) -> bool:
+        """
+        동시성 자리와 토큰이 모두 있으면 함께 가져감
+
+        Returns:
+            bool: 진입 성공 여부
+        """
+        if not self.concurrency.try_enter():
+            return False
+        if not self.bucket.try_take():
+            self.concurrency.exit(CALL_ABORTED)
+            return False
+        return True
+
+    def ready_in(self):
+        """
+        토큰 때문에 막혀 있을 때 다시 진입할 수 있을 때까지의 시간
+        (동시성 자리가 없으면 None - 자리가 나면 스케줄러의 release가 다음 차례를 줌)
+
+        Returns:
+            float | None: 초
+        """
+        if not self.concurrency.available():
+            return None
+        return self.bucket.wait_time()
+
+    def exit(self, outcome: str):
+        """
+        요청 종료 후 동시성 자리 반납
+
+        Args:
+            outcome: 호출 결과 (CALL_SUCCEEDED / CALL_THROTTLED / CALL_ABORTED)
+        """
+        self.concurrency.exit(outcome)
+
+    def abandon(self):
+        """
+        요청을 보내기 전에 그만둠 - 토큰을 돌려놓고 동시성은 그대로 둔 채 자리 반납
+        """
+        self.bucket.refund()
+        self.concurrency.exit(CALL_ABORTED)
+
+
+class CallSlot:
+    """
+    호출 하나가 차지한 자리 (스케줄러 자리 + 모델 자리) - 호출이 끝나면 exit로 함께 반납
+    """
+
+    def __init__(self, scheduler: FairScheduler, ticket: dict, gate: ModelGate):
+        self.scheduler = scheduler
+        self.ticket = ticket
+        self.gate = gate
+
+    def exit(self, outcome: str):
+        """
+        자리 반납
+
+        Args:
+            outcome: 호출 결과 (CALL_SUCCEEDED / CALL_THROTTLED / CALL_ABORTED, 모델 동시성 조정용)
+        """
+        self.gate.exit(outcome)
+        self.scheduler.release(self.ticket)
+
+
+class CallLayer:
+    """
+    RecipeAgent 아래의 공용 API 호출 계층
+    - 모델별 토큰 버킷 + AIMD 동시성 제한
+    - 세션 간 공정 스케줄러: 세션별 가중 공정 큐잉 + 앞쪽 단계 우선 + 전역 동시성 상한
+      (모델 동시성 자리와 토큰도 스케줄러가 차례대로 나눠 줌)
+    - AIMD 동시성은 응답을 끝까지 받은 호출에서만 늘리고, 마감/취소/중간에 닫힌 스트림은 조정하지 않음
+    - 429/5xx/네트워크 오류는 retry-after 힌트를 우선 따르고, 없으면 full jitter 지수 백오프로 재시도
+    - 재시도/할당량 초과/대기 시간 카운터 제공
+    - 호출마다 api.{메서드} 스팬 기록 (소요 시간, 토큰 수, 응답 크기, 재시도, 결과)
+    - call/stream(스레드용)과 acall(asyncio용)이 같은 제한/통계를 공유
+    - call/stream/acall은 현재 컨텍스트의 Deadline을 따름: 대기/백오프가 마감을 넘기면 DeadlineExceeded,
+      요청 설정(config)의 HTTP 타임아웃은 남은 시간으로 줄임
+    """
+
+    def __init__(self, limits: dict = None, max_retries: int = 4, base_delay: float = 1.0, max_delay: float = 30.0,
+                 telemetry=None, scheduler: FairScheduler = None):
+        """
+        CallLayer 초기화
+
+        Args:
+            limits: {모델 이름: ModelLimit} (None이면 DEFAULT_LIMITS)
+            max_retries: 최대 재시도 횟수
+            base_delay: 첫 재시도 기준 대기 시간 (초)
+            max_delay: 재시도 대기 시간 상한 (초)
+            telemetry: 스팬/지표 기록기 (Telemetry, None이면 프로세스 공용 기록기)
+            scheduler: 호출 스케줄러 (FairScheduler, None이면 기본 전역 동시성 상한으로 새로 만듦)
+        """
+        self.limits = dict(DEFAULT_LIMITS if limits is None else limits)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.telemetry = telemetry or shared_telemetry()
+        self.scheduler = scheduler or FairScheduler(telemetry=self.telemetry)
+
+        self._limiters = {}
+        self._lock = threading.Lock()
+        self._counters = {
+            "calls": 0,
+            "successes": 0,
+            "failures": 0,
+            "retries": 0,
+            "throttles": 0,
+            "transient_errors": 0,
+            "limiter_wait_seconds": 0.0,
+            "backoff_wait_seconds": 0.0,
+        }
+
+    def _limiter(self, model: str) -> ModelGate:
+        # 모델별 자리(토큰 버킷 + 동시성 제한)를 처음 사용할 때 생성
+        with self._lock:
+            if model not in self._limiters:
+                limit = self.limits.get(model, FALLBACK_LIMIT)
+                self._limiters[model] = ModelGate(
+                    TokenBucket(limit.requests_per_minute / 60.0),
+                    AdaptiveConcurrency(limit.initial_concurrency, limit.max_concurrency),
+                )
+            return self._limiters[model]
+
+    def _count(self, name: str, value=1):
+        with self._lock:
+            self._counters[name] += value
+
+    def _acquire(self, model: str, span=None, deadline=None) -> CallSlot:
+        # 스케줄러 차례(모델 동시성 자리 + 토큰)를 받을 때까지 대기 (마감이 있으면 남은 시간까지만)
+        gate = self._limiter(model)
+        started = time.monotonic()
+
+        if deadline is not None:
+            deadline.check()
+        slot = CallSlot(self.scheduler, self.scheduler.acquire(gate, deadline), gate)
+
+        waited = time.monotonic() - started
+        self._count("limiter_wait_seconds", waited)
+        if span is not None:
+            span.add("limiter_wait_seconds", waited)
+        return slot
+
+    async def _aacquire(self, model: str, span=None, deadline=None) -> CallSlot:
+        # _acquire의 비동기 버전 (이벤트 루프를 막지 않고 차례를 기다림)
+        gate = self._limiter(model)
+        started = time.monotonic()
+
+        if deadline is not None:
+            deadline.check()
+        slot = CallSlot(self.scheduler, await self.scheduler.aacquire(gate, deadline), gate)
+
+        waited = time.monotonic() - started
+        self._count("limiter_wait_seconds", waited)
+        if span is not None:
+            span.add("limiter_wait_seconds", waited)
+        return slot
+
+    def call(self, model_name: str, fn, /, *args, **kwargs):
+        """
+        제한과 재시도를 적용해서 API 함수 호출
+
+        Args:
+            model_name: 모델 이름 (제한 버킷 선택용)
+            fn: 호출할 함수 (예: client.models.generate_content)
+            *args, **kwargs: fn에 그대로 전달
+
+        Returns:
+            fn의 반환값
+        """
+        self._count("calls")
+        method = getattr(fn, "__name__", "call")
+        deadline = current_deadline()
+        with self.telemetry.span(f"api.{method}", model=model_name) as span:
+            attempt = 0
+            try:
+                while True:
+                    slot = self._acquire(model_name, span, deadline)
+                    try:
+                        result = fn(*args, **self._with_timeout(kwargs, deadline))
+                    except Exception as e:
+                        slot.exit(self._failure_outcome(e))
+                        self._handle_failure(model_name, e, attempt, deadline)
+                        attempt += 1
+                        span.set(retries=attempt)
+                        continue
+                    except BaseException:
+                        slot.exit(CALL_ABORTED)
+                        raise
+
+                    slot.exit(CALL_SUCCEEDED)
+                    self._count("successes")
+                    self._record_response(span, model_name, result)
+                    self._record_call(model_name, method, "ok", attempt)
+                    return result
+            except DeadlineExceeded as e:
+                span.set(deadline=e.reason)
+                self._record_call(model_name, method, e.reason, attempt)
+                raise
+            except Exception:
+                self._record_call(model_name, method, "error", attempt)
+                raise
+
+    async def acall(self, model_name: str, fn, /, *args, **kwargs):
+        """
+        call의 asyncio 버전 - 제한과 재시도를 적용해서 비동기 API 함수 호출
+        취소(asyncio.CancelledError)되면 재시도하지 않고 동시성 자리를 반납한 뒤 그대로 전달
+        현재 컨텍스트의 Deadline이 마감되거나 취소되면 진행 중인 요청/백오프를 멈추고 DeadlineExceeded
+
+        Args:
+            model_name: 모델 이름 (제한 버킷 선택용)
+            fn: 호출할 비동기 함수 (예: client.aio.models.generate_content)
+            *args, **kwargs: fn에 그대로 전달
+
+        Returns:
+            fn의 반환값
+        """
+        self._count("calls")
+        method = getattr(fn, "__name__", "call")
+        deadline = current_deadline()
+        with self.telemetry.span(f"api.{method}", model=model_name) as span:
+            attempt = 0
+            try:
+                while True:
+                    slot = await self._aacquire(model_name, span, deadline)
+                    try:
+                        result = await until_deadline(fn(*args, **self._with_timeout(kwargs, deadline)), deadline)
+                    except Exception as e:
+                        slot.exit(self._failure_outcome(e))
+                        await self._ahandle_failure(model_name, e, attempt, deadline)
+                        attempt += 1
+                        span.set(retries=attempt)
+                        continue
+                    except BaseException:
+                        slot.exit(CALL_ABORTED)
+                        raise
+
+                    slot.exit(CALL_SUCCEEDED)
+                    self._count("successes")
+                    self._record_response(span, model_name, result)
+                    self._record_call(model_name, method, "ok", attempt)
+                    return result
+            except DeadlineExceeded as e:
+                span.set(deadline=e.reason)
+                self._record_call(model_name, method, e.reason, attempt)
+                raise
+            except asyncio.CancelledError:
+                self._record_call(model_name, method, "cancelled", attempt)
+                raise
+            except Exception:
+                self._record_call(model_name, method, "error", attempt)
+                raise
+
+    def stream(self, model_name: str, fn, /, *args, **kwargs):
+        """
+        스트리밍 API 호출 - 첫 조각을 받기 전에 실패한 경우에만 재시도 (이미 전달한 조각은 되돌릴 수 없으므로)
+
+        Args:
+            model_name: 모델 이름 (제한 버킷 선택용)
+            fn: 호출할 스트리밍 함수 (예: client.models.generate_content_stream)
+            *args, **kwargs: fn에 그대로 전달
+
+        Yields:
+            fn이 반환한 스트림의 조각
+        """
+        self._count("calls")
+        method = getattr(fn, "__name__", "stream")
+        deadline = current_deadline()
+        # 제너레이터는 호출자 쪽에서 실행이 이어지므로 현재 스팬으로 지정하지 않고 직접 종료
+        span = self.telemetry.start_span(f"api.{method}", model=model_name, stream=True)
+        started = time.perf_counter()
+        attempt = 0
+        outcome = "error"
+        try:
+            while True:
+                slot = self._acquire(model_name, span, deadline)
+                received = False
+                try:
+                    for chunk in fn(*args, **self._with_timeout(kwargs, deadline)):
+                        if deadline is not None:
+                            # 조각 사이에서 마감 확인 (남은 조각은 읽지 않고 스트림을 닫음)
+                            deadline.check()
+                        if not received:
+                            span.set(time_to_first_chunk_seconds=time.perf_counter() - started)
+                        received = True
+                        self._record_response(span, model_name, chunk)
+                        yield chunk
+                except Exception as e:
+                    slot.exit(self._failure_outcome(e))
+                    if isinstance(e, DeadlineExceeded):
+                        outcome = e.reason
+                        span.set(deadline=e.reason)
+                        raise
+                    if received:
+                        self._count("failures")
+                        raise
+                    self._handle_failure(model_name, e, attempt, deadline)
+                    attempt += 1
+                    span.set(retries=attempt)
+                    continue
+                except BaseException:
+                    # 호출자가 스트림을 중간에 닫은 경우 (GeneratorExit 등)
+                    slot.exit(CALL_ABORTED)
+                    outcome = "cancelled"
+                    raise
+
+                slot.exit(CALL_SUCCEEDED)
+                self._count("successes")
+                outcome = "ok"
+                return
+        except BaseException as e:
+            self._record_call(model_name, method, outcome, attempt)
+            self.telemetry.finish_span(span, None if outcome == "cancelled" else e)
+            raise
+        finally:
+            if outcome == "ok":
+                self._record_call(model_name, method, outcome, attempt)
+                self.telemetry.finish_span(span)
+
+    def _record_response(self, span, model: str, response):
+        # 응답의 토큰 수(usage_metadata)와 크기를 스팬과 지표에 기록 (스트리밍은 조각마다 누적)
+        response_bytes = self.response_size(response)
+        span.add("response_bytes", response_bytes)
+        self.telemetry.metrics.inc("api_response_bytes_total", response_bytes, model=model)
+
+        usage = getattr(response, "usage_metadata", None)
+        if usage is None:
+            return
+        for attribute, token_type in (("prompt_token_count", "prompt"), ("candidates_token_count", "output"),
+                                      ("thoughts_token_count", "thoughts"), ("cached_content_token_count", "cached")):
+            count = getattr(usage, attribute, None)
+            if count:
+                # 스트리밍에서는 마지막 조각의 값이 전체 합계이므로 덮어씀
+                previous = span.attributes.get(f"{token_type}_tokens", 0)
+                span.set(**{f"{token_type}_tokens": count})
+                self.telemetry.metrics.inc("api_tokens_total", count - previous, model=model, type=token_type)
+
+    def _record_call(self, model: str, method: str, outcome: str, retries: int):
+        self.telemetry.metrics.inc("api_calls_total", model=model, method=method, outcome=outcome)
+        if retries:
+            self.telemetry.metrics.inc("api_retries_total", retries, model=model)
+
+    @staticmethod
+    def response_size(response) -> int:
+        """
+        응답 본문 크기 추정 (이미지 응답은 이미지 데이터 합계, 텍스트 응답은 UTF-8 바이트 수)
+
+        Returns:
+            int: 바이트 수
+        """
+        generated_images = getattr(response, "generated_images", None)
+        if generated_images is not None:
+            return sum(
+                len(getattr(getattr(generated_image, "image", None), "image_bytes", None) or b"")
+                for generated_image in generated_images
+            )
+        try:
+            text = getattr(response, "text", None)
+        except Exception:
+            text = None
+        return len(text.encode("utf-8")) if isinstance(text, str) else 0
+
+    def _handle_failure(self, model: str, error: Exception, attempt: int, deadline=None):
+        # 재시도할 수 없으면 예외를 그대로 올리고, 재시도할 수 있으면 백오프 대기
+        # (마감 전에 다시 시도할 수 없으면 기다리지 않고 바로 DeadlineExceeded)
+        if deadline is not None and deadline.expired():
+            raise DeadlineExceeded(deadline.reason) from error
+        delay = self._retry_delay(model, error, attempt)
+        if deadline is None:
+            time.sleep(delay)
+            return
+        remaining = deadline.remaining()
+        if (remaining is not None and delay >= remaining) or deadline.wait(delay):
+            raise DeadlineExceeded(deadline.reason or "timeout") from error
+
+    async def _ahandle_failure(self, model: str, error: Exception, attempt: int, deadline=None):
+        # _handle_failure의 비동기 버전
+        if deadline is not None and deadline.expired():
+            raise DeadlineExceeded(deadline.reason) from error
+        delay = self._retry_delay(model, error, attempt)
+        remaining = deadline.remaining() if deadline is not None else None
+        if remaining is not None and delay >= remaining:
+            raise DeadlineExceeded("timeout") from error
+        await until_deadline(asyncio.sleep(delay), deadline)
+
+    def _failure_outcome(self, error: Exception) -> str:
+        # 실패한 호출의 결과 (할당량 초과만 동시성을 줄이고, 다른 실패는 늘리지도 줄이지도 않음)
+        return CALL_THROTTLED if self.is_throttle(error) else CALL_ABORTED
+
+    @staticmethod
+    def _with_timeout(kwargs: dict, deadline) -> dict:
+        # 요청 설정(config)의 HTTP 타임아웃을 남은 시간으로 줄임 (느린 응답 하나가 마감을 넘겨 붙잡지 않도록)
+        remaining = deadline.remaining() if deadline is not None else None
+        config = kwargs.get("config")
+        if remaining is None or config is None or not hasattr(config, "http_options"):
+            return kwargs
+        timeout_ms = max(1, int(remaining * 1000))
+        http_options = config.http_options
+        if http_options is not None and http_options.timeout is not None and http_options.timeout <= timeout_ms:
+            return kwargs
+        http_options = (http_options or types.HttpOptions()).model_copy(update={"timeout": timeout_ms})
+        return dict(kwargs, config=config.model_copy(update={"http_options": http_options}))
+
+    def _retry_delay(self, model: str, error: Exception, attempt: int) -> float:
+        # 재시도할 수 없으면 예외를 그대로 올리고, 재시도할 수 있으면 기다릴 시간(초)을 반환
+        throttled = self.is_throttle(error)
+        transient = throttled or self.is_transient(error)
+
+        if throttled:
+            self._count("throttles")
+        elif transient:
+            self._count("transient_errors")
+
+        if not transient or attempt >= self.max_retries:
+            self._count("failures")
+            raise error
+
+        delay = self.retry_after(error)
+        if delay is None:
+            # full jitter: 0 ~ min(max_delay, base * 2^attempt)
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        else:
+            delay = min(delay, self.max_delay) + random.uniform(0, self.base_delay / 2)
+
+        print(f"   🔁 {model} 호출 재시도 {attempt + 1}/{self.max_retries} ({delay:.1f}초 후): {error}")
+        self._count("retries")
+        self._count("backoff_wait_seconds", delay)
+        return delay
+
+    @staticmethod
+    def is_throttle(error: Exception) -> bool:
+        """
+        할당량 초과(429) 오류인지 확인
+        """
+        return isinstance(error, errors.APIError) and (error.code == 429 or error.status == "RESOURCE_EXHAUSTED")
+
+    @staticmethod
+    def is_transient(error: Exception) -> bool:
+        """
+        재시도하면 성공할 수 있는 일시적 오류인지 확인 (5xx, 타임아웃, 연결 오류)
+        """
+        if isinstance(error, errors.APIError):
+            return error.code in TRANSIENT_STATUS_CODES
+        return isinstance(error, (httpx.TimeoutException, httpx.TransportError, TimeoutError, ConnectionError))
+
+    @staticmethod
+    def retry_after(error: Exception):
+        """
+        오류 응답의 재시도 힌트 추출 (Retry-After 헤더 또는 google.rpc.RetryInfo의 retryDelay)
+
+        Returns:
+            float | None: 기다릴 시간 (초), 힌트가 없으면 None
+        """
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None)
+        if headers:
+            value = headers.get("retry-after")
+            if value:
+                try:
+                    return max(0.0, float(value))
+                except ValueError:
+                    pass
+
+        details = getattr(error, "details", None)
+        if isinstance(details, dict):
+            for detail in details.get("error", details).get("details", []) or []:
+                if isinstance(detail, dict) and detail.get("@type", "").endswith("google.rpc.RetryInfo"):
+                    match = re.match(r"^([\d.]+)s$", str(detail.get("retryDelay", "")))
+                    if match:
+                        return float(match.group(1))
+        return None
+
+    def load(self, model: str) -> float:
+        """
+        모델의 현재 부하 (진행 중 요청 수 / 동시성 상한)
+
+        Args:
+            model: 모델 이름
+
+        Returns:
+            float: 0 이상 (1 이상이면 새 요청은 자리가 날 때까지 기다림), 아직 호출하지 않은 모델은 0
+        """
+        with self._lock:
+            gate = self._limiters.get(model)
+        if gate is None:
+            return 0.0
+        concurrency = gate.concurrency
+        return concurrency.in_flight / max(1, int(concurrency.limit))
+
+    def stats(self) -> dict:
+        """
+        호출 통계
+
+        Returns:
+            dict: 카운터, 모델별 현재 동시성 상한/진행 중 요청 수, 스케줄러 상태(FairScheduler.stats)
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            stats["models"] = {
+                model: {"concurrency_limit": int(gate.concurrency.limit), "in_flight": gate.concurrency.in_flight}
+                for model, gate in self._limiters.items()
+            }
+        stats["scheduler"] = self.scheduler.stats()
+        return stats
+
+
+_shared_call_layer = None
+_shared_lock = threading.Lock()
+
+
+def shared_call_layer() -> CallLayer:
+    """
+    프로세스 전체에서 함께 쓰는 CallLayer (모든 RecipeAgent가 같은 할당량을 나눠 쓰도록)
+
+    Returns:
+        CallLayer: 공용 호출 계층
+    """
+    global _shared_call_layer
+    with _shared_lock:
+        if _shared_call_layer is None:
+            _shared_call_layer = CallLayer()
+        return _shared_call_layer
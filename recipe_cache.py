@@ -0,0 +1,240 @@
+"""
+레시피 디스크 캐시
+generate_recipe 결과를 SQLite 파일에 저장해서 같은 요리를 다시 요청할 때 LLM 호출을 생략합니다.
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+import unicodedata
+from contextlib import contextmanager
+from pathlib import Path
+
+
+class RecipeCache:
+    """
+    generate_recipe 결과를 저장하는 디스크 캐시
+    - 키: 정규화된 요리명 + 모델명 + 시스템 프롬프트 + 생성 설정
+    - TTL 만료 및 최대 개수 초과 시 LRU(마지막 사용 시각) 순으로 제거
+    - SQLite WAL 모드를 사용하므로 여러 Streamlit 워커 프로세스가 같은 파일을 공유해도 안전
+    """
+
+    def __init__(self, db_path: str = "cache/recipes.db", ttl_seconds: int = 7 * 24 * 3600, max_entries: int = 5000):
+        """
+        RecipeCache 초기화
+
+        Args:
+            db_path: SQLite 파일 경로
+            ttl_seconds: 캐시 항목 유효 시간 (초, 0 이하면 만료 없음)
+            max_entries: 최대 저장 개수 (초과 시 오래 사용되지 않은 항목부터 제거)
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS recipes (
+                    key TEXT PRIMARY KEY,
+                    dish_name TEXT NOT NULL,
+                    recipe_json TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_recipes_last_access ON recipes (last_access)")
+            conn.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    @contextmanager
+    def _connect(self):
+        # 스레드/프로세스마다 새 연결을 사용 (잠금은 SQLite가 처리)
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def normalize_dish_name(dish_name: str) -> str:
+        """
+        캐시 키에 사용할 요리명 정규화 (유니코드 NFC, 앞뒤 공백 제거, 연속 공백 축약, 소문자)
+
+        Args:
+            dish_name: 요리 이름
+
+        Returns:
+            str: 정규화된 요리 이름
+        """
+        normalized = unicodedata.normalize("NFC", dish_name)
+        return " ".join(normalized.split()).lower()
+
+    @staticmethod
+    def make_key(dish_name: str, model_name: str, system_prompt: str, config: dict) -> str:
+        """
+        캐시 키 생성 - 프롬프트나 설정이 바뀌면 키도 바뀌어서 예전 항목은 자연스럽게 무효화됨
+
+        Args:
+            dish_name: 요리 이름
+            model_name: 텍스트 모델 이름
+            system_prompt: 시스템 프롬프트 (프롬프트 템플릿 포함)
+            config: 생성 설정 (JSON 직렬화 가능한 dict)
+
+        Returns:
+            str: SHA-256 해시 키
+        """
+        payload = json.dumps(
+            {
+                "dish_name": RecipeCache.normalize_dish_name(dish_name),
+                "model": model_name,
+                "system_prompt": system_prompt,
+                "config": config,
+            },
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        """
+        캐시 조회 (적중 시 마지막 사용 시각 갱신, 적중/미스 횟수 기록)
+
+        Args:
+            key: make_key로 만든 캐시 키
+
+        Returns:
+            dict | None: 저장된 레시피, 없거나 만료되었으면 None
+        """
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT recipe_json, created_at FROM recipes WHERE key = ?", (key,)).fetchone()
+
+            if row and self.ttl_seconds > 0 and now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM recipes WHERE key = ?", (key,))
+                row = None
+
+            if row is None:
+                self._increment(conn, "misses")
+                return None
+
+            conn.execute("UPDATE recipes SET last_access = ? WHERE key = ?", (now, key))
+            self._increment(conn, "hits")
+            return json.loads(row[0])
+
+    def set(self, key: str, dish_name: str, recipe: dict):
+        """
+        레시피 저장 후 만료/초과 항목 정리
+
+        Args:
+            key: make_key로 만든 캐시 키
+            dish_name: 요리 이름 (조회/디버깅용)
+            recipe: 저장할 레시피
+        """
+        now = time.time()
+        recipe_json = json.dumps(recipe, ensure_ascii=False)
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO recipes (key, dish_name, recipe_json, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                    (key, self.normalize_dish_name(dish_name), recipe_json, now, now),
+                )
+                self._evict(conn, now)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        # TTL이 지난 항목 제거
+        if self.ttl_seconds > 0:
+            conn.execute("DELETE FROM recipes WHERE created_at < ?", (now - self.ttl_seconds,))
+
+        # 최대 개수를 넘으면 가장 오래 사용되지 않은 항목부터 제거
+        if self.max_entries > 0:
+            conn.execute(
+                """
+                DELETE FROM recipes WHERE key IN (
+                    SELECT key FROM recipes ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+
+    def dish_names(self) -> list:
+        """
+        저장된 요리 이름 목록 (최근 사용 순, 비슷한 요리명 색인 초기화용)
+
+        Returns:
+            list: 정규화된 요리 이름 리스트 (중복 없음)
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT dish_name FROM recipes GROUP BY dish_name ORDER BY MAX(last_access) DESC"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def recipes(self) -> list:
+        """
+        저장된 요리 이름과 레시피 (오래 사용되지 않은 순, 재료 색인 초기화용)
+
+        Returns:
+            list: [(정규화된 요리 이름, 레시피 dict)] - 같은 요리가 여러 설정으로 저장되어 있으면 모두 포함
+        """
+        with self._connect() as conn:
+            rows = conn.execute("SELECT dish_name, recipe_json FROM recipes ORDER BY last_access").fetchall()
+        return [(dish_name, json.loads(recipe_json)) for dish_name, recipe_json in rows]
+
+    def contains(self, key: str) -> bool:
+        """
+        만료되지 않은 항목이 있는지 확인 (적중/미스 횟수와 마지막 사용 시각은 바꾸지 않음)
+
+        Args:
+            key: make_key로 만든 캐시 키
+
+        Returns:
+            bool: 있으면 True
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT created_at FROM recipes WHERE key = ?", (key,)).fetchone()
+        return row is not None and (self.ttl_seconds <= 0 or time.time() - row[0] <= self.ttl_seconds)
+
+    @staticmethod
+    def _increment(conn: sqlite3.Connection, name: str):
+        conn.execute(
+            "INSERT INTO stats (name, value) VALUES (?, 1) ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (name,),
+        )
+
+    def stats(self) -> dict:
+        """
+        캐시 통계 (모든 프로세스 합계)
+
+        Returns:
+            dict: hits, misses, hit_rate, entries
+        """
+        with self._connect() as conn:
+            counters = dict(conn.execute("SELECT name, value FROM stats").fetchall())
+            entries = conn.execute("SELECT COUNT(*) FROM recipes").fetchone()[0]
+
+        hits = counters.get("hits", 0)
+        misses = counters.get("misses", 0)
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+            "entries": entries,
+        }
+
+    def clear(self):
+        """
+        저장된 레시피와 통계 모두 삭제
+        """
+        with self._connect() as conn:
+            conn.execute("DELETE FROM recipes")
+            conn.execute("DELETE FROM stats")
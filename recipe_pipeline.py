@@ -0,0 +1,320 @@
+"""
+레시피 텍스트 → 이미지 파이프라인
+스트리밍으로 조리 단계가 도착하는 즉시 그 단계의 이미지 생성을 시작해서,
+레시피 텍스트 생성과 이미지 생성이 겹쳐서 진행되도록 합니다.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from artifact_store import owner_scope
+from deadline import TIMEOUT, Deadline, DeadlineExceeded, deadline_scope
+from profiles import profile_scope
+from scheduler import PRIORITY_BACKGROUND, priority_scope
+from telemetry import run_in_context
+
+# 단계 이미지 품질 모드
+# - full: 전체 품질 모델만 사용
+# - progressive: 미리보기 모델로 먼저 만들어 보여주고, 전체 품질 이미지를 백그라운드에서 만들어 교체
+# - preview: 미리보기 모델만 사용 (교체하지 않음)
+IMAGE_QUALITIES = ("full", "progressive", "preview")
+
+
+class RecipePipeline:
+    """
+    RecipeAgent와 app.py 사이의 파이프라인 단계
+    - 레시피는 generate_recipe_stream으로 스트리밍
+    - 조리 단계가 완성될 때마다 해당 단계 이미지 작업을 바로 제출
+    - 대표 이미지(generate_image)는 시작과 동시에 병렬로 요청
+    - progressive 모드에서는 단계마다 미리보기 이미지를 먼저 보내고, 전체 품질 이미지는 별도 작업자가 만들어 교체
+      (교체 작업이 미리보기 작업 자리를 차지하지 않도록 작업자를 나눔)
+    - 텍스트와 이미지 진행 상황을 하나의 이벤트 스트림으로 전달
+    - 교체 작업은 백그라운드 우선순위로 요청해서 다른 세션의 첫 이미지보다 늦게 나감 (scheduler.FairScheduler)
+    - 단계가 도착한 뒤 첫 이미지가 나오기까지 걸린 시간은 time_to_first_image_seconds{tier=...} 지표로 기록
+    - Deadline을 넘기거나 취소되면 끝난 결과만 가지고 바로 끝냄 (남은 작업은 기다리지 않음)
+    """
+
+    def __init__(self, agent, max_workers: int = 4, hero_image: bool = True, image_quality: str = "full",
+                 upgrade_max_load: float = None, upgrade_workers: int = None):
+        """
+        RecipePipeline 초기화
+
+        Args:
+            agent: RecipeAgent 인스턴스
+            max_workers: 동시에 진행할 이미지 생성 수
+            hero_image: 대표 이미지 생성 여부
+            image_quality: 단계 이미지 품질 모드 ("full" / "progressive" / "preview")
+            upgrade_max_load: progressive 모드에서 전체 품질 모델의 부하(RecipeAgent.image_load)가
+                이 값 이상이면 교체를 건너뛰고 미리보기를 그대로 사용 (None이면 항상 교체)
+            upgrade_workers: 동시에 진행할 교체 작업 수 (None이면 max_workers)
+        """
+        if image_quality not in IMAGE_QUALITIES:
+            raise ValueError(f"image_quality는 {', '.join(IMAGE_QUALITIES)} 중 하나여야 합니다: {image_quality}")
+        self.agent = agent
+        self.max_workers = max_workers
+        self.hero_image = hero_image
+        self.image_quality = image_quality
+        self.upgrade_max_load = upgrade_max_load
+        self.upgrade_workers = upgrade_workers or max_workers
+
+    def should_upgrade(self) -> bool:
+        """
+        미리보기 이미지를 전체 품질로 교체할지 여부 (교체 작업을 시작하기 직전에 확인)
+
+        Returns:
+            bool: progressive 모드이고 부하가 한도 미만이면 True
+        """
+        if self.image_quality != "progressive":
+            return False
+        if self.upgrade_max_load is not None and self.agent.image_load() >= self.upgrade_max_load:
+            self.agent.telemetry.metrics.inc("image_upgrades_total", outcome="skipped")
+            return False
+        return True
+
+    def record_first_image(self, started: float, tier: str):
+        """
+        단계 이미지 요청부터 첫 이미지(미리보기 또는 전체 품질)까지 걸린 시간 기록
+
+        Args:
+            started: 단계 이미지 요청 시각 (time.perf_counter)
+            tier: 첫 이미지 종류 ("preview" / "full")
+        """
+        self.agent.telemetry.metrics.observe("time_to_first_image_seconds", time.perf_counter() - started, tier=tier)
+
+    def generate_step_image(self, dish_name: str, step: str, index: int, total_steps: int = None, emit=None,
+                            upgrade=None) -> tuple:
+        """
+        품질 모드에 따라 조리 단계 하나의 이미지를 생성
+
+        Args:
+            dish_name: 요리 이름
+            step: 조리 단계 설명
+            index: 단계 번호
+            total_steps: 전체 단계 수 (로그 출력용, 모르면 None)
+            emit: 미리보기가 저장되면 (상태, 경로)로 호출할 함수 (progressive 모드, optional)
+            upgrade: 미리보기를 전체 품질로 교체하는 함수를 받아서 실행할 함수 (None이면 이 스레드에서 바로 실행)
+
+        Returns:
+            tuple: (상태, 이미지 경로) - 상태는 "completed" / "preview" / "failed" / "error"
+                교체를 다른 작업자에 넘긴 경우 (상태, 경로) 대신 None
+        """
+        started = time.perf_counter()
+        # 프로필의 이미지 모델이 미리보기 모델과 같으면 (fast 프로필) 미리보기를 따로 만들 이유가 없음
+        if self.image_quality == "full" or self.agent.image_model_name == self.agent.preview_image_model_name:
+            status, image_path = self.agent.generate_step_image(dish_name, step, index, total_steps)
+            if image_path:
+                self.record_first_image(started, "full")
+            return status, image_path
+
+        status, preview_path = self.agent.generate_step_image(dish_name, step, index, total_steps, quality="preview")
+        if preview_path is None:
+            # 미리보기가 실패하면 전체 품질로 바로 생성
+            status, image_path = self.agent.generate_step_image(dish_name, step, index, total_steps)
+            if image_path:
+                self.record_first_image(started, "full")
+            return status, image_path
+
+        self.record_first_image(started, "preview")
+        if not self.should_upgrade():
+            return "preview", preview_path
+
+        if emit is not None:
+            emit("preview", preview_path)
+
+        def run_upgrade():
+            return self.upgrade_step_image(dish_name, step, index, total_steps, preview_path)
+
+        if upgrade is None:
+            return run_upgrade()
+        upgrade(run_upgrade)
+        return None
+
+    def upgrade_step_image(self, dish_name: str, step: str, index: int, total_steps: int = None,
+                           preview_path: str = None) -> tuple:
+        """
+        미리보기 이미지를 전체 품질 이미지로 교체 (실패하면 미리보기를 그대로 사용)
+
+        Args:
+            dish_name: 요리 이름
+            step: 조리 단계 설명
+            index: 단계 번호
+            total_steps: 전체 단계 수 (로그 출력용, 모르면 None)
+            preview_path: 이미 저장된 미리보기 경로
+
+        Returns:
+            tuple: (상태, 이미지 경로) - 교체했으면 ("completed", 전체 품질 경로), 아니면 ("preview", 미리보기 경로)
+        """
+        # 이미 미리보기가 보이는 단계이므로 다른 호출에 차례를 양보
+        with priority_scope(PRIORITY_BACKGROUND):
+            status, image_path = self.agent.generate_step_image(dish_name, step, index, total_steps)
+        if image_path is None:
+            self.agent.telemetry.metrics.inc("image_upgrades_total", outcome="error")
+            return "preview", preview_path
+        self.agent.telemetry.metrics.inc("image_upgrades_total", outcome="ok")
+        return status, image_path
+
+    def run(self, dish_name: str, deadline: Deadline = None, profile=None):
+        """
+        레시피와 이미지를 함께 생성하면서 진행 이벤트를 순서대로 전달
+
+        이벤트는 모두 호출한 스레드에서 yield되므로 Streamlit 화면을 바로 갱신해도 안전합니다.
+
+        Args:
+            dish_name: 요리 이름
+            deadline: 제한 시간/취소 (None이면 제한 없음) - 레시피/이미지 호출이 모두 이 마감을 따르며,
+                마감되면 끝나지 않은 이미지를 기다리지 않고 "timeout"(취소는 "cancelled") 상태로 보낸 뒤 done으로 끝냄
+                (미리보기가 이미 있는 단계는 "preview"), 레시피가 완성되기 전에 마감되면 DeadlineExceeded 발생
+            profile: 생성 프로필 이름 또는 설정 dict (None이면 현재 프로필) - 레시피와 모든 이미지 작업이 같은 프로필을 따름
+
+        Yields:
+            tuple: (이벤트 이름, 값)
+                - generate_recipe_stream의 이벤트: "title", "cooking_time", "ingredient", "step", "recipe"
+                - ("step_image", {"index": 단계 번호, "status": 상태, "path": 이미지 경로, "upgrading": 교체 예정 여부})
+                  상태는 "generating" / "preview" / "completed" / "failed" / "error" / "timeout" / "cancelled"
+                  progressive 모드에서는 ("preview", upgrading=True) 다음에 전체 품질 결과가 한 번 더 옴
+                - ("hero_image", {"status": 상태, "path": 이미지 경로})
+                - ("done", {"recipe": 레시피, "step_images": 단계별 이미지 경로 리스트, "hero_image": 대표 이미지 경로})
+        """
+        events = queue.Queue()
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        upgrade_executor = ThreadPoolExecutor(max_workers=self.upgrade_workers, thread_name_prefix="image-upgrade")
+
+        # 텍스트 스레드가 제출한 이미지 작업 수 (텍스트 스트림이 끝난 뒤에만 읽음)
+        submitted = {"count": 0}
+
+        def run_image(event_name: str, payload: dict, fn, *args):
+            try:
+                if event_name == "hero_image":
+                    result = "completed", fn(*args)
+                else:
+                    result = fn(*args)
+            except Exception as e:
+                print(f"❌ 파이프라인 이미지 생성 중 오류: {e}")
+                result = "error", None
+            if result is not None:
+                status, image_path = result
+                events.put((event_name, dict(payload, status=status, path=image_path, upgrading=False)))
+
+        def submit_image(event_name: str, fn, *args, **payload):
+            submitted["count"] += 1
+            events.put((event_name, dict(payload, status="generating", path=None, upgrading=False)))
+            # 작업자 스레드의 스팬도 호출한 쪽 트레이스에 묶이도록 현재 컨텍스트를 넘김
+            executor.submit(run_in_context(run_image), event_name, payload, fn, *args)
+
+        def submit_step_image(step: str, index: int):
+            payload = {"index": index}
+
+            def emit(status, image_path):
+                # 교체 작업 결과가 이 이벤트 다음에 오도록 교체 작업을 넘기기 전에 보냄
+                events.put(("step_image", dict(payload, status=status, path=image_path, upgrading=True)))
+
+            def upgrade(fn):
+                upgrade_executor.submit(run_in_context(run_image), "step_image", payload, fn)
+
+            submit_image("step_image", self.generate_step_image, dish_name, step, index, None, emit, upgrade,
+                         **payload)
+
+        def produce_text():
+            # 레시피 스트림을 읽으면서 단계가 도착할 때마다 이미지 작업 제출
+            step_index = 0
+            try:
+                for event, value in self.agent.generate_recipe_stream(dish_name):
+                    events.put((event, value))
+                    if event == "step":
+                        step_index += 1
+                        submit_step_image(value, step_index)
+            except Exception as e:
+                events.put(("_text_error", e))
+            finally:
+                events.put(("_text_done", None))
+
+        # 작업자 스레드는 만들어질 때의 컨텍스트를 가져가므로 이 안에서 시작한 작업은 모두 같은 Deadline/프로필/
+        # 이미지 참조 주인을 따름 (미리보기를 교체한 전체 품질 이미지가 같은 레시피의 미리보기 참조를 해제)
+        with deadline_scope(deadline), profile_scope(profile), owner_scope():
+            if self.hero_image:
+                submit_image("hero_image", self.agent.generate_image, dish_name, dish_name)
+
+            text_thread = threading.Thread(target=run_in_context(produce_text), name="recipe-pipeline-text",
+                                           daemon=True)
+            text_thread.start()
+
+        if deadline is not None:
+            # 취소되면 대기 중인 루프를 바로 깨움
+            deadline.on_cancel(lambda: events.put(("_deadline", None)))
+
+        recipe = None
+        step_images = {}
+        hero_image = None
+        finished_images = 0
+        text_done = False
+        text_error = None
+        # 끝나지 않은 이미지 {(이벤트 이름, 단계 번호): 미리보기 경로}
+        pending = {}
+        expired = False
+
+        try:
+            while not text_done or finished_images < submitted["count"]:
+                try:
+                    event, value = events.get(timeout=None if deadline is None else deadline.remaining())
+                except queue.Empty:
+                    event, value = "_deadline", None
+
+                if event == "_deadline":
+                    expired = True
+                    break
+                if event == "_text_done":
+                    text_done = True
+                    if text_error is not None:
+                        break
+                    continue
+                if event == "_text_error":
+                    text_error = value
+                    continue
+
+                if event in ("step_image", "hero_image"):
+                    key = (event, value.get("index"))
+                    if value["status"] == "generating" or value["upgrading"]:
+                        pending[key] = value["path"]
+                    else:
+                        pending.pop(key, None)
+                        finished_images += 1
+                        if event == "step_image":
+                            step_images[value["index"]] = value["path"]
+                        else:
+                            hero_image = value["path"]
+                elif event == "recipe":
+                    recipe = value
+
+                yield event, value
+        finally:
+            # 레시피 생성이 실패했거나 호출자가 중단한 경우 대기 중인 이미지 작업은 취소
+            executor.shutdown(wait=False, cancel_futures=True)
+            upgrade_executor.shutdown(wait=False, cancel_futures=True)
+
+        if text_error is not None:
+            raise text_error
+
+        if expired:
+            reason = deadline.reason or TIMEOUT
+            if recipe is None:
+                self.agent.telemetry.metrics.inc("deadline_abandoned_total", kind="recipe", reason=reason)
+                raise DeadlineExceeded(reason)
+
+            # 끝나지 않은 이미지는 기다리지 않음 (미리보기가 있으면 미리보기를 최종 결과로 사용)
+            print(f"⏱️ 파이프라인 마감 ({reason}): 끝나지 않은 이미지 {len(pending)}개를 두고 반환합니다")
+            for (event, index), preview_path in sorted(pending.items(), key=lambda item: (item[0][0], item[0][1] or 0)):
+                self.agent.telemetry.metrics.inc("deadline_abandoned_total", kind=event, reason=reason)
+                status = "preview" if preview_path else reason
+                if event == "step_image":
+                    step_images[index] = preview_path
+                    yield event, {"index": index, "status": status, "path": preview_path, "upgrading": False}
+                else:
+                    yield event, {"status": reason, "path": None, "upgrading": False}
+
+        yield "done", {
+            "recipe": recipe,
+            "step_images": [step_images.get(i) for i in range(1, len(recipe["steps"]) + 1)],
+            "hero_image": hero_image,
+        }
@@ -0,0 +1,454 @@
+"""
+세션 간 공정 호출 스케줄러 (가중 공정 큐잉)
+모든 Streamlit 세션이 같은 API 할당량을 나눠 쓰므로, 단계가 많은 요리를 만드는 세션 하나가 다른 세션의
+첫 이미지를 굶기지 않도록 모든 Gemini / Imagen 호출을 세션별 대기열에 넣고 보낼 차례를 정합니다.
+
+- 세션 간: 가중 공정 큐잉 - 세션마다 가상 시각을 두고 호출 하나를 보낼 때마다 1/가중치만큼 전진 (가장 뒤처진 세션 먼저)
+- 우선순위: 화면에 먼저 보이는 것(레시피 텍스트, 대표 이미지, 앞쪽 VISIBLE_STEPS개 단계) → 뒤쪽 단계 →
+  백그라운드 작업(미리보기 교체, 배치) 순. 오래 기다린 호출은 aging_seconds마다 한 단계씩 올라감
+- 세션 안: 우선순위가 같으면 단계 번호 순
+- 자리: 전역 동시성 상한 + 호출할 모델의 자리(CallLayer의 AIMD 동시성 + 토큰 버킷)가 모두 비어야 보냄
+  (모델 자리가 없는 호출은 건너뛰고 같은 세션의 다른 모델 호출을 먼저 보냄, 토큰만 모자라면 충전될 때 다시 확인)
+- 세션/우선순위/단계 번호는 contextvars로 전달 (session_scope, priority_scope, step_scope)
+  run_in_context로 넘긴 작업자 스레드도 같은 값을 따름
+- 지표: scheduler_queue_depth{priority} / scheduler_in_flight / scheduler_active_sessions 게이지,
+  scheduler_wait_seconds{priority} 히스토그램, stats()의 세션별 대기 시간
+"""
+
+import asyncio
+import bisect
+import contextvars
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from deadline import DeadlineExceeded
+from telemetry import shared_telemetry
+
+# 우선순위 (작을수록 먼저)
+PRIORITY_INTERACTIVE = 0
+PRIORITY_LATER = 1
+PRIORITY_BACKGROUND = 2
+PRIORITY_NAMES = ("interactive", "later", "background")
+
+# 화면에 먼저 보이는 단계 수 (이 번호까지는 PRIORITY_INTERACTIVE)
+VISIBLE_STEPS = 2
+
+# 세션을 지정하지 않은 호출이 함께 쓰는 세션
+DEFAULT_SESSION = "default"
+
+# 모델과 상관없이 동시에 진행하는 호출 수 상한 (프로세스 전체)
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("SOUS_CHEF_MAX_CONCURRENCY", "16"))
+
+# 이 시간(초)만큼 기다릴 때마다 우선순위를 한 단계 올림 (백그라운드 작업이 끝없이 밀리지 않도록)
+PRIORITY_AGING_SECONDS = 30.0
+
+_current_session = contextvars.ContextVar("sous_chef_session", default=None)
+_current_priority = contextvars.ContextVar("sous_chef_priority", default=None)
+_current_step = contextvars.ContextVar("sous_chef_step", default=None)
+
+
+def step_priority(index: int) -> int:
+    """
+    조리 단계 번호의 기본 우선순위
+
+    Args:
+        index: 단계 번호 (1부터 시작, None이면 단계가 아닌 호출)
+
+    Returns:
+        int: 앞쪽 VISIBLE_STEPS개 단계와 단계가 아닌 호출은 PRIORITY_INTERACTIVE, 나머지는 PRIORITY_LATER
+    """
+    return PRIORITY_INTERACTIVE if index is None or index <= VISIBLE_STEPS else PRIORITY_LATER
+
+
+def current_session() -> tuple:
+    """
+    현재 컨텍스트의 세션
+
+    Returns:
+        tuple: (세션 ID, 가중치) - 지정하지 않았으면 (DEFAULT_SESSION, 1.0)
+    """
+    return _current_session.get() or (DEFAULT_SESSION, 1.0)
+
+
+def current_priority() -> tuple:
+    """
+    현재 컨텍스트의 호출 우선순위
+
+    Returns:
+        tuple: (우선순위, 세션 안 순서) - priority_scope로 지정하지 않았으면 단계 번호로 정함 (step_priority)
+    """
+    step = _current_step.get()
+    priority = _current_priority.get()
+    if priority is None:
+        priority = step_priority(step)
+    return priority, step or 0
+
+
+@contextmanager
+def session_scope(session, weight: float = 1.0):
+    """
+    블록 안의 API 호출을 session의 대기열로 보내도록 지정
+
+    Args:
+        session: 세션 ID (None이면 바깥에서 지정한 세션을 그대로 사용)
+        weight: 가중치 (2.0이면 다른 세션보다 두 배 자주 차례가 옴)
+
+    Yields:
+        tuple: 적용된 (세션 ID, 가중치)
+    """
+    if session is None:
+        yield current_session()
+        return
+
+    value = (str(session), float(weight))
+    token = _current_session.set(value)
+    try:
+        yield value
+    finally:
+        _current_session.reset(token)
+
+
+@contextmanager
+def priority_scope(priority: int):
+    """
+    블록 안의 API 호출 우선순위 지정 (단계 번호로 정하는 기본 우선순위보다 우선)
+
+    Args:
+        priority: PRIORITY_INTERACTIVE / PRIORITY_LATER / PRIORITY_BACKGROUND (None이면 바깥 값 사용)
+    """
+    if priority is None:
+        yield
+        return
+
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+@contextmanager
+def step_scope(index: int):
+    """
+    블록 안의 API 호출이 어느 조리 단계를 위한 것인지 지정 (우선순위와 세션 안 순서에 사용)
+
+    Args:
+        index: 단계 번호 (1부터 시작, None이면 바깥 값 사용)
+    """
+    if index is None:
+        yield
+        return
+
+    token = _current_step.set(index)
+    try:
+        yield
+    finally:
+        _current_step.reset(token)
+
+
+class FairScheduler:
+    """
+    세션별 가중 공정 큐잉 + 우선순위 + 전역 동시성 상한 (스레드 안전)
+    acquire(스레드용)와 aacquire(asyncio용)가 같은 대기열을 공유
+    - 기다리는 쪽은 자리를 받거나, Deadline이 취소되거나, 토큰이 충전될 때 깨어남 (주기적으로 확인하지 않음)
+      aacquire는 자리를 준 스레드가 loop.call_soon_threadsafe로 이벤트 루프에 알림
+    """
+
+    # stats()에 대기 시간을 남겨 둘 최근 세션 수
+    MAX_TRACKED_SESSIONS = 200
+
+    def __init__(self, max_concurrency: int = None, telemetry=None, aging_seconds: float = PRIORITY_AGING_SECONDS):
+        """
+        FairScheduler 초기화
+
+        Args:
+            max_concurrency: 전역 동시성 상한 (None이면 DEFAULT_MAX_CONCURRENCY)
+            telemetry: 지표 기록기 (Telemetry, None이면 프로세스 공용 기록기)
+            aging_seconds: 이 시간(초)만큼 기다릴 때마다 우선순위를 한 단계 올림 (None이면 올리지 않음)
+        """
+        self.max_concurrency = max_concurrency or DEFAULT_MAX_CONCURRENCY
+        self.aging_seconds = aging_seconds
+        self.telemetry = telemetry or shared_telemetry()
+        self.in_flight = 0
+
+        # 가상 시각 (마지막으로 보낸 호출의 시작 태그)
+        self._virtual_time = 0.0
+        # 대기 중이거나 진행 중인 호출이 있는 세션 -> {"weight", "finish", "queue", "in_flight"}
+        self._flows = {}
+        # 세션 -> 대기 시간 통계 (최근 MAX_TRACKED_SESSIONS개)
+        self._session_stats = OrderedDict()
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    def acquire(self, gate=None, deadline=None) -> dict:
+        """
+        현재 세션/우선순위로 줄을 서서 자리를 받을 때까지 대기
+
+        Args:
+            gate: 함께 확보할 모델 자리 (available()/try_enter()/ready_in()/abandon()이 있는 객체,
+                예: rate_limit.ModelGate) - 자리를 받으면 이미 진입한 상태이므로 호출이 끝나면 gate 자리와
+                release()를 함께 반납
+            deadline: 따를 Deadline (None이면 자리가 날 때까지)
+
+        Returns:
+            dict: 받은 자리 (release에 넘김)
+
+        Raises:
+            DeadlineExceeded: 자리를 받기 전에 마감되거나 취소됨
+        """
+        ticket = self._enqueue(gate)
+        if deadline is not None:
+            deadline.on_cancel(self._wake_all)
+        with self._condition:
+            while not ticket["granted"]:
+                if deadline is not None and deadline.expired():
+                    self._withdraw(ticket)
+                    raise DeadlineExceeded(deadline.reason)
+                self._condition.wait(self._wait_timeout(deadline))
+                if not ticket["granted"] and self._dispatch():
+                    self._publish()
+        return ticket
+
+    async def aacquire(self, gate=None, deadline=None) -> dict:
+        """
+        acquire의 비동기 버전 (이벤트 루프를 막지 않고 자리를 받았다는 알림을 기다림)
+        취소(asyncio.CancelledError)되면 줄에서 빠짐
+
+        Args:
+            gate: 함께 확보할 모델 자리 (acquire 참고)
+            deadline: 따를 Deadline (None이면 자리가 날 때까지)
+
+        Returns:
+            dict: 받은 자리 (release에 넘김)
+
+        Raises:
+            DeadlineExceeded: 자리를 받기 전에 마감되거나 취소됨
+        """
+        loop = asyncio.get_running_loop()
+        woken = asyncio.Event()
+
+        def wake():
+            # 자리를 준 스레드나 Deadline을 취소한 스레드에서 호출
+            try:
+                loop.call_soon_threadsafe(woken.set)
+            except RuntimeError:
+                # 이미 닫힌 이벤트 루프
+                pass
+
+        ticket = self._enqueue(gate, wake)
+        if deadline is not None:
+            deadline.on_cancel(wake)
+        try:
+            while True:
+                # 확인하기 전에 지워야 확인과 대기 사이에 온 알림을 놓치지 않음
+                woken.clear()
+                with self._condition:
+                    if not ticket["granted"] and self._dispatch():
+                        self._publish()
+                    if ticket["granted"]:
+                        break
+                    timeout = self._wait_timeout(deadline)
+                if deadline is not None and deadline.expired():
+                    raise DeadlineExceeded(deadline.reason)
+                try:
+                    await asyncio.wait_for(woken.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            with self._condition:
+                self._withdraw(ticket)
+            raise
+        return ticket
+
+    def release(self, ticket: dict):
+        """
+        자리 반납 후 다음 호출에 자리를 줌 (gate 자리는 호출한 쪽에서 먼저 반납)
+
+        Args:
+            ticket: acquire/aacquire가 돌려준 자리
+        """
+        with self._condition:
+            self._release(ticket)
+            self._dispatch()
+            self._publish()
+
+    def _classify(self) -> tuple:
+        # 현재 컨텍스트의 호출 분류: (세션 ID, 가중치, 우선순위, 세션 안 순서)
+        return (*current_session(), *current_priority())
+
+    def _enqueue(self, gate, wake=None) -> dict:
+        # wake: 자리를 받았을 때 부를 함수 (aacquire용, acquire는 조건 변수로 깨어남)
+        session, weight, priority, order = self._classify()
+        ticket = {
+            "session": session,
+            "priority": priority,
+            "gate": gate,
+            "wake": wake,
+            "enqueued": time.monotonic(),
+            "granted": False,
+        }
+        with self._condition:
+            flow = self._flows.get(session)
+            if flow is None:
+                # 쉬고 있던 세션은 현재 가상 시각에서 다시 시작 (쉬는 동안 쌓인 몫은 없음)
+                flow = self._flows[session] = {"finish": self._virtual_time, "queue": [], "in_flight": 0}
+            flow["weight"] = weight
+            # 순번이 모두 달라서 정렬 비교가 ticket(dict)까지 가지 않음
+            bisect.insort(flow["queue"], (priority, order, next(self._sequence), ticket))
+            self._dispatch()
+            self._publish()
+        return ticket
+
+    def _withdraw(self, ticket: dict):
+        # 줄에서 빠짐 - 그 사이에 자리를 받았으면 반납 (self._condition을 잡은 상태에서 호출)
+        if ticket["granted"]:
+            if ticket["gate"] is not None:
+                # 요청을 보내기 전이므로 동시성 조정 없이 반납 (토큰도 돌려놓음)
+                ticket["gate"].abandon()
+            self._release(ticket)
+        else:
+            flow = self._flows[ticket["session"]]
+            flow["queue"] = [item for item in flow["queue"] if item[3] is not ticket]
+            self._forget_idle(ticket["session"])
+        self._dispatch()
+        self._publish()
+
+    def _release(self, ticket: dict):
+        self.in_flight -= 1
+        self._flows[ticket["session"]]["in_flight"] -= 1
+        self._forget_idle(ticket["session"])
+
+    def _forget_idle(self, session: str):
+        flow = self._flows.get(session)
+        if flow is not None and not flow["queue"] and not flow["in_flight"]:
+            del self._flows[session]
+
+    def _effective_priority(self, ticket: dict, now: float) -> int:
+        if not self.aging_seconds:
+            return ticket["priority"]
+        return max(0, ticket["priority"] - int((now - ticket["enqueued"]) / self.aging_seconds))
+
+    def _wake_all(self):
+        # Deadline 취소 알림 - 기다리는 스레드가 각자 마감을 다시 확인하도록 깨움
+        with self._condition:
+            self._condition.notify_all()
+
+    def _wait_timeout(self, deadline):
+        # 다음 확인까지 기다릴 시간: 토큰 충전과 마감 중 먼저 오는 쪽 (둘 다 없으면 None - 알림이 올 때까지)
+        # (self._condition을 잡은 상태에서 호출)
+        timeouts = [self._next_refill(), None if deadline is None else deadline.remaining()]
+        timeouts = [timeout for timeout in timeouts if timeout is not None]
+        return min(timeouts) if timeouts else None
+
+    def _next_refill(self):
+        # 토큰만 모자라 막힌 모델 자리가 다시 열릴 때까지의 최소 시간 (self._condition을 잡은 상태에서 호출)
+        # 토큰 충전은 조건 변수를 깨우지 않으므로 그때 다시 _dispatch (없으면 None)
+        if self.in_flight >= self.max_concurrency:
+            # 전역 상한이 찼으면 release가 깨움
+            return None
+        delays = []
+        for flow in self._flows.values():
+            for _, _, _, ticket in flow["queue"]:
+                delay = None if ticket["gate"] is None else ticket["gate"].ready_in()
+                if delay is not None:
+                    delays.append(delay)
+        return max(0.001, min(delays)) if delays else None
+
+    def _dispatch(self) -> bool:
+        # 자리가 있는 동안 가장 앞선 호출에 자리를 줌 (self._condition을 잡은 상태에서 호출, 자리를 줬으면 True)
+        # 세션마다 모델 자리가 있는 첫 호출이 후보이고, 후보끼리는 (우선순위, 세션 시작 태그, 도착 순서)로 비교
+        now = time.monotonic()
+        granted = False
+        while self.in_flight < self.max_concurrency:
+            best = None
+            for flow in self._flows.values():
+                for position, (_, _, sequence, ticket) in enumerate(flow["queue"]):
+                    gate = ticket["gate"]
+                    if gate is None or gate.available():
+                        start = max(self._virtual_time, flow["finish"])
+                        key = (self._effective_priority(ticket, now), start, sequence)
+                        if best is None or key < best[0]:
+                            best = (key, flow, position)
+                        break
+            if best is None:
+                break
+
+            (_, start, _), flow, position = best
+            ticket = flow["queue"][position][3]
+            if ticket["gate"] is not None and not ticket["gate"].try_enter():
+                break
+            del flow["queue"][position]
+            self._virtual_time = start
+            flow["finish"] = start + 1.0 / flow["weight"]
+            flow["in_flight"] += 1
+            self.in_flight += 1
+            ticket["granted"] = True
+            if ticket["wake"] is not None:
+                ticket["wake"]()
+            self._record_wait(ticket, now - ticket["enqueued"])
+            granted = True
+
+        if granted:
+            self._condition.notify_all()
+        return granted
+
+    def _record_wait(self, ticket: dict, waited: float):
+        self.telemetry.metrics.observe("scheduler_wait_seconds", waited, priority=PRIORITY_NAMES[ticket["priority"]])
+        stats = self._session_stats.pop(ticket["session"], None) or {"calls": 0, "wait_seconds": 0.0,
+                                                                      "max_wait_seconds": 0.0}
+        stats["calls"] += 1
+        stats["wait_seconds"] += waited
+        stats["max_wait_seconds"] = max(stats["max_wait_seconds"], waited)
+        self._session_stats[ticket["session"]] = stats
+        while len(self._session_stats) > self.MAX_TRACKED_SESSIONS:
+            self._session_stats.popitem(last=False)
+
+    def _publish(self):
+        # 현재 대기열 길이를 게이지로 기록 (self._condition을 잡은 상태에서 호출)
+        depths = [0] * len(PRIORITY_NAMES)
+        for flow in self._flows.values():
+            for priority, _, _, _ in flow["queue"]:
+                depths[priority] += 1
+        metrics = self.telemetry.metrics
+        for name, depth in zip(PRIORITY_NAMES, depths):
+            metrics.set("scheduler_queue_depth", depth, priority=name)
+        metrics.set("scheduler_in_flight", self.in_flight)
+        metrics.set("scheduler_active_sessions", len(self._flows))
+
+    def stats(self) -> dict:
+        """
+        스케줄러 상태
+
+        Returns:
+            dict: max_concurrency, in_flight, queued({우선순위 이름: 대기 수}),
+                sessions({세션 ID: {"waiting", "in_flight", "calls", "mean_wait_seconds", "max_wait_seconds"}},
+                진행 중인 세션과 최근 세션)
+        """
+        with self._condition:
+            queued = dict.fromkeys(PRIORITY_NAMES, 0)
+            sessions = {}
+            for session, stats in self._session_stats.items():
+                sessions[session] = {
+                    "waiting": 0,
+                    "in_flight": 0,
+                    "calls": stats["calls"],
+                    "mean_wait_seconds": stats["wait_seconds"] / stats["calls"],
+                    "max_wait_seconds": stats["max_wait_seconds"],
+                }
+            for session, flow in self._flows.items():
+                entry = sessions.setdefault(session, {"waiting": 0, "in_flight": 0, "calls": 0,
+                                                      "mean_wait_seconds": 0.0, "max_wait_seconds": 0.0})
+                entry["waiting"] = len(flow["queue"])
+                entry["in_flight"] = flow["in_flight"]
+                for priority, _, _, _ in flow["queue"]:
+                    queued[PRIORITY_NAMES[priority]] += 1
+            return {
+                "max_concurrency": self.max_concurrency,
+                "in_flight": self.in_flight,
+                "queued": queued,
+                "sessions": sessions,
+            }
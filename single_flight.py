@@ -0,0 +1,250 @@
+"""
+진행 중인 같은 요청 합치기 (single-flight)
+같은 키의 작업이 이미 진행 중이면 새로 실행하지 않고 그 작업에 붙어서 같은 결과(스트림이면 같은 진행 이벤트)를 받습니다.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+from deadline import CANCELLED, DeadlineExceeded, current_deadline, deadline_scope, until_deadline
+from telemetry import run_in_context
+
+
+class _Broadcast:
+    """
+    스트림 하나의 이벤트를 여러 구독자에게 전달하는 버퍼 (늦게 붙은 구독자는 처음부터 다시 받음)
+    """
+
+    def __init__(self):
+        self._items = []
+        self._done = False
+        self._error = None
+        self._condition = threading.Condition()
+
+    def publish(self, item):
+        with self._condition:
+            self._items.append(item)
+            self._condition.notify_all()
+
+    def close(self, error: BaseException = None):
+        with self._condition:
+            self._done = True
+            self._error = error
+            self._condition.notify_all()
+
+    def subscribe(self, deadline=None):
+        index = 0
+        while True:
+            with self._condition:
+                while index >= len(self._items) and not self._done:
+                    if deadline is None:
+                        self._condition.wait()
+                    elif not self._condition.wait(deadline.remaining()) and deadline.expired():
+                        raise DeadlineExceeded(deadline.reason)
+                if index >= len(self._items):
+                    if self._error is not None:
+                        raise self._error
+                    return
+                item = self._items[index]
+            index += 1
+            yield item
+
+
+class SingleFlight:
+    """
+    같은 키의 호출/스트림을 하나로 합치는 도우미
+    - do: 먼저 호출한 쪽(leader)만 함수를 실행하고, 뒤에 온 쪽(follower)은 결과나 예외를 그대로 공유
+    - ado: do의 asyncio 버전 (do와 같은 진행 중 목록을 쓰므로 스레드 호출과 비동기 호출도 서로 합쳐짐)
+    - stream: 원본 스트림은 백그라운드 스레드에서 한 번만 읽고, 모든 구독자가 같은 이벤트를 처음부터 받음
+      (구독자가 모두 중간에 떠나도 원본 스트림은 끝까지 읽어서 캐시 저장 등 후처리가 완료되도록 함)
+    - 합쳐진 호출 수는 coalesced_calls_total{kind=...} 지표와 stats()로 확인
+    - follower는 자기 Deadline까지만 기다림 (leader의 호출은 leader의 Deadline을 따름)
+      leader가 자기 마감/취소로 끝나면 follower는 그 DeadlineExceeded를 받지 않고, 자기 마감이 남았으면 다시 시도
+      (먼저 다시 시도한 follower가 새 leader가 됨)
+    - 원본 스트림은 어느 한 구독자의 Deadline도 따르지 않음 (구독자는 각자 자기 Deadline까지만 받음)
+    """
+
+    def __init__(self, telemetry=None):
+        """
+        SingleFlight 초기화
+
+        Args:
+            telemetry: 지표/스팬 기록기 (Telemetry, optional)
+        """
+        self.telemetry = telemetry
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._streams = {}
+        self._stats = {}
+
+    def record(self, kind: str, leader: bool):
+        """
+        합치기 통계 기록
+
+        Args:
+            kind: 호출 종류
+            leader: 직접 실행했으면 True, 진행 중인 호출에 붙었으면 False
+        """
+        with self._lock:
+            stats = self._stats.setdefault(kind, {"leaders": 0, "followers": 0})
+            stats["leaders" if leader else "followers"] += 1
+
+        if not leader and self.telemetry is not None:
+            self.telemetry.metrics.inc("coalesced_calls_total", kind=kind)
+            span = self.telemetry.current_span()
+            if span is not None:
+                span.set(coalesced=True)
+
+    def do(self, kind: str, key, fn, *args, **kwargs):
+        """
+        같은 (kind, key)의 호출이 진행 중이면 그 결과를 기다리고, 없으면 직접 실행
+
+        Args:
+            kind: 호출 종류 (통계 구분용, 예: "recipe", "image")
+            key: 합치기 키 (해시 가능)
+            fn: 실행할 함수
+            *args, **kwargs: fn에 그대로 전달
+
+        Returns:
+            fn의 반환값 (follower는 leader와 같은 객체를 받음)
+        """
+        flight_key = (kind, key)
+        deadline = current_deadline()
+        while True:
+            with self._lock:
+                future = self._calls.get(flight_key)
+                leader = future is None
+                if leader:
+                    future = self._calls[flight_key] = Future()
+            self.record(kind, leader)
+            if leader:
+                break
+
+            try:
+                return future.result(None if deadline is None else deadline.remaining())
+            except DeadlineExceeded:
+                # leader 자신의 마감/취소 - 이 호출의 마감이 남았으면 다시 시도
+                if deadline is not None and deadline.expired():
+                    raise DeadlineExceeded(deadline.reason) from None
+            except FutureTimeoutError:
+                if future.done():
+                    # leader가 올린 예외 (TimeoutError 계열)
+                    raise
+                raise DeadlineExceeded(deadline.reason or "timeout") from None
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self._finish(flight_key, future, error=e)
+            raise
+        self._finish(flight_key, future, result=result)
+        return result
+
+    async def ado(self, kind: str, key, fn, *args, **kwargs):
+        """
+        do의 asyncio 버전 - 같은 (kind, key)의 호출이 진행 중이면 이벤트 루프를 막지 않고 그 결과를 기다림
+        leader 작업이 취소되면 follower에게는 DeadlineExceeded(cancelled)로 알려서, 자기 마감이 남은 follower가 다시 시도
+
+        Args:
+            kind: 호출 종류 (통계 구분용, 예: "recipe", "image")
+            key: 합치기 키 (해시 가능)
+            fn: 실행할 코루틴 함수
+            *args, **kwargs: fn에 그대로 전달
+
+        Returns:
+            fn의 반환값 (follower는 leader와 같은 객체를 받음)
+        """
+        flight_key = (kind, key)
+        deadline = current_deadline()
+        while True:
+            with self._lock:
+                future = self._calls.get(flight_key)
+                leader = future is None
+                if leader:
+                    future = self._calls[flight_key] = Future()
+            self.record(kind, leader)
+            if leader:
+                break
+
+            try:
+                # follower가 취소되거나 마감되어도 leader의 Future는 건드리지 않음
+                return await until_deadline(asyncio.shield(asyncio.wrap_future(future)), deadline)
+            except DeadlineExceeded:
+                if not future.done() or (deadline is not None and deadline.expired()):
+                    # 이 호출의 마감/취소
+                    raise DeadlineExceeded(deadline.reason) from None
+                # leader 자신의 마감/취소 - 다시 시도
+
+        try:
+            result = await fn(*args, **kwargs)
+        except asyncio.CancelledError:
+            self._finish(flight_key, future, error=DeadlineExceeded(CANCELLED))
+            raise
+        except BaseException as e:
+            self._finish(flight_key, future, error=e)
+            raise
+        self._finish(flight_key, future, result=result)
+        return result
+
+    def _finish(self, flight_key, future: Future, result=None, error: BaseException = None):
+        # 깨어난 follower가 끝난 Future를 다시 가져가지 않도록 먼저 제거한 뒤 결과 전달
+        with self._lock:
+            del self._calls[flight_key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def stream(self, kind: str, key, factory):
+        """
+        같은 (kind, key)의 스트림이 진행 중이면 그 스트림을 처음부터 함께 받고, 없으면 새로 시작
+
+        Args:
+            kind: 스트림 종류 (통계 구분용, 예: "recipe_stream")
+            key: 합치기 키 (해시 가능)
+            factory: 원본 이터레이터를 만드는 함수 (leader일 때만 호출)
+
+        Yields:
+            원본 스트림의 항목
+        """
+        flight_key = (kind, key)
+        with self._lock:
+            broadcast = self._streams.get(flight_key)
+            leader = broadcast is None
+            if leader:
+                broadcast = self._streams[flight_key] = _Broadcast()
+        self.record(kind, leader)
+
+        if leader:
+            # 원본 스트림은 호출한 쪽 트레이스를 그대로 가지고 백그라운드에서 읽음 (Deadline은 _pump에서 뗌)
+            pump = threading.Thread(target=run_in_context(self._pump), args=(flight_key, broadcast, factory),
+                                    name=f"single-flight-{kind}", daemon=True)
+            pump.start()
+
+        yield from broadcast.subscribe(current_deadline())
+
+    def _pump(self, flight_key, broadcast: _Broadcast, factory):
+        error = None
+        try:
+            # 처음 구독한 쪽의 마감/취소가 다른 구독자의 스트림까지 끊지 않도록 Deadline 없이 읽음
+            with deadline_scope(None):
+                for item in factory():
+                    broadcast.publish(item)
+        except BaseException as e:
+            error = e
+        finally:
+            # 끝난 스트림에는 새 구독자가 붙지 않도록 먼저 제거
+            with self._lock:
+                del self._streams[flight_key]
+            broadcast.close(error)
+
+    def stats(self) -> dict:
+        """
+        종류별 합치기 통계
+
+        Returns:
+            dict: {종류: {"leaders": 직접 실행한 수, "followers": 진행 중인 호출에 붙은 수}}
+        """
+        with self._lock:
+            return {kind: dict(stats) for kind, stats in self._stats.items()}
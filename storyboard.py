@@ -0,0 +1,193 @@
+"""
+스토리보드 이미지 (조리 단계 여러 개를 Imagen 한 번으로)
+단계마다 한 칸씩 들어간 격자 이미지를 요청한 뒤, 칸 경계를 찾아서 단계별 이미지로 잘라냅니다.
+경계를 확실히 찾지 못하면 None을 돌려주고, 호출하는 쪽은 단계별 요청으로 돌아갑니다.
+"""
+
+import io
+
+import numpy as np
+from PIL import Image
+
+# 단계 수 -> (행, 열, Imagen 가로세로 비율) - 칸이 정사각형에 가깝도록 선택
+GRID_SHAPES = [
+    (4, (2, 2, "1:1")),
+    (6, (2, 3, "4:3")),
+    (9, (3, 3, "1:1")),
+]
+
+# 경계 탐색 범위 (칸 크기 대비, 예상 위치 앞뒤)
+SEARCH_WINDOW = 0.2
+# 여백(거터)으로 볼 줄의 최대 밝기 표준편차 (0~255)
+GUTTER_STD = 6.0
+# 여백 없이 맞닿은 경계로 볼 밝기 변화량 (이미지 전체 중앙값 대비 배수)
+SEAM_RATIO = 4.0
+# 잘라낸 칸 크기 허용 범위 (예상 크기 대비)
+PANEL_SIZE_RANGE = (0.7, 1.3)
+# 빈 칸으로 볼 최대 밝기 표준편차
+BLANK_STD = 2.0
+# 경계 탐색용 축소 크기 (긴 변, px)
+ANALYSIS_SIZE = 512
+
+
+def grid_shape(count: int):
+    """
+    단계 수에 맞는 격자 모양
+
+    Args:
+        count: 조리 단계 수
+
+    Returns:
+        tuple | None: (행, 열, 가로세로 비율), 한 장에 담기에 단계가 너무 많으면 None
+    """
+    for max_count, shape in GRID_SHAPES:
+        if count <= max_count:
+            return shape
+    return None
+
+
+def build_storyboard_prompt(dish_name: str, scenes: list, rows: int, cols: int) -> str:
+    """
+    스토리보드 Imagen 프롬프트 구성
+
+    Args:
+        dish_name: 요리 이름
+        scenes: 단계별 장면 설명 (영어, 단계 순서)
+        rows: 행 수
+        cols: 열 수
+
+    Returns:
+        str: 이미지 생성 프롬프트
+    """
+    panels = "\n".join(f"Panel {n}: {scene}" for n, scene in enumerate(scenes, 1))
+    empty_panels = rows * cols - len(scenes)
+    filler = f"\nThe remaining {empty_panels} panel(s): the finished dish, plated." if empty_panels else ""
+    return f"""NO TEXT, NO WORDS, NO LETTERS, NO NUMBERS, NO TYPOGRAPHY - Pure photography only.
+
+A storyboard grid of {rows} rows and {cols} columns of equally sized photo panels separated by thin plain white gutters.
+Each panel is a separate realistic photograph of Korean {dish_name} being cooked, read left to right, top to bottom.
+Home kitchen scene with natural daylight, wooden table, hands visible during cooking action, consistent style in every panel.
+{panels}{filler}
+
+CRITICAL: ZERO text overlays, ZERO panel numbers, ZERO labels, ZERO captions, ZERO watermarks."""
+
+
+def _gray(image: Image.Image) -> tuple:
+    # 경계 탐색용 축소 흑백 배열과 원본 대비 축소 비율
+    scale = min(1.0, ANALYSIS_SIZE / max(image.size))
+    small = image.convert("L")
+    if scale < 1.0:
+        small = small.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))))
+    return np.asarray(small, dtype=np.float32), scale
+
+
+def _gutter_runs(std: np.ndarray) -> list:
+    # 밝기 변화가 거의 없는 줄(여백)의 연속 구간 [(시작, 끝)] (끝은 포함하지 않음)
+    flat = std < GUTTER_STD
+    runs = []
+    start = None
+    for n, is_flat in enumerate(flat):
+        if is_flat and start is None:
+            start = n
+        elif not is_flat and start is not None:
+            runs.append((start, n))
+            start = None
+    if start is not None:
+        runs.append((start, len(flat)))
+    return runs
+
+
+def _find_cuts(gray: np.ndarray, count: int) -> list:
+    """
+    한 축(열 방향)의 칸 구간 찾기 - 행 방향은 전치해서 호출
+
+    Args:
+        gray: 흑백 이미지 배열 (높이 × 너비)
+        count: 이 축의 칸 수
+
+    Returns:
+        list | None: [(시작, 끝), ...] 칸마다 하나, 경계를 찾지 못하면 None
+    """
+    length = gray.shape[1]
+    std = gray.std(axis=0)
+    runs = _gutter_runs(std)
+
+    # 바깥 테두리 여백은 잘라냄
+    start, end = 0, length
+    if runs and runs[0][0] == 0:
+        start = runs[0][1]
+    if runs and runs[-1][1] == length:
+        end = runs[-1][0]
+    if end - start < count:
+        return None
+
+    # 맞닿은 경계 탐지용: 이웃한 두 줄의 평균 밝기 차이
+    seam = np.abs(np.diff(gray, axis=1)).mean(axis=0)
+    seam_floor = max(float(np.median(seam)), 1.0) * SEAM_RATIO
+
+    cell = (end - start) / count
+    window = cell * SEARCH_WINDOW
+    bounds = [(start, start)]
+    for k in range(1, count):
+        expected = start + cell * k
+        low, high = expected - window, expected + window
+
+        # 1) 예상 위치에 가장 가까운 안쪽 여백
+        inner = [run for run in runs if run[0] < high and run[1] > low and run[0] > start and run[1] < end]
+        if inner:
+            bounds.append(min(inner, key=lambda run: abs((run[0] + run[1]) / 2 - expected)))
+            continue
+
+        # 2) 여백이 없으면 밝기가 크게 바뀌는 줄
+        low_index, high_index = max(int(low), start + 1), min(int(high) + 1, end - 1)
+        if low_index >= high_index:
+            return None
+        n = low_index + int(np.argmax(seam[low_index - 1:high_index - 1]))
+        if seam[n - 1] < seam_floor:
+            return None
+        bounds.append((n, n))
+    bounds.append((end, end))
+
+    cuts = [(bounds[k][1], bounds[k + 1][0]) for k in range(count)]
+    low_size, high_size = PANEL_SIZE_RANGE
+    if any(not low_size * cell <= b - a <= high_size * cell for a, b in cuts):
+        return None
+    return cuts
+
+
+def split_grid(image_data: bytes, rows: int, cols: int, panels: int = None):
+    """
+    스토리보드 이미지를 칸별 PNG로 분리
+
+    Args:
+        image_data: 격자 이미지 데이터
+        rows: 행 수
+        cols: 열 수
+        panels: 사용할 칸 수 (앞에서부터, None이면 전체) - 남는 칸은 비어 있어도 됨
+
+    Returns:
+        list | None: 칸별 PNG 데이터 (왼쪽 위부터 행 순서), 경계를 찾지 못했거나 빈 칸이 있으면 None
+    """
+    panels = rows * cols if panels is None else panels
+    try:
+        image = Image.open(io.BytesIO(image_data))
+        image.load()
+    except Exception:
+        return None
+
+    gray, scale = _gray(image)
+    col_cuts = _find_cuts(gray, cols)
+    row_cuts = _find_cuts(gray.T, rows)
+    if col_cuts is None or row_cuts is None:
+        return None
+
+    results = []
+    for n in range(panels):
+        (top, bottom), (left, right) = row_cuts[n // cols], col_cuts[n % cols]
+        if gray[top:bottom, left:right].std() < BLANK_STD:
+            return None
+        box = (round(left / scale), round(top / scale), round(right / scale), round(bottom / scale))
+        buffer = io.BytesIO()
+        image.crop(box).save(buffer, format="PNG")
+        results.append(buffer.getvalue())
+    return results
@@ -0,0 +1,468 @@
+"""
+호출 계측 (스팬/트레이스/지표)
+API 호출, 이미지 저장 등 각 작업의 소요 시간과 토큰 수, 응답 크기, 재시도, 결과를 스팬으로 기록합니다.
+스팬은 사용자 요청 하나당 하나의 트레이스로 묶이며(contextvars로 현재 스팬 전달),
+Prometheus 텍스트 형식 지표와 JSON 트레이스 로그로 내보낼 수 있습니다.
+
+사용법:
+    with telemetry.trace("request", dish_name="김치찌개") as root:
+        with telemetry.span("recipe.generate"):
+            ...
+    telemetry.export_trace(root.trace_id)
+"""
+
+import asyncio
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# 현재 실행 중인 스팬 (스레드/비동기 작업마다 따로 관리됨)
+_current_span = contextvars.ContextVar("sous_chef_current_span", default=None)
+
+# 지연 시간 히스토그램 구간 (초)
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Span:
+    """
+    작업 하나의 실행 기록
+    """
+
+    def __init__(self, name: str, trace_id: str, parent_id: str = None, attributes: dict = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.start_time = time.time()
+        self._started = time.perf_counter()
+        self.duration = None
+        self.status = "ok"
+        self.error = None
+
+    def set(self, **attributes):
+        """
+        속성 추가/갱신 (토큰 수, 응답 크기 등)
+        """
+        self.attributes.update(attributes)
+
+    def add(self, name: str, value=1):
+        """
+        숫자 속성에 값을 더함 (재시도 횟수, 누적 바이트 등)
+        """
+        self.attributes[name] = self.attributes.get(name, 0) + value
+
+    def to_dict(self) -> dict:
+        """
+        JSON으로 내보낼 수 있는 dict
+        """
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "duration_seconds": self.duration,
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class Metrics:
+    """
+    Prometheus 형식 지표 저장소 (카운터 + 게이지 + 히스토그램)
+    """
+
+    def __init__(self, prefix: str = "sous_chef"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+
+    @staticmethod
+    def _labels_key(labels: dict) -> tuple:
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """
+        카운터 증가
+
+        Args:
+            name: 지표 이름 (접두사 제외)
+            value: 증가량
+            **labels: 레이블
+        """
+        key = (name, self._labels_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        """
+        게이지 값 지정 (대기열 길이처럼 오르내리는 현재 값)
+
+        Args:
+            name: 지표 이름 (접두사 제외)
+            value: 현재 값
+            **labels: 레이블
+        """
+        key = (name, self._labels_key(labels))
+        with self._lock:
+            self._gauges[key] = value
+
+    def gauge(self, name: str, **labels) -> float:
+        """
+        게이지 현재 값 (주어진 레이블이 모두 일치하는 항목의 합)
+
+        Args:
+            name: 지표 이름 (접두사 제외)
+            **labels: 걸러낼 레이블
+
+        Returns:
+            float: 현재 값 (없으면 0)
+        """
+        wanted = set(self._labels_key(labels))
+        with self._lock:
+            return sum(value for (key_name, key_labels), value in self._gauges.items()
+                       if key_name == name and wanted <= set(key_labels))
+
+    def total(self, name: str, **labels) -> float:
+        """
+        카운터 합계 (주어진 레이블이 모두 일치하는 항목만)
+
+        Args:
+            name: 지표 이름 (접두사 제외)
+            **labels: 걸러낼 레이블
+
+        Returns:
+            float: 합계
+        """
+        wanted = set(self._labels_key(labels))
+        with self._lock:
+            return sum(value for (key_name, key_labels), value in self._counters.items()
+                       if key_name == name and wanted <= set(key_labels))
+
+    def mean(self, name: str, **labels) -> tuple:
+        """
+        히스토그램 평균 (주어진 레이블이 모두 일치하는 항목만)
+
+        Args:
+            name: 지표 이름 (접두사 제외)
+            **labels: 걸러낼 레이블
+
+        Returns:
+            tuple: (평균, 측정 수) - 측정값이 없으면 (0.0, 0)
+        """
+        wanted = set(self._labels_key(labels))
+        with self._lock:
+            matched = [histogram for (key_name, key_labels), histogram in self._histograms.items()
+                       if key_name == name and wanted <= set(key_labels)]
+            count = sum(histogram["count"] for histogram in matched)
+            total = sum(histogram["sum"] for histogram in matched)
+        return (total / count if count else 0.0), count
+
+    def observe(self, name: str, value: float, **labels):
+        """
+        히스토그램에 측정값 추가
+
+        Args:
+            name: 지표 이름 (접두사 제외)
+            value: 측정값 (초)
+            **labels: 레이블
+        """
+        key = (name, self._labels_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {"buckets": [0] * len(DURATION_BUCKETS), "sum": 0.0, "count": 0}
+            for n, bound in enumerate(DURATION_BUCKETS):
+                if value <= bound:
+                    histogram["buckets"][n] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    @staticmethod
+    def _format_labels(labels, extra: tuple = ()) -> str:
+        pairs = list(labels) + list(extra)
+        if not pairs:
+            return ""
+        escaped = (f'{key}="{value.replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+                   for key, value in pairs)
+        return "{" + ",".join(escaped) + "}"
+
+    def prometheus_text(self) -> str:
+        """
+        Prometheus 텍스트 노출 형식으로 변환
+
+        Returns:
+            str: 지표 텍스트
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            histograms = {key: {"buckets": list(value["buckets"]), "sum": value["sum"], "count": value["count"]}
+                          for key, value in self._histograms.items()}
+
+        lines = []
+        for metric in sorted({name for name, _ in counters}):
+            full_name = f"{self.prefix}_{metric}"
+            lines.append(f"# TYPE {full_name} counter")
+            for (name, labels), value in sorted(counters.items()):
+                if name == metric:
+                    lines.append(f"{full_name}{self._format_labels(labels)} {value:g}")
+
+        for metric in sorted({name for name, _ in gauges}):
+            full_name = f"{self.prefix}_{metric}"
+            lines.append(f"# TYPE {full_name} gauge")
+            for (name, labels), value in sorted(gauges.items()):
+                if name == metric:
+                    lines.append(f"{full_name}{self._format_labels(labels)} {value:g}")
+
+        for metric in sorted({name for name, _ in histograms}):
+            full_name = f"{self.prefix}_{metric}"
+            lines.append(f"# TYPE {full_name} histogram")
+            for (name, labels), histogram in sorted(histograms.items()):
+                if name != metric:
+                    continue
+                for bound, count in zip(DURATION_BUCKETS, histogram["buckets"]):
+                    lines.append(f"{full_name}_bucket{self._format_labels(labels, (('le', f'{bound:g}'),))} {count}")
+                lines.append(f"{full_name}_bucket{self._format_labels(labels, (('le', '+Inf'),))} {histogram['count']}")
+                lines.append(f"{full_name}_sum{self._format_labels(labels)} {histogram['sum']:g}")
+                lines.append(f"{full_name}_count{self._format_labels(labels)} {histogram['count']}")
+
+        return "\n".join(lines) + "\n"
+
+
+class Telemetry:
+    """
+    트레이스/스팬 기록기
+    - 부모 스팬이 없는 스팬은 새 트레이스를 시작 (루트 스팬)
+    - 최근 트레이스를 메모리에 보관하고, 루트 스팬이 끝나면 JSON 트레이스 로그(JSONL)에 기록
+    - 모든 스팬의 소요 시간은 span_duration_seconds 히스토그램에 누적
+    """
+
+    def __init__(self, trace_log_path: str = None, max_traces: int = 50):
+        """
+        Telemetry 초기화
+
+        Args:
+            trace_log_path: JSON 트레이스 로그 파일 경로 (None이면 기록하지 않음)
+            max_traces: 메모리에 보관할 최근 트레이스 수
+        """
+        self.trace_log_path = trace_log_path
+        self.max_traces = max_traces
+        self.metrics = Metrics()
+
+        self._lock = threading.Lock()
+        self._traces = OrderedDict()
+
+    def start_span(self, name: str, new_trace: bool = False, **attributes) -> Span:
+        """
+        스팬 시작 (현재 스팬으로 지정하지는 않음 - 제너레이터처럼 실행이 끊기는 작업용)
+
+        Args:
+            name: 스팬 이름
+            new_trace: True면 현재 스팬과 관계없이 새 트레이스 시작
+            **attributes: 스팬 속성
+
+        Returns:
+            Span: 시작한 스팬 (finish_span으로 종료)
+        """
+        parent = None if new_trace else _current_span.get()
+        if parent is None:
+            span = Span(name, uuid.uuid4().hex, attributes=attributes)
+        else:
+            span = Span(name, parent.trace_id, parent.span_id, attributes)
+
+        with self._lock:
+            spans = self._traces.get(span.trace_id)
+            if spans is None:
+                spans = self._traces[span.trace_id] = []
+                while len(self._traces) > self.max_traces:
+                    self._traces.popitem(last=False)
+            spans.append(span)
+        return span
+
+    def finish_span(self, span: Span, error: BaseException = None):
+        """
+        스팬 종료 (소요 시간/결과 기록)
+
+        Args:
+            span: 종료할 스팬
+            error: 실패한 경우 예외
+        """
+        span.duration = time.perf_counter() - span._started
+        if isinstance(error, (asyncio.CancelledError, GeneratorExit)):
+            # 호출자가 취소하거나 중간에 닫은 경우
+            span.status = "cancelled"
+        elif error is not None:
+            span.status = "error"
+            span.error = f"{type(error).__name__}: {error}"
+
+        self.metrics.observe("span_duration_seconds", span.duration, span=span.name, status=span.status)
+
+        if span.parent_id is None and self.trace_log_path:
+            self._write_trace_log(span.trace_id)
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """
+        스팬 컨텍스트 매니저 (블록 안에서 시작한 스팬은 이 스팬의 자식이 됨)
+
+        Args:
+            name: 스팬 이름
+            **attributes: 스팬 속성
+
+        Yields:
+            Span: 현재 스팬
+        """
+        span = self.start_span(name, **attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            _current_span.reset(token)
+            self.finish_span(span, e)
+            raise
+        _current_span.reset(token)
+        self.finish_span(span)
+
+    @contextmanager
+    def trace(self, name: str, **attributes):
+        """
+        새 트레이스의 루트 스팬 (사용자 요청 하나)
+
+        Args:
+            name: 루트 스팬 이름
+            **attributes: 스팬 속성
+
+        Yields:
+            Span: 루트 스팬
+        """
+        span = self.start_span(name, new_trace=True, **attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            _current_span.reset(token)
+            self.finish_span(span, e)
+            raise
+        _current_span.reset(token)
+        self.finish_span(span)
+
+    @contextmanager
+    def activate(self, span: Span):
+        """
+        start_span으로 만든 스팬을 블록 안에서만 현재 스팬으로 지정 (종료는 하지 않음)
+
+        Args:
+            span: 현재 스팬으로 지정할 스팬
+        """
+        token = _current_span.set(span)
+        try:
+            yield span
+        finally:
+            _current_span.reset(token)
+
+    @staticmethod
+    def current_span():
+        """
+        현재 스팬 (없으면 None)
+        """
+        return _current_span.get()
+
+    def export_trace(self, trace_id: str) -> dict:
+        """
+        트레이스 하나를 JSON으로 내보낼 수 있는 dict로 변환
+
+        Args:
+            trace_id: 트레이스 ID
+
+        Returns:
+            dict: {"trace_id", "spans": [...]} (스팬은 시작 순서), 없으면 None
+        """
+        with self._lock:
+            spans = list(self._traces.get(trace_id, []))
+        if not spans:
+            return None
+        return {"trace_id": trace_id, "spans": [span.to_dict() for span in sorted(spans, key=lambda s: s.start_time)]}
+
+    def recent_trace_ids(self) -> list:
+        """
+        최근 트레이스 ID 리스트 (오래된 것부터)
+        """
+        with self._lock:
+            return list(self._traces)
+
+    def prometheus_text(self) -> str:
+        """
+        Prometheus 텍스트 형식 지표
+        """
+        return self.metrics.prometheus_text()
+
+    def write_prometheus(self, path: str):
+        """
+        지표를 파일로 저장 (node_exporter textfile collector 등에서 수집)
+
+        Args:
+            path: 저장할 파일 경로
+        """
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+
+    def _write_trace_log(self, trace_id: str):
+        trace = self.export_trace(trace_id)
+        if trace is None:
+            return
+        try:
+            with self._lock:
+                with open(self.trace_log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(trace, ensure_ascii=False, default=str) + "\n")
+        except OSError as e:
+            print(f"⚠️ 트레이스 로그 기록 실패: {e}")
+
+
+def run_in_context(fn):
+    """
+    현재 contextvars 컨텍스트(현재 스팬 포함)를 그대로 가지고 실행되는 함수로 감쌈
+    ThreadPoolExecutor/Thread에 작업을 넘길 때 사용해서 작업자 스레드의 스팬이 같은 트레이스에 묶이게 합니다.
+
+    Args:
+        fn: 감쌀 함수
+
+    Returns:
+        callable: 감싼 함수
+    """
+    context = contextvars.copy_context()
+
+    def wrapper(*args, **kwargs):
+        # 같은 Context 객체는 동시에 두 스레드에서 실행할 수 없으므로 호출마다 복사
+        return context.copy().run(fn, *args, **kwargs)
+
+    return wrapper
+
+
+_shared_telemetry = None
+_shared_lock = threading.Lock()
+
+
+def shared_telemetry() -> Telemetry:
+    """
+    프로세스 전체에서 함께 쓰는 Telemetry (SOUS_CHEF_TRACE_LOG가 설정되어 있으면 그 파일에 트레이스 기록)
+
+    Returns:
+        Telemetry: 공용 계측기
+    """
+    global _shared_telemetry
+    with _shared_lock:
+        if _shared_telemetry is None:
+            _shared_telemetry = Telemetry(trace_log_path=os.getenv("SOUS_CHEF_TRACE_LOG"))
+        return _shared_telemetry
@@ -0,0 +1,96 @@
+"""
+artifact_store.py 테스트
+같은 내용의 이미지를 한 번만 저장하는지, 레시피/작업(owner)별 참조와 용량 정리가 맞게 동작하는지 확인합니다.
+"""
+
+import time
+from pathlib import Path
+
+from artifact_store import ArtifactStore, current_owner, is_handle, owner_scope
+
+
+def build_store(tmp_path, quota_bytes: int = 0) -> ArtifactStore:
+    """
+    백그라운드 정리 없이, 최근 사용 유예 시간 없이 쓰는 저장소
+    """
+    return ArtifactStore(tmp_path / "artifacts", quota_bytes=quota_bytes, grace_seconds=0, evict_interval=0)
+
+
+def test_same_content_is_stored_once(tmp_path):
+    """
+    같은 내용은 여러 owner가 저장해도 같은 핸들과 파일 하나를 씀
+    """
+    store = build_store(tmp_path)
+    first = store.put(b"kimchi" * 100, "recipe-a", "step_1")
+    second = store.put(b"kimchi" * 100, "recipe-b", "step_1")
+
+    assert is_handle(first)
+    assert first == second
+    assert Path(store.path(first)).read_bytes() == b"kimchi" * 100
+    assert store.stats() == {"artifacts": 1, "bytes": 600, "quota_bytes": 0, "referenced": 1, "owners": 2}
+
+
+def test_refs_are_kept_per_owner(tmp_path):
+    """
+    참조는 (owner, 이름)마다 하나 - 같은 이름으로 다시 저장하면 이전 이미지의 참조를 대신함
+    """
+    store = build_store(tmp_path)
+    old = store.put(b"preview", "recipe-a", "step_1")
+    new = store.put(b"full image", "recipe-a", "step_1")
+    other = store.put(b"preview", "recipe-b", "step_1")
+
+    assert old != new
+    assert store.refs("recipe-a") == {"step_1": new}
+    assert store.refs("recipe-b") == {"step_1": other}
+
+    assert store.release("recipe-a", "step_1") == 1
+    assert store.release("recipe-a", "step_1") == 0
+    assert store.refs("recipe-a") == {}
+    assert store.refs("recipe-b") == {"step_1": other}
+
+
+def test_owner_scope_nests_and_resets():
+    """
+    owner_scope 안에서만 주인이 지정되고, 주인을 주지 않은 안쪽 블록은 바깥 주인을 그대로 씀
+    """
+    assert current_owner() is None
+    with owner_scope("job-1") as owner:
+        assert owner == "job-1"
+        with owner_scope() as inner:
+            assert inner == "job-1"
+    assert current_owner() is None
+
+
+def test_evict_removes_unreferenced_first(tmp_path):
+    """
+    용량을 넘으면 참조 없는 이미지부터 오래 쓰지 않은 순으로 지우고, 참조 중인 이미지는 남김
+    """
+    store = build_store(tmp_path, quota_bytes=250)
+    kept = store.put(b"a" * 100, "recipe-a", "image")
+    orphan_old = store.put(b"b" * 100)
+    time.sleep(0.01)
+    orphan_new = store.put(b"c" * 100)
+
+    result = store.evict()
+    assert result == {"removed": 1, "freed": 100, "released": 0}
+    assert store.path(orphan_old) is None
+    assert store.path(orphan_new) is not None
+    assert store.path(kept) is not None
+
+
+def test_evict_releases_least_recently_used_owner(tmp_path):
+    """
+    참조 없는 이미지만으로 부족하면 가장 오래 쓰지 않은 레시피의 참조를 통째로 해제하고 그 이미지를 지움
+    """
+    store = build_store(tmp_path, quota_bytes=150)
+    old = store.put(b"a" * 100, "recipe-old", "image")
+    store.put(b"b" * 100, "recipe-old", "step_1")
+    time.sleep(0.01)
+    new = store.put(b"c" * 100, "recipe-new", "image")
+
+    result = store.evict()
+    assert result == {"removed": 2, "freed": 200, "released": 1}
+    assert store.refs("recipe-old") == {}
+    assert store.path(old) is None
+    assert store.path(new) is not None
+    assert store.stats()["bytes"] == 100
@@ -0,0 +1,142 @@
+"""
+AsyncRecipeAgent 테스트
+가짜 백엔드의 client.aio로 레시피/이미지를 생성하고, 동기 API와 같은 캐시/합치기를 쓰는지,
+제한 시간과 취소를 지키는지 확인합니다.
+"""
+
+import asyncio
+
+import pytest
+
+from chef_brain import AsyncRecipeAgent, RecipeAgent
+from deadline import DeadlineExceeded
+from fake_backend import FakeGenaiClient
+from rate_limit import DEFAULT_LIMITS, CallLayer, ModelLimit
+from recipe_cache import RecipeCache
+from scheduler import FairScheduler
+from telemetry import Telemetry
+
+
+def build_agent(tmp_path, client: FakeGenaiClient, **agent_kwargs) -> RecipeAgent:
+    """
+    가짜 백엔드와 속도 제한/재시도 대기가 거의 없는 호출 계층을 쓰는 에이전트
+    """
+    telemetry = Telemetry()
+    limits = {model: ModelLimit(requests_per_minute=60000, max_concurrency=8) for model in DEFAULT_LIMITS}
+    calls = CallLayer(limits=limits, max_retries=1, base_delay=0.001, max_delay=0.01, telemetry=telemetry,
+                      scheduler=FairScheduler(max_concurrency=8, telemetry=telemetry))
+    return RecipeAgent(client=client, call_layer=calls, image_dir=str(tmp_path / "images"), context_cache=False,
+                       **agent_kwargs)
+
+
+def sync_calls_fail(client: FakeGenaiClient):
+    """
+    동기 client.models로는 생성하지 못하게 막음 (비동기 API가 client.aio만 쓰는지 확인용)
+    """
+    def fail(**kwargs):
+        raise AssertionError("client.models를 호출했습니다.")
+
+    client.models.generate_content = fail
+    client.models.generate_images = fail
+
+
+def in_flight(agent: RecipeAgent) -> int:
+    """
+    호출 계층에서 진행 중인 요청 수
+    """
+    return sum(model["in_flight"] for model in agent.calls.stats()["models"].values())
+
+
+def test_recipe_uses_aio_and_shares_cache_with_sync_api(tmp_path):
+    """
+    비동기 생성은 client.aio로 요청하고, 저장한 레시피는 동기 API가 같은 캐시 키로 재사용
+    """
+    client = FakeGenaiClient(latency=0, image_latency=0, jitter=0)
+    sync_calls_fail(client)
+    agent = build_agent(tmp_path, client, recipe_cache=RecipeCache(tmp_path / "recipes.db"))
+
+    recipe = asyncio.run(AsyncRecipeAgent(agent).generate_recipe("김치찌개"))
+
+    assert recipe["title"] == "집에서 즐기는 김치찌개"
+    assert client.models.calls["generate_content"] == 1
+    assert agent.generate_recipe("김치찌개") == recipe
+    assert client.models.calls["generate_content"] == 1
+
+
+def test_same_recipe_requests_are_coalesced(tmp_path):
+    """
+    진행 중인 같은 요리의 비동기 요청은 API를 한 번만 호출하고 같은 결과를 나눠 받음
+    """
+    client = FakeGenaiClient(latency=0.1, image_latency=0, jitter=0)
+    agent = build_agent(tmp_path, client)
+    async_agent = AsyncRecipeAgent(agent)
+
+    async def main():
+        return await asyncio.gather(*(async_agent.generate_recipe("김치찌개") for _ in range(3)))
+
+    recipes = asyncio.run(main())
+    assert recipes[0] == recipes[1] == recipes[2]
+    assert client.models.calls["generate_content"] == 1
+    assert agent.coalesce_stats()["recipe"] == {"leaders": 1, "followers": 2}
+
+
+def test_step_images_arrive_as_they_complete(tmp_path):
+    """
+    iter_step_images는 단계마다 결과를 하나씩 전달하고, generate_step_images는 단계 순서로 경로를 돌려줌
+    """
+    client = FakeGenaiClient(latency=0, image_latency=0, jitter=0)
+    sync_calls_fail(client)
+    agent = build_agent(tmp_path, client)
+    async_agent = AsyncRecipeAgent(agent)
+    recipe = {"steps": ["1단계: 도마에서 썰어 주세요.", "2단계: 팬에 볶아 주세요.", "3단계: 냄비에 끓여 주세요."]}
+
+    async def main():
+        streamed = [result async for result in async_agent.iter_step_images("김치찌개", recipe)]
+        progress = []
+        image_paths = await async_agent.generate_step_images(
+            "김치찌개", recipe, progress_callback=lambda i, total, status: progress.append((i, status)))
+        return streamed, image_paths, progress
+
+    streamed, image_paths, progress = asyncio.run(main())
+    assert sorted((i, status) for i, status, _ in streamed) == [(1, "completed"), (2, "completed"), (3, "completed")]
+    assert [path.rsplit("_", 1)[-1] for path in image_paths] == ["1.png", "2.png", "3.png"]
+    assert progress[:3] == [(1, "generating"), (2, "generating"), (3, "generating")]
+    assert sorted(progress[3:]) == [(1, "completed"), (2, "completed"), (3, "completed")]
+    assert client.models.calls["generate_images"] == 6
+
+
+def test_timeout_reports_unfinished_steps(tmp_path):
+    """
+    제한 시간이 지나면 레시피는 DeadlineExceeded, 단계 이미지는 끝나지 못한 단계를 "timeout"으로 보고
+    """
+    client = FakeGenaiClient(latency=1.0, image_latency=1.0, jitter=0)
+    agent = build_agent(tmp_path, client)
+    async_agent = AsyncRecipeAgent(agent, timeout=0.1)
+
+    async def main():
+        with pytest.raises(DeadlineExceeded):
+            await async_agent.generate_recipe("김치찌개")
+        return await async_agent.generate_step_images("김치찌개", {"steps": ["1단계: 냄비에 끓여 주세요."]})
+
+    assert asyncio.run(main()) == [None]
+    assert in_flight(agent) == 0
+
+
+def test_cancel_stops_in_flight_call(tmp_path):
+    """
+    작업을 취소하면 진행 중인 API 호출도 취소되고 호출 계층 자리를 반납
+    """
+    client = FakeGenaiClient(latency=1.0, image_latency=1.0, jitter=0)
+    agent = build_agent(tmp_path, client)
+    async_agent = AsyncRecipeAgent(agent)
+
+    async def main():
+        task = asyncio.create_task(async_agent.generate_image("김치찌개"))
+        await asyncio.sleep(0.05)
+        assert in_flight(agent) == 1
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert in_flight(agent) == 0
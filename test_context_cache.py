@@ -0,0 +1,68 @@
+"""
+context_cache.py 테스트
+지시문이 최소 캐시 크기보다 작으면 캐시를 만들지 않고, 토큰 수 확인도 호출 계층을 거치는지 확인합니다.
+"""
+
+from google.genai import errors
+
+from context_cache import ContextCache
+from fake_backend import FakeGenaiClient
+from rate_limit import DEFAULT_LIMITS, CallLayer, ModelLimit
+from scheduler import FairScheduler
+from telemetry import Telemetry
+
+MODEL = "gemini-2.5-flash"
+
+
+def build_calls(telemetry: Telemetry) -> CallLayer:
+    """
+    속도 제한/재시도 대기가 거의 없는 호출 계층
+    """
+    limits = {model: ModelLimit(requests_per_minute=60000, max_concurrency=8) for model in DEFAULT_LIMITS}
+    return CallLayer(limits=limits, max_retries=2, base_delay=0.001, max_delay=0.01, telemetry=telemetry,
+                     scheduler=FairScheduler(max_concurrency=8, telemetry=telemetry))
+
+
+def test_small_instruction_disables_cache_after_retried_count():
+    """
+    count_tokens는 호출 계층을 거쳐 429를 재시도하고, 지시문이 작으면 caches.create 없이 캐시를 끔
+    """
+    client = FakeGenaiClient(latency=0, image_latency=0, jitter=0)
+    count_tokens = client.models.count_tokens
+    attempts = []
+
+    def throttled_once(model, contents, config=None):
+        attempts.append(model)
+        if len(attempts) == 1:
+            raise errors.ClientError(429, {"error": {"code": 429, "status": "RESOURCE_EXHAUSTED",
+                                                     "message": "[test] quota"}})
+        return count_tokens(model=model, contents=contents, config=config)
+
+    client.models.count_tokens = throttled_once
+    telemetry = Telemetry()
+    cache = ContextCache(client, MODEL, "짧은 지시문", telemetry=telemetry, call_layer=build_calls(telemetry))
+
+    assert cache.name() is None
+    assert cache.name() is None
+    assert cache.stats()["disabled"]
+    assert attempts == [MODEL, MODEL]
+    assert client.caches.calls["create"] == 0
+    assert telemetry.metrics.total("context_cache_events_total", event="count_tokens", outcome="ok") == 1
+    assert telemetry.metrics.total("context_cache_events_total", event="create") == 0
+
+
+def test_large_instruction_creates_and_reuses_cache():
+    """
+    최소 캐시 크기 이상인 지시문은 캐시를 한 번 만들고 다음 요청부터 같은 이름을 재사용
+    """
+    client = FakeGenaiClient(latency=0, image_latency=0, jitter=0)
+    telemetry = Telemetry()
+    cache = ContextCache(client, MODEL, "레시피 형식 설명 " * 2000, telemetry=telemetry,
+                         call_layer=build_calls(telemetry))
+
+    name = cache.name()
+    assert name is not None
+    assert cache.name() == name
+    assert client.caches.calls["create"] == 1
+    assert telemetry.metrics.total("context_cache_events_total", event="create", outcome="ok") == 1
+    assert telemetry.metrics.total("context_cache_events_total", event="count_tokens", outcome="ok") == 1
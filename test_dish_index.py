@@ -0,0 +1,64 @@
+"""
+dish_index.py 테스트
+표기만 다른 요리명은 저장된 요리로 연결하고, 이름이 겹쳐도 다른 요리는 연결하지 않는지 확인합니다.
+"""
+
+import pytest
+
+from dish_index import DishNameIndex
+
+STORED = ["김치찌개", "김치볶음밥", "된장찌개", "떡볶이", "비빔밥", "돌솥비빔밥", "닭볶음탕", "짜장면", "순두부찌개"]
+
+
+@pytest.fixture
+def index() -> DishNameIndex:
+    """
+    자주 헷갈리는 요리명을 담은 기본 기준값 색인
+    """
+    dish_index = DishNameIndex()
+    dish_index.add_many(STORED)
+    return dish_index
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("김치 찌개", "김치찌개"),
+    ("kimchi jjigae", "김치찌개"),
+    ("김치찌게", "김치찌개"),
+    ("김치찌개 황금레시피", "김치찌개"),
+    ("Doenjang Jjigae", "된장찌개"),
+    ("떡볶기", "떡볶이"),
+    ("tteokbokki", "떡볶이"),
+    ("김치볶음밥 만들기", "김치볶음밥"),
+    ("jajangmyeon", "짜장면"),
+])
+def test_spelling_variants_match(index, query, expected):
+    """
+    띄어쓰기, 로마자 표기, 오타, 군더더기만 다른 이름은 저장된 요리로 연결
+    """
+    match = index.match(query)
+    assert match is not None and match[0] == expected
+
+
+@pytest.mark.parametrize("query", [
+    "김치볶음",
+    "김치찌개밥",
+    "닭볶음",
+    "볶음밥",
+    "비빔",
+    "순두부",
+    "돼지고기 김치찌개",
+    "비빔국수",
+])
+def test_different_dishes_do_not_match(index, query):
+    """
+    저장된 이름에 글자가 붙거나 빠져서 다른 요리가 된 이름은 연결하지 않음
+    """
+    assert index.match(query) is None
+
+
+def test_short_name_length_check_applies_at_any_threshold(index):
+    """
+    기준값을 낮춰도 짧은 이름은 길이가 비슷해야 연결
+    """
+    assert index.match("김치볶음", threshold=0.5) is None
+    assert index.match("떡볶기", threshold=0.5) == ("떡볶이", 1.0)
@@ -0,0 +1,56 @@
+"""
+image_cache.py 테스트
+캐시 키가 프롬프트와 이미지 모델을 모두 반영해서, 둘 중 하나라도 다르면 이미지를 다시 생성하는지 확인합니다.
+"""
+
+from pathlib import Path
+
+from chef_brain import RecipeAgent
+from fake_backend import FakeGenaiClient
+from image_cache import ImageCache
+from rate_limit import DEFAULT_LIMITS, CallLayer, ModelLimit
+from scheduler import FairScheduler
+from telemetry import Telemetry
+
+CONFIG = {"number_of_images": 1, "aspect_ratio": "1:1"}
+
+
+def test_key_depends_on_prompt_model_and_config(tmp_path):
+    """
+    프롬프트, 모델, 설정 중 하나만 달라도 다른 키이고, 저장한 키로만 꺼낼 수 있음
+    """
+    cache = ImageCache(tmp_path / "images")
+    key = ImageCache.make_key("kimchi stew", "imagen-4.0-generate-001", CONFIG)
+
+    assert ImageCache.make_key("kimchi stew", "imagen-4.0-generate-001", dict(CONFIG)) == key
+    assert ImageCache.make_key("bibimbap", "imagen-4.0-generate-001", CONFIG) != key
+    assert ImageCache.make_key("kimchi stew", "imagen-4.0-fast-generate-001", CONFIG) != key
+    assert ImageCache.make_key("kimchi stew", "imagen-4.0-generate-001", {**CONFIG, "aspect_ratio": "4:3"}) != key
+
+    cache.put(key, [b"png"])
+    assert cache.get(key) == [b"png"]
+    assert cache.get(ImageCache.make_key("kimchi stew", "imagen-4.0-fast-generate-001", CONFIG)) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_agent_regenerates_when_only_the_model_changes(tmp_path):
+    """
+    같은 프롬프트라도 프로필의 이미지 모델이 바뀌면 캐시를 쓰지 않고, 같은 모델로 다시 요청하면 캐시 사용
+    """
+    client = FakeGenaiClient(latency=0, image_latency=0, jitter=0)
+    telemetry = Telemetry()
+    limits = {model: ModelLimit(requests_per_minute=60000, max_concurrency=8) for model in DEFAULT_LIMITS}
+    calls = CallLayer(limits=limits, max_retries=1, base_delay=0.001, max_delay=0.01, telemetry=telemetry,
+                      scheduler=FairScheduler(max_concurrency=8, telemetry=telemetry))
+    agent = RecipeAgent(client=client, call_layer=calls, image_dir=str(tmp_path / "images"), context_cache=False,
+                        image_cache=ImageCache(tmp_path / "cache"))
+
+    first = agent.generate_image("김치찌개", "김치찌개", profile="balanced")
+    assert client.models.calls["generate_images"] == 1
+    agent.generate_image("김치찌개", "김치찌개", profile="fast")
+    assert client.models.calls["generate_images"] == 2
+
+    again = agent.generate_image("김치찌개", "김치찌개", profile="balanced")
+    assert client.models.calls["generate_images"] == 2
+    assert Path(again).read_bytes() == Path(first).read_bytes()
+    assert agent.image_cache.stats()["hits"] == 1
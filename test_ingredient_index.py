@@ -0,0 +1,70 @@
+"""
+ingredient_index.py 테스트
+가진 재료로 레시피를 찾을 때 재료명 정규화, 앞뒤 일치, 결과 순서를 확인합니다.
+"""
+
+from ingredient_index import IngredientIndex
+
+RECIPES = [
+    ("김치찌개", {"ingredients": ["신김치 (300g)", "돼지고기 목살 200g", "두부 1/2모", "대파 1대", "소금 약간"]}),
+    ("제육볶음", {"ingredients": ["돼지고기 앞다리살 (400g)", "양파 1개", "고추장 2큰술", "다진 마늘 1큰술", "설탕 1큰술"]}),
+    ("김치볶음밥", {"ingredients": ["김치 1컵", "밥 (1공기)", "계란 1개", "식용유 1큰술"]}),
+    ("두부조림", {"ingredients": ["두부 1모", "간장 3큰술", "송송 썬 파 약간"]}),
+]
+
+
+def build_index() -> IngredientIndex:
+    """
+    테스트용 레시피 네 개를 담은 색인
+    """
+    index = IngredientIndex()
+    index.add_many(RECIPES)
+    return index
+
+
+def test_search_ranks_by_coverage_then_missing():
+    """
+    입력 재료를 많이 쓰는 레시피가 먼저, 같으면 더 사야 할 재료가 적은 레시피가 먼저
+    """
+    results = build_index().search("돼지고기랑 김치 두부")
+
+    assert [result["dish_name"] for result in results] == ["김치찌개", "두부조림", "김치볶음밥", "제육볶음"]
+    assert results[0]["coverage"] == 1.0
+    # "김치"는 "신김치"에, "돼지고기"는 "돼지고기목살"에 일치하고, 소금은 기본 양념이라 빠진 재료가 아님
+    assert results[0]["matched"] == ["돼지고기", "김치", "두부"]
+    assert results[0]["missing"] == ["대파"]
+    # 둘 다 입력 재료 셋 중 하나만 쓰지만 두부조림은 대파 하나만 더 있으면 됨 ("송송 썬 파" → "대파")
+    assert results[1]["missing"] == ["대파"]
+    assert results[2]["missing"] == ["달걀", "밥"]
+
+
+def test_best_match_uses_aliases_and_min_coverage():
+    """
+    같은 재료의 다른 이름("계란" → "달걀")으로도 찾고, 일치율이 기준에 못 미치면 None
+    """
+    index = build_index()
+
+    match = index.best_match(["계란", "밥", "김치"])
+    assert match["dish_name"] == "김치볶음밥"
+    assert match["missing"] == []
+
+    # "파"는 한 글자라 "양파"에 앞뒤 일치하지 않고 "대파"로 통일됨
+    match = index.best_match("파, 두부")
+    assert match["dish_name"] == "두부조림"
+    assert match["matched"] == ["대파", "두부"]
+    assert index.best_match("연어, 아보카도, 두부") is None
+
+
+def test_re_adding_a_dish_replaces_its_ingredients():
+    """
+    같은 요리를 다시 추가하면 예전 재료는 색인에서 빠지고, remove한 요리는 검색되지 않음
+    """
+    index = build_index()
+    index.add("김치찌개", ["참치 통조림 1캔", "김치 300g"])
+
+    assert index.search("돼지고기", limit=None)[0]["dish_name"] == "제육볶음"
+    assert index.best_match("참치, 김치")["dish_name"] == "김치찌개"
+
+    index.remove("김치찌개")
+    assert len(index) == 3
+    assert all(result["dish_name"] != "김치찌개" for result in index.search("참치, 김치", limit=None))
@@ -0,0 +1,97 @@
+"""
+job_queue.py 테스트
+JobStore의 작업 합치기, 임대 만료 후 다른 작업자의 인수, 임대를 잃은 작업자의 기록 차단을 확인합니다.
+"""
+
+import time
+
+from job_queue import DONE, FAILED, QUEUED, RUNNING, JobStore
+
+
+def test_submit_coalesces_same_dish(tmp_path):
+    """
+    같은 요리의 작업이 대기/실행 중이면 새 작업을 만들지 않고 같은 작업 ID를 돌려줌
+    """
+    store = JobStore(tmp_path / "jobs.db")
+    job_id = store.submit("김치찌개")
+
+    assert store.submit(" 김치찌개 ") == job_id
+    assert store.submit("된장찌개") != job_id
+    assert store.stats()["coalesced"] == 1
+    assert store.stats()[QUEUED] == 2
+
+
+def test_live_lease_is_not_taken(tmp_path):
+    """
+    임대가 살아 있는 작업은 다른 작업자가 가져가지 않고, 임대를 가진 작업자만 연장할 수 있음
+    """
+    store = JobStore(tmp_path / "jobs.db")
+    job_id = store.submit("김치찌개")
+
+    job = store.claim("worker-a", lease_seconds=60)
+    assert job["id"] == job_id
+    assert job["status"] == RUNNING
+    assert job["lease_owner"] == "worker-a"
+    assert store.claim("worker-b", lease_seconds=60) is None
+    assert store.renew(job_id, "worker-a", lease_seconds=60)
+    assert not store.renew(job_id, "worker-b", lease_seconds=60)
+
+
+def test_expired_lease_is_taken_over(tmp_path):
+    """
+    임대가 끝나면 다른 작업자가 작업을 가져가고, 임대를 잃은 작업자의 연장/기록/완료는 모두 거절됨
+    """
+    store = JobStore(tmp_path / "jobs.db")
+    job_id = store.submit("김치찌개")
+    store.claim("worker-a", lease_seconds=0.05)
+    time.sleep(0.1)
+
+    job = store.claim("worker-b", lease_seconds=60)
+    assert job["id"] == job_id
+    assert job["attempts"] == 2
+    assert job["lease_owner"] == "worker-b"
+
+    assert not store.renew(job_id, "worker-a")
+    assert not store.set_recipe(job_id, {"title": "늦은 결과"}, owner="worker-a")
+    assert not store.set_step(job_id, 1, "completed", "a.png", owner="worker-a")
+    assert not store.complete(job_id, owner="worker-a")
+    assert not store.fail(job_id, "늦은 실패", owner="worker-a")
+
+    assert store.set_recipe(job_id, {"title": "김치찌개"}, owner="worker-b")
+    assert store.set_step(job_id, 1, "completed", "b.png", owner="worker-b")
+    assert store.complete(job_id, owner="worker-b")
+
+    job = store.get(job_id)
+    assert job["status"] == DONE
+    assert job["recipe"] == {"title": "김치찌개"}
+    assert job["steps"] == {1: {"status": "completed", "path": "b.png"}}
+    assert job["lease_owner"] is None
+
+
+def test_expired_lease_stops_after_max_attempts(tmp_path):
+    """
+    작업자가 임대를 계속 놓치면 max_attempts번 시도한 뒤 더 가져가지 않고 failed로 처리
+    """
+    store = JobStore(tmp_path / "jobs.db", max_attempts=2)
+    job_id = store.submit("김치찌개")
+    for worker in ("worker-a", "worker-b"):
+        assert store.claim(worker, lease_seconds=0.05)["id"] == job_id
+        time.sleep(0.1)
+
+    assert store.claim("worker-c", lease_seconds=60) is None
+    assert store.get(job_id)["status"] == FAILED
+
+
+def test_fail_requeues_until_max_attempts(tmp_path):
+    """
+    실패한 작업은 최대 시도 횟수 전까지 다시 대기열로 돌아가고, retry=False면 바로 failed
+    """
+    store = JobStore(tmp_path / "jobs.db", max_attempts=3)
+    job_id = store.submit("김치찌개")
+    store.claim("worker-a")
+    assert store.fail(job_id, "일시적 오류", owner="worker-a")
+    assert store.get(job_id)["status"] == QUEUED
+
+    store.claim("worker-a")
+    assert store.fail(job_id, "제한 시간 초과", retry=False, owner="worker-a")
+    assert store.get(job_id)["status"] == FAILED
@@ -0,0 +1,101 @@
+"""
+json_stream.py 테스트
+JSON 텍스트가 문자열 안, 이스케이프 중간, 한글 \\u 이스케이프 중간, 배열 원소 사이 등 어디서 잘려 도착해도
+같은 이벤트와 최종 레시피를 만드는지 확인합니다.
+"""
+
+import json
+
+from json_stream import RecipeStreamParser
+
+RECIPE = {
+    "title": "엄마표 \"김치\"찌개",
+    "cooking_time": "30분",
+    "servings": 2,
+    "spicy": True,
+    "ingredients": ["신김치 (300g)", "돼지고기 앞다리살\t200g", "두부 ½모"],
+    "steps": ["1단계: 냄비에 김치를 볶아 주세요.\n불은 중불", "2단계: 물을 붓고 끓여 주세요. \\ 끝"],
+}
+
+EXPECTED_EVENTS = [
+    ("title", RECIPE["title"]),
+    ("cooking_time", "30분"),
+    ("servings", 2),
+    ("spicy", True),
+    ("ingredient", "신김치 (300g)"),
+    ("ingredient", "돼지고기 앞다리살\t200g"),
+    ("ingredient", "두부 ½모"),
+    ("step", RECIPE["steps"][0]),
+    ("step", RECIPE["steps"][1]),
+]
+
+
+def feed_chunks(chunks: list) -> tuple:
+    """
+    조각을 차례로 넣고 (전체 이벤트, 파서) 반환
+    """
+    parser = RecipeStreamParser()
+    events = []
+    for chunk in chunks:
+        events.extend(parser.feed(chunk))
+    return events, parser
+
+
+def test_every_two_way_split_gives_same_events():
+    """
+    한글 원문과 \\u 이스케이프 응답 모두, 어느 위치에서 두 조각으로 나눠도 같은 이벤트와 레시피
+    """
+    for ensure_ascii in (False, True):
+        text = "```json\n" + json.dumps(RECIPE, ensure_ascii=ensure_ascii, indent=2) + "\n```"
+        for cut in range(len(text) + 1):
+            events, parser = feed_chunks([text[:cut], text[cut:]])
+            assert events == EXPECTED_EVENTS, (ensure_ascii, cut)
+            assert parser.done
+            assert parser.result() == RECIPE
+
+
+def test_single_character_chunks():
+    """
+    한 글자씩 도착해도 (이스케이프 문자와 \\uXXXX의 각 글자가 따로 와도) 같은 결과
+    """
+    text = json.dumps(RECIPE)
+    assert "\\uae40" in text and '\\"' in text and "\\\\" in text
+
+    events, parser = feed_chunks(list(text))
+    assert events == EXPECTED_EVENTS
+    assert parser.result() == RECIPE
+
+
+def test_items_are_reported_as_soon_as_they_close():
+    """
+    배열 원소는 닫는 따옴표가 도착하는 즉시 이벤트가 되고, 배열은 ']'를 받아야 완성
+    """
+    parser = RecipeStreamParser()
+    assert parser.feed('{"title": "김치') == []
+    assert parser.feed('찌개", "ingredients": ["신김') == [("title", "김치찌개")]
+    assert parser.result() == {"title": "김치찌개", "ingredients": []}
+
+    assert parser.feed('치", ') == [("ingredient", "신김치")]
+    assert not parser.is_complete("ingredients")
+    assert parser.feed('"두부"') == [("ingredient", "두부")]
+    assert parser.feed("]") == []
+    assert parser.is_complete("ingredients")
+    assert not parser.done
+
+
+def test_truncated_stream_keeps_finished_fields():
+    """
+    응답이 중간에 끊기면 완성된 필드와 원소만 결과에 남고, 뒤에 붙은 텍스트는 무시
+    """
+    text = json.dumps(RECIPE, ensure_ascii=False)
+    cut = text.index("2단계")
+    events, parser = feed_chunks([text[:cut + 3]])
+
+    assert events == EXPECTED_EVENTS[:-1]
+    assert not parser.done
+    assert not parser.is_complete("steps")
+    assert parser.result() == {**RECIPE, "steps": RECIPE["steps"][:1]}
+
+    events, parser = feed_chunks([text, '\n{"title": "두 번째 객체"}'])
+    assert events == EXPECTED_EVENTS
+    assert parser.result() == RECIPE
@@ -0,0 +1,86 @@
+"""
+profiles.py 테스트
+profile_scope로 지정한 프로필이 블록 안, 중첩 블록, run_in_context로 넘긴 작업자 스레드, 에이전트 요청에
+어떻게 적용되는지 확인합니다.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from chef_brain import RecipeAgent
+from fake_backend import FakeGenaiClient
+from profiles import current_profile, get_profile, profile_scope
+from rate_limit import DEFAULT_LIMITS, CallLayer, ModelLimit
+from scheduler import FairScheduler
+from telemetry import Telemetry, run_in_context
+
+
+def test_scopes_nest_and_reset():
+    """
+    안쪽 블록이 바깥 프로필을 가리고, None은 바깥 프로필을 그대로 쓰며, 블록을 나가면 원래대로
+    """
+    assert current_profile() is None
+    with profile_scope("fast"):
+        assert current_profile()["name"] == "fast"
+        with profile_scope("quality") as inner:
+            assert current_profile() == inner == get_profile("quality")
+        with profile_scope(None) as unchanged:
+            assert unchanged["name"] == "fast"
+        assert current_profile()["name"] == "fast"
+    assert current_profile() is None
+
+    with pytest.raises(ValueError):
+        with profile_scope("turbo"):
+            pass
+    assert current_profile() is None
+
+
+def test_worker_threads_follow_scope_only_through_run_in_context():
+    """
+    run_in_context로 넘긴 작업은 제출한 쪽의 프로필을 따르고, 그냥 넘긴 작업은 기본값(None)
+    """
+    def profile_name():
+        profile = current_profile()
+        return None if profile is None else profile["name"]
+
+    with ThreadPoolExecutor(max_workers=2) as executor, profile_scope("fast"):
+        assert executor.submit(run_in_context(profile_name)).result() == "fast"
+        assert executor.submit(profile_name).result() is None
+
+
+def test_agent_resolves_models_per_request(tmp_path):
+    """
+    에이전트 기본 프로필은 profile 인자/profile_scope가 있는 요청에서만 바뀌고, 동시에 실행한 다른 요청에 새지 않음
+    """
+    client = FakeGenaiClient(latency=0, image_latency=0, jitter=0)
+    generate_content = client.models.generate_content
+    models = {}
+
+    def recording_generate_content(model, contents, config=None):
+        models[contents] = model
+        return generate_content(model=model, contents=contents, config=config)
+
+    client.models.generate_content = recording_generate_content
+    telemetry = Telemetry()
+    limits = {model: ModelLimit(requests_per_minute=60000, max_concurrency=8) for model in DEFAULT_LIMITS}
+    calls = CallLayer(limits=limits, max_retries=1, base_delay=0.001, max_delay=0.01, telemetry=telemetry,
+                      scheduler=FairScheduler(max_concurrency=8, telemetry=telemetry))
+    agent = RecipeAgent(client=client, call_layer=calls, image_dir=str(tmp_path / "images"), context_cache=False,
+                        profile="balanced")
+
+    assert agent.model_name == "gemini-2.5-flash"
+    with profile_scope("quality"):
+        assert agent.model_name == "gemini-2.5-pro"
+        assert agent.image_model_name == "imagen-4.0-ultra-generate-001"
+    assert agent.model_name == "gemini-2.5-flash"
+
+    def generate(dish_name, profile):
+        agent.generate_recipe(dish_name, use_cache=False, profile=profile)
+        return models[agent._build_recipe_prompt(dish_name)]
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        fast = executor.submit(generate, "김치찌개", "fast")
+        default = executor.submit(generate, "된장찌개", None)
+        assert fast.result() == "gemini-2.5-flash-lite"
+        assert default.result() == "gemini-2.5-flash"
@@ -0,0 +1,172 @@
+"""
+rate_limit.py 테스트
+AIMD 동시성 조정과 모델 자리(토큰 버킷 + 동시성)를 확인하고, 가짜 백엔드로 CallLayer의 조정 결과를 확인합니다.
+"""
+
+import asyncio
+
+import pytest
+from google.genai import errors
+
+from deadline import CANCELLED, TIMEOUT, Deadline, DeadlineExceeded, deadline_scope
+from fake_backend import FakeGenaiClient
+from rate_limit import (CALL_ABORTED, CALL_SUCCEEDED, CALL_THROTTLED, AdaptiveConcurrency, CallLayer, ModelGate,
+                        ModelLimit, TokenBucket)
+from scheduler import FairScheduler
+from telemetry import Telemetry
+
+MODEL = "gemini-2.5-flash"
+
+
+def run_once(concurrency: AdaptiveConcurrency, outcome: str):
+    """
+    자리 하나를 잡았다가 outcome으로 반납
+    """
+    assert concurrency.try_enter()
+    concurrency.exit(outcome)
+
+
+def test_additive_increase_up_to_max():
+    """
+    성공할 때마다 1/limit씩 늘어서 limit번 성공하면 약 1 증가하고, max_limit을 넘지 않음
+    """
+    concurrency = AdaptiveConcurrency(initial=4, max_limit=6)
+    for _ in range(5):
+        run_once(concurrency, CALL_SUCCEEDED)
+    assert int(concurrency.limit) == 5
+
+    for _ in range(100):
+        run_once(concurrency, CALL_SUCCEEDED)
+    assert concurrency.limit == 6
+    assert concurrency.in_flight == 0
+
+
+def test_multiplicative_decrease_once_per_cooldown():
+    """
+    할당량 초과면 절반으로 줄이고, decrease_cooldown 안에 연달아 온 초과는 한 번으로 봄 (min_limit 아래로는 줄지 않음)
+    """
+    concurrency = AdaptiveConcurrency(initial=8, max_limit=8, decrease_cooldown=60)
+    run_once(concurrency, CALL_THROTTLED)
+    run_once(concurrency, CALL_THROTTLED)
+    assert concurrency.limit == 4
+
+    concurrency = AdaptiveConcurrency(initial=2, max_limit=8, min_limit=1, decrease_cooldown=0)
+    for _ in range(5):
+        run_once(concurrency, CALL_THROTTLED)
+    assert concurrency.limit == 1
+
+
+def test_aborted_calls_leave_limit_unchanged():
+    """
+    마감/취소/그 밖의 실패는 동시성을 늘리지도 줄이지도 않음
+    """
+    concurrency = AdaptiveConcurrency(initial=4, max_limit=8)
+    for _ in range(10):
+        run_once(concurrency, CALL_ABORTED)
+    assert concurrency.limit == 4
+
+
+def test_limit_caps_in_flight():
+    """
+    진행 중인 요청이 limit만큼 차면 더 진입하지 않음
+    """
+    concurrency = AdaptiveConcurrency(initial=2, max_limit=8)
+    assert concurrency.try_enter()
+    assert concurrency.try_enter()
+    assert not concurrency.available()
+    assert not concurrency.try_enter()
+    assert not concurrency.enter(timeout=0.01)
+
+
+def test_gate_returns_slot_when_bucket_is_empty():
+    """
+    토큰이 없으면 동시성 자리를 잡은 채로 두지 않고, abandon은 토큰과 자리를 모두 돌려놓음
+    """
+    gate = ModelGate(TokenBucket(rate_per_second=1.0, capacity=1), AdaptiveConcurrency(initial=2, max_limit=2))
+    assert gate.try_enter()
+    assert not gate.try_enter()
+    assert gate.concurrency.in_flight == 1
+    assert gate.ready_in() > 0
+
+    gate.abandon()
+    assert gate.concurrency.in_flight == 0
+    assert gate.concurrency.limit == 2
+    assert gate.try_enter()
+
+
+def build_call_layer(client: FakeGenaiClient, max_retries: int = 4) -> CallLayer:
+    """
+    MODEL 하나만 제한하는 CallLayer (시작 동시성 4, 상한 8, 재시도 대기 최소)
+    """
+    telemetry = Telemetry()
+    return CallLayer(
+        limits={MODEL: ModelLimit(requests_per_minute=60000, max_concurrency=8, initial_concurrency=4)},
+        max_retries=max_retries,
+        base_delay=0.001,
+        max_delay=0.01,
+        telemetry=telemetry,
+        scheduler=FairScheduler(max_concurrency=8, telemetry=telemetry),
+    )
+
+
+def test_call_layer_increases_on_success():
+    """
+    가짜 백엔드 호출이 성공하면 모델 동시성이 늘어남
+    """
+    client = FakeGenaiClient(latency=0, jitter=0)
+    calls = build_call_layer(client)
+    for _ in range(5):
+        calls.call(MODEL, client.models.generate_content, model=MODEL, contents="요리명: 김치찌개")
+
+    stats = calls.stats()
+    assert stats["successes"] == 5
+    assert stats["models"][MODEL] == {"concurrency_limit": 5, "in_flight": 0}
+
+
+def test_call_layer_decreases_on_throttle():
+    """
+    가짜 백엔드가 429를 돌려주면 재시도 후 실패하고, 모델 동시성은 한 번만 절반으로 줄어듦
+    """
+    client = FakeGenaiClient(latency=0, jitter=0, throttle_rate=1.0)
+    calls = build_call_layer(client, max_retries=2)
+    with pytest.raises(errors.ClientError):
+        calls.call(MODEL, client.models.generate_content, model=MODEL, contents="요리명: 김치찌개")
+
+    stats = calls.stats()
+    assert stats["throttles"] == 3
+    assert stats["models"][MODEL] == {"concurrency_limit": 2, "in_flight": 0}
+
+
+def test_acall_separates_deadline_from_task_cancellation():
+    """
+    acall 도중 Deadline이 마감/취소되면 DeadlineExceeded, 호출한 작업 자체가 취소되면 CancelledError 그대로
+    (어느 쪽이든 모델 자리는 반납)
+    """
+    client = FakeGenaiClient(latency=1.0, jitter=0)
+    calls = build_call_layer(client)
+
+    async def call(deadline: Deadline):
+        with deadline_scope(deadline):
+            return await calls.acall(MODEL, client.aio.models.generate_content, model=MODEL, contents="요리명: 김치찌개")
+
+    async def main():
+        with pytest.raises(DeadlineExceeded) as timed_out:
+            await call(Deadline(0.05))
+        assert timed_out.value.reason == TIMEOUT
+
+        deadline = Deadline()
+        task = asyncio.create_task(call(deadline))
+        await asyncio.sleep(0.05)
+        deadline.cancel()
+        with pytest.raises(DeadlineExceeded) as cancelled:
+            await task
+        assert cancelled.value.reason == CANCELLED
+
+        task = asyncio.create_task(call(Deadline(10)))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert calls.stats()["models"][MODEL]["in_flight"] == 0
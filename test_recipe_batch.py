@@ -0,0 +1,65 @@
+"""
+RecipeAgent.generate_recipes 테스트
+묶음 응답이 요리 순서를 바꾸거나, 요리를 빠뜨리거나, 다른 요리명을 적어 보내도
+요청한 요리마다 맞는 레시피를 입력 순서로 돌려주는지 확인합니다.
+"""
+
+import json
+import typing
+
+from chef_brain import RecipeAgent
+from fake_backend import FakeGenaiClient
+from rate_limit import DEFAULT_LIMITS, CallLayer, ModelLimit
+from scheduler import FairScheduler
+from telemetry import Telemetry
+
+DISHES = ["김치찌개", "된장찌개", "제육볶음", "비빔밥"]
+
+
+def build_agent(tmp_path, client: FakeGenaiClient) -> RecipeAgent:
+    """
+    가짜 백엔드와 속도 제한/재시도 대기가 거의 없는 호출 계층을 쓰는 에이전트
+    """
+    telemetry = Telemetry()
+    limits = {model: ModelLimit(requests_per_minute=60000, max_concurrency=8) for model in DEFAULT_LIMITS}
+    calls = CallLayer(limits=limits, max_retries=1, base_delay=0.001, max_delay=0.01, telemetry=telemetry,
+                      scheduler=FairScheduler(max_concurrency=8, telemetry=telemetry))
+    return RecipeAgent(client=client, call_layer=calls, image_dir=str(tmp_path / "images"), context_cache=False)
+
+
+def test_batch_response_is_matched_by_dish_name(tmp_path):
+    """
+    순서가 바뀐 항목은 dish로 제자리를 찾고, 빠졌거나 요리명이 틀린 요리만 따로 다시 생성
+    """
+    client = FakeGenaiClient(latency=0, image_latency=0, jitter=0)
+    generate_content = client.models.generate_content
+    batch_requests = []
+
+    def shuffled_generate_content(model, contents, config=None):
+        response = generate_content(model=model, contents=contents, config=config)
+        if typing.get_origin(getattr(config, "response_schema", None)) is not list:
+            return response
+
+        batch_requests.append(config)
+        items = {item["dish"]: item for item in json.loads(response.text)}
+        # 순서를 바꾸고, 된장찌개에는 다른 요리명을 붙이고, 비빔밥은 빠뜨림
+        mislabeled = {**items["된장찌개"], "dish": "불고기"}
+        response.candidates[0].content.parts[0].text = json.dumps(
+            [items["제육볶음"], mislabeled, items["김치찌개"]], ensure_ascii=False)
+        return response
+
+    client.models.generate_content = shuffled_generate_content
+    agent = build_agent(tmp_path, client)
+    assert agent.recipe_batch_size() >= len(DISHES)
+
+    recipes = agent.generate_recipes(DISHES, max_workers=1)
+
+    assert [recipe["title"] for recipe in recipes] == [f"집에서 즐기는 {dish}" for dish in DISHES]
+    # 묶음 요청 하나 + 된장찌개/비빔밥 단일 요청 두 개
+    assert client.models.calls["generate_content"] == 3
+    assert len(batch_requests) == 1
+    assert batch_requests[0].system_instruction == agent.recipe_batch_instruction
+
+    metrics = agent.telemetry.metrics
+    assert metrics.total("recipe_batch_dishes_total", outcome="batched") == 2
+    assert metrics.total("recipe_batch_dishes_total", outcome="retried") == 2
@@ -0,0 +1,98 @@
+"""
+recipe_cache.py 테스트
+캐시 키가 요리명 정규화와 모델/프롬프트/설정을 반영하는지, TTL 만료와 LRU 제거, 적중/미스 통계를 확인합니다.
+"""
+
+import time
+import unicodedata
+
+from recipe_cache import RecipeCache
+
+CONFIG = {"temperature": 0.7, "response_mime_type": "application/json"}
+
+
+def make_key(dish_name: str, model_name: str = "gemini-2.5-flash", system_prompt: str = "레시피 프롬프트",
+             config: dict = CONFIG) -> str:
+    """
+    기본 모델/프롬프트/설정으로 만든 캐시 키
+    """
+    return RecipeCache.make_key(dish_name, model_name, system_prompt, config)
+
+
+def test_key_ignores_spacing_and_case_but_not_generation_settings():
+    """
+    요리명의 공백/대소문자/유니코드 조합 차이는 같은 키, 모델/프롬프트/설정이 다르면 다른 키
+    """
+    key = make_key("김치찌개")
+    # NFD로 분해된 한글도 NFC로 합쳐서 같은 키
+    assert make_key("  김치찌개 ") == make_key("김치찌개") == key
+    assert make_key("Kimchi   Jjigae") == make_key("kimchi jjigae")
+
+    assert make_key("된장찌개") != key
+    assert make_key("김치찌개", model_name="gemini-2.5-pro") != key
+    assert make_key("김치찌개", system_prompt="다른 프롬프트") != key
+    assert make_key("김치찌개", config={**CONFIG, "temperature": 0.2}) != key
+
+
+def test_hit_miss_stats(tmp_path):
+    """
+    조회 결과에 따라 적중/미스 횟수와 적중률이 기록되고 clear로 초기화
+    """
+    cache = RecipeCache(tmp_path / "recipes.db")
+    key = make_key("김치찌개")
+    recipe = {"title": "김치찌개", "steps": ["1단계: 끓여 주세요."]}
+
+    assert cache.get(key) is None
+    cache.set(key, "김치찌개", recipe)
+    assert cache.get(key) == recipe
+    assert cache.get(key) == recipe
+    assert cache.contains(key)
+
+    assert cache.stats() == {"hits": 2, "misses": 1, "hit_rate": 2 / 3, "entries": 1}
+    cache.clear()
+    assert cache.stats() == {"hits": 0, "misses": 0, "hit_rate": 0.0, "entries": 0}
+
+
+def test_expired_entry_is_a_miss(tmp_path, monkeypatch):
+    """
+    TTL이 지난 항목은 조회하면 미스로 처리하고 삭제
+    """
+    cache = RecipeCache(tmp_path / "recipes.db", ttl_seconds=60)
+    key = make_key("김치찌개")
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now)
+    cache.set(key, "김치찌개", {"title": "김치찌개"})
+
+    monkeypatch.setattr(time, "time", lambda: now + 59)
+    assert cache.contains(key)
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert not cache.contains(key)
+    assert cache.get(key) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path, monkeypatch):
+    """
+    최대 개수를 넘으면 가장 오래 사용되지 않은 항목부터 제거 (조회하면 최근 사용으로 갱신)
+    """
+    cache = RecipeCache(tmp_path / "recipes.db", max_entries=2)
+    clock = [time.time()]
+    monkeypatch.setattr(time, "time", lambda: clock[0])
+
+    def tick():
+        clock[0] += 1
+
+    keys = {dish: make_key(dish) for dish in ("김치찌개", "된장찌개", "비빔밥")}
+    cache.set(keys["김치찌개"], "김치찌개", {"title": "김치찌개"})
+    tick()
+    cache.set(keys["된장찌개"], "된장찌개", {"title": "된장찌개"})
+    tick()
+    # 김치찌개를 다시 사용해서 된장찌개가 가장 오래 사용되지 않은 항목이 됨
+    assert cache.get(keys["김치찌개"]) == {"title": "김치찌개"}
+    tick()
+    cache.set(keys["비빔밥"], "비빔밥", {"title": "비빔밥"})
+
+    assert cache.contains(keys["김치찌개"])
+    assert not cache.contains(keys["된장찌개"])
+    assert cache.contains(keys["비빔밥"])
+    assert cache.dish_names() == ["비빔밥", "김치찌개"]
@@ -0,0 +1,106 @@
+"""
+RecipeAgent._parse_recipe_response 테스트
+코드 펜스로 감싼 응답, 잘린 응답, 복구 요청까지 실패하는 응답을 어떻게 처리하는지 확인합니다.
+"""
+
+import json
+
+import pytest
+
+from chef_brain import RecipeAgent
+from fake_backend import FakeGenaiClient
+from rate_limit import DEFAULT_LIMITS, CallLayer, ModelLimit
+from scheduler import FairScheduler
+from telemetry import Telemetry
+
+RECIPE = {
+    "title": "집에서 즐기는 김치찌개",
+    "cooking_time": "30분",
+    "ingredients": ["신김치 (300g)", "돼지고기 (200g)", "두부 (1/2모)"],
+    "steps": ["1단계: 김치와 고기를 볶아 주세요.", "2단계: 물을 붓고 끓여 주세요.", "3단계: 두부를 넣어 주세요."],
+}
+TEXT = json.dumps(RECIPE, ensure_ascii=False, indent=2)
+
+
+def build_agent(tmp_path, client: FakeGenaiClient) -> RecipeAgent:
+    """
+    가짜 백엔드와 속도 제한/재시도 대기가 거의 없는 호출 계층을 쓰는 에이전트
+    """
+    telemetry = Telemetry()
+    limits = {model: ModelLimit(requests_per_minute=60000, max_concurrency=8) for model in DEFAULT_LIMITS}
+    calls = CallLayer(limits=limits, max_retries=1, base_delay=0.001, max_delay=0.01, telemetry=telemetry,
+                      scheduler=FairScheduler(max_concurrency=8, telemetry=telemetry))
+    return RecipeAgent(client=client, call_layer=calls, image_dir=str(tmp_path / "images"), context_cache=False)
+
+
+def broken_responses(client: FakeGenaiClient, text: str):
+    """
+    generate_content가 항상 text를 돌려주게 바꿈 (호출 횟수는 그대로 기록)
+    """
+    generate_content = client.models.generate_content
+
+    def fixed_text(model, contents, config=None):
+        response = generate_content(model=model, contents=contents, config=config)
+        response.candidates[0].content.parts[0].text = text
+        return response
+
+    client.models.generate_content = fixed_text
+
+
+def test_code_fenced_json_is_parsed_without_requests(tmp_path):
+    """
+    ```json 코드 펜스로 감싼 응답은 펜스를 벗기고 그대로 사용
+    """
+    client = FakeGenaiClient(latency=0, image_latency=0, jitter=0)
+    agent = build_agent(tmp_path, client)
+
+    assert agent._parse_recipe_response("김치찌개", f"```json\n{TEXT}\n```") == RECIPE
+    assert client.models.calls["generate_content"] == 0
+    assert agent.response_stats()["parsed"] == 1
+
+
+def test_truncated_after_last_field_is_repaired_locally(tmp_path):
+    """
+    모든 필드가 완성된 뒤 닫는 괄호만 잘렸으면 다시 요청하지 않고 복구
+    """
+    client = FakeGenaiClient(latency=0, image_latency=0, jitter=0)
+    agent = build_agent(tmp_path, client)
+
+    assert agent._parse_recipe_response("김치찌개", TEXT.rstrip("}\n ")) == RECIPE
+    assert client.models.calls["generate_content"] == 0
+    assert agent.response_stats()["repaired_locally"] == 1
+
+
+def test_truncated_steps_request_only_the_tail(tmp_path):
+    """
+    조리 단계 중간에서 잘리면 완성된 단계는 살리고 뒷부분만 다시 요청해서 이어 붙임
+    """
+    client = FakeGenaiClient(latency=0, image_latency=0, jitter=0)
+    agent = build_agent(tmp_path, client)
+    truncated = TEXT[:TEXT.index("2단계") + 5]
+
+    recipe = agent._parse_recipe_response("김치찌개", truncated)
+
+    assert recipe["title"] == RECIPE["title"]
+    assert recipe["ingredients"] == RECIPE["ingredients"]
+    assert recipe["steps"][0] == RECIPE["steps"][0]
+    assert len(recipe["steps"]) > 1
+    assert client.models.calls["generate_content"] == 1
+    assert agent.response_stats()["repaired_tail"] == 1
+
+
+def test_failed_tail_repair_falls_back_to_one_regeneration(tmp_path):
+    """
+    뒷부분 요청도 깨진 응답이면 전체를 한 번만 다시 생성하고, 그것도 깨지면 ValueError
+    """
+    client = FakeGenaiClient(latency=0, image_latency=0, jitter=0)
+    broken_responses(client, '{"title": "집에서')
+    agent = build_agent(tmp_path, client)
+    truncated = TEXT[:TEXT.index("2단계") + 5]
+
+    with pytest.raises(ValueError):
+        agent._parse_recipe_response("김치찌개", truncated)
+
+    # 뒷부분 요청 한 번 + 전체 재생성 한 번
+    assert client.models.calls["generate_content"] == 2
+    assert agent.response_stats() == {"parsed": 0, "repaired_locally": 0, "repaired_tail": 0, "regenerated": 1}
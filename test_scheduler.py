@@ -0,0 +1,140 @@
+"""
+scheduler.py 테스트
+FairScheduler가 세션 간에는 공정하게, 세션 안에서는 우선순위와 단계 번호 순으로 자리를 주는지 확인합니다.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from deadline import Deadline, DeadlineExceeded
+from scheduler import (PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, PRIORITY_LATER, FairScheduler, priority_scope,
+                       session_scope, step_scope)
+from telemetry import Telemetry, run_in_context
+
+
+def waiting(scheduler: FairScheduler) -> int:
+    """
+    대기 중인 호출 수
+    """
+    return sum(scheduler.stats()["queued"].values())
+
+
+def grant_order(scheduler: FairScheduler, calls: list) -> list:
+    """
+    자리 하나를 잡아 둔 상태에서 calls를 순서대로 줄 세운 뒤 자리를 풀고, 자리를 받은 순서를 반환
+
+    Args:
+        scheduler: max_concurrency=1인 스케줄러
+        calls: [(이름, 세션, 가중치, 우선순위, 단계 번호)]
+
+    Returns:
+        list: 자리를 받은 호출 이름 순서
+    """
+    order = []
+    blocker = scheduler.acquire()
+
+    def one_call(name):
+        ticket = scheduler.acquire()
+        order.append(name)
+        scheduler.release(ticket)
+
+    threads = []
+    for name, session, weight, priority, step in calls:
+        with session_scope(session, weight), priority_scope(priority), step_scope(step):
+            thread = threading.Thread(target=run_in_context(one_call), args=(name,))
+        thread.start()
+        threads.append(thread)
+        # 도착 순서를 고정하기 위해 줄에 설 때까지 기다림
+        until = time.monotonic() + 2
+        while waiting(scheduler) < len(threads):
+            assert time.monotonic() < until, "호출이 줄에 서지 않았습니다."
+            time.sleep(0.005)
+
+    scheduler.release(blocker)
+    for thread in threads:
+        thread.join(2)
+    return order
+
+
+def test_sessions_share_slots_fairly():
+    """
+    단계가 많은 세션이 먼저 줄을 서도 나중에 온 세션의 첫 호출이 그 뒤에 모두 밀리지 않음
+    """
+    scheduler = FairScheduler(max_concurrency=1, telemetry=Telemetry())
+    calls = [(f"big-{n}", "big", 1.0, PRIORITY_LATER, n) for n in range(1, 5)]
+    calls.append(("small-1", "small", 1.0, PRIORITY_LATER, 1))
+
+    assert grant_order(scheduler, calls) == ["big-1", "small-1", "big-2", "big-3", "big-4"]
+
+
+def test_priority_then_step_order_within_session():
+    """
+    같은 세션 안에서는 우선순위가 높은(값이 작은) 호출부터, 우선순위가 같으면 단계 번호 순
+    """
+    scheduler = FairScheduler(max_concurrency=1, telemetry=Telemetry())
+    calls = [
+        ("background", "cook", 1.0, PRIORITY_BACKGROUND, None),
+        ("step-4", "cook", 1.0, PRIORITY_LATER, 4),
+        ("step-3", "cook", 1.0, PRIORITY_LATER, 3),
+        ("recipe", "cook", 1.0, PRIORITY_INTERACTIVE, None),
+    ]
+
+    assert grant_order(scheduler, calls) == ["recipe", "step-3", "step-4", "background"]
+
+
+def test_weight_gives_more_turns():
+    """
+    가중치가 2인 세션은 가중치가 1인 세션보다 두 배 자주 차례가 옴
+    """
+    scheduler = FairScheduler(max_concurrency=1, telemetry=Telemetry())
+    calls = [("heavy", "heavy", 2.0, PRIORITY_LATER, None)] * 4 + [("light", "light", 1.0, PRIORITY_LATER, None)] * 4
+
+    order = grant_order(scheduler, calls)
+    assert order[:6].count("heavy") == 4
+    assert order[-1] == "light"
+
+
+def test_deadline_withdraws_waiting_call():
+    """
+    자리를 받기 전에 마감되면 DeadlineExceeded와 함께 줄에서 빠지고, 자리가 나면 다음 호출이 받음
+    """
+    scheduler = FairScheduler(max_concurrency=1, telemetry=Telemetry())
+    blocker = scheduler.acquire()
+
+    with pytest.raises(DeadlineExceeded):
+        scheduler.acquire(deadline=Deadline(0.05))
+    assert waiting(scheduler) == 0
+
+    cancelled = Deadline()
+    threading.Timer(0.05, cancelled.cancel).start()
+    with pytest.raises(DeadlineExceeded):
+        scheduler.acquire(deadline=cancelled)
+    assert waiting(scheduler) == 0
+
+    scheduler.release(blocker)
+    ticket = scheduler.acquire(deadline=Deadline(1))
+    assert scheduler.stats()["in_flight"] == 1
+    scheduler.release(ticket)
+
+
+def test_async_acquire_is_woken_by_release():
+    """
+    aacquire는 이벤트 루프를 막지 않고 기다리다가 다른 스레드의 release로 자리를 받음
+    """
+    scheduler = FairScheduler(max_concurrency=1, telemetry=Telemetry())
+    blocker = scheduler.acquire()
+
+    async def main():
+        waiter = asyncio.create_task(scheduler.aacquire())
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+        threading.Timer(0.05, scheduler.release, args=(blocker,)).start()
+        return await asyncio.wait_for(waiter, 2)
+
+    ticket = asyncio.run(main())
+    assert ticket["granted"]
+    scheduler.release(ticket)
+    assert scheduler.stats()["in_flight"] == 0
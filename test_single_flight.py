@@ -0,0 +1,175 @@
+"""
+single_flight.py 테스트
+같은 키의 호출을 합칠 때 leader/follower가 결과, 예외, 마감을 어떻게 나누는지 확인합니다.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from deadline import CANCELLED, Deadline, DeadlineExceeded, deadline_scope
+from single_flight import SingleFlight
+
+
+def wait_for_followers(flight: SingleFlight, kind: str, count: int, timeout: float = 2.0):
+    """
+    follower가 count개 붙을 때까지 대기
+    """
+    until = time.monotonic() + timeout
+    while flight.stats().get(kind, {}).get("followers", 0) < count:
+        assert time.monotonic() < until, "follower가 붙지 않았습니다."
+        time.sleep(0.005)
+
+
+def test_follower_shares_leader_result():
+    """
+    진행 중인 호출에 붙은 follower는 함수를 다시 실행하지 않고 같은 결과를 받음
+    """
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def leader_fn():
+        calls.append("leader")
+        started.set()
+        release.wait(2)
+        return {"title": "김치찌개"}
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(flight.do, "recipe", "김치찌개", leader_fn)
+        assert started.wait(2)
+        follower = executor.submit(flight.do, "recipe", "김치찌개", lambda: calls.append("follower"))
+        wait_for_followers(flight, "recipe", 1)
+        release.set()
+
+        assert leader.result(2) is follower.result(2)
+
+    assert calls == ["leader"]
+    assert flight.stats() == {"recipe": {"leaders": 1, "followers": 1}}
+
+
+def test_follower_receives_leader_error():
+    """
+    leader의 함수가 실패하면 follower도 같은 예외를 받고, 다음 호출은 새로 실행
+    """
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(2)
+        raise ValueError("레시피 생성 실패")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(flight.do, "recipe", "된장찌개", failing)
+        assert started.wait(2)
+        follower = executor.submit(flight.do, "recipe", "된장찌개", lambda: "실행되면 안 됨")
+        wait_for_followers(flight, "recipe", 1)
+        release.set()
+
+        with pytest.raises(ValueError):
+            leader.result(2)
+        with pytest.raises(ValueError):
+            follower.result(2)
+
+    assert flight.do("recipe", "된장찌개", lambda: "다시 생성") == "다시 생성"
+
+
+def test_follower_retries_after_leader_deadline():
+    """
+    leader가 자기 마감/취소로 끝나면 마감이 남은 follower는 DeadlineExceeded를 받지 않고 새 leader로 다시 실행
+    """
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def cancelled_leader():
+        started.set()
+        release.wait(2)
+        raise DeadlineExceeded(CANCELLED)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(flight.do, "image", "step_1", cancelled_leader)
+        assert started.wait(2)
+        follower = executor.submit(flight.do, "image", "step_1", lambda: "follower가 직접 생성")
+        wait_for_followers(flight, "image", 1)
+        release.set()
+
+        with pytest.raises(DeadlineExceeded):
+            leader.result(2)
+        assert follower.result(2) == "follower가 직접 생성"
+
+    assert flight.stats()["image"] == {"leaders": 2, "followers": 1}
+
+
+def test_follower_stops_at_own_deadline():
+    """
+    follower는 자기 Deadline까지만 기다리고, leader는 그와 상관없이 끝까지 실행
+    """
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(2)
+        return "완성"
+
+    def impatient():
+        with deadline_scope(Deadline(0.05)):
+            return flight.do("recipe", "비빔밥", lambda: "실행되면 안 됨")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(flight.do, "recipe", "비빔밥", slow)
+        assert started.wait(2)
+        follower = executor.submit(impatient)
+
+        with pytest.raises(DeadlineExceeded):
+            follower.result(2)
+        assert not leader.done()
+        release.set()
+        assert leader.result(2) == "완성"
+
+
+def test_async_follower_joins_thread_leader_and_retries_after_cancel():
+    """
+    ado는 스레드에서 진행 중인 do 호출에도 붙고, 비동기 leader가 취소되면 follower가 새 leader로 다시 실행
+    """
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def thread_leader():
+        release.wait(2)
+        return "thread"
+
+    async def async_fn(value, delay):
+        await asyncio.sleep(delay)
+        return value
+
+    async def main():
+        leader = asyncio.create_task(asyncio.to_thread(flight.do, "recipe", "kimchi", thread_leader))
+        while flight.stats().get("recipe", {}).get("leaders", 0) < 1:
+            await asyncio.sleep(0.005)
+        follower = asyncio.create_task(flight.ado("recipe", "kimchi", async_fn, "unused", 0))
+        await asyncio.sleep(0.05)
+        release.set()
+        assert await follower == "thread"
+        assert await leader == "thread"
+
+        cancelled = asyncio.create_task(flight.ado("image", "kimchi", async_fn, "cancelled", 1))
+        await asyncio.sleep(0.01)
+        retried = asyncio.create_task(flight.ado("image", "kimchi", async_fn, "retried", 0))
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        assert await retried == "retried"
+
+    asyncio.run(main())
+    assert flight.stats()["recipe"] == {"leaders": 1, "followers": 1}
+    assert flight.stats()["image"] == {"leaders": 2, "followers": 1}
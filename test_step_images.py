@@ -0,0 +1,89 @@
+"""
+RecipeAgent.generate_step_images 테스트
+가짜 백엔드로 단계 이미지를 동시에 생성했을 때 결과 순서, 콜백, 실패한 단계의 격리를 확인합니다.
+"""
+
+import time
+from pathlib import Path
+
+from chef_brain import RecipeAgent
+from fake_backend import FakeGenaiClient
+from rate_limit import DEFAULT_LIMITS, CallLayer, ModelLimit
+from scheduler import FairScheduler
+from telemetry import Telemetry
+
+# 조리 도구가 모두 달라서 단계마다 Imagen 프롬프트가 하나씩
+STEPS = [
+    "1단계: 도마 위에서 돼지고기를 먹기 좋게 썰어 주세요.",
+    "2단계: 달군 팬에 김치를 넣고 볶아 주세요.",
+    "3단계: 냄비에 물을 붓고 한소끔 끓여 주세요.",
+    "4단계: 그릇에 담아 내주세요.",
+]
+
+
+def build_agent(tmp_path, client: FakeGenaiClient) -> RecipeAgent:
+    """
+    가짜 백엔드와 속도 제한/재시도 대기가 거의 없는 호출 계층을 쓰는 에이전트
+    """
+    telemetry = Telemetry()
+    limits = {model: ModelLimit(requests_per_minute=60000, max_concurrency=8) for model in DEFAULT_LIMITS}
+    calls = CallLayer(limits=limits, max_retries=1, base_delay=0.001, max_delay=0.01, telemetry=telemetry,
+                      scheduler=FairScheduler(max_concurrency=8, telemetry=telemetry))
+    return RecipeAgent(client=client, call_layer=calls, image_dir=str(tmp_path / "images"), context_cache=False)
+
+
+def test_concurrent_steps_keep_order_and_isolate_failure(tmp_path):
+    """
+    동시 모드에서 늦게 끝난 단계도 제자리에 들어가고, 한 단계의 실패는 그 단계만 "error"로 남음
+    """
+    client = FakeGenaiClient(latency=0, image_latency=0, jitter=0)
+    generate_images = client.models.generate_images
+
+    def flaky_generate_images(model, prompt, config=None):
+        # 1단계(도마)는 가장 늦게 끝나고, 3단계(냄비)는 재시도할 수 없는 오류
+        if "cutting board" in prompt:
+            time.sleep(0.1)
+        if "cooking pot" in prompt:
+            raise ValueError("[test] broken prompt")
+        return generate_images(model=model, prompt=prompt, config=config)
+
+    client.models.generate_images = flaky_generate_images
+    agent = build_agent(tmp_path, client)
+
+    progress = []
+    finished = []
+    image_paths = agent.generate_step_images(
+        "김치찌개", {"steps": STEPS}, max_workers=4,
+        progress_callback=lambda i, total, status: progress.append((i, total, status)),
+        on_step=lambda i, status, image_path: finished.append((i, status, image_path)),
+    )
+
+    assert len(image_paths) == 4
+    assert image_paths[2] is None
+    for i in (0, 1, 3):
+        assert image_paths[i].endswith(f"_step_{i + 1}.png")
+        assert Path(image_paths[i]).exists()
+
+    # 끝난 순서대로 보고하므로 가장 늦은 1단계가 마지막
+    assert finished[-1] == (1, "completed", image_paths[0])
+    assert sorted(finished) == sorted([(1, "completed", image_paths[0]), (2, "completed", image_paths[1]),
+                                       (3, "error", None), (4, "completed", image_paths[3])])
+
+    assert [(i, status) for i, _, status in progress if status == "generating"] == [(i, "generating") for i in range(1, 5)]
+    assert sorted((i, status) for i, _, status in progress if status != "generating") == [
+        (1, "completed"), (2, "completed"), (3, "error"), (4, "completed")]
+    assert all(total == 4 for _, total, _ in progress)
+
+
+def test_steps_sharing_a_prompt_use_one_request(tmp_path):
+    """
+    같은 프롬프트를 쓰는 단계는 Imagen을 한 번만 호출하고 같은 이미지를 단계별 파일로 저장
+    """
+    client = FakeGenaiClient(latency=0, image_latency=0, jitter=0)
+    agent = build_agent(tmp_path, client)
+    steps = ["1단계: 냄비에 물을 끓여 주세요.", "2단계: 면을 넣고 삶아 주세요.", "3단계: 그릇에 담아 주세요."]
+
+    image_paths = agent.generate_step_images("라면", {"steps": steps}, max_workers=4)
+
+    assert client.models.calls["generate_images"] == 2
+    assert [path.rsplit("_", 1)[-1] for path in image_paths] == ["1.png", "2.png", "3.png"]
@@ -0,0 +1,105 @@
+"""
+storyboard.py 테스트
+가짜 백엔드가 그린 격자 이미지와 직접 만든 격자 이미지를 split_grid가 칸별로 나누는지 확인합니다.
+"""
+
+import io
+
+import numpy as np
+from google.genai import types
+from PIL import Image, ImageDraw
+
+from fake_backend import FakeGenaiClient
+from storyboard import build_storyboard_prompt, grid_shape, split_grid
+
+
+def to_png(image: Image.Image) -> bytes:
+    """
+    PIL 이미지를 PNG 데이터로 변환
+    """
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def panel_sizes(panels: list) -> list:
+    """
+    칸별 (너비, 높이)
+    """
+    return [Image.open(io.BytesIO(panel)).size for panel in panels]
+
+
+def draw_panel(draw: ImageDraw.ImageDraw, box: tuple, color: tuple):
+    """
+    칸 하나: 단색 배경 + 밝기가 다른 원
+    """
+    left, top, right, bottom = box
+    draw.rectangle(box, fill=color)
+    inset_x, inset_y = (right - left) / 4, (bottom - top) / 4
+    foreground = (20, 20, 20) if sum(color) > 384 else (235, 235, 235)
+    draw.ellipse((left + inset_x, top + inset_y, right - inset_x, bottom - inset_y), fill=foreground)
+
+
+def test_split_fake_backend_storyboard():
+    """
+    가짜 백엔드가 스토리보드 프롬프트로 그린 2×3 격자를 칸 6개로 나눔
+    """
+    rows, cols, aspect_ratio = grid_shape(6)
+    client = FakeGenaiClient(image_latency=0, jitter=0, image_size=300)
+    prompt = build_storyboard_prompt("김치찌개", [f"step {n}" for n in range(1, 7)], rows, cols)
+    response = client.models.generate_images(
+        model="imagen-4.0-generate-001",
+        prompt=prompt,
+        config=types.GenerateImagesConfig(number_of_images=1, aspect_ratio=aspect_ratio),
+    )
+
+    panels = split_grid(response.generated_images[0].image.image_bytes, rows, cols)
+    assert panels is not None
+    assert len(panels) == 6
+    for width, height in panel_sizes(panels):
+        assert abs(width - 400 / 3) <= 10
+        assert abs(height - 150) <= 10
+
+
+def test_split_seamless_grid():
+    """
+    여백 없이 맞닿은 칸도 밝기가 크게 바뀌는 경계로 나눔
+    """
+    image = Image.new("RGB", (300, 300))
+    draw = ImageDraw.Draw(image)
+    colors = [(200, 40, 40), (40, 160, 60), (50, 60, 200), (230, 200, 40)]
+    for n, color in enumerate(colors):
+        left, top = (n % 2) * 150, (n // 2) * 150
+        draw_panel(draw, (left, top, left + 149, top + 149), color)
+
+    panels = split_grid(to_png(image), 2, 2)
+    assert panels is not None
+    assert panel_sizes(panels) == [(150, 150)] * 4
+
+
+def test_blank_panel_is_rejected_unless_unused():
+    """
+    사용할 칸이 비어 있으면 None, 빈 칸이 사용하지 않는 마지막 칸이면 나머지만 돌려줌
+    """
+    image = Image.new("RGB", (308, 308), (255, 255, 255))
+    draw = ImageDraw.Draw(image)
+    colors = [(200, 40, 40), (40, 160, 60), (50, 60, 200)]
+    for n, color in enumerate(colors):
+        left, top = 4 + (n % 2) * 152, 4 + (n // 2) * 152
+        draw_panel(draw, (left, top, left + 147, top + 147), color)
+    draw.rectangle((156, 156, 303, 303), fill=(120, 120, 120))
+    image_data = to_png(image)
+
+    assert split_grid(image_data, 2, 2) is None
+    panels = split_grid(image_data, 2, 2, panels=3)
+    assert panels is not None
+    assert len(panels) == 3
+
+
+def test_image_without_grid_is_rejected():
+    """
+    경계를 찾을 수 없는 이미지(잡음)나 이미지가 아닌 데이터는 None
+    """
+    noise = np.random.default_rng(0).integers(0, 256, (300, 300, 3), dtype=np.uint8)
+    assert split_grid(to_png(Image.fromarray(noise)), 2, 2) is None
+    assert split_grid(b"not an image", 2, 2) is None